@@ -0,0 +1,168 @@
+"""
+Benchmark: alert rule evaluation throughput
+
+Evaluates a large rule set (per-host style rules: many thresholds over
+many metrics) against one sample, with BasicAlerting's compiled,
+metric-indexed rules and with the previous per-rule loop that re-read
+every rule dictionary and dispatched the operator through an if/elif
+chain. Also times the same sample as a typed Sample (read by schema
+slot), a sample that carries only a tenth of the rules' metrics, and an
+incremental reload after changing one rule.
+
+Then times one update of each windowed aggregate (src/alerting/windows.py)
+for windows of increasing length, against recomputing the aggregate over
+the samples in the window, and reports the memory each window holds.
+
+Usage:
+    python -m benchmarks.bench_alerting [--rules N] [--metrics M]
+"""
+
+import time
+import random
+import logging
+import argparse
+
+from collections import deque
+
+from src.alerting.basic_alerting import BasicAlerting
+from src.alerting.windows import create_window
+from src.sample import Schema
+
+CONDITIONS = ('>=', '<=', '>', '<', '==', '!=')
+
+
+def make_rules(count: int, metrics: int):
+    rng = random.Random(42)
+    return [{'name': f'rule-{i}', 'metric': f'metric_{i % metrics}',
+             'condition': rng.choice(CONDITIONS), 'threshold': rng.uniform(0, 100),
+             'duration': 60, 'severity': rng.choice(('warning', 'critical'))}
+            for i in range(count)]
+
+
+def evaluate(condition, value, threshold):
+    if condition == '>=':
+        return value >= threshold
+    elif condition == '<=':
+        return value <= threshold
+    elif condition == '>':
+        return value > threshold
+    elif condition == '<':
+        return value < threshold
+    elif condition == '==':
+        return value == threshold
+    elif condition == '!=':
+        return value != threshold
+    return False
+
+
+def legacy_check(rules, state, metrics, now):
+    """The per-cycle work of the loop compiled rules replace"""
+    for rule in rules:
+        metric_name = rule.get('metric')
+        threshold = rule.get('threshold')
+        condition = rule.get('condition', '>=')
+        duration = rule.get('duration', 0)
+        rule_name = rule.get('name', f"Alert on {metric_name}")
+        value = metrics.get(metric_name)
+        if value is None:
+            continue
+        if evaluate(condition, value, threshold):
+            if rule_name not in state:
+                state[rule_name] = now
+            if now - state[rule_name] >= duration:
+                pass
+        elif rule_name in state:
+            del state[rule_name]
+
+
+def recompute(aggregate, values):
+    if aggregate == 'avg':
+        return sum(values) / len(values)
+    if aggregate == 'min':
+        return min(values)
+    if aggregate == 'max':
+        return max(values)
+    if aggregate == 'rate':
+        return values[-1] - values[0]
+    ordered = sorted(values)
+    return ordered[int(0.95 * (len(ordered) - 1))]
+
+
+def bench_windows(lengths, updates: int) -> None:
+    rng = random.Random(3)
+    values = [rng.uniform(80, 95) for _ in range(updates)]
+    print("Window update cost (us/update), incremental vs recompute:")
+    for length in lengths:
+        cells = []
+        for aggregate in ('avg', 'min', 'max', 'rate', 'p95'):
+            window = create_window(aggregate, length, max_samples=length)
+            started = time.perf_counter()
+            for tick, value in enumerate(values):
+                window.push(float(tick), value)
+            incremental = (time.perf_counter() - started) / updates
+
+            kept = deque(maxlen=length)
+            started = time.perf_counter()
+            for value in values:
+                kept.append(value)
+                recompute(aggregate, list(kept))
+            naive = (time.perf_counter() - started) / updates
+            cells.append(f"{aggregate} {incremental * 1e6:4.1f}/{naive * 1e6:6.1f} "
+                         f"{window.memory_bytes() / 1024:5.0f}KiB")
+        print(f"  {length:5d} samples: " + "  ".join(cells))
+
+
+def rate(name: str, check, rules: int, repeat: int) -> None:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        check()
+    elapsed = (time.perf_counter() - started) / repeat
+    print(f"  {name:<28} {elapsed * 1000:7.2f} ms/cycle  {rules / elapsed / 1e6:6.2f} M rules/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Alert rule evaluation throughput")
+    parser.add_argument("--rules", type=int, default=10000)
+    parser.add_argument("--metrics", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--updates", type=int, default=20000)
+    args = parser.parse_args()
+
+    # Rules trigger but stay below their duration: no alert logging
+    logging.disable(logging.CRITICAL)
+    rng = random.Random(1)
+    rules = make_rules(args.rules, args.metrics)
+    sample = {f'metric_{i}': rng.uniform(0, 100) for i in range(args.metrics)}
+    partial = {f'metric_{i}': value for i, (_, value) in enumerate(sample.items())
+               if i % 10 == 0}
+    partial_rules = sum(1 for rule in rules if rule['metric'] in partial)
+
+    print(f"{args.rules} rules over {args.metrics} metrics:")
+    state = {}
+    rate('legacy loop', lambda: legacy_check(rules, state, sample, time.time()), args.rules, args.repeat)
+    rate('legacy loop, 10% of metrics',
+         lambda: legacy_check(rules, state, partial, time.time()), partial_rules, args.repeat)
+
+    alerting = BasicAlerting(rules)
+    rate('compiled', lambda: alerting.check_rules(sample), args.rules, args.repeat)
+    typed = Schema(list(sample)).new_sample(time.time(), 'h')
+    typed.update(sample)
+    rate('compiled, typed sample', lambda: alerting.check_rules(typed), args.rules, args.repeat)
+    rate('compiled, 10% of metrics', lambda: alerting.check_rules(partial), partial_rules, args.repeat)
+
+    changed = [dict(rule) for rule in rules]
+    changed[0]['threshold'] = -1.0
+    started = time.perf_counter()
+    BasicAlerting(changed)
+    full = time.perf_counter() - started
+    started = time.perf_counter()
+    alerting.reload(changed)
+    incremental = time.perf_counter() - started
+    print(f"Compile all rules: {full * 1000:.1f} ms; reload with one changed rule: "
+          f"{incremental * 1000:.1f} ms")
+
+    bench_windows((30, 360, 3600), args.updates)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Benchmark: memory-mapped column reads vs query_metrics over many days
+
+Writes several days of synthetic samples through FileStorage with
+column_files enabled, then averages one metric over the whole period two
+ways: through zero-copy read_columns() views, and through query_metrics(),
+which builds a Python dict per point. Reports time and peak Python heap
+(tracemalloc) for each.
+
+Usage:
+    python -m benchmarks.bench_column_read [--days N] [--interval S]
+"""
+
+import argparse
+import math
+import os
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.bench_segment_format import synthetic_samples
+from src.storage.file_storage import FileStorage
+
+METRIC = 'cpu_usage_percent'
+
+
+def write_days(output_dir: str, days: int, interval: float) -> float:
+    """Write days of samples, one day file each; returns the first timestamp"""
+    per_day = int(86400 / interval)
+    day_samples = synthetic_samples(per_day)
+    storage = FileStorage(output_dir=output_dir, buffer_size=1000, column_files=True)
+    first = time.time() - days * 86400
+
+    # FileStorage names files after the flush date, so lay files out by
+    # writing each day and renaming it to its own date
+    for day in range(days):
+        start = first + day * 86400
+        for i, sample in enumerate(day_samples):
+            sample['timestamp'] = start + i * interval
+            storage.write_metrics(sample)
+        storage._flush()
+        stamp = time.strftime('%Y-%m-%d', time.localtime(start + 43200))
+        for name in os.listdir(output_dir):
+            if name.startswith(f'metrics-{time.strftime("%Y-%m-%d")}'):
+                target = name.replace(time.strftime('%Y-%m-%d'), stamp, 1)
+                os.replace(os.path.join(output_dir, name), os.path.join(output_dir, target))
+    return first
+
+
+def mmap_average(storage: FileStorage, start: float, end: float) -> float:
+    total = 0.0
+    count = 0
+    for _, values in storage.read_columns(METRIC, start, end):
+        for value in values:
+            if not math.isnan(value):
+                total += value
+                count += 1
+    return total / count
+
+
+def query_average(storage: FileStorage, start: float, end: float) -> float:
+    points = storage.query_metrics(METRIC, start, end)
+    return sum(p['value'] for p in points) / len(points)
+
+
+def measure(name: str, func, *args) -> None:
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<14} {elapsed * 1000:9.1f} ms  peak heap {peak / 1024 ** 2:8.2f} MB  "
+          f"avg {result:.3f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="mmap column reads vs query_metrics")
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--interval", type=float, default=10.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        start = write_days(output_dir, args.days, args.interval)
+        end = time.time()
+        storage = FileStorage(output_dir=output_dir, column_files=True)
+        print(f"{args.days} days at {args.interval}s")
+        measure("read_columns", mmap_average, storage, start, end)
+        measure("query_metrics", query_average, storage, start, end)
+
+
+if __name__ == "__main__":
+    main()
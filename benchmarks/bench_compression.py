@@ -0,0 +1,77 @@
+"""
+Benchmark: block-compressed day files vs plain JSONL
+
+Writes a day of synthetic samples through FileStorage, compresses the file
+with compressed_file, and reports the compression ratio, the raw line
+throughput of streaming each file, and query_metrics latency on each.
+
+Usage:
+    python -m benchmarks.bench_compression [--hours H] [--block-size BYTES]
+"""
+
+import argparse
+import tempfile
+import time
+
+from benchmarks.bench_query import METRIC, timed
+from benchmarks.bench_segment_format import synthetic_samples
+from src.storage import compressed_file
+from src.storage.file_storage import FileStorage
+
+
+def throughput(name: str, read_lines, raw_bytes: int) -> None:
+    best = float('inf')
+    for _ in range(3):
+        started = time.perf_counter()
+        for _ in read_lines():
+            pass
+        best = min(best, time.perf_counter() - started)
+    print(f"  {name:<22} {raw_bytes / best / 1e6:8.1f} MB/s of JSONL")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compressed day file size and read speed")
+    parser.add_argument("--hours", type=int, default=24)
+    parser.add_argument("--block-size", type=int, default=256 * 1024)
+    args = parser.parse_args()
+
+    count = args.hours * 360
+    end = time.time()
+    start = end - count * 10
+    samples = synthetic_samples(count)
+    for i, sample in enumerate(samples):
+        sample['timestamp'] = start + i * 10
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        storage = FileStorage(output_dir=output_dir, buffer_size=100)
+        for sample in samples:
+            storage.write_metrics(sample)
+        storage._flush()
+        path = next(storage.output_dir.glob('metrics-*.jsonl'))
+        target = path.with_suffix(f'.{compressed_file.EXTENSION}')
+
+        started = time.perf_counter()
+        raw, compressed = compressed_file.compress_file(str(path), str(target), args.block_size)
+        elapsed = time.perf_counter() - started
+        print(f"{count} samples: {raw / 1e6:.1f} MB -> {compressed / 1e6:.2f} MB "
+              f"({raw / compressed:.1f}x) in {elapsed:.2f} s")
+
+        def read_plain():
+            with open(path, 'rb') as f:
+                yield from f
+
+        reader = compressed_file.BlockReader(str(target))
+        throughput("plain JSONL stream", read_plain, raw)
+        throughput("compressed stream", reader.iter_lines, raw)
+
+        print("jsonl:")
+        timed("24h query", lambda: storage.query_metrics(METRIC, start, end))
+        timed("last 1h query", lambda: storage.query_metrics(METRIC, end - 3600, end))
+        path.unlink()
+        print("compressed:")
+        timed("24h query", lambda: storage.query_metrics(METRIC, start, end))
+        timed("last 1h query", lambda: storage.query_metrics(METRIC, end - 3600, end))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark: per-cycle cost of the procfs engine vs the psutil path
+
+Runs one collection cycle's worth of reads (CPU times, memory, swap, load
+average, disk and network counters) repeatedly through each path and
+reports wall and CPU time per cycle, plus the implied agent CPU overhead at
+1s and 10s collection intervals.
+
+Usage:
+    python -m benchmarks.bench_procfs [--cycles N]
+"""
+
+import argparse
+import time
+
+import psutil
+
+from src.collectors.procfs import ProcfsReader
+
+
+def psutil_cycle() -> None:
+    """One cycle through psutil, as the collectors did before procfs"""
+    psutil.cpu_times(percpu=True)
+    psutil.virtual_memory()
+    psutil.swap_memory()
+    psutil.getloadavg()
+    psutil.disk_io_counters(perdisk=True)
+    psutil.net_io_counters(pernic=True)
+
+
+def make_procfs_cycle(reader: ProcfsReader):
+    """Build one cycle through a shared procfs snapshot"""
+    def cycle() -> None:
+        snap = reader.snapshot()
+        snap.cpu_times()
+        snap.meminfo()
+        snap.loadavg()
+        snap.diskstats()
+        snap.net_dev()
+    return cycle
+
+
+def measure(name: str, cycle, cycles: int) -> float:
+    """
+    Time a cycle function
+
+    Returns:
+        CPU seconds per cycle
+    """
+    for _ in range(min(cycles, 50)):
+        cycle()  # warm up
+
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    for _ in range(cycles):
+        cycle()
+    cpu = (time.process_time() - cpu_start) / cycles
+    wall = (time.perf_counter() - wall_start) / cycles
+
+    print(f"{name:<8} wall {wall * 1e6:9.1f} us/cycle   cpu {cpu * 1e6:9.1f} us/cycle   "
+          f"overhead @1s {cpu * 100:.4f}%   @10s {cpu * 10:.5f}%")
+    return cpu
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="procfs vs psutil collection cost")
+    parser.add_argument("--cycles", type=int, default=2000)
+    args = parser.parse_args()
+
+    # max_age=0 forces a fresh snapshot (and fresh reads) every cycle
+    reader = ProcfsReader(max_age=0)
+
+    psutil_cpu = measure("psutil", psutil_cycle, args.cycles)
+    procfs_cpu = measure("procfs", make_procfs_cycle(reader), args.cycles)
+    if procfs_cpu > 0:
+        print(f"speedup  {psutil_cpu / procfs_cpu:.1f}x CPU per cycle")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmark: Prometheus exporter render cost and scrape throughput
+
+Renders a synthetic sample into the exposition cache and then has several
+concurrent scrapers (keep-alive connections, as Prometheus uses) fetch
+/metrics for a few seconds, reporting the render time per cycle and the
+scrapes served per second, plain and gzipped.
+
+Usage:
+    python -m benchmarks.bench_prometheus [--scrapers N] [--seconds S]
+"""
+
+import argparse
+import http.client
+import threading
+import time
+
+from benchmarks.bench_segment_format import synthetic_samples
+from src.storage.prometheus_storage import PrometheusStorage
+
+
+def scraper(port: int, deadline: float, gzip_ok: bool, counts: list) -> None:
+    connection = http.client.HTTPConnection('127.0.0.1', port)
+    headers = {'Accept-Encoding': 'gzip'} if gzip_ok else {}
+    done = 0
+    while time.perf_counter() < deadline:
+        connection.request('GET', '/metrics', headers=headers)
+        connection.getresponse().read()
+        done += 1
+    connection.close()
+    counts.append(done)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Prometheus exporter throughput")
+    parser.add_argument("--scrapers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    args = parser.parse_args()
+
+    sample = synthetic_samples(1)[0]
+    exporter = PrometheusStorage(host='127.0.0.1', port=0)
+    try:
+        started = time.perf_counter()
+        rounds = 200
+        for _ in range(rounds):
+            exporter.write_metrics(sample)
+        render = (time.perf_counter() - started) / rounds
+        stats = exporter.stats()
+        print(f"render per cycle: {render * 1000:.3f} ms "
+              f"({stats['exposition_bytes']} bytes, {stats['exposition_gzip_bytes']} gzipped)")
+
+        for gzip_ok in (False, True):
+            counts: list = []
+            deadline = time.perf_counter() + args.seconds
+            threads = [threading.Thread(target=scraper, args=(exporter.port, deadline, gzip_ok, counts))
+                       for _ in range(args.scrapers)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            label = 'gzip' if gzip_ok else 'plain'
+            print(f"{args.scrapers} scrapers, {label}: {sum(counts) / args.seconds:8.0f} scrapes/s")
+    finally:
+        exporter.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark: FileStorage.query_metrics over a day of samples
+
+Writes a day of synthetic samples at a 10s interval through FileStorage
+(JSONL and segment formats) into a temporary directory, then times a 24h
+query and a 1h query of one metric against a naive scan that parses every
+line with json.loads.
+
+Usage:
+    python -m benchmarks.bench_query [--hours H] [--interval S]
+"""
+
+import argparse
+import json
+import tempfile
+import time
+
+from benchmarks.bench_segment_format import synthetic_samples
+from src.storage.file_storage import FileStorage
+
+METRIC = 'memory_usage_percent'
+
+
+def naive_query(path: str, start: float, end: float):
+    points = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            sample = json.loads(line)
+            if start <= sample['timestamp'] <= end and METRIC in sample:
+                points.append({'timestamp': sample['timestamp'], 'value': sample[METRIC]})
+    return points
+
+
+def timed(name: str, query, repeat: int = 3) -> None:
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        points = query()
+        best = min(best, time.perf_counter() - started)
+    print(f"  {name:<22} {best * 1000:8.1f} ms  ({len(points)} points)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="FileStorage query latency")
+    parser.add_argument("--hours", type=int, default=24)
+    parser.add_argument("--interval", type=float, default=10.0)
+    args = parser.parse_args()
+
+    count = int(args.hours * 3600 / args.interval)
+    end = time.time()
+    start = end - count * args.interval
+    samples = synthetic_samples(count)
+    for i, sample in enumerate(samples):
+        sample['timestamp'] = start + i * args.interval
+
+    for file_format in ('jsonl', 'segment'):
+        with tempfile.TemporaryDirectory() as output_dir:
+            storage = FileStorage(output_dir=output_dir, buffer_size=100, format=file_format)
+            for sample in samples:
+                storage.write_metrics(sample)
+            storage._flush()
+
+            print(f"{file_format}: {count} samples")
+            timed("24h query", lambda: storage.query_metrics(METRIC, start, end))
+            timed("last 1h query", lambda: storage.query_metrics(METRIC, end - 3600, end))
+            if file_format == 'jsonl':
+                path = next(storage.output_dir.glob('metrics-*.jsonl'))
+                timed("naive json.loads scan", lambda: naive_query(str(path), start, end))
+
+
+if __name__ == "__main__":
+    main()
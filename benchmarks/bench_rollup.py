@@ -0,0 +1,55 @@
+"""
+Benchmark: long-range queries from rollup tiers vs raw samples
+
+Writes several days of synthetic samples at a 10s interval through
+FileStorage with rollups enabled, then times a query over the whole range
+at raw resolution and with 1m and 1h steps, and reports the bytes each
+tier holds.
+
+Usage:
+    python -m benchmarks.bench_rollup [--days D] [--interval S]
+"""
+
+import argparse
+import tempfile
+import time
+
+from benchmarks.bench_query import METRIC, timed
+from benchmarks.bench_segment_format import synthetic_samples
+from src.storage.file_storage import FileStorage
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rollup tier query latency")
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--interval", type=float, default=10.0)
+    args = parser.parse_args()
+
+    count = int(args.days * 86400 / args.interval)
+    end = time.time()
+    start = end - count * args.interval
+    samples = synthetic_samples(count)
+    for i, sample in enumerate(samples):
+        sample['timestamp'] = start + i * args.interval
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        storage = FileStorage(output_dir=output_dir, buffer_size=100, rollups=True)
+        started = time.perf_counter()
+        for sample in samples:
+            storage.write_metrics(sample)
+        storage._flush()
+        print(f"{count} samples over {args.days} days, written in "
+              f"{time.perf_counter() - started:.1f} s")
+
+        for pattern in ('metrics-*.jsonl', 'rollup-1m-*.jsonl', 'rollup-1h-*.jsonl'):
+            size = sum(path.stat().st_size for path in storage.output_dir.glob(pattern))
+            print(f"  {pattern:<22} {size / 1e6:8.1f} MB")
+
+        timed("raw query", lambda: storage.query_metrics(METRIC, start, end), repeat=1)
+        timed("step=60 (1m tier)", lambda: storage.query_metrics(METRIC, start, end, step=60))
+        timed("step=3600 (1h tier)", lambda: storage.query_metrics(METRIC, start, end, step=3600))
+        storage.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Benchmark: typed samples vs flat dictionaries per collection cycle
+
+Replays the agent's per-cycle work for the CPU and memory collectors with
+fixed values, so only the sample representation differs:
+
+- dict: each collector returns a dictionary with its own timestamp and
+  hostname, and the agent copies every key into a third dictionary,
+  filtering those two keys out (the agent before typed samples)
+- sample: each collector fills a Sample of its schema, per-core usage as
+  core=N series, and the agent merges them without copying values
+  (src/sample.py)
+
+Reports time per cycle, the objects and memory held by a full writer
+queue of merged samples, the time to encode one merged sample for the
+Prometheus, InfluxDB and SQLite backends, and the per-core CPU percentage
+step on a many-core snapshot (per-field dictionaries vs the direct busy
+sum).
+
+Usage:
+    python -m benchmarks.bench_sample [--cycles N] [--queue N] [--cores N]
+"""
+
+import sys
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+from src.collectors.cpu_collector import CPUCollector
+from src.collectors.memory_collector import MemoryCollector
+from src.sample import Sample
+from src.storage.prometheus_storage import PrometheusStorage
+from src.storage.influxdb_storage import InfluxDBStorage
+from src.storage.sqlite_storage import SQLiteStorage
+
+HOSTNAME = 'web-01.example.com'
+AGENT_METRICS = {f'agent_collector_{name}_{stat}': 0
+                 for name in ('cpu', 'memory') for stat in ('duration_ms', 'timeouts', 'errors')}
+
+
+def cpu_values(cores: int):
+    return [12.5, 8.0, 3.5, 87.5, 1.0, [12.5] * cores, 0.52, 0.48, 0.40]
+
+
+def memory_values():
+    return [16 * 1024 ** 3, 6 * 1024 ** 3, 2 * 1024 ** 3, 9 * 1024 ** 3, 43.8, 3 * 1024 ** 3,
+            512 * 1024 ** 2, 2 * 1024 ** 3, 0, 2 * 1024 ** 3, 0.0]
+
+
+def dict_cycle(cores: int):
+    timestamp = time.time()
+    results = {}
+    for name, schema, values in (('cpu', CPUCollector.SCHEMA, cpu_values(cores)),
+                                 ('memory', MemoryCollector.SCHEMA, memory_values())):
+        collected = {'timestamp': timestamp, 'hostname': HOSTNAME}
+        collected.update(zip(schema.names, values))
+        results[name] = collected
+
+    metrics = {'timestamp': timestamp, 'hostname': HOSTNAME}
+    for collected in results.values():
+        for key, value in collected.items():
+            if key not in ['timestamp', 'hostname']:
+                metrics[key] = value
+    metrics.update(AGENT_METRICS)
+    return metrics
+
+
+def sample_cycle(cores: int):
+    timestamp = time.time()
+    samples = []
+    for schema, values in ((CPUCollector.SCHEMA, cpu_values(cores)),
+                           (MemoryCollector.SCHEMA, memory_values())):
+        sample = Sample(schema, timestamp, HOSTNAME)
+        sample.data[:] = values
+        for name in schema.labels:
+            sample.set_series(name, values[schema.index[name]])
+        samples.append(sample)
+    return Sample.merge(timestamp, HOSTNAME, samples, dict(AGENT_METRICS))
+
+
+def measure(name: str, cycle, cycles: int, queue: int, cores: int) -> None:
+    started = time.perf_counter()
+    for _ in range(cycles):
+        cycle(cores)
+    per_cycle = (time.perf_counter() - started) / cycles
+
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    blocks = sys.getallocatedblocks()
+    held = [cycle(cores) for _ in range(queue)]
+    blocks = (sys.getallocatedblocks() - blocks) / queue
+    queued = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    del held
+
+    print(f"  {name:<8} {per_cycle * 1e6:7.2f} us/cycle  {blocks:5.1f} objects/sample  "
+          f"{queued / 1024:8.1f} KiB for {queue} queued samples ({queued / queue:.0f} B each)")
+
+
+def measure_encoders(cores: int, repeat: int = 5000) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        prometheus = PrometheusStorage(host='127.0.0.1', port=0)
+        influx = InfluxDBStorage(url='http://127.0.0.1:9', spool_dir=f'{directory}/spool')
+        sqlite = SQLiteStorage(path=f'{directory}/metrics.db', batch_size=10 ** 9)
+        encoders = (('prometheus', prometheus.render), ('influxdb', influx.encode),
+                    ('sqlite', sqlite._add_rows))
+        for name, cycle in (('dict', dict_cycle), ('sample', sample_cycle)):
+            metrics = cycle(cores)
+            timings = []
+            for encoder, encode in encoders:
+                started = time.perf_counter()
+                for _ in range(repeat):
+                    encode(metrics)
+                timings.append(f"{encoder} {(time.perf_counter() - started) / repeat * 1e6:6.1f} us")
+                sqlite._rows.clear()
+            print(f"  {name:<8} " + "  ".join(timings))
+        prometheus.close()
+        influx.close()
+        sqlite.close()
+
+
+def measure_per_core(cores: int, repeat: int = 2000) -> None:
+    collector = CPUCollector(sampling='blocking', use_procfs=False)
+    collector._fields = ('user', 'nice', 'system', 'idle', 'iowait', 'irq', 'softirq',
+                         'steal', 'guest', 'guest_nice')
+    prev = [(100.0 + i, 1.0, 50.0, 800.0, 5.0, 0.0, 1.0, 0.0, 0.0, 0.0) for i in range(cores)]
+    cur = [(130.0 + i, 1.0, 60.0, 850.0, 6.0, 0.0, 2.0, 0.0, 0.0, 0.0) for i in range(cores)]
+
+    for name, step in (('dicts', lambda p, c: collector._percentages(p, c)['busy']),
+                       ('direct', collector._busy)):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            [step(p, c) for p, c in zip(prev, cur)]
+        elapsed = (time.perf_counter() - started) / repeat
+        print(f"  {name:<8} {elapsed * 1e6:7.1f} us per {cores}-core snapshot")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Typed samples vs flat dictionaries")
+    parser.add_argument("--cycles", type=int, default=100000)
+    parser.add_argument("--queue", type=int, default=1000)
+    parser.add_argument("--cores", type=int, default=8)
+    args = parser.parse_args()
+
+    print(f"Cycle of CPU ({args.cores} cores) and memory collectors plus agent metrics:")
+    measure('dict', dict_cycle, args.cycles, args.queue, args.cores)
+    measure('sample', sample_cycle, args.cycles, args.queue, args.cores)
+
+    print(f"Encoding one merged sample ({args.cores} cores):")
+    measure_encoders(args.cores)
+
+    print("Per-core CPU percentages:")
+    measure_per_core(64)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Benchmark: segment format vs JSONL size and throughput
+
+Encodes the same samples as JSONL (what FileStorage writes by default) and
+as columnar segments, and reports bytes per sample, the projected size of
+a month at a 10s interval, and encode/decode throughput. Samples are
+synthetic random walks shaped like the agent's output unless JSONL files
+from a real agent are given.
+
+Usage:
+    python -m benchmarks.bench_segment_format [--samples N] [--segment-rows N] [FILE.jsonl ...]
+"""
+
+import argparse
+import json
+import random
+import time
+
+from src.storage.segment_format import encode_segment, decode_segment
+
+SAMPLES_PER_MONTH = 30 * 24 * 3600 // 10
+
+
+def synthetic_samples(count: int):
+    """Samples resembling CPU, memory, disk and network collector output"""
+    rng = random.Random(42)
+    cpu = 20.0
+    used = 6 * 1024 ** 3
+    read_bytes = 0
+    samples = []
+    for i in range(count):
+        cpu = min(max(cpu + rng.uniform(-3, 3), 0.0), 100.0)
+        used += rng.randint(-1, 1) * 4096 * rng.randint(0, 64)
+        read_bytes = round(rng.expovariate(1 / 50000), 2)
+        samples.append({
+            'timestamp': 1700000000.0 + i * 10,
+            'hostname': 'web-01.example.com',
+            'cpu_usage_percent': round(cpu, 1),
+            'cpu_usage_per_core': [round(cpu + rng.uniform(-5, 5), 1) for _ in range(8)],
+            'cpu_load_avg_1min': round(cpu / 25, 2),
+            'cpu_load_avg_5min': round(cpu / 25, 2),
+            'cpu_load_avg_15min': round(cpu / 25, 2),
+            'memory_total': 16 * 1024 ** 3,
+            'memory_used': used,
+            'memory_available': 16 * 1024 ** 3 - used,
+            'memory_usage_percent': round(used / (16 * 1024 ** 3) * 100, 1),
+            'swap_total': 2 * 1024 ** 3,
+            'swap_used': 0,
+            'swap_usage_percent': 0.0,
+            'disk_read_bytes': read_bytes,
+            'disk_write_bytes': round(read_bytes * 1.7, 2),
+            'disk_io_util_percent': round(rng.uniform(0, 10), 1),
+            'network_bytes_sent': round(rng.expovariate(1 / 20000), 2),
+            'network_bytes_recv': round(rng.expovariate(1 / 80000), 2),
+            'network_connections': 120 + rng.randint(-5, 5),
+        })
+    return samples
+
+
+def load_jsonl(paths):
+    samples = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            samples.extend(json.loads(line) for line in f if line.strip())
+    return samples
+
+
+def batches(samples, size):
+    return [samples[i:i + size] for i in range(0, len(samples), size)]
+
+
+def measure(name: str, encode, decode, chunks, count: int) -> None:
+    """Report size and throughput for one format"""
+    started = time.perf_counter()
+    encoded = [encode(chunk) for chunk in chunks]
+    encode_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for data in encoded:
+        decode(data)
+    decode_time = time.perf_counter() - started
+
+    size = sum(len(data) for data in encoded)
+    per_sample = size / count
+    print(f"{name:<8} {per_sample:9.1f} B/sample  "
+          f"{per_sample * SAMPLES_PER_MONTH / 1024 ** 2:8.1f} MB/month  "
+          f"encode {count / encode_time:9.0f}/s  decode {count / decode_time:9.0f}/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Segment format vs JSONL")
+    parser.add_argument("files", nargs="*", help="JSONL metrics files (default: synthetic)")
+    parser.add_argument("--samples", type=int, default=5000)
+    parser.add_argument("--segment-rows", type=int, default=100,
+                        help="samples per segment, i.e. FileStorage buffer_size")
+    args = parser.parse_args()
+
+    samples = load_jsonl(args.files) if args.files else synthetic_samples(args.samples)
+    count = len(samples)
+    chunks = batches(samples, args.segment_rows)
+    print(f"samples: {count}, {len(chunks)} segments of up to {args.segment_rows}")
+
+    def encode_jsonl(chunk):
+        return ''.join(json.dumps(s, default=str) + '\n' for s in chunk).encode('utf-8')
+
+    def decode_jsonl(data):
+        return [json.loads(line) for line in data.decode('utf-8').splitlines()]
+
+    measure("jsonl", encode_jsonl, decode_jsonl, chunks, count)
+    measure("segment", encode_segment, decode_segment, chunks, count)
+
+
+if __name__ == "__main__":
+    main()
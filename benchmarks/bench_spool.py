@@ -0,0 +1,54 @@
+"""
+Benchmark: throughput cost of each spool durability level
+
+Writes the same synthetic samples through FileStorage with the spool off
+and at each durability level ('os', 'group', 'sync'), and reports samples
+per second, the per-sample cost on the collection thread and the number of
+spool fsyncs. Run it on the disk the agent writes to: fsync cost depends
+entirely on the device.
+
+Usage:
+    python -m benchmarks.bench_spool [--samples N] [--group-size N] [--dir PATH]
+"""
+
+import argparse
+import tempfile
+import time
+
+from benchmarks.bench_segment_format import synthetic_samples
+from src.storage.file_storage import FileStorage
+
+
+def run(level: str, samples, group_size: int, parent: str) -> None:
+    with tempfile.TemporaryDirectory(dir=parent) as output_dir:
+        storage = FileStorage(output_dir=output_dir, buffer_size=100,
+                              spool_durability=level, spool_group_size=group_size,
+                              spool_group_interval_ms=60000)
+        started = time.perf_counter()
+        for sample in samples:
+            storage.write_metrics(sample)
+        storage.close()
+        elapsed = time.perf_counter() - started
+
+        stats = storage.stats()
+        print(f"{level:<6} {len(samples) / elapsed:10.0f} samples/s  "
+              f"{elapsed / len(samples) * 1e6:8.1f} us/sample  "
+              f"spool fsyncs {stats.get('spool_fsyncs', 0):6d}  "
+              f"storage fsyncs {stats['fsyncs']:4d}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Spool durability cost")
+    parser.add_argument("--samples", type=int, default=2000)
+    parser.add_argument("--group-size", type=int, default=16)
+    parser.add_argument("--dir", default=None, help="directory on the disk to test")
+    args = parser.parse_args()
+
+    samples = synthetic_samples(args.samples)
+    print(f"samples: {args.samples}, group size {args.group_size}")
+    for level in ('off', 'os', 'group', 'sync'):
+        run(level, samples, args.group_size, args.dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark: SQLite backend insert rate and range-query latency
+
+Simulates a fleet of hosts reporting a few metrics each, writes a week of
+samples through SQLiteStorage into a temporary database, and reports the
+sustained insert rate, database size, and the latency of 24h and 7d range
+queries of one metric for one host and for the whole fleet.
+
+Every series lives in its own run of B-tree pages, so a batch dirties one
+page per series it touches; batching several ticks per transaction
+(--batch-ticks) puts several rows on each of those page writes.
+
+Usage:
+    python -m benchmarks.bench_sqlite [--hosts N] [--days D] [--interval S]
+                                      [--metrics M] [--batch-ticks T]
+"""
+
+import os
+import time
+import random
+import argparse
+import tempfile
+
+from benchmarks.bench_query import timed
+from src.storage.sqlite_storage import SQLiteStorage
+
+METRIC = 'cpu_usage_percent'
+
+
+def fleet_tick(rng: random.Random, hosts, names, timestamp: float):
+    """One sample per host"""
+    for host in hosts:
+        sample = {'timestamp': timestamp, 'hostname': host}
+        for name in names:
+            sample[name] = round(rng.uniform(0, 100), 1)
+        yield sample
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="SQLite backend insert rate and query latency")
+    parser.add_argument("--hosts", type=int, default=1000)
+    parser.add_argument("--days", type=float, default=7)
+    parser.add_argument("--interval", type=float, default=300.0)
+    parser.add_argument("--metrics", type=int, default=4)
+    parser.add_argument("--batch-ticks", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    hosts = [f'host-{i:04d}' for i in range(args.hosts)]
+    names = [METRIC] + [f'metric_{i}' for i in range(1, args.metrics)]
+    ticks = int(args.days * 86400 / args.interval)
+    end = time.time()
+    start = end - ticks * args.interval
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'metrics.db')
+        storage = SQLiteStorage(path=path, batch_size=args.hosts * args.batch_ticks,
+                                flush_interval_s=3600)
+
+        print(f"Inserting {ticks} ticks x {args.hosts} hosts x {args.metrics} metrics "
+              f"({ticks * args.hosts * args.metrics:,} rows)")
+        started = time.perf_counter()
+        for tick in range(ticks):
+            for sample in fleet_tick(rng, hosts, names, start + tick * args.interval):
+                storage.write_metrics(sample)
+        storage.query_metrics(METRIC, 0, 0)  # Flush the last batch
+        elapsed = time.perf_counter() - started
+
+        stats = storage.stats()
+        rows = stats['rows_written']
+        print(f"  {rows / elapsed:,.0f} rows/s, {rows / args.metrics / elapsed:,.0f} samples/s "
+              f"({elapsed:.1f} s, last batch {stats['flush_latency_ms']} ms)")
+        print(f"  database {stats['db_bytes'] / 1024 ** 2:.1f} MiB, "
+              f"{stats['db_bytes'] / rows:.1f} bytes/row, {stats['series']} series")
+
+        print("Range queries:")
+        host = hosts[len(hosts) // 2]
+        timed('24h one host', lambda: storage.query_metrics(METRIC, end - 86400, end, host=host))
+        timed('7d one host', lambda: storage.query_metrics(METRIC, end - 7 * 86400, end, host=host))
+        timed('24h all hosts', lambda: storage.query_metrics(METRIC, end - 86400, end), repeat=1)
+        timed('7d all hosts', lambda: storage.query_metrics(METRIC, end - 7 * 86400, end), repeat=1)
+        storage.close()
+
+
+if __name__ == "__main__":
+    main()
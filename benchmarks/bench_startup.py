@@ -0,0 +1,78 @@
+"""
+Benchmark: agent cold start
+
+Starts a fresh interpreter per run that imports src.main and constructs
+MetricsAgent from a config file (collectors, storage and alerting set up,
+no collection), and reports the wall time distribution. With --imports,
+also prints the slowest modules from one run's -X importtime output.
+
+Runs happen in a temporary working directory, so file storage output does
+not land in the repository.
+
+Usage:
+    python -m benchmarks.bench_startup [--config PATH] [--runs N] [--imports]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STARTUP = "from src.main import MetricsAgent; MetricsAgent({config!r}).executor.shutdown()"
+
+
+def start_once(config: str, cwd: str, extra_args=()) -> subprocess.CompletedProcess:
+    """Run one cold start in a new interpreter"""
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT)
+    return subprocess.run([sys.executable, *extra_args, "-c", STARTUP.format(config=config)],
+                          cwd=cwd, env=env, capture_output=True, text=True, check=True)
+
+
+def slowest_imports(stderr: str, count: int) -> None:
+    """Print the modules with the largest cumulative import time"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append((int(cumulative_us), name.rstrip()))
+    for cumulative_us, name in sorted(rows, reverse=True)[:count]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Agent cold start time")
+    parser.add_argument("--config", default=os.path.join(REPO_ROOT, "config", "config.yaml"))
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--imports", action="store_true",
+                        help="show the slowest imports of one run")
+    args = parser.parse_args()
+    config = os.path.abspath(args.config)
+
+    with tempfile.TemporaryDirectory() as cwd:
+        start_once(config, cwd)  # warm the OS page cache and bytecode
+        times = []
+        for _ in range(args.runs):
+            started = time.perf_counter()
+            start_once(config, cwd)
+            times.append(time.perf_counter() - started)
+
+        times.sort()
+        print(f"runs:   {args.runs}")
+        print(f"median  {statistics.median(times) * 1000:8.1f} ms")
+        print(f"min     {times[0] * 1000:8.1f} ms")
+        print(f"max     {times[-1] * 1000:8.1f} ms")
+
+        if args.imports:
+            result = start_once(config, cwd, ("-X", "importtime"))
+            print("slowest imports (cumulative):")
+            slowest_imports(result.stderr, 15)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,86 @@
 """
 Basic alerting system for threshold-based alerts
+
+Rules are compiled once into CompiledRule objects with the comparison
+operator bound as a function, and indexed by metric name, so a cycle only
+looks at rules whose metric is in the sample and evaluating one is a
+function call and a state lookup. reload() recompiles only rules that were
+added or changed; unchanged rules keep their compiled form, alert state
+and window.
+
+Typed samples (src/sample.py) are read without name lookups: the rules'
+metrics are resolved to the sample schema's slots through their interned
+ids once per schema, and each cycle reads the slots directly.
+
+A rule with an 'aggregate' and a 'window' compares an aggregate of its
+metric over the last 'window' seconds (avg, min, max, rate, p95, ...)
+instead of the latest value; see src/alerting/windows.py.
 """
 
 import time
 import logging
-from typing import Dict, Any, List, Optional
+import operator
+from typing import Dict, Any, List, Optional, Callable, Tuple, Iterator
+
+from src.sample import Schema, Sample, metric_id
+from src.alerting.windows import Window, create_window, DEFAULT_MAX_SAMPLES
+
+# Per schema: (slot, metric name, rules) for indexed metrics in the schema,
+# and (metric name, rules) for those only found in a sample's extra values
+_Plan = Tuple[List[Tuple[int, str, List['CompiledRule']]], List[Tuple[str, List['CompiledRule']]]]
 
 logger = logging.getLogger(__name__)
 
+OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    '>=': operator.ge,
+    '<=': operator.le,
+    '>': operator.gt,
+    '<': operator.lt,
+    '==': operator.eq,
+    '!=': operator.ne,
+}
+
+
+class CompiledRule:
+    """An alert rule with its fields resolved and its operator bound"""
+
+    __slots__ = ('name', 'metric', 'condition', 'compare', 'threshold', 'duration',
+                 'severity', 'aggregate', 'window', 'position', 'source')
+
+    def __init__(self, rule: Dict[str, Any], position: int = 0):
+        """
+        Compile a rule
+
+        Args:
+            rule: Alert rule dictionary from config
+            position: Index of the rule in the configured list
+
+        Raises:
+            ValueError: If the rule has no metric, an unknown condition,
+                or an invalid aggregate or window
+        """
+        self.metric = rule.get('metric')
+        if not self.metric:
+            raise ValueError(f"Alert rule without a metric: {rule}")
+        self.condition = rule.get('condition', '>=')
+        self.compare = OPERATORS.get(self.condition)
+        if self.compare is None:
+            raise ValueError(f"Unknown condition operator: {self.condition}")
+        self.name = rule.get('name', f"Alert on {self.metric}")
+        self.threshold = rule.get('threshold')
+        self.duration = rule.get('duration', 0)
+        self.severity = rule.get('severity', 'warning')
+        self.aggregate = rule.get('aggregate')
+        self.window: Optional[Window] = None
+        if self.aggregate is not None:
+            window_s = rule.get('window')
+            if not window_s:
+                raise ValueError(f"Aggregate '{self.aggregate}' without a window")
+            self.window = create_window(self.aggregate, float(window_s),
+                                        int(rule.get('max_samples', DEFAULT_MAX_SAMPLES)))
+        self.position = position
+        self.source = dict(rule)
+
 
 class BasicAlerting:
     """Basic threshold-based alerting engine"""
@@ -19,122 +92,201 @@ class BasicAlerting:
         Args:
             alert_rules: List of alert rule dictionaries from config
         """
-        self.rules = alert_rules
+        self.rules: List[Dict[str, Any]] = []
+        self.compiled: List[CompiledRule] = []
         self.alert_state: Dict[str, float] = {}  # {rule_name: start_time}
-        logger.info(f"Initialized alerting with {len(self.rules)} rules")
+        self._index: Dict[str, List[CompiledRule]] = {}
+        self._by_id: Dict[int, List[CompiledRule]] = {}
+        self._plans: Dict[Schema, _Plan] = {}
+
+        # Statistics
+        self.evaluations = 0
+        self.rules_compiled = 0
+        self.rules_reused = 0
+
+        self.reload(alert_rules)
+        logger.info(f"Initialized alerting with {len(self.compiled)} rules")
+
+    def reload(self, alert_rules: List[Dict[str, Any]]) -> None:
+        """
+        Replace the rule set, recompiling only new or changed rules
+
+        Alert state is kept for unchanged rules and dropped for rules that
+        were removed or changed.
+
+        Args:
+            alert_rules: List of alert rule dictionaries from config
+        """
+        previous = {rule.name: rule for rule in self.compiled}
+        compiled: List[CompiledRule] = []
+        for position, rule in enumerate(alert_rules or []):
+            name = rule.get('name', f"Alert on {rule.get('metric')}")
+            existing = previous.get(name)
+            if existing is not None and existing.source == rule:
+                existing.position = position
+                compiled.append(existing)
+                self.rules_reused += 1
+                continue
+            try:
+                compiled.append(CompiledRule(rule, position))
+                self.rules_compiled += 1
+            except ValueError as e:
+                logger.warning(f"Skipping alert rule '{name}': {e}")
+
+        kept = {id(rule) for rule in compiled}
+        for name, rule in previous.items():
+            if id(rule) not in kept:
+                self.alert_state.pop(name, None)
+
+        index: Dict[str, List[CompiledRule]] = {}
+        for rule in compiled:
+            index.setdefault(rule.metric, []).append(rule)
+
+        self.rules = list(alert_rules or [])
+        self.compiled = compiled
+        self._index = index
+        self._by_id = {metric_id(metric): rules for metric, rules in index.items()}
+        self._plans = {}
 
     def check_rules(self, metrics: Dict[str, Any]) -> List[Dict[str, Any]]:
         """
-        Check all alert rules against current metrics
+        Check the alert rules of the metrics present in a sample
 
         Args:
             metrics: Current metrics dictionary
 
         Returns:
-            List of triggered alerts
+            List of triggered alerts, in rule order
         """
-        triggered_alerts = []
+        triggered: List[Tuple[int, Dict[str, Any]]] = []
         current_time = time.time()
 
-        for rule in self.rules:
-            alert = self._check_rule(rule, metrics, current_time)
-            if alert:
-                triggered_alerts.append(alert)
-                # Log the alert
-                self._log_alert(alert)
+        if isinstance(metrics, Sample):
+            values = self._sample_values(metrics)
+        else:
+            values = ((rules, metrics.get(metric)) for metric, rules in self._index.items())
+
+        for rules, metric_value in values:
+            # Skip if metric not available
+            if metric_value is None:
+                continue
+
+            self.evaluations += len(rules)
+            for rule in rules:
+                alert = self._check_rule(rule, metric_value, current_time)
+                if alert:
+                    triggered.append((rule.position, alert))
+
+        triggered.sort(key=lambda item: item[0])
+        triggered_alerts = [alert for _, alert in triggered]
+        for alert in triggered_alerts:
+            # Log the alert
+            self._log_alert(alert)
 
         return triggered_alerts
 
-    def _check_rule(self, rule: Dict[str, Any], metrics: Dict[str, Any], current_time: float) -> Optional[Dict[str, Any]]:
+    def _sample_values(self, sample: Sample) -> Iterator[Tuple[List[CompiledRule], Any]]:
         """
-        Check a single alert rule
+        Read the indexed metrics of a typed sample
 
         Args:
-            rule: Alert rule configuration
-            metrics: Current metrics
-            current_time: Current timestamp
+            sample: Typed sample
+
+        Yields:
+            (rules of a metric, its value or None)
+        """
+        plan = self._plans.get(sample.schema)
+        if plan is None:
+            plan = self._plans[sample.schema] = self._plan(sample.schema)
+        in_schema, in_extra = plan
+        extra = sample.extra
+        for slot, metric, rules in in_schema:
+            # Like Sample.get(): values in extra override schema slots
+            if extra and metric in extra:
+                yield rules, extra[metric]
+            else:
+                yield rules, sample.get_slot(slot)
+        if extra:
+            for metric, rules in in_extra:
+                yield rules, extra.get(metric)
+
+    def _plan(self, schema: Schema) -> _Plan:
+        """
+        Resolve the indexed metrics to a schema's slots
+
+        Args:
+            schema: Sample schema
 
         Returns:
-            Alert dictionary if triggered, None otherwise
+            Slots of the metrics in the schema, and the metrics outside it
         """
-        metric_name = rule.get('metric')
-        threshold = rule.get('threshold')
-        condition = rule.get('condition', '>=')
-        duration = rule.get('duration', 0)
-        rule_name = rule.get('name', f"Alert on {metric_name}")
+        in_schema = []
+        found = set()
+        # schema.index keeps the last slot of duplicated names, like Sample.get()
+        for metric, slot in schema.index.items():
+            rules = self._by_id.get(schema.ids[slot])
+            if rules is not None:
+                in_schema.append((slot, metric, rules))
+                found.add(metric)
+        in_extra = [(metric, rules) for metric, rules in self._index.items() if metric not in found]
+        return in_schema, in_extra
 
-        # Get metric value
-        metric_value = metrics.get(metric_name)
+    def _check_rule(self, rule: CompiledRule, metric_value: Any,
+                    current_time: float) -> Optional[Dict[str, Any]]:
+        """
+        Check a single alert rule
 
-        # Skip if metric not available
-        if metric_value is None:
-            return None
+        Args:
+            rule: Compiled alert rule
+            metric_value: Current value of the rule's metric (pushed into
+                the window of windowed rules)
+            current_time: Current timestamp
 
+        Returns:
+            Alert dictionary if triggered, None otherwise
+        """
         # Check if threshold is exceeded
-        exceeded = self._evaluate_condition(metric_value, condition, threshold)
+        try:
+            if rule.window is not None:
+                # None until the window has seen samples for its full length
+                metric_value = rule.window.push(current_time, metric_value)
+            exceeded = metric_value is not None and rule.compare(metric_value, rule.threshold)
+        except (TypeError, ValueError) as e:
+            logger.error(f"Error evaluating condition: {e}")
+            exceeded = False
 
         if exceeded:
             # Track when threshold was first exceeded
-            if rule_name not in self.alert_state:
-                self.alert_state[rule_name] = current_time
-                logger.debug(f"Alert '{rule_name}' threshold exceeded, tracking duration")
+            started = self.alert_state.get(rule.name)
+            if started is None:
+                started = self.alert_state[rule.name] = current_time
+                logger.debug(f"Alert '{rule.name}' threshold exceeded, tracking duration")
 
             # Check if duration requirement is met
-            time_exceeded = current_time - self.alert_state[rule_name]
+            time_exceeded = current_time - started
 
-            if time_exceeded >= duration:
+            if time_exceeded >= rule.duration:
                 # Alert should be triggered
                 return {
-                    'name': rule_name,
-                    'metric': metric_name,
+                    'name': rule.name,
+                    'metric': rule.metric,
                     'current_value': metric_value,
-                    'threshold': threshold,
-                    'condition': condition,
-                    'severity': rule.get('severity', 'warning'),
+                    'threshold': rule.threshold,
+                    'condition': rule.condition,
+                    'severity': rule.severity,
+                    'aggregate': rule.aggregate,
+                    'window': rule.window.window_s if rule.window is not None else None,
                     'duration': time_exceeded,
                     'timestamp': current_time
                 }
         else:
             # Threshold not exceeded - reset state if it was previously exceeded
-            if rule_name in self.alert_state:
-                time_exceeded = current_time - self.alert_state[rule_name]
-                logger.info(f"Alert '{rule_name}' resolved after {time_exceeded:.0f}s")
-                del self.alert_state[rule_name]
+            started = self.alert_state.pop(rule.name, None)
+            if started is not None:
+                logger.info(f"Alert '{rule.name}' resolved after {current_time - started:.0f}s")
 
         return None
 
-    def _evaluate_condition(self, value: float, condition: str, threshold: float) -> bool:
-        """
-        Evaluate a condition
-
-        Args:
-            value: Current metric value
-            condition: Condition operator (>=, <=, >, <, ==, !=)
-            threshold: Threshold value
-
-        Returns:
-            True if condition is met, False otherwise
-        """
-        try:
-            if condition == '>=':
-                return value >= threshold
-            elif condition == '<=':
-                return value <= threshold
-            elif condition == '>':
-                return value > threshold
-            elif condition == '<':
-                return value < threshold
-            elif condition == '==':
-                return value == threshold
-            elif condition == '!=':
-                return value != threshold
-            else:
-                logger.warning(f"Unknown condition operator: {condition}")
-                return False
-        except (TypeError, ValueError) as e:
-            logger.error(f"Error evaluating condition: {e}")
-            return False
-
     def _log_alert(self, alert: Dict[str, Any]) -> None:
         """
         Log an alert
@@ -149,6 +301,8 @@ class BasicAlerting:
         threshold = alert['threshold']
         condition = alert['condition']
         duration = alert['duration']
+        if alert.get('aggregate'):
+            metric = f"{alert['aggregate']}({metric}, {alert['window']:.0f}s)"
 
         # Choose log level based on severity
         if severity == 'CRITICAL':
@@ -172,3 +326,31 @@ class BasicAlerting:
             List of alert names that are currently in alert state
         """
         return list(self.alert_state.keys())
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get alerting statistics
+
+        Returns:
+            Dictionary with rule and indexed metric counts, active
+            alerts, rule evaluations, rules compiled or reused by reloads,
+            and the windowed rules with their samples, approximate memory
+            (total and largest per rule), samples dropped by their
+            max_samples cap and non-finite values skipped
+        """
+        windows = [rule.window for rule in self.compiled if rule.window is not None]
+        memory = [window.memory_bytes() for window in windows]
+        return {
+            'rules': len(self.compiled),
+            'metrics': len(self._index),
+            'active': len(self.alert_state),
+            'evaluations': self.evaluations,
+            'rules_compiled': self.rules_compiled,
+            'rules_reused': self.rules_reused,
+            'windowed_rules': len(windows),
+            'window_samples': sum(len(window.entries) for window in windows),
+            'window_bytes': sum(memory),
+            'window_bytes_max': max(memory, default=0),
+            'window_dropped': sum(window.dropped for window in windows),
+            'window_skipped': sum(window.skipped for window in windows),
+        }
@@ -0,0 +1,320 @@
+"""
+Sliding windows for aggregate alert conditions
+
+A windowed rule compares an aggregate of its metric over the last N
+seconds instead of the latest value, so a noisy metric that keeps dipping
+below its threshold can still fire on its average or percentile:
+
+    - name: "High CPU Usage"
+      metric: "cpu_usage_percent"
+      aggregate: "avg"    # avg, min, max, rate, p95 (any pNN)
+      window: 300         # seconds
+      condition: ">="
+      threshold: 80.0
+
+Each window keeps the samples it covers in a ring buffer of (timestamp,
+value) pairs, capped at max_samples, and maintains its aggregate
+incrementally as samples enter and leave, so an update costs O(1)
+amortized whatever the window length:
+
+- avg: running sum of the values in the window
+- min/max: monotonic deque of the samples that can still become the
+  extreme once older ones leave
+- rate: change per second between the oldest and newest sample
+- pNN: histogram of logarithmic buckets (relative error 1%) with its
+  occupied keys kept sorted as buckets appear and empty; the quantile
+  walks the occupied buckets, which are bounded by the value range, not
+  by the window length
+
+A window reports no value until it has seen samples for its full length,
+so a rule does not fire on the first few samples after start or reload.
+If samples arrive faster than max_samples per window, the oldest are
+dropped early and the window covers the last max_samples samples.
+"""
+
+import abc
+import sys
+import math
+from bisect import insort, bisect_left
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+# Approximate size of one (timestamp, value) pair: tuple and two floats
+_ENTRY_BYTES = sys.getsizeof((0.0, 0.0)) + 2 * sys.getsizeof(0.0)
+# Approximate size of one histogram bucket: dict slot, key, count and
+# the key's slot in the sorted key list
+_BUCKET_BYTES = 4 * 8 + sys.getsizeof((1, 0)) + 2 * sys.getsizeof(1)
+
+DEFAULT_MAX_SAMPLES = 1024
+
+
+class Window(abc.ABC):
+    """Ring buffer of the samples of the last window_s seconds"""
+
+    __slots__ = ('window_s', 'max_samples', 'entries', 'first_seen', 'pushed',
+                 'dropped', 'skipped', '_seq')
+
+    def __init__(self, window_s: float, max_samples: int = DEFAULT_MAX_SAMPLES):
+        """
+        Initialize window
+
+        Args:
+            window_s: Window length in seconds
+            max_samples: Most samples kept (oldest are dropped beyond it)
+        """
+        if window_s <= 0:
+            raise ValueError(f"Window must be positive: {window_s}")
+        if max_samples < 2:
+            raise ValueError(f"Window needs at least 2 samples: {max_samples}")
+        self.window_s = float(window_s)
+        self.max_samples = max_samples
+        self.entries: deque = deque()
+        self.first_seen: Optional[float] = None
+        self.pushed = 0
+        self.dropped = 0  # Samples evicted by max_samples before their time
+        self.skipped = 0  # NaN and infinite values
+        self._seq = 0  # Sequence number of entries[0]
+
+    def push(self, timestamp: float, value: float) -> Optional[float]:
+        """
+        Add a sample and evict those outside the window
+
+        Args:
+            timestamp: Sample timestamp
+            value: Metric value
+
+        Returns:
+            Aggregate over the window, or None until the window has seen
+            samples for its full length. NaN and infinite values are
+            skipped (they would never leave a running sum) and only
+            report the current aggregate
+        """
+        value = float(value)
+        if not math.isfinite(value):
+            self.skipped += 1
+            return self._current(timestamp)
+        if self.first_seen is None:
+            self.first_seen = timestamp
+        self.entries.append((timestamp, value))
+        self._add(self._seq + len(self.entries) - 1, value)
+        self.pushed += 1
+
+        entries = self.entries
+        cutoff = timestamp - self.window_s
+        while len(entries) > 1 and entries[0][0] <= cutoff:
+            self._evict()
+        while len(entries) > self.max_samples:
+            self._evict()
+            self.dropped += 1
+
+        return self._current(timestamp)
+
+    def _current(self, timestamp: float) -> Optional[float]:
+        """Aggregate, or None if the window is not full length at timestamp"""
+        if self.first_seen is None or timestamp - self.first_seen < self.window_s:
+            return None
+        return self.value()
+
+    def _evict(self) -> None:
+        _, value = self.entries.popleft()
+        self._seq += 1
+        self._remove(value)
+
+    def _add(self, seq: int, value: float) -> None:
+        """Account for a sample entering the window"""
+
+    def _remove(self, value: float) -> None:
+        """Account for the oldest sample leaving the window"""
+
+    @abc.abstractmethod
+    def value(self) -> Optional[float]:
+        """Aggregate over the samples in the window"""
+
+    def memory_bytes(self) -> int:
+        """Approximate memory held by the window's samples"""
+        return len(self.entries) * _ENTRY_BYTES
+
+
+class AvgWindow(Window):
+    """Average, from a running sum"""
+
+    __slots__ = ('total',)
+
+    def __init__(self, window_s: float, max_samples: int = DEFAULT_MAX_SAMPLES):
+        super().__init__(window_s, max_samples)
+        self.total = 0.0
+
+    def _add(self, seq: int, value: float) -> None:
+        self.total += value
+
+    def _remove(self, value: float) -> None:
+        self.total -= value
+        if not self.entries:
+            self.total = 0.0  # Drop accumulated rounding error
+
+    def value(self) -> Optional[float]:
+        return self.total / len(self.entries) if self.entries else None
+
+
+class MaxWindow(Window):
+    """Maximum, from a monotonic deque of (seq, value), decreasing values"""
+
+    __slots__ = ('candidates',)
+
+    def __init__(self, window_s: float, max_samples: int = DEFAULT_MAX_SAMPLES):
+        super().__init__(window_s, max_samples)
+        self.candidates: deque = deque()
+
+    def _dominates(self, new: float, old: float) -> bool:
+        return new >= old
+
+    def _add(self, seq: int, value: float) -> None:
+        candidates = self.candidates
+        while candidates and self._dominates(value, candidates[-1][1]):
+            candidates.pop()
+        candidates.append((seq, value))
+
+    def _remove(self, value: float) -> None:
+        # The evicted sample had sequence number self._seq - 1
+        if self.candidates and self.candidates[0][0] < self._seq:
+            self.candidates.popleft()
+
+    def value(self) -> Optional[float]:
+        return self.candidates[0][1] if self.candidates else None
+
+    def memory_bytes(self) -> int:
+        return (len(self.entries) + len(self.candidates)) * _ENTRY_BYTES
+
+
+class MinWindow(MaxWindow):
+    """Minimum, from a monotonic deque of (seq, value), increasing values"""
+
+    __slots__ = ()
+
+    def _dominates(self, new: float, old: float) -> bool:
+        return new <= old
+
+
+class RateWindow(Window):
+    """Change per second between the oldest and newest sample"""
+
+    __slots__ = ()
+
+    def value(self) -> Optional[float]:
+        if len(self.entries) < 2:
+            return None
+        (first_ts, first), (last_ts, last) = self.entries[0], self.entries[-1]
+        if last_ts <= first_ts:
+            return None
+        return (last - first) / (last_ts - first_ts)
+
+
+class QuantileWindow(Window):
+    """Quantile, from a histogram of logarithmic buckets"""
+
+    __slots__ = ('quantile', 'buckets', 'keys', '_log_gamma', '_gamma')
+
+    # Values closer to zero than this share the zero bucket
+    MIN_MAGNITUDE = 1e-9
+
+    def __init__(self, window_s: float, quantile: float,
+                 max_samples: int = DEFAULT_MAX_SAMPLES, relative_error: float = 0.01):
+        """
+        Initialize window
+
+        Args:
+            window_s: Window length in seconds
+            quantile: Quantile in (0, 1], e.g. 0.95
+            max_samples: Most samples kept (oldest are dropped beyond it)
+            relative_error: Relative accuracy of the reported quantile
+        """
+        if not 0 < quantile <= 1:
+            raise ValueError(f"Quantile must be in (0, 1]: {quantile}")
+        super().__init__(window_s, max_samples)
+        self.quantile = quantile
+        self.buckets: Dict[Tuple[int, int], int] = {}
+        self.keys: List[Tuple[int, int]] = []  # Occupied bucket keys, sorted
+        self._gamma = (1 + relative_error) / (1 - relative_error)
+        self._log_gamma = math.log(self._gamma)
+
+    def _key(self, value: float) -> Tuple[int, int]:
+        """Sortable bucket key: (sign, index), with negatives mirrored"""
+        magnitude = abs(value)
+        if magnitude < self.MIN_MAGNITUDE:
+            return (0, 0)
+        index = math.ceil(math.log(magnitude) / self._log_gamma)
+        return (1, index) if value > 0 else (-1, -index)
+
+    def _estimate(self, key: Tuple[int, int]) -> float:
+        sign, index = key
+        if sign == 0:
+            return 0.0
+        magnitude = 2 * self._gamma ** (index * sign) / (self._gamma + 1)
+        return magnitude * sign
+
+    def _add(self, seq: int, value: float) -> None:
+        key = self._key(value)
+        count = self.buckets.get(key, 0)
+        if not count:
+            insort(self.keys, key)
+        self.buckets[key] = count + 1
+
+    def _remove(self, value: float) -> None:
+        key = self._key(value)
+        count = self.buckets[key] - 1
+        if count:
+            self.buckets[key] = count
+        else:
+            del self.buckets[key]
+            del self.keys[bisect_left(self.keys, key)]
+
+    def value(self) -> Optional[float]:
+        if not self.entries:
+            return None
+        rank = max(1, math.ceil(self.quantile * len(self.entries)))
+        seen = 0
+        for key in self.keys:
+            seen += self.buckets[key]
+            if seen >= rank:
+                return self._estimate(key)
+        return None
+
+    def memory_bytes(self) -> int:
+        return len(self.entries) * _ENTRY_BYTES + len(self.buckets) * _BUCKET_BYTES
+
+
+AGGREGATES = {
+    'avg': AvgWindow,
+    'min': MinWindow,
+    'max': MaxWindow,
+    'rate': RateWindow,
+}
+
+
+def create_window(aggregate: str, window_s: float,
+                  max_samples: int = DEFAULT_MAX_SAMPLES) -> Window:
+    """
+    Create the window of an aggregate
+
+    Args:
+        aggregate: avg, min, max, rate, or pNN (p95, p99, p99.9, ...)
+        window_s: Window length in seconds
+        max_samples: Most samples kept
+
+    Returns:
+        Window instance
+
+    Raises:
+        ValueError: If the aggregate or window is invalid
+    """
+    window_class = AGGREGATES.get(aggregate)
+    if window_class is not None:
+        return window_class(window_s, max_samples)
+    if isinstance(aggregate, str) and aggregate.startswith('p'):
+        try:
+            quantile = float(aggregate[1:]) / 100
+        except ValueError:
+            quantile = None
+        if quantile is not None:
+            return QuantileWindow(window_s, quantile, max_samples)
+    raise ValueError(f"Unknown aggregate: {aggregate}")
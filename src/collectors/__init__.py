@@ -4,11 +4,48 @@ Metrics collectors module
 Collectors for CPU, Memory, Disk I/O, Network, and Disk Usage metrics.
 """
 
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+from src.sample import Schema, Sample
+
+_WRAP_32 = 1 << 32
+_WRAP_64 = 1 << 64
+
+
+def counter_delta(before: int, after: int) -> Optional[int]:
+    """
+    Difference between two readings of a monotonically increasing counter
+
+    Kernel counters are unsigned long and wrap at 2**32 on 32-bit kernels
+    (2**64 otherwise). A reading smaller than its predecessor is taken as a
+    wraparound only when the previous reading was close to the wrap
+    boundary, so the implied increment is under a quarter of the counter
+    range. Any other decrease is a reset: the interface, device or cgroup
+    was recreated under the same name, or its driver reloaded, and the
+    counter restarted from zero.
+
+    Args:
+        before: Previous reading
+        after: Current reading
+
+    Returns:
+        Non-negative increment between the readings, or None on a reset;
+        the caller should keep the current reading as its new baseline
+        and report no rate for this interval
+    """
+    if after >= before:
+        return after - before
+    wrap = _WRAP_32 if before < _WRAP_32 else _WRAP_64
+    delta = after + wrap - before
+    return delta if delta < wrap >> 2 else None
+
 
 class BaseCollector:
     """Base class for all metric collectors"""
 
+    # Collectors with a fixed set of metrics declare it and implement
+    # collect_sample(); the agent then takes samples instead of dicts
+    SCHEMA: Optional[Schema] = None
+
     def __init__(self, collection_interval: int = 10):
         """
         Initialize collector
@@ -18,6 +55,20 @@ class BaseCollector:
         """
         self.collection_interval = collection_interval
 
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], agent_config: Dict[str, Any]) -> 'BaseCollector':
+        """
+        Create a collector from its configuration section
+
+        Args:
+            config: The collector's section under 'collectors'
+            agent_config: The 'agent' section, for agent-wide defaults
+
+        Returns:
+            Configured collector
+        """
+        return cls(collection_interval=config.get('interval', agent_config['collection_interval']))
+
     def collect(self) -> Dict[str, Any]:
         """
         Collect metrics
@@ -26,3 +77,12 @@ class BaseCollector:
             Dictionary of metric name to value
         """
         raise NotImplementedError("Subclasses must implement collect()")
+
+    def collect_sample(self) -> Sample:
+        """
+        Collect metrics into a Sample of SCHEMA
+
+        Returns:
+            Sample with timestamp, hostname and the collected values
+        """
+        raise NotImplementedError("Collectors with a SCHEMA must implement collect_sample()")
@@ -0,0 +1,286 @@
+"""
+cgroup v2 container-level metrics collector
+"""
+
+import os
+import time
+import logging
+from typing import Dict, Any, Optional, List, Tuple
+
+from src.collectors import BaseCollector, counter_delta
+
+logger = logging.getLogger(__name__)
+
+# cpu.stat counters kept per cgroup (microseconds, except nr_* counts)
+_CPU_STAT_KEYS = (b'usage_usec', b'user_usec', b'system_usec',
+                  b'nr_periods', b'nr_throttled', b'throttled_usec')
+_USAGE, _USER, _SYSTEM, _PERIODS, _THROTTLED, _THROTTLED_USEC, _RBYTES, _WBYTES, _RIOS, _WIOS = range(10)
+
+# io.stat keys summed over devices
+_IO_STAT_KEYS = {b'rbytes': 0, b'wbytes': 1, b'rios': 2, b'wios': 3}
+
+
+class CgroupCollector(BaseCollector):
+    """Collector for per-cgroup CPU, memory and I/O usage (cgroup v2)"""
+
+    def __init__(self, collection_interval: int = 10, cgroup_root: str = '/sys/fs/cgroup',
+                 max_depth: int = 3, full_rescan_interval: int = 30):
+        """
+        Initialize cgroup collector
+
+        Args:
+            collection_interval: Collection interval in seconds
+            cgroup_root: Mount point of the cgroup v2 unified hierarchy
+            max_depth: Deepest level of the hierarchy to report
+            full_rescan_interval: Collections between unconditional
+                directory rescans, as a safety net for create+remove pairs
+                that leave the descendant count unchanged
+        """
+        super().__init__(collection_interval)
+        self.cgroup_root = cgroup_root
+        self.max_depth = max_depth
+        self.full_rescan_interval = full_rescan_interval
+        self.hostname = "localhost"  # Will be set by main agent
+
+        # Only the v2 unified hierarchy has cgroup.controllers at its root
+        self.available = os.path.exists(os.path.join(cgroup_root, 'cgroup.controllers'))
+        if not self.available:
+            logger.warning(f"No cgroup v2 hierarchy at {cgroup_root}, cgroup metrics disabled")
+
+        # Cached directory index: cgroup path relative to root
+        self._index: List[str] = []
+        self._descendants: Optional[int] = None
+        self._collections_since_scan = 0
+        self.rescans = 0
+
+        # Previous counters per cgroup, when they were read, and the inode
+        # of its cpu.stat (a new inode means the cgroup was recreated)
+        self._prev: Dict[str, Tuple[float, List[int], Optional[int]]] = {}
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], agent_config: Dict[str, Any]) -> 'CgroupCollector':
+        """Create a collector from its configuration section"""
+        return cls(
+            collection_interval=config.get('interval', agent_config['collection_interval']),
+            cgroup_root=config.get('cgroup_root', '/sys/fs/cgroup'),
+            max_depth=config.get('max_depth', 3),
+            full_rescan_interval=config.get('full_rescan_interval', 30)
+        )
+
+    def collect(self) -> Dict[str, Any]:
+        """
+        Collect cgroup metrics
+
+        Returns:
+            Dictionary containing:
+            - cgroup_count: Number of cgroups reported
+            - cgroup_scan_duration_ms: Wall time spent reading cgroups
+            - cgroup_per_path: Per-cgroup metrics keyed by path relative to the
+              root ('/' is the root cgroup):
+              cpu_usage_percent, cpu_user_percent, cpu_system_percent
+              (percent of one CPU), cpu_throttled_percent (share of
+              periods throttled), cpu_throttled_time (ms/s),
+              memory_current, memory_max (None = unlimited),
+              memory_usage_percent, io_read_bytes, io_write_bytes (bytes/s),
+              io_read_ops, io_write_ops (ops/s)
+        """
+        metrics: Dict[str, Any] = {
+            'timestamp': time.time(),
+            'hostname': self.hostname
+        }
+
+        if not self.available:
+            return metrics
+
+        try:
+            started = time.monotonic()
+            if self._index_stale():
+                self._rescan()
+
+            cgroups: Dict[str, Dict[str, Any]] = {}
+            vanished = False
+            for path in self._index:
+                stats = self._read_cgroup(path)
+                if stats is None:
+                    vanished = True
+                    continue
+                cgroups[path] = stats
+
+            if vanished:
+                # A cgroup was removed; rebuild the index on the next cycle
+                self._descendants = None
+
+            for path in [path for path in self._prev if path not in cgroups]:
+                del self._prev[path]
+
+            metrics['cgroup_count'] = len(cgroups)
+            metrics['cgroup_scan_duration_ms'] = round((time.monotonic() - started) * 1000, 2)
+            metrics['cgroup_per_path'] = cgroups
+
+        except Exception as e:
+            logger.error(f"Error collecting cgroup metrics: {e}", exc_info=True)
+
+        return metrics
+
+    def _index_stale(self) -> bool:
+        """
+        Check whether the cached directory index must be rebuilt
+
+        The root's cgroup.stat nr_descendants changes whenever a cgroup is
+        created or removed, so one small read replaces a directory walk.
+
+        Returns:
+            True if the hierarchy changed (or a periodic rescan is due)
+        """
+        self._collections_since_scan += 1
+        if self._collections_since_scan >= self.full_rescan_interval:
+            return True
+        descendants = self._read_descendants()
+        return descendants is None or descendants != self._descendants
+
+    def _read_descendants(self) -> Optional[int]:
+        """Read nr_descendants from the root cgroup.stat"""
+        try:
+            with open(os.path.join(self.cgroup_root, 'cgroup.stat'), 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+        for line in data.split(b'\n'):
+            # nr_dying_descendants churns on its own, so only this line counts
+            if line.startswith(b'nr_descendants '):
+                return int(line.split()[1])
+        return None
+
+    def _rescan(self) -> None:
+        """Walk the hierarchy up to max_depth and rebuild the index"""
+        self._descendants = self._read_descendants()
+
+        index = ['/']
+        level = ['']
+        for _ in range(self.max_depth):
+            next_level = []
+            for rel in level:
+                try:
+                    with os.scandir(self.cgroup_root + rel) as entries:
+                        for entry in entries:
+                            if entry.is_dir(follow_symlinks=False):
+                                next_level.append(f'{rel}/{entry.name}')
+                except OSError:
+                    continue  # Removed while walking
+            index.extend(next_level)
+            level = next_level
+
+        self._index = index
+        self._collections_since_scan = 0
+        self.rescans += 1
+        logger.debug(f"cgroup index rebuilt: {len(index)} cgroups")
+
+    def _read_cgroup(self, path: str) -> Optional[Dict[str, Any]]:
+        """
+        Read one cgroup's interface files and compute rates
+
+        Args:
+            path: cgroup path relative to the root
+
+        Returns:
+            Metric dictionary, or None if the cgroup no longer exists
+        """
+        base = self.cgroup_root + path.rstrip('/') if path != '/' else self.cgroup_root
+        counters = [0] * 10
+        identity = None
+
+        try:
+            with open(base + '/cpu.stat', 'rb') as f:
+                identity = os.fstat(f.fileno()).st_ino
+                for line in f.read().split(b'\n'):
+                    key, _, value = line.partition(b' ')
+                    if key in _CPU_STAT_KEYS:
+                        counters[_CPU_STAT_KEYS.index(key)] = int(value)
+        except FileNotFoundError:
+            if not os.path.isdir(base):
+                return None
+        except OSError:
+            pass
+
+        io = _read_io_stat(base + '/io.stat')
+        counters[_RBYTES:] = io
+
+        memory_current = _read_int(base + '/memory.current')
+        memory_max = _read_int(base + '/memory.max')
+
+        now = time.monotonic()
+        previous = self._prev.get(path)
+        self._prev[path] = (now, counters, identity)
+
+        stats: Dict[str, Any] = {
+            'memory_current': memory_current,
+            'memory_max': memory_max,
+            'memory_usage_percent': (round(memory_current / memory_max * 100, 1)
+                                     if memory_current is not None and memory_max else None),
+        }
+
+        delta = None
+        if previous is not None and now > previous[0] and previous[2] == identity:
+            delta = [counter_delta(a, b) for a, b in zip(previous[1], counters)]
+        if delta is None or None in delta:
+            # First sighting, or the cgroup was recreated at the same path
+            # (a service restart) and its counters restarted from zero:
+            # baseline only, rates start next cycle
+            stats.update(dict.fromkeys((
+                'cpu_usage_percent', 'cpu_user_percent', 'cpu_system_percent',
+                'cpu_throttled_percent', 'cpu_throttled_time', 'io_read_bytes',
+                'io_write_bytes', 'io_read_ops', 'io_write_ops'), None))
+            return stats
+
+        elapsed = now - previous[0]
+        elapsed_usec = elapsed * 1_000_000
+        periods = delta[_PERIODS]
+
+        stats.update({
+            'cpu_usage_percent': round(delta[_USAGE] / elapsed_usec * 100, 2),
+            'cpu_user_percent': round(delta[_USER] / elapsed_usec * 100, 2),
+            'cpu_system_percent': round(delta[_SYSTEM] / elapsed_usec * 100, 2),
+            'cpu_throttled_percent': round(delta[_THROTTLED] / periods * 100, 2) if periods else 0.0,
+            'cpu_throttled_time': round(delta[_THROTTLED_USEC] / 1000 / elapsed, 2),
+            'io_read_bytes': round(delta[_RBYTES] / elapsed, 2),
+            'io_write_bytes': round(delta[_WBYTES] / elapsed, 2),
+            'io_read_ops': round(delta[_RIOS] / elapsed, 2),
+            'io_write_ops': round(delta[_WIOS] / elapsed, 2),
+        })
+        return stats
+
+
+def _read_int(path: str) -> Optional[int]:
+    """Read a single-integer interface file; 'max' and missing files are None"""
+    try:
+        with open(path, 'rb') as f:
+            value = f.read().strip()
+    except OSError:
+        return None
+    return int(value) if value.isdigit() else None
+
+
+def _read_io_stat(path: str) -> List[int]:
+    """
+    Sum io.stat counters over devices
+
+    Args:
+        path: Path to io.stat
+
+    Returns:
+        [rbytes, wbytes, rios, wios]
+    """
+    totals = [0, 0, 0, 0]
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return totals
+
+    for line in data.split(b'\n'):
+        for field in line.split()[1:]:
+            key, _, value = field.partition(b'=')
+            slot = _IO_STAT_KEYS.get(key)
+            if slot is not None:
+                totals[slot] += int(value)
+    return totals
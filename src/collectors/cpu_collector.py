@@ -6,26 +6,76 @@ import psutil
 import time
 import platform
 import logging
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 from src.collectors import BaseCollector
+from src.collectors.procfs import get_shared_reader
+from src.sample import Schema, Sample
 
 logger = logging.getLogger(__name__)
 
+# Fields that are already accounted for in 'user'/'nice' on Linux and must not
+# be counted twice when computing the total elapsed CPU time
+_GUEST_FIELDS = ('guest', 'guest_nice')
+
+# Fields that count as "not busy" when computing usage percent
+_IDLE_FIELDS = ('idle', 'iowait')
+
 
 class CPUCollector(BaseCollector):
     """Collector for CPU metrics"""
 
-    def __init__(self, collection_interval: int = 10, per_core: bool = True):
+    SAMPLING_MODES = ('delta', 'blocking')
+
+    SCHEMA = Schema(('cpu_usage_percent', 'cpu_user_time', 'cpu_system_time', 'cpu_idle_time',
+                     'cpu_iowait_time', 'cpu_usage_per_core', 'load_average_1m',
+                     'load_average_5m', 'load_average_15m'),
+                    labels={'cpu_usage_per_core': 'core'})
+
+    def __init__(self, collection_interval: int = 10, per_core: bool = True,
+                 sampling: str = 'delta', use_procfs: bool = True):
         """
         Initialize CPU collector
 
         Args:
             collection_interval: Collection interval in seconds
             per_core: Whether to collect per-core CPU usage
+            sampling: 'delta' derives every percentage from two consecutive
+                cpu_times snapshots without blocking; 'blocking' keeps the
+                legacy behaviour of sleeping 1s inside cpu_percent()
+            use_procfs: Read /proc/stat and /proc/loadavg directly on Linux
+                instead of going through psutil
         """
         super().__init__(collection_interval)
+        if sampling not in self.SAMPLING_MODES:
+            raise ValueError(f"Unknown CPU sampling mode: {sampling}")
+
         self.per_core = per_core
+        self.sampling = sampling
         self.hostname = "localhost"  # Will be set by main agent
+        self.procfs = get_shared_reader() if use_procfs else None
+
+        # Previous raw snapshot: (source, aggregate, [per-cpu...]); values are
+        # clock ticks from procfs or seconds from psutil, never mixed
+        self._fields: Tuple[str, ...] = ()
+        self._prev_snapshot: Optional[Tuple[str, Tuple[float, ...], List[Tuple[float, ...]]]] = None
+        self._last_percentages: Optional[Dict[str, Any]] = None
+
+        if self.sampling == 'delta':
+            # Prime the first snapshot so the first collect() has a baseline
+            try:
+                self._prev_snapshot = self._take_snapshot()
+            except Exception as e:
+                logger.warning(f"Could not take initial CPU times snapshot: {e}")
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], agent_config: Dict[str, Any]) -> 'CPUCollector':
+        """Create a collector from its configuration section"""
+        return cls(
+            collection_interval=config.get('interval', agent_config['collection_interval']),
+            per_core=config.get('per_core', True),
+            sampling=config.get('sampling', 'delta'),
+            use_procfs=agent_config.get('use_procfs', True)
+        )
 
     def collect(self) -> Dict[str, Any]:
         """
@@ -43,50 +93,233 @@ class CPUCollector(BaseCollector):
             - load_average_5m: 5-minute load average (None on Windows)
             - load_average_15m: 15-minute load average (None on Windows)
         """
-        metrics: Dict[str, Any] = {
-            'timestamp': time.time(),
-            'hostname': self.hostname
-        }
+        return self.collect_sample().to_dict()
 
-        try:
-            # Overall CPU usage - use interval=1 for accurate reading
-            metrics['cpu_usage_percent'] = psutil.cpu_percent(interval=1)
-
-            # Per-core CPU usage (if enabled)
-            if self.per_core:
-                # Use interval=0 after the first call to avoid blocking
-                per_core_usage = psutil.cpu_percent(interval=0, percpu=True)
-                metrics['cpu_usage_per_core'] = per_core_usage
-            else:
-                metrics['cpu_usage_per_core'] = None
+    def collect_sample(self) -> Sample:
+        """
+        Collect CPU metrics into a Sample of SCHEMA
 
-            # CPU times as percentages
-            cpu_times = psutil.cpu_times_percent(interval=0)
-            metrics['cpu_user_time'] = cpu_times.user
-            metrics['cpu_system_time'] = cpu_times.system
-            metrics['cpu_idle_time'] = cpu_times.idle
+        Returns:
+            Sample with the metrics described in collect(); per-core usage
+            is labelled core=N
+        """
+        sample = Sample(self.SCHEMA, time.time(), self.hostname)
 
-            # I/O wait time (not available on Windows)
-            metrics['cpu_iowait_time'] = getattr(cpu_times, 'iowait', 0.0)
+        try:
+            if self.sampling == 'delta':
+                metrics = self._collect_delta()
+            else:
+                metrics = self._collect_blocking()
+            per_core = metrics.pop('cpu_usage_per_core', None)
+            sample.update(metrics)
+            # One series per core, labelled core=N
+            sample.set_series('cpu_usage_per_core', per_core)
 
             # Load average (not available on Windows)
+            load_avg = (None, None, None)
             if platform.system() != 'Windows':
                 try:
-                    load_avg = psutil.getloadavg()
-                    metrics['load_average_1m'] = load_avg[0]
-                    metrics['load_average_5m'] = load_avg[1]
-                    metrics['load_average_15m'] = load_avg[2]
+                    load_avg = self._load_average()
                 except (AttributeError, OSError) as e:
                     logger.debug(f"Load average not available: {e}")
-                    metrics['load_average_1m'] = None
-                    metrics['load_average_5m'] = None
-                    metrics['load_average_15m'] = None
-            else:
-                metrics['load_average_1m'] = None
-                metrics['load_average_5m'] = None
-                metrics['load_average_15m'] = None
+            sample.set('load_average_1m', load_avg[0])
+            sample.set('load_average_5m', load_avg[1])
+            sample.set('load_average_15m', load_avg[2])
 
         except Exception as e:
             logger.error(f"Error collecting CPU metrics: {e}", exc_info=True)
 
+        return sample
+
+    def _collect_blocking(self) -> Dict[str, Any]:
+        """
+        Collect CPU usage with psutil's blocking 1s sampling window
+
+        Returns:
+            Dictionary of CPU usage metrics
+        """
+        metrics: Dict[str, Any] = {}
+
+        # Overall CPU usage - use interval=1 for accurate reading
+        metrics['cpu_usage_percent'] = psutil.cpu_percent(interval=1)
+
+        # Per-core CPU usage (if enabled)
+        if self.per_core:
+            # Use interval=0 after the first call to avoid blocking
+            metrics['cpu_usage_per_core'] = psutil.cpu_percent(interval=0, percpu=True)
+        else:
+            metrics['cpu_usage_per_core'] = None
+
+        # CPU times as percentages
+        cpu_times = psutil.cpu_times_percent(interval=0)
+        metrics['cpu_user_time'] = cpu_times.user
+        metrics['cpu_system_time'] = cpu_times.system
+        metrics['cpu_idle_time'] = cpu_times.idle
+
+        # I/O wait time (not available on Windows)
+        metrics['cpu_iowait_time'] = getattr(cpu_times, 'iowait', 0.0)
+
         return metrics
+
+    def _collect_delta(self) -> Dict[str, Any]:
+        """
+        Collect CPU usage from the delta between two cpu_times snapshots
+
+        Every percentage is derived from the same pair of snapshots, so the
+        overall, per-core and per-state numbers describe the same window.
+        Nothing blocks: the window is the time since the previous collect().
+
+        Returns:
+            Dictionary of CPU usage metrics
+        """
+        current = self._take_snapshot()
+        previous = self._prev_snapshot
+        self._prev_snapshot = current
+
+        if previous is None or previous[0] != current[0]:
+            # No comparable baseline (initial snapshot failed or the source
+            # switched between procfs and psutil); report on next cycle
+            return self._empty_percentages()
+
+        _, prev_total, prev_cores = previous
+        _, cur_total, cur_cores = current
+
+        overall = self._percentages(prev_total, cur_total)
+        if overall is None:
+            # No CPU time elapsed since the previous snapshot
+            if self._last_percentages is not None:
+                return dict(self._last_percentages)
+            return self._empty_percentages()
+
+        metrics: Dict[str, Any] = {
+            'cpu_usage_percent': overall['busy'],
+            'cpu_user_time': overall.get('user', 0.0),
+            'cpu_system_time': overall.get('system', 0.0),
+            'cpu_idle_time': overall.get('idle', 0.0),
+            'cpu_iowait_time': overall.get('iowait', 0.0),
+        }
+
+        if self.per_core:
+            if len(prev_cores) == len(cur_cores):
+                metrics['cpu_usage_per_core'] = [self._busy(prev_core, cur_core)
+                                                 for prev_core, cur_core in zip(prev_cores, cur_cores)]
+            else:
+                # CPU hotplug changed the core count; skip one cycle
+                logger.debug("CPU count changed between snapshots, skipping per-core usage")
+                metrics['cpu_usage_per_core'] = [0.0] * len(cur_cores)
+        else:
+            metrics['cpu_usage_per_core'] = None
+
+        self._last_percentages = metrics
+        return dict(metrics)
+
+    def _take_snapshot(self) -> Tuple[str, Tuple[float, ...], List[Tuple[float, ...]]]:
+        """
+        Take a raw CPU times snapshot
+
+        Aggregate and per-CPU times always come from a single read of the
+        kernel counters: one /proc/stat read, or one psutil call whose
+        per-CPU times are summed.
+
+        Returns:
+            Tuple of (source, aggregate times, list of per-CPU times)
+        """
+        if self.procfs is not None:
+            try:
+                fields, total, cores = self.procfs.snapshot().cpu_times()
+                self._fields = fields
+                return 'procfs', total, cores
+            except (OSError, ValueError, IndexError) as e:
+                logger.debug(f"procfs CPU read failed, using psutil: {e}")
+
+        per_cpu = psutil.cpu_times(percpu=True)
+        self._fields = per_cpu[0]._fields
+
+        cores = [tuple(cpu) for cpu in per_cpu]
+        total = tuple(sum(values) for values in zip(*cores))
+        return 'psutil', total, cores
+
+    def _load_average(self) -> Tuple[float, float, float]:
+        """
+        Read load averages from procfs when available
+
+        Returns:
+            Tuple of 1, 5 and 15 minute load averages
+        """
+        if self.procfs is not None:
+            try:
+                return self.procfs.snapshot().loadavg()
+            except (OSError, ValueError, IndexError) as e:
+                logger.debug(f"procfs loadavg read failed, using psutil: {e}")
+        return psutil.getloadavg()
+
+    def _percentages(self, prev: Tuple[float, ...], cur: Tuple[float, ...]) -> Optional[Dict[str, float]]:
+        """
+        Convert two raw CPU times tuples into percentages
+
+        Args:
+            prev: Previous CPU times
+            cur: Current CPU times
+
+        Returns:
+            Dictionary of field name to percent plus 'busy', or None if no
+            CPU time elapsed between the two snapshots
+        """
+        deltas = {}
+        elapsed = 0.0
+        for name, before, after in zip(self._fields, prev, cur):
+            # Counters may step backwards on some virtualized hosts
+            delta = max(after - before, 0.0)
+            deltas[name] = delta
+            if name not in _GUEST_FIELDS:
+                elapsed += delta
+
+        if elapsed <= 0:
+            return None
+
+        percentages = {
+            name: min(round(delta / elapsed * 100, 1), 100.0)
+            for name, delta in deltas.items()
+        }
+        idle = sum(deltas.get(name, 0.0) for name in _IDLE_FIELDS)
+        percentages['busy'] = min(max(round((elapsed - idle) / elapsed * 100, 1), 0.0), 100.0)
+        return percentages
+
+    def _busy(self, prev: Tuple[float, ...], cur: Tuple[float, ...]) -> float:
+        """
+        Busy percent between two raw CPU times tuples
+
+        Same result as _percentages()['busy'] (0.0 when no time elapsed)
+        without building the per-field dictionaries, which matters once
+        per core per cycle.
+        """
+        elapsed = 0.0
+        idle = 0.0
+        for name, before, after in zip(self._fields, prev, cur):
+            delta = after - before
+            if delta <= 0:
+                continue
+            if name in _IDLE_FIELDS:
+                idle += delta
+            if name not in _GUEST_FIELDS:
+                elapsed += delta
+
+        if elapsed <= 0:
+            return 0.0
+        return min(max(round((elapsed - idle) / elapsed * 100, 1), 0.0), 100.0)
+
+    def _empty_percentages(self) -> Dict[str, Any]:
+        """
+        Build zeroed usage metrics for cycles without a usable window
+
+        Returns:
+            Dictionary of CPU usage metrics set to 0.0
+        """
+        return {
+            'cpu_usage_percent': 0.0,
+            'cpu_usage_per_core': [0.0] * (psutil.cpu_count() or 1) if self.per_core else None,
+            'cpu_user_time': 0.0,
+            'cpu_system_time': 0.0,
+            'cpu_idle_time': 0.0,
+            'cpu_iowait_time': 0.0,
+        }
@@ -0,0 +1,298 @@
+"""
+Disk I/O metrics collector with incremental per-device rate computation
+"""
+
+import os
+import time
+import logging
+from array import array
+from fnmatch import fnmatchcase
+from typing import Dict, Any, Optional, List, Tuple
+
+import psutil
+
+from src.collectors import BaseCollector, counter_delta
+from src.collectors.procfs import get_shared_reader, DISKSTAT_FIELDS
+
+logger = logging.getLogger(__name__)
+
+# Devices that are rarely interesting and can number in the hundreds
+DEFAULT_EXCLUDE = ('loop*', 'ram*')
+
+# Layout of the per-device counter arrays
+_READS, _WRITES, _READ_UNITS, _WRITE_UNITS, _READ_MS, _WRITE_MS, _IO_MS, _WEIGHTED_MS = range(8)
+
+# Positions of the counters above within a /proc/diskstats row
+_DISKSTAT_COLUMNS = tuple(DISKSTAT_FIELDS.index(name) for name in (
+    'reads', 'writes', 'sectors_read', 'sectors_written',
+    'read_ms', 'write_ms', 'io_ms', 'weighted_io_ms'))
+
+# /proc/diskstats always counts 512-byte sectors regardless of device
+_SECTOR_SIZE = 512
+
+
+class DiskIOCollector(BaseCollector):
+    """Collector for per-device disk I/O rates"""
+
+    def __init__(self, collection_interval: int = 10, devices: Optional[List[str]] = None,
+                 exclude_devices: Optional[List[str]] = None, include_partitions: bool = False,
+                 use_procfs: bool = True, sys_root: str = '/sys'):
+        """
+        Initialize disk I/O collector
+
+        Args:
+            collection_interval: Collection interval in seconds
+            devices: Device name patterns to collect (empty = all devices)
+            exclude_devices: Device name patterns to skip (default: loop*, ram*)
+            include_partitions: Whether to report partitions as well as whole
+                disks (partitions double count I/O in the totals)
+            use_procfs: Read /proc/diskstats directly on Linux instead of
+                going through psutil
+            sys_root: Mount point of sysfs, used to tell disks from partitions
+        """
+        super().__init__(collection_interval)
+        self.devices = list(devices or [])
+        self.exclude_devices = list(DEFAULT_EXCLUDE if exclude_devices is None else exclude_devices)
+        self.include_partitions = include_partitions
+        self.sys_root = sys_root
+        self.hostname = "localhost"  # Will be set by main agent
+        self.procfs = get_shared_reader() if use_procfs else None
+
+        # Filter verdict per device name, so patterns run once per device
+        self._included: Dict[str, bool] = {}
+        self._whole_disks: Optional[set] = None
+
+        # Previous counters per device as compact unsigned arrays
+        self._prev: Dict[str, array] = {}
+        self._prev_time: Optional[float] = None
+        self._prev_source: Optional[str] = None
+
+        # Prime the baseline so the first collect() reports rates
+        try:
+            self._update(*self._read_counters())
+        except Exception as e:
+            logger.warning(f"Could not take initial disk I/O snapshot: {e}")
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], agent_config: Dict[str, Any]) -> 'DiskIOCollector':
+        """Create a collector from its configuration section"""
+        return cls(
+            collection_interval=config.get('interval', agent_config['collection_interval']),
+            devices=config.get('devices'),
+            exclude_devices=config.get('exclude_devices'),
+            include_partitions=config.get('include_partitions', False),
+            use_procfs=agent_config.get('use_procfs', True)
+        )
+
+    def collect(self) -> Dict[str, Any]:
+        """
+        Collect disk I/O metrics
+
+        Returns:
+            Dictionary containing 9 disk I/O metrics summed over devices,
+            plus per-device values under 'disk_io_per_device':
+            - disk_read_bytes, disk_write_bytes: Throughput in bytes/s
+            - disk_read_ops, disk_write_ops: IOPS
+            - disk_read_time, disk_write_time, disk_await_time: Average
+              time per operation in ms
+            - disk_io_util_percent: Busiest device's utilization
+            - disk_queue_length: Average number of requests in flight
+        """
+        metrics: Dict[str, Any] = {
+            'timestamp': time.time(),
+            'hostname': self.hostname
+        }
+
+        try:
+            source, now, counters = self._read_counters()
+            per_device = self._update(source, now, counters)
+            metrics.update(self._aggregate(per_device))
+            metrics['disk_io_per_device'] = per_device
+
+        except Exception as e:
+            logger.error(f"Error collecting disk I/O metrics: {e}", exc_info=True)
+
+        return metrics
+
+    def _read_counters(self) -> Tuple[str, float, Dict[str, Tuple[int, ...]]]:
+        """
+        Read raw counters for the included devices
+
+        Returns:
+            Tuple of (source, monotonic time, device name to counters)
+        """
+        if self.procfs is not None:
+            try:
+                snap = self.procfs.snapshot()
+                rows = snap.diskstats(include=self._include)
+                counters = {
+                    name: tuple(row[i] for i in _DISKSTAT_COLUMNS)
+                    for name, row in rows.items()
+                }
+                return 'procfs', snap.monotonic, counters
+            except (OSError, ValueError, IndexError) as e:
+                logger.debug(f"procfs diskstats read failed, using psutil: {e}")
+
+        now = time.monotonic()
+        counters = {}
+        for name, io in (psutil.disk_io_counters(perdisk=True) or {}).items():
+            if not self._include(name):
+                continue
+            counters[name] = (
+                io.read_count, io.write_count, io.read_bytes, io.write_bytes,
+                io.read_time, io.write_time, getattr(io, 'busy_time', 0), 0,
+            )
+        return 'psutil', now, counters
+
+    def _update(self, source: str, now: float,
+                counters: Dict[str, Tuple[int, ...]]) -> Dict[str, Dict[str, float]]:
+        """
+        Compute per-device rates and store counters as the new baseline
+
+        Devices seen for the first time, or whose counters were reset, only
+        establish a baseline; devices that disappeared are forgotten.
+
+        Args:
+            source: 'procfs' or 'psutil'; baselines are reset on a switch
+            now: Monotonic time of the reading
+            counters: Device name to raw counters
+
+        Returns:
+            Device name to metric dictionary
+        """
+        if source != self._prev_source:
+            self._prev.clear()
+            self._prev_time = None
+            self._prev_source = source
+
+        elapsed = now - self._prev_time if self._prev_time is not None else 0.0
+        unit_bytes = _SECTOR_SIZE if source == 'procfs' else 1
+        per_device: Dict[str, Dict[str, float]] = {}
+        prev_all = self._prev
+
+        for name, values in counters.items():
+            current = array('Q', values)
+            previous = prev_all.get(name)
+            prev_all[name] = current
+            if previous is None or elapsed <= 0:
+                continue
+            delta = [counter_delta(before, after) for before, after in zip(previous, current)]
+            if None in delta:
+                logger.debug(f"Disk I/O counters of {name} were reset, re-baselining")
+                continue
+            per_device[name] = _device_metrics(delta, elapsed, unit_bytes, source == 'procfs')
+
+        if len(prev_all) != len(counters):
+            for name in [name for name in prev_all if name not in counters]:
+                del prev_all[name]
+
+        self._prev_time = now
+        return per_device
+
+    def _aggregate(self, per_device: Dict[str, Dict[str, float]]) -> Dict[str, Any]:
+        """
+        Combine per-device metrics into host-level metrics
+
+        Args:
+            per_device: Device name to metric dictionary
+
+        Returns:
+            Dictionary of host-level disk I/O metrics
+        """
+        # Float starts keep the types stable when no device has a rate yet
+        read_ops = sum((d['disk_read_ops'] for d in per_device.values()), 0.0)
+        write_ops = sum((d['disk_write_ops'] for d in per_device.values()), 0.0)
+        read_ms = sum((d['disk_read_time'] * d['disk_read_ops'] for d in per_device.values()), 0.0)
+        write_ms = sum((d['disk_write_time'] * d['disk_write_ops'] for d in per_device.values()), 0.0)
+
+        queue = [d['disk_queue_length'] for d in per_device.values()
+                 if d['disk_queue_length'] is not None]
+
+        return {
+            'disk_read_bytes': sum((d['disk_read_bytes'] for d in per_device.values()), 0.0),
+            'disk_write_bytes': sum((d['disk_write_bytes'] for d in per_device.values()), 0.0),
+            'disk_read_ops': read_ops,
+            'disk_write_ops': write_ops,
+            'disk_read_time': _ratio(read_ms, read_ops),
+            'disk_write_time': _ratio(write_ms, write_ops),
+            'disk_await_time': _ratio(read_ms + write_ms, read_ops + write_ops),
+            'disk_io_util_percent': max((d['disk_io_util_percent'] for d in per_device.values()),
+                                        default=0.0),
+            'disk_queue_length': round(sum(queue), 2) if queue else None,
+        }
+
+    def _include(self, name: str) -> bool:
+        """
+        Decide whether a device is collected, caching the verdict
+
+        Args:
+            name: Block device name
+
+        Returns:
+            True if the device passes the filters
+        """
+        verdict = self._included.get(name)
+        if verdict is None:
+            verdict = (
+                (not self.devices or any(fnmatchcase(name, p) for p in self.devices))
+                and not any(fnmatchcase(name, p) for p in self.exclude_devices)
+                and (self.include_partitions or not self._is_partition(name))
+            )
+            self._included[name] = verdict
+        return verdict
+
+    def _is_partition(self, name: str) -> bool:
+        """
+        Check whether a device is a partition rather than a whole disk
+
+        Whole disks are listed under /sys/block; the listing is refreshed
+        only when an unknown device name shows up.
+
+        Args:
+            name: Block device name
+
+        Returns:
+            True if the device is a partition
+        """
+        if self._whole_disks is None or name not in self._whole_disks:
+            try:
+                self._whole_disks = set(os.listdir(os.path.join(self.sys_root, 'block')))
+            except OSError:
+                # No sysfs: cannot tell, so treat everything as a disk
+                return False
+        return name not in self._whole_disks
+
+
+def _ratio(numerator: float, denominator: float) -> float:
+    """Rounded ratio, 0.0 when the denominator is 0"""
+    return round(numerator / denominator, 2) if denominator > 0 else 0.0
+
+
+def _device_metrics(delta: List[int], elapsed: float, unit_bytes: int,
+                    has_queue: bool) -> Dict[str, float]:
+    """
+    Turn counter deltas into rates and latencies for one device
+
+    Args:
+        delta: Counter deltas in the per-device array layout
+        elapsed: Seconds between the two readings
+        unit_bytes: Bytes per read/write unit (sectors or bytes)
+        has_queue: Whether the weighted I/O time counter is available
+
+    Returns:
+        Dictionary of per-device disk I/O metrics
+    """
+    elapsed_ms = elapsed * 1000
+    reads = delta[_READS]
+    writes = delta[_WRITES]
+    return {
+        'disk_read_bytes': round(delta[_READ_UNITS] * unit_bytes / elapsed, 2),
+        'disk_write_bytes': round(delta[_WRITE_UNITS] * unit_bytes / elapsed, 2),
+        'disk_read_ops': round(reads / elapsed, 2),
+        'disk_write_ops': round(writes / elapsed, 2),
+        'disk_read_time': _ratio(delta[_READ_MS], reads),
+        'disk_write_time': _ratio(delta[_WRITE_MS], writes),
+        'disk_await_time': _ratio(delta[_READ_MS] + delta[_WRITE_MS], reads + writes),
+        'disk_io_util_percent': min(round(delta[_IO_MS] / elapsed_ms * 100, 1), 100.0),
+        'disk_queue_length': round(delta[_WEIGHTED_MS] / elapsed_ms, 2) if has_queue else None,
+    }
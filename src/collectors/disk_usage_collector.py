@@ -0,0 +1,333 @@
+"""
+Disk usage metrics collector with mount-table change detection
+"""
+
+import os
+import re
+import sys
+import time
+import select
+import logging
+import threading
+from fnmatch import fnmatchcase
+from typing import Dict, Any, Optional, List, Tuple
+
+import psutil
+
+from src.collectors import BaseCollector
+
+logger = logging.getLogger(__name__)
+
+# Kernel and virtual filesystems that do not represent disk space
+PSEUDO_FILESYSTEMS = frozenset({
+    'autofs', 'binfmt_misc', 'bpf', 'cgroup', 'cgroup2', 'configfs', 'debugfs',
+    'devpts', 'devtmpfs', 'efivarfs', 'fusectl', 'hugetlbfs', 'mqueue', 'nsfs',
+    'proc', 'pstore', 'ramfs', 'rpc_pipefs', 'securityfs', 'selinuxfs',
+    'squashfs', 'sysfs', 'tmpfs', 'tracefs', 'nfsd',
+})
+
+# Network filesystems whose statvfs can block on an unreachable server
+REMOTE_FILESYSTEMS = frozenset({
+    '9p', 'afs', 'ceph', 'cifs', 'davfs', 'fuse.ceph', 'fuse.glusterfs',
+    'fuse.s3fs', 'fuse.sshfs', 'glusterfs', 'gpfs', 'lustre', 'nfs', 'nfs4',
+    'smb3', 'smbfs', 'sshfs',
+})
+
+# Mount entry: (device, mount point, filesystem type)
+Mount = Tuple[str, str, str]
+
+# Octal escapes the kernel uses for whitespace in mount table fields
+_OCTAL_ESCAPE = re.compile(r'\\([0-7]{3})')
+
+
+class DiskUsageCollector(BaseCollector):
+    """Collector for per-mount disk space and inode usage"""
+
+    def __init__(self, collection_interval: int = 60, mount_points: Optional[List[str]] = None,
+                 include_pseudo: bool = False, include_remote: bool = False,
+                 statvfs_timeout: float = 2.0, mounts_path: str = '/proc/self/mounts'):
+        """
+        Initialize disk usage collector
+
+        Args:
+            collection_interval: Collection interval in seconds
+            mount_points: Mount point patterns to collect (empty = all)
+            include_pseudo: Whether to report pseudo filesystems (tmpfs, proc...)
+            include_remote: Whether to report network filesystems (nfs, cifs...)
+            statvfs_timeout: Seconds to wait for each mount's statvfs before
+                reporting it as unresponsive
+            mounts_path: Mount table to parse (Linux); psutil is used when
+                it cannot be opened
+        """
+        super().__init__(collection_interval)
+        self.mount_points = list(mount_points or [])
+        self.include_pseudo = include_pseudo
+        self.include_remote = include_remote
+        self.statvfs_timeout = statvfs_timeout
+        self.mounts_path = mounts_path
+        self.hostname = "localhost"  # Will be set by main agent
+
+        self._mounts: List[Mount] = []
+        self._mounts_file = None
+        self._poller = None
+        self.mount_table_reads = 0
+
+        # statvfs calls still running after their timeout, by mount point
+        self._pending: Dict[str, threading.Thread] = {}
+
+        self._open_mount_table()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], agent_config: Dict[str, Any]) -> 'DiskUsageCollector':
+        """Create a collector from its configuration section"""
+        return cls(
+            collection_interval=config.get('interval', 60),
+            mount_points=config.get('mount_points'),
+            include_pseudo=config.get('include_pseudo', False),
+            include_remote=config.get('include_remote', False),
+            statvfs_timeout=config.get('statvfs_timeout', 2.0)
+        )
+
+    def collect(self) -> Dict[str, Any]:
+        """
+        Collect disk usage metrics
+
+        Returns:
+            Dictionary containing 8 disk usage metrics, plus per-mount
+            values under 'disk_usage_per_mount':
+            - disk_total, disk_used, disk_free: Bytes, summed over devices
+            - disk_usage_percent: Fullest mount's usage percentage
+            - inode_total, inode_used, inode_free: Inodes, summed over devices
+            - inode_usage_percent: Fullest mount's inode usage percentage
+            - disk_usage_unresponsive_mounts: Mounts whose statvfs timed out
+        """
+        metrics: Dict[str, Any] = {
+            'timestamp': time.time(),
+            'hostname': self.hostname
+        }
+
+        try:
+            if self._mount_table_changed():
+                self._mounts = self._read_mounts()
+
+            per_mount, unresponsive = self._statvfs_all(self._mounts)
+            metrics.update(self._aggregate(per_mount))
+            metrics['disk_usage_unresponsive_mounts'] = unresponsive
+            metrics['disk_usage_per_mount'] = per_mount
+
+        except Exception as e:
+            logger.error(f"Error collecting disk usage metrics: {e}", exc_info=True)
+
+        return metrics
+
+    def _open_mount_table(self) -> None:
+        """Open the mount table for change polling, if the platform has one"""
+        if not sys.platform.startswith('linux'):
+            return
+        try:
+            self._mounts_file = open(self.mounts_path, 'rb')
+            # The kernel flags POLLPRI/POLLERR on this file when mounts change
+            self._poller = select.poll()
+            self._poller.register(self._mounts_file, select.POLLPRI | select.POLLERR)
+        except OSError as e:
+            logger.info(f"Cannot watch {self.mounts_path}, using psutil: {e}")
+            self._mounts_file = None
+            self._poller = None
+
+    def _mount_table_changed(self) -> bool:
+        """
+        Check whether the mount table must be (re)parsed
+
+        Returns:
+            True on first use, when the kernel signalled a change, or on
+            platforms without change notification
+        """
+        if self._mounts_file is None or self.mount_table_reads == 0:
+            return True
+        return bool(self._poller.poll(0))
+
+    def _read_mounts(self) -> List[Mount]:
+        """
+        Parse the mount table and apply filters
+
+        Returns:
+            List of mounts to collect, one entry per mount point
+        """
+        self.mount_table_reads += 1
+        entries: List[Mount] = []
+
+        if self._mounts_file is not None:
+            # Reading to EOF also clears the pending change notification
+            self._mounts_file.seek(0)
+            for line in self._mounts_file.read().split(b'\n'):
+                fields = line.split()
+                if len(fields) >= 3:
+                    entries.append((_unescape(fields[0]), _unescape(fields[1]), fields[2].decode()))
+        else:
+            for part in psutil.disk_partitions(all=True):
+                entries.append((part.device, part.mountpoint, part.fstype))
+
+        # Later entries shadow earlier ones mounted on the same point
+        by_mount_point: Dict[str, Mount] = {}
+        for device, mount_point, fstype in entries:
+            if self._include(mount_point, fstype):
+                by_mount_point[mount_point] = (device, mount_point, fstype)
+
+        mounts = list(by_mount_point.values())
+        logger.debug(f"Mount table parsed: {len(mounts)} of {len(entries)} mounts collected")
+        return mounts
+
+    def _include(self, mount_point: str, fstype: str) -> bool:
+        """
+        Decide whether a mount is collected
+
+        Args:
+            mount_point: Mount point path
+            fstype: Filesystem type
+
+        Returns:
+            True if the mount passes the filters
+        """
+        if not self.include_pseudo and fstype in PSEUDO_FILESYSTEMS:
+            return False
+        if not self.include_remote and fstype in REMOTE_FILESYSTEMS:
+            return False
+        if self.mount_points:
+            return any(fnmatchcase(mount_point, p) for p in self.mount_points)
+        return True
+
+    def _statvfs_all(self, mounts: List[Mount]) -> Tuple[Dict[str, Dict[str, Any]], List[str]]:
+        """
+        Run statvfs on every mount concurrently with a timeout
+
+        Each call runs on its own daemon thread, so a hung mount only costs
+        one blocked thread; it is skipped until that call returns.
+
+        Args:
+            mounts: Mounts to query
+
+        Returns:
+            Tuple of (mount point to metrics, unresponsive mount points)
+        """
+        results: Dict[str, Any] = {}
+        started: List[Tuple[Mount, threading.Thread]] = []
+        unresponsive: List[str] = []
+
+        for mount in mounts:
+            mount_point = mount[1]
+            pending = self._pending.get(mount_point)
+            if pending is not None:
+                if pending.is_alive():
+                    unresponsive.append(mount_point)
+                    continue
+                del self._pending[mount_point]
+
+            thread = threading.Thread(target=_statvfs_into, args=(mount_point, results),
+                                      name=f"statvfs:{mount_point}", daemon=True)
+            thread.start()
+            started.append((mount, thread))
+
+        deadline = time.monotonic() + self.statvfs_timeout
+        per_mount: Dict[str, Dict[str, Any]] = {}
+        for (device, mount_point, fstype), thread in started:
+            thread.join(max(deadline - time.monotonic(), 0))
+            if thread.is_alive():
+                logger.warning(f"statvfs on {mount_point} timed out after {self.statvfs_timeout}s")
+                self._pending[mount_point] = thread
+                unresponsive.append(mount_point)
+                continue
+
+            result = results.get(mount_point)
+            if isinstance(result, OSError):
+                logger.debug(f"statvfs on {mount_point} failed: {result}")
+                continue
+            if result is not None:
+                stats = _usage_metrics(result)
+                stats['device'] = device
+                stats['fstype'] = fstype
+                per_mount[mount_point] = stats
+
+        return per_mount, unresponsive
+
+    def _aggregate(self, per_mount: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Combine per-mount metrics into host-level metrics
+
+        Totals count each device once so bind mounts are not double counted.
+
+        Args:
+            per_mount: Mount point to metric dictionary
+
+        Returns:
+            Dictionary of host-level disk usage metrics
+        """
+        totals = dict.fromkeys(('disk_total', 'disk_used', 'disk_free',
+                                'inode_total', 'inode_used', 'inode_free'), 0)
+        seen_devices = set()
+        for stats in per_mount.values():
+            if stats['device'] in seen_devices:
+                continue
+            seen_devices.add(stats['device'])
+            for key in totals:
+                totals[key] += stats[key]
+
+        metrics: Dict[str, Any] = dict(totals)
+        metrics['disk_usage_percent'] = max(
+            (s['disk_usage_percent'] for s in per_mount.values()), default=0.0)
+        metrics['inode_usage_percent'] = max(
+            (s['inode_usage_percent'] for s in per_mount.values()), default=0.0)
+        return metrics
+
+    def __del__(self):
+        """Close the mount table on deletion"""
+        try:
+            if self._mounts_file is not None:
+                self._mounts_file.close()
+        except Exception:
+            pass  # Avoid errors during cleanup
+
+
+def _statvfs_into(mount_point: str, results: Dict[str, Any]) -> None:
+    """Thread target: store os.statvfs() result (or the OSError) by mount point"""
+    try:
+        results[mount_point] = os.statvfs(mount_point)
+    except OSError as e:
+        results[mount_point] = e
+
+
+def _usage_metrics(st: os.statvfs_result) -> Dict[str, Any]:
+    """
+    Compute space and inode usage from a single statvfs result
+
+    Uses the same formulas as psutil.disk_usage() (and df): usage percent
+    is relative to the space available to unprivileged users.
+
+    Args:
+        st: statvfs result
+
+    Returns:
+        Dictionary of per-mount disk usage metrics
+    """
+    total = st.f_blocks * st.f_frsize
+    free = st.f_bavail * st.f_frsize
+    used = (st.f_blocks - st.f_bfree) * st.f_frsize
+    inode_total = st.f_files
+    inode_free = st.f_ffree
+    inode_used = inode_total - inode_free
+
+    return {
+        'disk_total': total,
+        'disk_used': used,
+        'disk_free': free,
+        'disk_usage_percent': round(used / (used + free) * 100, 1) if used + free > 0 else 0.0,
+        'inode_total': inode_total,
+        'inode_used': inode_used,
+        'inode_free': inode_free,
+        'inode_usage_percent': round(inode_used / inode_total * 100, 1) if inode_total > 0 else 0.0,
+    }
+
+
+def _unescape(field: bytes) -> str:
+    """Decode a mount table field, expanding octal escapes such as \\040"""
+    return _OCTAL_ESCAPE.sub(lambda m: chr(int(m.group(1), 8)),
+                             field.decode('utf-8', 'surrogateescape'))
@@ -5,8 +5,10 @@ Memory metrics collector using psutil
 import psutil
 import time
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Tuple
 from src.collectors import BaseCollector
+from src.collectors.procfs import get_shared_reader
+from src.sample import Schema, Sample
 
 logger = logging.getLogger(__name__)
 
@@ -14,15 +16,30 @@ logger = logging.getLogger(__name__)
 class MemoryCollector(BaseCollector):
     """Collector for memory metrics"""
 
-    def __init__(self, collection_interval: int = 10):
+    SCHEMA = Schema(('memory_total', 'memory_used', 'memory_free', 'memory_available',
+                     'memory_usage_percent', 'memory_cached', 'memory_buffers',
+                     'swap_total', 'swap_used', 'swap_free', 'swap_usage_percent'))
+
+    def __init__(self, collection_interval: int = 10, use_procfs: bool = True):
         """
         Initialize memory collector
 
         Args:
             collection_interval: Collection interval in seconds
+            use_procfs: Read /proc/meminfo directly on Linux instead of
+                going through psutil
         """
         super().__init__(collection_interval)
         self.hostname = "localhost"  # Will be set by main agent
+        self.procfs = get_shared_reader() if use_procfs else None
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], agent_config: Dict[str, Any]) -> 'MemoryCollector':
+        """Create a collector from its configuration section"""
+        return cls(
+            collection_interval=config.get('interval', agent_config['collection_interval']),
+            use_procfs=agent_config.get('use_procfs', True)
+        )
 
     def collect(self) -> Dict[str, Any]:
         """
@@ -42,32 +59,80 @@ class MemoryCollector(BaseCollector):
             - swap_free: Free swap memory in bytes
             - swap_usage_percent: Swap usage percentage
         """
-        metrics: Dict[str, Any] = {
-            'timestamp': time.time(),
-            'hostname': self.hostname
-        }
+        return self.collect_sample().to_dict()
+
+    def collect_sample(self) -> Sample:
+        """
+        Collect memory metrics into a Sample of SCHEMA
+
+        Returns:
+            Sample with the metrics described in collect()
+        """
+        sample = Sample(self.SCHEMA, time.time(), self.hostname)
 
         try:
+            if self.procfs is not None:
+                try:
+                    sample.data[:] = self._collect_procfs()
+                    return sample
+                except (OSError, ValueError, KeyError) as e:
+                    logger.debug(f"procfs memory read failed, using psutil: {e}")
+
             # Virtual memory (physical RAM)
             vm = psutil.virtual_memory()
-            metrics['memory_total'] = vm.total
-            metrics['memory_used'] = vm.used
-            metrics['memory_free'] = vm.free
-            metrics['memory_available'] = vm.available
-            metrics['memory_usage_percent'] = vm.percent
+            sample.set('memory_total', vm.total)
+            sample.set('memory_used', vm.used)
+            sample.set('memory_free', vm.free)
+            sample.set('memory_available', vm.available)
+            sample.set('memory_usage_percent', vm.percent)
 
             # Cached and buffered memory (not available on Windows)
-            metrics['memory_cached'] = getattr(vm, 'cached', 0)
-            metrics['memory_buffers'] = getattr(vm, 'buffers', 0)
+            sample.set('memory_cached', getattr(vm, 'cached', 0))
+            sample.set('memory_buffers', getattr(vm, 'buffers', 0))
 
             # Swap memory
             swap = psutil.swap_memory()
-            metrics['swap_total'] = swap.total
-            metrics['swap_used'] = swap.used
-            metrics['swap_free'] = swap.free
-            metrics['swap_usage_percent'] = swap.percent
+            sample.set('swap_total', swap.total)
+            sample.set('swap_used', swap.used)
+            sample.set('swap_free', swap.free)
+            sample.set('swap_usage_percent', swap.percent)
 
         except Exception as e:
             logger.error(f"Error collecting memory metrics: {e}", exc_info=True)
 
-        return metrics
+        return sample
+
+    def _collect_procfs(self) -> Tuple[float, ...]:
+        """
+        Collect memory metrics from a single /proc/meminfo read
+
+        Uses the same formulas as psutil on Linux so both paths agree.
+
+        Returns:
+            Memory metric values in SCHEMA order
+        """
+        info = self.procfs.snapshot().meminfo()
+
+        total = info['MemTotal']
+        free = info['MemFree']
+        buffers = info.get('Buffers', 0)
+        cached = info.get('Cached', 0) + info.get('SReclaimable', 0)
+        available = info.get('MemAvailable', free + cached + buffers)
+        used = total - free - cached - buffers
+        if used < 0:
+            used = total - free
+
+        swap_total = info.get('SwapTotal', 0)
+        swap_free = info.get('SwapFree', 0)
+        swap_used = swap_total - swap_free
+
+        return (total, used, free, available, _percent(total - available, total),
+                cached, buffers, swap_total, swap_used, swap_free,
+                _percent(swap_used, swap_total))
+
+
+def _percent(used: int, total: int) -> float:
+    """Usage percentage rounded like psutil, 0.0 when total is 0"""
+    if total <= 0:
+        return 0.0
+    return round(used / total * 100, 1)
@@ -0,0 +1,306 @@
+"""
+Top-N process collector with incremental /proc scanning
+"""
+
+import os
+import sys
+import time
+import heapq
+import logging
+from typing import Dict, Any, Optional
+
+import psutil
+
+from src.collectors import BaseCollector
+
+try:
+    import pwd
+except ImportError:  # Windows
+    pwd = None
+
+logger = logging.getLogger(__name__)
+
+# Field positions in /proc/<pid>/stat after the ')' closing the command name
+_UTIME, _STIME, _STARTTIME, _RSS = 11, 12, 19, 21
+
+
+class ProcessState:
+    """Cached state for one process, valid while its start time matches"""
+
+    __slots__ = ('pid', 'starttime', 'name', 'cpu_ticks', 'sampled_at', 'cpu_percent',
+                 'memory_rss', 'uid', 'user', 'cmdline', 'exe', 'static_loaded')
+
+    def __init__(self, pid: int, starttime: int, name: str):
+        self.pid = pid
+        self.starttime = starttime
+        self.name = name
+        self.cpu_ticks = 0
+        self.sampled_at = 0.0
+        self.cpu_percent = 0.0
+        self.memory_rss = 0
+        self.uid: Optional[int] = None
+        self.user: Optional[str] = None
+        self.cmdline: Optional[str] = None
+        self.exe: Optional[str] = None
+        self.static_loaded = False
+
+
+class ProcessCollector(BaseCollector):
+    """Collector for the top processes by CPU and by resident memory"""
+
+    def __init__(self, collection_interval: int = 10, top_k: int = 10,
+                 scan_budget: float = 0.1, proc_root: str = '/proc'):
+        """
+        Initialize process collector
+
+        Args:
+            collection_interval: Collection interval in seconds
+            top_k: Number of processes reported per ranking
+            scan_budget: Seconds of scanning allowed per collect(); on hosts
+                with more processes than fit, the scan resumes where it
+                stopped on the next collect()
+            proc_root: Mount point of procfs (overridable for tests)
+        """
+        super().__init__(collection_interval)
+        self.top_k = top_k
+        self.scan_budget = scan_budget
+        self.proc_root = proc_root
+        self.hostname = "localhost"  # Will be set by main agent
+
+        self.use_procfs = sys.platform.startswith('linux') and os.path.isdir(proc_root)
+        self._clock_ticks = os.sysconf('SC_CLK_TCK') if self.use_procfs else 100
+        self._page_size = os.sysconf('SC_PAGE_SIZE') if self.use_procfs else 4096
+
+        self._states: Dict[int, ProcessState] = {}
+        self._users: Dict[int, str] = {}
+        self._cursor = 0
+        self._process_count = 0
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], agent_config: Dict[str, Any]) -> 'ProcessCollector':
+        """Create a collector from its configuration section"""
+        return cls(
+            collection_interval=config.get('interval', agent_config['collection_interval']),
+            top_k=config.get('top_k', 10),
+            scan_budget=config.get('scan_budget', 0.1)
+        )
+
+    def collect(self) -> Dict[str, Any]:
+        """
+        Collect top process metrics
+
+        Returns:
+            Dictionary containing:
+            - process_count: Number of processes on the host
+            - top_processes_cpu: Top-K processes by CPU percent
+            - top_processes_memory: Top-K processes by resident memory
+            - process_scan_duration_ms: Wall time spent scanning
+            - process_scan_cpu_ms: CPU time spent scanning
+            - process_scan_coverage: Fraction of processes refreshed this
+              cycle (1.0 unless the scan budget was exhausted)
+        """
+        metrics: Dict[str, Any] = {
+            'timestamp': time.time(),
+            'hostname': self.hostname
+        }
+
+        try:
+            wall_start = time.monotonic()
+            cpu_start = time.thread_time()
+
+            if self.use_procfs:
+                scanned = self._scan_procfs(wall_start)
+            else:
+                scanned = self._scan_psutil()
+
+            states = self._states.values()
+            top_cpu = heapq.nlargest(self.top_k, states, key=lambda s: s.cpu_percent)
+            top_memory = heapq.nlargest(self.top_k, states, key=lambda s: s.memory_rss)
+
+            metrics['process_count'] = self._process_count
+            metrics['top_processes_cpu'] = [self._describe(s) for s in top_cpu]
+            metrics['top_processes_memory'] = [self._describe(s) for s in top_memory]
+            metrics['process_scan_duration_ms'] = round((time.monotonic() - wall_start) * 1000, 2)
+            metrics['process_scan_cpu_ms'] = round((time.thread_time() - cpu_start) * 1000, 2)
+            metrics['process_scan_coverage'] = (
+                round(scanned / self._process_count, 3) if self._process_count else 1.0)
+
+        except Exception as e:
+            logger.error(f"Error collecting process metrics: {e}", exc_info=True)
+
+        return metrics
+
+    def _scan_procfs(self, started: float) -> int:
+        """
+        Refresh per-process counters from /proc within the scan budget
+
+        Only /proc/<pid>/stat is read per process; static fields are read
+        later and only for processes that make it into a top-K list.
+
+        Args:
+            started: Monotonic time the collect() started
+
+        Returns:
+            Number of processes refreshed
+        """
+        pids = [int(name) for name in os.listdir(self.proc_root) if name.isdigit()]
+
+        # Forget processes that exited
+        alive = set(pids)
+        for pid in [pid for pid in self._states if pid not in alive]:
+            del self._states[pid]
+
+        total = self._process_count = len(pids)
+        if self._cursor >= total:
+            self._cursor = 0
+
+        deadline = started + self.scan_budget
+        scanned = 0
+        index = self._cursor
+        while scanned < total:
+            self._refresh(pids[index])
+            scanned += 1
+            index = (index + 1) % total
+            # Check the clock every 64 processes to keep the loop cheap
+            if scanned & 63 == 0 and time.monotonic() >= deadline:
+                break
+
+        self._cursor = index
+        if scanned < total:
+            logger.debug(f"Process scan budget exhausted after {scanned}/{total} processes")
+        return scanned
+
+    def _refresh(self, pid: int) -> None:
+        """
+        Read /proc/<pid>/stat and update the process's CPU and RSS
+
+        Args:
+            pid: Process ID
+        """
+        try:
+            with open(f'{self.proc_root}/{pid}/stat', 'rb') as f:
+                data = f.read()
+        except OSError:
+            self._states.pop(pid, None)
+            return
+
+        # The command name may itself contain spaces or parentheses
+        name_start = data.find(b'(')
+        name_end = data.rfind(b')')
+        fields = data[name_end + 2:].split()
+        starttime = int(fields[_STARTTIME])
+        now = time.monotonic()
+        cpu_ticks = int(fields[_UTIME]) + int(fields[_STIME])
+
+        state = self._states.get(pid)
+        if state is None or state.starttime != starttime:
+            # New process, or the PID was reused: drop cached static fields
+            name = data[name_start + 1:name_end].decode('utf-8', 'replace')
+            state = ProcessState(pid, starttime, name)
+            self._states[pid] = state
+        elif now > state.sampled_at:
+            elapsed_ticks = (now - state.sampled_at) * self._clock_ticks
+            state.cpu_percent = round((cpu_ticks - state.cpu_ticks) / elapsed_ticks * 100, 1)
+
+        state.cpu_ticks = cpu_ticks
+        state.sampled_at = now
+        state.memory_rss = int(fields[_RSS]) * self._page_size
+
+    def _scan_psutil(self) -> int:
+        """
+        Refresh per-process counters through psutil (non-Linux fallback)
+
+        Returns:
+            Number of processes refreshed
+        """
+        seen = set()
+        for proc in psutil.process_iter(['pid', 'name', 'create_time', 'memory_info']):
+            info = proc.info
+            pid = info['pid']
+            seen.add(pid)
+            state = self._states.get(pid)
+            if state is None or state.starttime != info['create_time']:
+                state = ProcessState(pid, info['create_time'], info['name'] or '')
+                self._states[pid] = state
+            try:
+                # process_iter() reuses Process objects, so this is a delta
+                state.cpu_percent = proc.cpu_percent(interval=None)
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                pass
+            memory = info['memory_info']
+            state.memory_rss = memory.rss if memory is not None else 0
+
+        for pid in [pid for pid in self._states if pid not in seen]:
+            del self._states[pid]
+        self._process_count = len(seen)
+        return len(seen)
+
+    def _describe(self, state: ProcessState) -> Dict[str, Any]:
+        """
+        Build the reported entry for a top-K process
+
+        Static fields (user, command line, executable) are loaded on first
+        use and cached until the PID is reused.
+
+        Args:
+            state: Process state
+
+        Returns:
+            Dictionary describing the process
+        """
+        if not state.static_loaded:
+            self._load_static(state)
+        return {
+            'pid': state.pid,
+            'name': state.name,
+            'user': state.user,
+            'cmdline': state.cmdline,
+            'exe': state.exe,
+            'cpu_percent': state.cpu_percent,
+            'memory_rss': state.memory_rss,
+        }
+
+    def _load_static(self, state: ProcessState) -> None:
+        """
+        Load a process's static fields once
+
+        Args:
+            state: Process state to fill in
+        """
+        state.static_loaded = True
+        if not self.use_procfs:
+            try:
+                proc = psutil.Process(state.pid)
+                state.user = proc.username()
+                state.cmdline = ' '.join(proc.cmdline())
+                state.exe = proc.exe() or None
+            except (psutil.Error, OSError):
+                pass
+            return
+
+        base = f'{self.proc_root}/{state.pid}'
+        try:
+            with open(f'{base}/cmdline', 'rb') as f:
+                state.cmdline = f.read().rstrip(b'\0').replace(b'\0', b' ').decode('utf-8', 'replace')
+        except OSError:
+            pass
+        try:
+            state.exe = os.readlink(f'{base}/exe')
+        except OSError:
+            pass  # Kernel threads and other users' processes
+        try:
+            state.uid = os.stat(base).st_uid
+            state.user = self._username(state.uid)
+        except OSError:
+            pass
+
+    def _username(self, uid: int) -> str:
+        """Resolve a UID to a user name, caching lookups"""
+        user = self._users.get(uid)
+        if user is None:
+            try:
+                user = pwd.getpwuid(uid).pw_name if pwd is not None else str(uid)
+            except KeyError:
+                user = str(uid)
+            self._users[uid] = user
+        return user
@@ -0,0 +1,315 @@
+"""
+Single-pass procfs reader engine for Linux collectors
+
+Reads /proc files through file descriptors that stay open for the lifetime of
+the reader and into preallocated buffers, parses only the fields the
+collectors emit, and hands every collector the same snapshot within a tick.
+Collectors fall back to psutil when procfs is unavailable.
+"""
+
+import os
+import sys
+import time
+import logging
+import threading
+from typing import Dict, Any, Optional, List, Tuple, Callable
+
+logger = logging.getLogger(__name__)
+
+# /proc/stat cpu line columns, in kernel order (older kernels emit fewer)
+CPU_FIELDS = ('user', 'nice', 'system', 'idle', 'iowait', 'irq',
+              'softirq', 'steal', 'guest', 'guest_nice')
+
+# /proc/meminfo keys used by the memory collector
+MEMINFO_FIELDS = (b'MemTotal', b'MemFree', b'MemAvailable', b'Buffers', b'Cached',
+                  b'SReclaimable', b'SwapTotal', b'SwapFree')
+
+# /proc/diskstats columns after (major, minor, name)
+DISKSTAT_FIELDS = ('reads', 'reads_merged', 'sectors_read', 'read_ms',
+                   'writes', 'writes_merged', 'sectors_written', 'write_ms',
+                   'in_flight', 'io_ms', 'weighted_io_ms')
+
+# /proc/net/dev columns kept per interface
+NETDEV_FIELDS = ('rx_bytes', 'rx_packets', 'rx_errs', 'rx_drop',
+                 'tx_bytes', 'tx_packets', 'tx_errs', 'tx_drop')
+
+# Indexes of NETDEV_FIELDS within the 16 raw /proc/net/dev columns
+_NETDEV_COLUMNS = (0, 1, 2, 3, 8, 9, 10, 11)
+
+# Initial per-file buffer size; grown on demand for large diskstats/net/dev
+DEFAULT_BUFFER_SIZE = 16 * 1024
+
+
+class ProcfsReader:
+    """Reads /proc files with reused file descriptors and buffers"""
+
+    def __init__(self, proc_root: str = '/proc', max_age: float = 0.5,
+                 buffer_size: int = DEFAULT_BUFFER_SIZE):
+        """
+        Initialize procfs reader
+
+        Args:
+            proc_root: Mount point of procfs (overridable for tests)
+            max_age: Seconds a snapshot is reused before a new one is taken,
+                so collectors running in the same tick share one snapshot
+            buffer_size: Initial read buffer size per file in bytes
+        """
+        self.proc_root = proc_root
+        self.max_age = max_age
+        self.buffer_size = buffer_size
+        self._fds: Dict[str, int] = {}
+        self._buffers: Dict[str, bytearray] = {}
+        self._snapshot: Optional['ProcfsSnapshot'] = None
+        self._lock = threading.Lock()
+        # Descriptors and buffers are shared, so reads are serialized
+        self._read_lock = threading.Lock()
+
+    def snapshot(self) -> 'ProcfsSnapshot':
+        """
+        Get the snapshot for the current tick
+
+        Returns:
+            Cached snapshot if younger than max_age, otherwise a new one
+        """
+        with self._lock:
+            now = time.monotonic()
+            snap = self._snapshot
+            if snap is None or now - snap.monotonic >= self.max_age:
+                snap = ProcfsSnapshot(self, now)
+                self._snapshot = snap
+            return snap
+
+    def read(self, relpath: str) -> bytes:
+        """
+        Read a whole procfs file through a cached descriptor
+
+        Args:
+            relpath: Path relative to proc_root (e.g. 'net/dev')
+
+        Returns:
+            File contents
+
+        Raises:
+            OSError: If the file cannot be opened or read
+        """
+        with self._read_lock:
+            return self._read_locked(relpath)
+
+    def _read_locked(self, relpath: str) -> bytes:
+        fd = self._fds.get(relpath)
+        if fd is None:
+            fd = os.open(os.path.join(self.proc_root, relpath), os.O_RDONLY)
+            self._fds[relpath] = fd
+            self._buffers[relpath] = bytearray(self.buffer_size)
+
+        buf = self._buffers[relpath]
+        try:
+            while True:
+                nbytes = os.preadv(fd, [buf], 0)
+                if nbytes < len(buf):
+                    return bytes(buf[:nbytes])
+                # File did not fit: grow the buffer and read again
+                buf = bytearray(len(buf) * 2)
+                self._buffers[relpath] = buf
+        except OSError:
+            # Drop the descriptor so the next read reopens it
+            self._close_fd(relpath)
+            raise
+
+    def close(self) -> None:
+        """Close all cached file descriptors"""
+        for relpath in list(self._fds):
+            self._close_fd(relpath)
+
+    def _close_fd(self, relpath: str) -> None:
+        fd = self._fds.pop(relpath, None)
+        self._buffers.pop(relpath, None)
+        if fd is not None:
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def __del__(self):
+        """Close descriptors on deletion"""
+        try:
+            self.close()
+        except Exception:
+            pass  # Avoid errors during cleanup
+
+
+class ProcfsSnapshot:
+    """One tick's view of procfs; each file is read and parsed at most once"""
+
+    __slots__ = ('_reader', 'monotonic', 'timestamp', '_raw', '_parsed')
+
+    def __init__(self, reader: ProcfsReader, monotonic: float):
+        """
+        Initialize snapshot
+
+        Args:
+            reader: Reader used to fetch files on first access
+            monotonic: Monotonic time the snapshot was taken
+        """
+        self._reader = reader
+        self.monotonic = monotonic
+        self.timestamp = time.time()
+        self._raw: Dict[str, bytes] = {}
+        self._parsed: Dict[str, Any] = {}
+
+    def raw(self, relpath: str) -> bytes:
+        """
+        Get raw file contents, reading the file on first access
+
+        Args:
+            relpath: Path relative to proc_root
+
+        Returns:
+            File contents as read during this snapshot
+        """
+        data = self._raw.get(relpath)
+        if data is None:
+            data = self._reader.read(relpath)
+            self._raw[relpath] = data
+        return data
+
+    def cpu_times(self) -> Tuple[Tuple[str, ...], Tuple[float, ...], List[Tuple[float, ...]]]:
+        """
+        Parse CPU times from /proc/stat
+
+        Values are raw clock ticks, which is all percentage math needs.
+
+        Returns:
+            Tuple of (field names, aggregate times, list of per-CPU times)
+        """
+        parsed = self._parsed.get('stat')
+        if parsed is None:
+            total: Tuple[float, ...] = ()
+            cores: List[Tuple[float, ...]] = []
+            for line in self.raw('stat').split(b'\n'):
+                if not line.startswith(b'cpu'):
+                    # cpu lines come first; stop before intr/ctxt/softirq
+                    break
+                parts = line.split()
+                values = tuple(float(v) for v in parts[1:len(CPU_FIELDS) + 1])
+                if parts[0] == b'cpu':
+                    total = values
+                else:
+                    cores.append(values)
+            parsed = (CPU_FIELDS[:len(total)], total, cores)
+            self._parsed['stat'] = parsed
+        return parsed
+
+    def meminfo(self) -> Dict[str, int]:
+        """
+        Parse the memory fields the collectors use from /proc/meminfo
+
+        Returns:
+            Dictionary of meminfo key to value in bytes
+        """
+        parsed = self._parsed.get('meminfo')
+        if parsed is None:
+            parsed = {}
+            wanted = len(MEMINFO_FIELDS)
+            for line in self.raw('meminfo').split(b'\n'):
+                key, _, rest = line.partition(b':')
+                if key in MEMINFO_FIELDS:
+                    fields = rest.split()
+                    value = int(fields[0])
+                    if len(fields) > 1 and fields[1] == b'kB':
+                        value *= 1024
+                    parsed[key.decode()] = value
+                    if len(parsed) == wanted:
+                        break
+            self._parsed['meminfo'] = parsed
+        return parsed
+
+    def loadavg(self) -> Tuple[float, float, float]:
+        """
+        Parse /proc/loadavg
+
+        Returns:
+            Tuple of 1, 5 and 15 minute load averages
+        """
+        parsed = self._parsed.get('loadavg')
+        if parsed is None:
+            parts = self.raw('loadavg').split(None, 3)
+            parsed = (float(parts[0]), float(parts[1]), float(parts[2]))
+            self._parsed['loadavg'] = parsed
+        return parsed
+
+    def diskstats(self, include: Optional[Callable[[str], bool]] = None) -> Dict[str, Tuple[int, ...]]:
+        """
+        Parse /proc/diskstats
+
+        Only the device name is decoded before the filter runs, so excluded
+        devices cost a single split of the line prefix.
+
+        Args:
+            include: Optional predicate on device name
+
+        Returns:
+            Dictionary of device name to counters in DISKSTAT_FIELDS order
+        """
+        stats: Dict[str, Tuple[int, ...]] = {}
+        width = len(DISKSTAT_FIELDS)
+        for line in self.raw('diskstats').split(b'\n'):
+            parts = line.split(None, 3)
+            if len(parts) < 4:
+                continue
+            name = parts[2].decode()
+            if include is not None and not include(name):
+                continue
+            values = parts[3].split(None, width)
+            stats[name] = tuple(int(v) for v in values[:width])
+        return stats
+
+    def net_dev(self, include: Optional[Callable[[str], bool]] = None) -> Dict[str, Tuple[int, ...]]:
+        """
+        Parse /proc/net/dev
+
+        Args:
+            include: Optional predicate on interface name
+
+        Returns:
+            Dictionary of interface name to counters in NETDEV_FIELDS order
+        """
+        stats: Dict[str, Tuple[int, ...]] = {}
+        # Skip the two header lines
+        for line in self.raw('net/dev').split(b'\n')[2:]:
+            name, sep, rest = line.partition(b':')
+            if not sep:
+                continue
+            name = name.strip().decode()
+            if include is not None and not include(name):
+                continue
+            columns = rest.split()
+            stats[name] = tuple(int(columns[i]) for i in _NETDEV_COLUMNS)
+        return stats
+
+
+_shared_reader: Optional[ProcfsReader] = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_reader() -> Optional[ProcfsReader]:
+    """
+    Get the process-wide procfs reader shared by all collectors
+
+    Returns:
+        Shared reader on Linux with a readable /proc, otherwise None
+    """
+    global _shared_reader
+    if not sys.platform.startswith('linux'):
+        return None
+
+    with _shared_lock:
+        if _shared_reader is None:
+            reader = ProcfsReader()
+            try:
+                reader.read('stat')
+            except OSError as e:
+                logger.info(f"procfs not available, using psutil fallback: {e}")
+                return None
+            _shared_reader = reader
+        return _shared_reader
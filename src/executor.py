@@ -0,0 +1,227 @@
+"""
+Collector execution with per-collector deadlines
+
+Runs the collectors due on a tick either one after another on the calling
+thread ('sequential') or concurrently on a small bounded pool of worker
+threads ('concurrent'). In concurrent mode every run gets a deadline:
+whatever finished in time is merged into the tick's sample, late results
+are dropped as stale when they eventually arrive, and a collector that is
+still running from an earlier tick is skipped instead of queued again.
+"""
+
+import time
+import queue
+import logging
+import threading
+from typing import Dict, Any, List, Optional, Union
+
+from src.collectors import BaseCollector
+from src.sample import Sample
+
+logger = logging.getLogger(__name__)
+
+# What a collector run returns
+Result = Union[Sample, Dict[str, Any]]
+
+
+def collect(collector: BaseCollector) -> Result:
+    """Run a collector, as a typed Sample when it declares a schema"""
+    if getattr(collector, 'SCHEMA', None) is not None:
+        return collector.collect_sample()
+    return collector.collect()
+
+
+class CollectorJob:
+    """One collect() invocation handed to a worker"""
+
+    __slots__ = ('name', 'collector', 'done', 'result', 'error', 'started', 'finished',
+                 'abandoned')
+
+    def __init__(self, name: str, collector: BaseCollector):
+        self.name = name
+        self.collector = collector
+        self.done = threading.Event()
+        self.result: Optional[Result] = None
+        self.error: Optional[BaseException] = None
+        self.started = 0.0
+        self.finished = 0.0
+        self.abandoned = False
+
+
+class CollectorStats:
+    """Run statistics for one collector"""
+
+    __slots__ = ('runs', 'timeouts', 'skipped', 'stale', 'errors', 'last_duration')
+
+    def __init__(self):
+        self.runs = 0
+        self.timeouts = 0
+        self.skipped = 0
+        self.stale = 0
+        self.errors = 0
+        self.last_duration = 0.0
+
+
+class CollectorExecutor:
+    """Runs due collectors sequentially or on a bounded worker pool"""
+
+    MODES = ('sequential', 'concurrent')
+
+    def __init__(self, mode: str = 'concurrent', max_workers: int = 4, deadline: float = 5.0):
+        """
+        Initialize executor
+
+        Args:
+            mode: 'concurrent' (worker pool with deadlines) or 'sequential'
+            max_workers: Number of worker threads in concurrent mode
+            deadline: Seconds a tick waits for its collectors in concurrent mode
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown execution mode: {mode}")
+
+        self.mode = mode
+        self.max_workers = max_workers
+        self.deadline = deadline
+        self.stats: Dict[str, CollectorStats] = {}
+
+        # Jobs still running, by collector name (at most one each)
+        self._in_flight: Dict[str, CollectorJob] = {}
+        self._lock = threading.Lock()
+        self._jobs: 'queue.Queue[Optional[CollectorJob]]' = queue.Queue()
+        self._workers: List[threading.Thread] = []
+
+        if self.mode == 'concurrent':
+            for i in range(max_workers):
+                # Daemon threads: a hung collector must not block agent exit
+                worker = threading.Thread(target=self._worker, name=f"collector-worker-{i}",
+                                          daemon=True)
+                worker.start()
+                self._workers.append(worker)
+
+    def run(self, collectors: Dict[str, BaseCollector], names: List[str]) -> Dict[str, Result]:
+        """
+        Run the named collectors for one tick
+
+        Args:
+            collectors: All collectors by name
+            names: Names of the collectors due on this tick
+
+        Returns:
+            Collector name to collected metrics (a Sample or a dictionary),
+            for runs that finished (within the deadline in concurrent mode)
+        """
+        if self.mode == 'sequential':
+            return self._run_sequential(collectors, names)
+        return self._run_concurrent(collectors, names)
+
+    def collector_metrics(self) -> Dict[str, Any]:
+        """
+        Get per-collector run statistics as flat agent metrics
+
+        Returns:
+            Dictionary of agent_collector_<name>_<stat> metrics
+        """
+        metrics: Dict[str, Any] = {}
+        for name, stats in self.stats.items():
+            prefix = f'agent_collector_{name}'
+            metrics[f'{prefix}_duration_ms'] = round(stats.last_duration * 1000, 2)
+            metrics[f'{prefix}_timeouts'] = stats.timeouts
+            metrics[f'{prefix}_skipped'] = stats.skipped
+            metrics[f'{prefix}_stale'] = stats.stale
+            metrics[f'{prefix}_errors'] = stats.errors
+        return metrics
+
+    def shutdown(self) -> None:
+        """Stop the worker threads (running collectors are not interrupted)"""
+        for _ in self._workers:
+            self._jobs.put(None)
+        self._workers = []
+
+    def _run_sequential(self, collectors: Dict[str, BaseCollector],
+                        names: List[str]) -> Dict[str, Result]:
+        results: Dict[str, Result] = {}
+        for name in names:
+            stats = self._stats(name)
+            started = time.monotonic()
+            try:
+                results[name] = collect(collectors[name])
+            except Exception as e:
+                stats.errors += 1
+                logger.error(f"Collector '{name}' failed: {e}", exc_info=True)
+            stats.runs += 1
+            stats.last_duration = time.monotonic() - started
+        return results
+
+    def _run_concurrent(self, collectors: Dict[str, BaseCollector],
+                        names: List[str]) -> Dict[str, Result]:
+        submitted: List[CollectorJob] = []
+        with self._lock:
+            for name in names:
+                if name in self._in_flight:
+                    # Still running from an earlier tick: do not pile up
+                    self._stats(name).skipped += 1
+                    logger.warning(f"Collector '{name}' still running, skipping this tick")
+                    continue
+                job = CollectorJob(name, collectors[name])
+                self._in_flight[name] = job
+                submitted.append(job)
+
+        for job in submitted:
+            self._jobs.put(job)
+
+        deadline = time.monotonic() + self.deadline
+        results: Dict[str, Result] = {}
+        for job in submitted:
+            job.done.wait(max(deadline - time.monotonic(), 0))
+            with self._lock:
+                # Checked under the lock the worker holds when it finishes
+                if not job.done.is_set():
+                    # Leave it in flight; its result is dropped on arrival
+                    job.abandoned = True
+                    stats = self._stats(job.name)
+                    stats.timeouts += 1
+                    if job.started:
+                        stats.last_duration = time.monotonic() - job.started
+                    logger.warning(f"Collector '{job.name}' missed its {self.deadline}s deadline")
+                    continue
+
+            if job.error is not None:
+                logger.error(f"Collector '{job.name}' failed: {job.error}",
+                             exc_info=(type(job.error), job.error, job.error.__traceback__))
+            elif job.result is not None:
+                results[job.name] = job.result
+
+        return results
+
+    def _worker(self) -> None:
+        """Worker thread loop"""
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+
+            job.started = time.monotonic()
+            try:
+                job.result = collect(job.collector)
+            except Exception as e:
+                job.error = e
+            job.finished = time.monotonic()
+
+            with self._lock:
+                stats = self._stats(job.name)
+                stats.runs += 1
+                if job.error is not None:
+                    stats.errors += 1
+                if job.abandoned:
+                    stats.stale += 1
+                    logger.info(f"Collector '{job.name}' finished after its deadline "
+                                f"({job.finished - job.started:.2f}s), result dropped")
+                stats.last_duration = job.finished - job.started
+                self._in_flight.pop(job.name, None)
+                job.done.set()
+
+    def _stats(self, name: str) -> CollectorStats:
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = CollectorStats()
+        return stats
@@ -5,20 +5,23 @@ Main entry point for the metrics collection agent
 import argparse
 import sys
 import signal
-import time
+import threading
 from pathlib import Path
+from typing import Dict, Any
 
 from src.utils import setup_logger
 from src.utils.config_loader import load_config
-from src.collectors.cpu_collector import CPUCollector
-from src.collectors.memory_collector import MemoryCollector
-from src.storage.file_storage import FileStorage
-from src.alerting.basic_alerting import BasicAlerting
-from src.cli import display_metrics
+from src import plugins
+from src.scheduler import CollectorScheduler
+from src.executor import CollectorExecutor
+from src.sample import Sample
 
 # Initialize logger (will be reconfigured with config file)
 logger = setup_logger(__name__)
 
+# Keys of collector dictionaries that the merged sample sets itself
+_SAMPLE_KEYS = frozenset(('timestamp', 'hostname'))
+
 
 class MetricsAgent:
     """Main metrics collection agent"""
@@ -32,6 +35,8 @@ class MetricsAgent:
         """
         self.config_path = config_path
         self.running = False
+        self._stop_event = threading.Event()
+        self._reload_requested = False
 
         # Load configuration
         self.config = load_config(config_path)
@@ -45,73 +50,117 @@ class MetricsAgent:
         self.hostname = self.config['agent']['hostname']
         self.collection_interval = self.config['agent']['collection_interval']
 
-        # Initialize collectors
+        # Initialize collectors; each module is imported only if enabled
         self.collectors = {}
-
-        # CPU collector
-        cpu_config = self.config['collectors']['cpu']
-        if cpu_config['enabled']:
-            self.collectors['cpu'] = CPUCollector(
-                collection_interval=cpu_config['interval'],
-                per_core=cpu_config['per_core']
-            )
-            self.collectors['cpu'].hostname = self.hostname
-            logger.info("CPU collector initialized")
-
-        # Memory collector
-        mem_config = self.config['collectors']['memory']
-        if mem_config['enabled']:
-            self.collectors['memory'] = MemoryCollector(
-                collection_interval=mem_config['interval']
-            )
-            self.collectors['memory'].hostname = self.hostname
-            logger.info("Memory collector initialized")
+        for name, collector_config in self.config['collectors'].items():
+            if not collector_config or not collector_config.get('enabled', False):
+                continue
+            try:
+                collector_class = plugins.collectors.load(name)
+            except plugins.PluginError as e:
+                logger.error(f"Skipping collector '{name}': {e}")
+                continue
+            collector = collector_class.from_config(collector_config, self.config['agent'])
+            collector.hostname = self.hostname
+            self.collectors[name] = collector
+            logger.info(f"{name} collector initialized")
+
+        # Schedule every collector on its own interval
+        self.scheduler = CollectorScheduler(
+            late_tolerance=self.config['agent'].get('late_tolerance', 0.5)
+        )
+        for name, collector in self.collectors.items():
+            self.scheduler.add(name, collector.collection_interval)
+
+        # Run due collectors concurrently with a deadline (or sequentially)
+        exec_config = self.config['agent'].get('execution', {})
+        self.executor = CollectorExecutor(
+            mode=exec_config.get('mode', 'concurrent'),
+            max_workers=exec_config.get('max_workers', 4),
+            deadline=exec_config.get('deadline', 5.0)
+        )
 
         # Initialize storage
-        self.storage = FileStorage(output_dir='data')
+        self.storage = self._create_storage(self.config['storage'])
 
         # Initialize alerting
         if self.config['alerts']['enabled']:
+            from src.alerting.basic_alerting import BasicAlerting
             self.alerting = BasicAlerting(self.config['alerts']['rules'])
         else:
             self.alerting = None
 
         logger.info("Metrics agent initialized successfully")
 
+    def _create_storage(self, storage_config: Dict[str, Any]):
+        """
+        Create the configured storage backend
+
+        Unknown or unloadable backends fall back to local file storage so
+        the agent keeps recording.
+
+        Args:
+            storage_config: The 'storage' configuration section
+
+        Returns:
+            Storage backend instance
+        """
+        backend = storage_config.get('backend', 'file')
+        try:
+            backend_class = plugins.storage_backends.load(backend)
+        except plugins.PluginError as e:
+            logger.warning(f"{e}; falling back to file storage")
+            backend = 'file'
+            backend_class = plugins.storage_backends.load(backend)
+
+        storage = backend_class.from_config(storage_config.get(backend) or {}, storage_config)
+        logger.info(f"Storage backend: {backend}")
+        return storage
+
     def start(self):
         """Start the metrics collection agent"""
         logger.info("Starting metrics collection agent...")
+        from src.cli import display_metrics
         self.running = True
+        self._stop_event.clear()
 
         # Register signal handlers for graceful shutdown
         signal.signal(signal.SIGINT, self._signal_handler)
         signal.signal(signal.SIGTERM, self._signal_handler)
+        if hasattr(signal, 'SIGHUP'):
+            signal.signal(signal.SIGHUP, self._reload_handler)
 
         try:
             while self.running:
-                # Collect metrics from all enabled collectors
-                metrics = {
-                    'timestamp': time.time(),
-                    'hostname': self.hostname
-                }
-
-                # CPU metrics
-                if 'cpu' in self.collectors:
-                    logger.debug("Collecting CPU metrics...")
-                    cpu_metrics = self.collectors['cpu'].collect()
-                    # Merge CPU metrics (skip timestamp and hostname to avoid overwriting)
-                    for key, value in cpu_metrics.items():
-                        if key not in ['timestamp', 'hostname']:
-                            metrics[key] = value
-
-                # Memory metrics
-                if 'memory' in self.collectors:
-                    logger.debug("Collecting memory metrics...")
-                    memory_metrics = self.collectors['memory'].collect()
-                    # Merge memory metrics
-                    for key, value in memory_metrics.items():
-                        if key not in ['timestamp', 'hostname']:
-                            metrics[key] = value
+                # Wait for the next tick; None means we are stopping
+                tick = self.scheduler.wait_due(self._stop_event)
+                if tick is None:
+                    break
+                timestamp, due = tick
+
+                if self._reload_requested:
+                    self._reload_alert_rules()
+
+                # Collect metrics from the collectors due on this tick
+                logger.debug(f"Collecting metrics from: {', '.join(due)}")
+                results = self.executor.run(self.collectors, due)
+
+                # Typed samples are merged without copying their values;
+                # dictionaries from other collectors and the agent's own
+                # metrics ride along as extra values
+                samples = []
+                extra: Dict[str, Any] = {}
+                for name, result in results.items():
+                    if isinstance(result, Sample):
+                        samples.append(result)
+                        continue
+                    for key, value in result.items():
+                        if key not in _SAMPLE_KEYS:
+                            extra[key] = value
+
+                # Agent self-monitoring metrics
+                extra.update(self._agent_metrics())
+                metrics = Sample.merge(timestamp, self.hostname, samples, extra)
 
                 # Store metrics
                 if metrics:
@@ -126,23 +175,61 @@ class MetricsAgent:
                     # Display metrics
                     display_metrics(metrics)
 
-                # Sleep until next collection
-                time.sleep(self.collection_interval)
-
         except Exception as e:
             logger.error(f"Error in collection loop: {e}", exc_info=True)
             sys.exit(1)
 
         finally:
+            self.executor.shutdown()
+
             # Flush any buffered metrics
             logger.info("Flushing remaining metrics...")
-            if hasattr(self.storage, '_flush'):
-                self.storage._flush()
+            self.storage.close()
+
+    def _agent_metrics(self) -> Dict[str, Any]:
+        """
+        Collect the agent's own health metrics
+
+        Returns:
+            Dictionary of agent metrics (schedule lateness and missed ticks,
+            per-collector run durations and timeouts, storage and alerting
+            statistics)
+        """
+        metrics = {f'agent_scheduler_{key}': value
+                   for key, value in self.scheduler.stats().items()}
+        metrics.update(self.executor.collector_metrics())
+        metrics.update({f'agent_storage_{key}': value
+                        for key, value in self.storage.stats().items()})
+        if self.alerting:
+            metrics.update({f'agent_alerting_{key}': value
+                            for key, value in self.alerting.stats().items()})
+        return metrics
 
     def stop(self):
         """Stop the metrics collection agent"""
         logger.info("Stopping metrics collection agent...")
         self.running = False
+        self._stop_event.set()
+
+    def _reload_alert_rules(self):
+        """Re-read the alert rules from the configuration file"""
+        self._reload_requested = False
+        if not self.alerting:
+            return
+        try:
+            config = load_config(self.config_path)
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not reload configuration: {e}")
+            return
+        self.alerting.reload(config['alerts'].get('rules') or [])
+        stats = self.alerting.stats()
+        logger.info(f"Reloaded alert rules: {stats['rules']} rules "
+                    f"({stats['rules_compiled']} compiled, {stats['rules_reused']} reused so far)")
+
+    def _reload_handler(self, signum, frame):
+        """Handle SIGHUP: reload alert rules before the next tick"""
+        logger.info("Received SIGHUP, reloading alert rules...")
+        self._reload_requested = True
 
     def _signal_handler(self, signum, frame):
         """Handle shutdown signals"""
@@ -0,0 +1,169 @@
+"""
+Lazy plugin registry for collectors and storage backends
+
+Plugins are registered by name as "module:Class" import paths and imported
+only when the configuration enables them, so agent startup pays only for
+the modules it actually uses. Third-party packages add plugins through
+entry points in the 'metrics_collector.collectors' and
+'metrics_collector.storage' groups, e.g. in setup.py:
+
+    entry_points={
+        "metrics_collector.collectors": [
+            "nginx = my_package.nginx:NginxCollector",
+        ],
+    }
+
+Built-in names take precedence over entry points with the same name.
+"""
+
+import sys
+import logging
+import importlib
+from typing import Dict, Any, Optional, List
+
+logger = logging.getLogger(__name__)
+
+COLLECTOR_GROUP = 'metrics_collector.collectors'
+STORAGE_GROUP = 'metrics_collector.storage'
+
+# Built-in plugins: config name -> "module:Class"
+BUILTIN_COLLECTORS = {
+    'cpu': 'src.collectors.cpu_collector:CPUCollector',
+    'memory': 'src.collectors.memory_collector:MemoryCollector',
+    'disk_io': 'src.collectors.disk_io_collector:DiskIOCollector',
+    'network': 'src.collectors.network_collector:NetworkCollector',
+    'disk_usage': 'src.collectors.disk_usage_collector:DiskUsageCollector',
+    'process': 'src.collectors.process_collector:ProcessCollector',
+    'cgroup': 'src.collectors.cgroup_collector:CgroupCollector',
+}
+
+BUILTIN_STORAGE = {
+    'file': 'src.storage.file_storage:FileStorage',
+    'prometheus': 'src.storage.prometheus_storage:PrometheusStorage',
+    'influxdb': 'src.storage.influxdb_storage:InfluxDBStorage',
+    'multiplex': 'src.storage.multiplex_storage:MultiplexStorage',
+    'sqlite': 'src.storage.sqlite_storage:SQLiteStorage',
+}
+
+
+class PluginError(Exception):
+    """Raised when a plugin is unknown or cannot be loaded"""
+
+
+class PluginRegistry:
+    """Name to import path mapping, resolved on first use"""
+
+    def __init__(self, kind: str, group: str, builtins: Optional[Dict[str, str]] = None):
+        """
+        Initialize registry
+
+        Args:
+            kind: Plugin kind used in messages ('collector', 'storage')
+            group: Entry point group searched for third-party plugins
+            builtins: Built-in plugins as name -> "module:Class"
+        """
+        self.kind = kind
+        self.group = group
+        self._targets: Dict[str, str] = dict(builtins or {})
+        self._loaded: Dict[str, type] = {}
+        self._discovered = False
+
+    def register(self, name: str, target: str) -> None:
+        """
+        Register a plugin
+
+        Args:
+            name: Name used in the configuration
+            target: Import path as "module:Class"
+        """
+        if ':' not in target:
+            raise ValueError(f"Plugin target must be 'module:Class', got {target!r}")
+        self._targets[name] = target
+        self._loaded.pop(name, None)
+
+    def names(self) -> List[str]:
+        """
+        Get the names of all known plugins, including entry points
+
+        Returns:
+            Sorted plugin names
+        """
+        self._discover()
+        return sorted(self._targets)
+
+    def __contains__(self, name: str) -> bool:
+        if name not in self._targets:
+            self._discover()
+        return name in self._targets
+
+    def load(self, name: str) -> type:
+        """
+        Import and return a plugin class
+
+        Args:
+            name: Plugin name
+
+        Returns:
+            Plugin class
+
+        Raises:
+            PluginError: If the plugin is unknown or fails to import
+        """
+        cls = self._loaded.get(name)
+        if cls is not None:
+            return cls
+
+        if name not in self:
+            raise PluginError(f"Unknown {self.kind} plugin: {name}")
+
+        module_name, _, attr = self._targets[name].partition(':')
+        try:
+            module = importlib.import_module(module_name)
+            cls = getattr(module, attr)
+        except (ImportError, AttributeError) as e:
+            raise PluginError(f"Failed to load {self.kind} plugin '{name}' "
+                              f"({self._targets[name]}): {e}") from e
+
+        self._loaded[name] = cls
+        logger.debug(f"Loaded {self.kind} plugin '{name}' from {module_name}")
+        return cls
+
+    def _discover(self) -> None:
+        """Add entry point plugins (once, and only when needed)"""
+        if self._discovered:
+            return
+        self._discovered = True
+
+        for entry_point in _entry_points(self.group):
+            if entry_point.name in self._targets:
+                continue
+            self._targets[entry_point.name] = entry_point.value
+            logger.debug(f"Found {self.kind} plugin '{entry_point.name}' "
+                         f"at {entry_point.value}")
+
+
+def _entry_points(group: str) -> List[Any]:
+    """
+    Get the installed entry points of a group
+
+    Args:
+        group: Entry point group name
+
+    Returns:
+        List of entry points (empty if they cannot be read)
+    """
+    from importlib import metadata
+
+    try:
+        entry_points = metadata.entry_points()
+        if sys.version_info >= (3, 10):
+            return list(entry_points.select(group=group))
+        # Python 3.9 returns a dict of group -> entry points
+        return list(entry_points.get(group, ()))
+    except Exception as e:
+        logger.warning(f"Failed to read entry points for {group}: {e}")
+        return []
+
+
+collectors = PluginRegistry('collector', COLLECTOR_GROUP, BUILTIN_COLLECTORS)
+storage_backends = PluginRegistry('storage', STORAGE_GROUP, BUILTIN_STORAGE)
@@ -0,0 +1,414 @@
+"""
+Compact typed samples
+
+A collector that knows its metrics up front declares them once as a
+Schema and fills a Sample per cycle: a __slots__ object holding the
+timestamp, hostname and a flat list of values in schema order
+(sample.data), instead of a fresh dictionary that repeats every key.
+Metric names are interned to small integer ids, shared process-wide.
+
+The agent merges the samples of one tick into a single Sample over the
+combined schema (cached per combination of collectors), with values from
+collectors that still return dictionaries, and the agent's own metrics,
+kept in an 'extra' dictionary. No per-collector dictionaries are built and
+no keys are copied or filtered.
+
+Per-entity slots carry a label: the CPU collector sets
+cpu_usage_per_core with set_series(), which records one series per core,
+labelled core=0, core=1, ... with interned label sets, and series()
+yields every value as (metric id, label set, value). The Prometheus,
+InfluxDB and SQLite encoders read those series (see
+src.storage.iter_series) and cache their rendering per label set.
+
+A Sample is also a read-only Mapping, so file storage and display read it
+like the flat dictionary they always did ('cpu_usage_percent' in sample,
+sample['memory_used'], sample.items(); a labelled slot reads as its list
+of values); to_dict() gives the plain dictionary for serialization.
+Consumers on the hot path can skip the name lookups instead: BasicAlerting
+resolves its rules' metric ids to schema slots once per schema and reads
+values with get_slot().
+
+    SCHEMA = Schema(('cpu_usage_percent', 'cpu_usage_per_core'),
+                    labels={'cpu_usage_per_core': 'core'})
+    sample = SCHEMA.new_sample(time.time(), 'web-1')
+    sample.set('cpu_usage_percent', 12.5)
+    sample.set_series('cpu_usage_per_core', [10.0, 15.0])
+"""
+
+import threading
+from collections.abc import Mapping
+from typing import Dict, Any, Optional, List, Tuple, Iterator, Sequence
+
+# Process-wide metric name <-> id tables
+_ids: Dict[str, int] = {}
+_names: List[str] = []
+_lock = threading.Lock()
+
+# (name, value) label pairs of one series, e.g. (('core', '0'),)
+LabelSet = Tuple[Tuple[str, str], ...]
+
+# Interned label sets, entity label sets per label name, combined schemas
+_label_sets: Dict[LabelSet, LabelSet] = {}
+_entity_label_sets: Dict[str, Tuple[LabelSet, ...]] = {}
+_combined: Dict[Tuple['Schema', ...], 'Schema'] = {}
+
+# Marks a slot whose value was not collected this cycle
+_MISSING: Any = object()
+
+_RESERVED = ('timestamp', 'hostname')
+
+
+def metric_id(name: str) -> int:
+    """
+    Get the interned id of a metric name
+
+    Args:
+        name: Metric name
+
+    Returns:
+        Small integer id, stable for the life of the process
+    """
+    mid = _ids.get(name)
+    if mid is None:
+        with _lock:
+            mid = _ids.get(name)
+            if mid is None:
+                mid = _ids[name] = len(_names)
+                _names.append(name)
+    return mid
+
+
+def metric_name(mid: int) -> str:
+    """
+    Get the metric name of an interned id
+
+    Args:
+        mid: Id returned by metric_id()
+
+    Returns:
+        Metric name
+    """
+    return _names[mid]
+
+
+def label_set(*pairs: Tuple[str, str]) -> LabelSet:
+    """
+    Get the interned label set of (name, value) pairs
+
+    Equal label sets are the same tuple object, so series keyed by them
+    share one copy.
+
+    Returns:
+        Tuple of (name, value) pairs
+    """
+    labels = tuple(pairs)
+    return _label_sets.setdefault(labels, labels)
+
+
+def entity_label_sets(label: str, count: int) -> Tuple[LabelSet, ...]:
+    """
+    Get the interned label sets of entities 0 .. count-1
+
+    Args:
+        label: Label name, e.g. 'core'
+        count: Number of entities
+
+    Returns:
+        Label sets (label=0,), (label=1,), ...; cached per label name, so
+        possibly longer than count
+    """
+    sets = _entity_label_sets.get(label, ())
+    if len(sets) < count:
+        sets += tuple(label_set((label, str(entity))) for entity in range(len(sets), count))
+        _entity_label_sets[label] = sets
+    return sets
+
+
+class Series:
+    """Values of one metric per entity, each its own labelled series"""
+
+    __slots__ = ('label_sets', 'values')
+
+    def __init__(self, label_sets: Tuple[LabelSet, ...], values: List[Any]):
+        """
+        Initialize series
+
+        Args:
+            label_sets: Label set per entity (at least len(values))
+            values: Value per entity
+        """
+        self.label_sets = label_sets
+        self.values = values
+
+    def __iter__(self) -> Iterator[Tuple[LabelSet, Any]]:
+        return zip(self.label_sets, self.values)
+
+
+class Schema:
+    """Ordered metric names of one collector, and their labels"""
+
+    __slots__ = ('names', 'ids', 'index', 'labels')
+
+    def __init__(self, names: Sequence[str], labels: Optional[Dict[str, str]] = None):
+        """
+        Initialize schema
+
+        Args:
+            names: Metric names in slot order
+            labels: Label name of per-entity slots, whose values are set
+                with Sample.set_series ({'cpu_usage_per_core': 'core'})
+        """
+        self.names: Tuple[str, ...] = tuple(names)
+        self.ids: Tuple[int, ...] = tuple(metric_id(name) for name in self.names)
+        # Later duplicates win, like dict.update()
+        self.index: Dict[str, int] = {name: slot for slot, name in enumerate(self.names)}
+        self.labels: Dict[str, str] = dict(labels or {})
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def new_sample(self, timestamp: Optional[float] = None,
+                   hostname: Optional[str] = None) -> 'Sample':
+        """Create an empty sample of this schema"""
+        return Sample(self, timestamp, hostname)
+
+    @staticmethod
+    def combine(schemas: Tuple['Schema', ...]) -> 'Schema':
+        """
+        Get the schema of several schemas' slots laid end to end
+
+        Args:
+            schemas: Schemas in merge order
+
+        Returns:
+            Combined schema, cached per combination
+        """
+        if len(schemas) == 1:
+            return schemas[0]
+        combined = _combined.get(schemas)
+        if combined is None:
+            labels: Dict[str, str] = {}
+            for schema in schemas:
+                labels.update(schema.labels)
+            combined = Schema([name for schema in schemas for name in schema.names], labels)
+            _combined[schemas] = combined
+        return combined
+
+
+_EMPTY_SCHEMA = Schema(())
+
+
+class Sample(Mapping):
+    """One sample: timestamp, hostname and values in schema order"""
+
+    __slots__ = ('timestamp', 'hostname', 'schema', 'data', 'extra')
+
+    def __init__(self, schema: Schema, timestamp: Optional[float] = None,
+                 hostname: Optional[str] = None, values: Optional[List[Any]] = None,
+                 extra: Optional[Dict[str, Any]] = None):
+        """
+        Initialize sample
+
+        Args:
+            schema: Schema of the values
+            timestamp: Unix timestamp
+            hostname: Host the sample was taken on
+            values: Values in schema order (default: all missing)
+            extra: Values of metrics outside the schema
+        """
+        self.timestamp = timestamp
+        self.hostname = hostname
+        self.schema = schema
+        self.data = values if values is not None else [_MISSING] * len(schema)
+        self.extra = extra
+
+    @classmethod
+    def merge(cls, timestamp: float, hostname: str, samples: List['Sample'],
+              extra: Optional[Dict[str, Any]] = None) -> 'Sample':
+        """
+        Merge samples into one over their combined schema
+
+        Args:
+            timestamp: Timestamp of the merged sample
+            hostname: Hostname of the merged sample
+            samples: Samples to merge, in order (a metric in several
+                schemas is read from the last one)
+            extra: Values outside every schema (override schema values)
+
+        Returns:
+            Merged sample
+        """
+        if not samples:
+            return cls(_EMPTY_SCHEMA, timestamp, hostname, [], extra)
+        values: List[Any] = []
+        merged: Optional[Dict[str, Any]] = None
+        for sample in samples:
+            values.extend(sample.data)
+            if sample.extra:
+                merged = merged if merged is not None else {}
+                merged.update(sample.extra)
+        if merged is not None:
+            merged.update(extra or {})
+            extra = merged
+        schema = Schema.combine(tuple(sample.schema for sample in samples))
+        return cls(schema, timestamp, hostname, values, extra)
+
+    def set(self, name: str, value: Any) -> None:
+        """
+        Set a metric value
+
+        Args:
+            name: Metric name (a schema slot, else stored in extra)
+            value: Value
+        """
+        slot = self.schema.index.get(name)
+        if slot is not None:
+            if isinstance(value, list) and name in self.schema.labels:
+                self.set_series(name, value)
+            else:
+                self.data[slot] = value
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[name] = value
+
+    def update(self, metrics: Dict[str, Any]) -> None:
+        """Set several metric values from a dictionary"""
+        for name, value in metrics.items():
+            self.set(name, value)
+
+    def set_series(self, name: str, values: Optional[List[Any]]) -> None:
+        """
+        Set a per-entity metric as one labelled series per entity
+
+        Args:
+            name: Metric name with a label in the schema
+                ('cpu_usage_per_core')
+            values: Value per entity; values[i] is the series labelled
+                <label>=i (core=0, core=1, ...). None records the metric
+                as not available, like set()
+
+        Raises:
+            KeyError: If the schema has no label for name
+        """
+        label = self.schema.labels[name]
+        slot = self.schema.index[name]
+        if values is None:
+            self.data[slot] = None
+        else:
+            self.data[slot] = Series(entity_label_sets(label, len(values)), values)
+
+    def get_slot(self, slot: int, default: Any = None) -> Any:
+        """
+        Get the value of a schema slot, without a name lookup
+
+        Consumers that resolve their metrics to slots once per schema
+        (see BasicAlerting) read values this way.
+
+        Args:
+            slot: Slot index in schema order
+            default: Returned when the slot was not collected
+
+        Returns:
+            Slot value (values in extra are not consulted); a labelled
+            slot reads as its list of values
+        """
+        value = self.data[slot]
+        if value is _MISSING:
+            return default
+        return value.values if type(value) is Series else value
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def get(self, key: str, default: Any = None) -> Any:
+        extra = self.extra
+        if extra and key in extra:
+            return extra[key]
+        slot = self.schema.index.get(key)
+        if slot is not None:
+            value = self.data[slot]
+            if value is not _MISSING:
+                return value.values if type(value) is Series else value
+        elif key == 'timestamp' and self.timestamp is not None:
+            return self.timestamp
+        elif key == 'hostname' and self.hostname is not None:
+            return self.hostname
+        return default
+
+    def __contains__(self, key: object) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __iter__(self) -> Iterator[str]:
+        for key, _ in self.items():
+            yield key
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.items())
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        """Iterate (name, value) pairs in dictionary order"""
+        extra = self.extra or {}
+        if self.timestamp is not None and 'timestamp' not in extra:
+            yield 'timestamp', self.timestamp
+        if self.hostname is not None and 'hostname' not in extra:
+            yield 'hostname', self.hostname
+        index = self.schema.index
+        for slot, (name, value) in enumerate(zip(self.schema.names, self.data)):
+            if value is not _MISSING and index[name] == slot and name not in extra:
+                yield name, value.values if type(value) is Series else value
+        yield from extra.items()
+
+    def series(self, names: bool = False) -> Iterator[Tuple[Any, LabelSet, Any]]:
+        """
+        Iterate labelled series
+
+        Args:
+            names: Yield metric names instead of ids (for encoders that
+                key on names, saving the id round trip)
+
+        Yields:
+            (metric id, label set, value) per plain value, with an empty
+            label set, and per entity of labelled slots (core=0, core=1,
+            ...); timestamp and hostname are not series
+        """
+        extra = self.extra or {}
+        schema = self.schema
+        index = schema.index
+        keys = schema.names if names else schema.ids
+        for slot, (name, key, value) in enumerate(zip(schema.names, keys, self.data)):
+            if value is _MISSING or index[name] != slot or name in extra:
+                continue
+            if type(value) is Series:
+                for labels, item in value:
+                    yield key, labels, item
+            else:
+                yield key, (), value
+        for name, value in extra.items():
+            if name not in _RESERVED:
+                yield name if names else metric_id(name), (), value
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the sample as a flat dictionary"""
+        return dict(self.items())
+
+    def __repr__(self) -> str:
+        return f'Sample({self.to_dict()!r})'
+
+
+def json_default(value: Any) -> Any:
+    """
+    json.dumps() fallback that serializes samples as objects
+
+    Args:
+        value: Value json cannot serialize by itself
+
+    Returns:
+        Plain dictionary for a Sample, else str(value)
+    """
+    if isinstance(value, Sample):
+        return value.to_dict()
+    return str(value)
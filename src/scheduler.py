@@ -0,0 +1,180 @@
+"""
+Drift-free per-collector scheduler
+
+Each collector fires on its own interval, aligned to wall-clock boundaries
+(a 10s collector fires at :00, :10, :20, ...). Due times are kept on the
+monotonic clock in a priority queue and advance by whole intervals from the
+schedule, never from when a run finished, so collection time does not
+accumulate as drift and one slow run does not shift later ticks.
+"""
+
+import heapq
+import math
+import time
+import logging
+import threading
+from typing import Dict, Any, List, Optional, Tuple, Callable
+
+logger = logging.getLogger(__name__)
+
+# Due times closer than this fire on the same tick (absorbs float error
+# between intervals that share boundaries, e.g. 10s and 60s)
+_COALESCE_WINDOW = 0.001
+
+
+class ScheduledTask:
+    """Schedule state for one collector"""
+
+    __slots__ = ('name', 'interval', 'next_due', 'runs', 'late_ticks', 'missed_ticks',
+                 'last_lateness')
+
+    def __init__(self, name: str, interval: float, next_due: float):
+        """
+        Initialize scheduled task
+
+        Args:
+            name: Collector name
+            interval: Interval in seconds
+            next_due: Monotonic time of the first run
+        """
+        self.name = name
+        self.interval = interval
+        self.next_due = next_due
+        self.runs = 0
+        self.late_ticks = 0
+        self.missed_ticks = 0
+        self.last_lateness = 0.0
+
+
+class CollectorScheduler:
+    """Priority-queue scheduler firing each collector on its own cadence"""
+
+    def __init__(self, late_tolerance: float = 0.5,
+                 clock: Callable[[], float] = time.monotonic,
+                 wall_clock: Callable[[], float] = time.time):
+        """
+        Initialize scheduler
+
+        Args:
+            late_tolerance: Seconds after its due time a tick may fire
+                before it is counted as late
+            clock: Monotonic clock (overridable for tests)
+            wall_clock: Wall clock used for alignment and sample timestamps
+        """
+        self.late_tolerance = late_tolerance
+        self.clock = clock
+        self.wall_clock = wall_clock
+        self.tasks: Dict[str, ScheduledTask] = {}
+        self._queue: List[Tuple[float, int, str]] = []
+        self._seq = 0
+
+        # Offset that maps monotonic times onto the wall clock, fixed at start
+        self._wall_offset = wall_clock() - clock()
+
+    def add(self, name: str, interval: float, align: bool = True) -> None:
+        """
+        Schedule a collector
+
+        Args:
+            name: Collector name
+            interval: Interval in seconds
+            align: Whether to align runs to multiples of interval on the
+                wall clock; otherwise the first run is immediate
+        """
+        if interval <= 0:
+            raise ValueError(f"Interval for '{name}' must be positive, got {interval}")
+
+        now = self.clock()
+        if align:
+            wall_now = now + self._wall_offset
+            first_due = math.ceil(wall_now / interval) * interval - self._wall_offset
+        else:
+            first_due = now
+
+        task = ScheduledTask(name, interval, first_due)
+        self.tasks[name] = task
+        self._push(task)
+        logger.debug(f"Scheduled '{name}' every {interval}s")
+
+    def wait_due(self, stop_event: threading.Event) -> Optional[Tuple[float, List[str]]]:
+        """
+        Block until the next tick and return the collectors due on it
+
+        Tasks sharing a due time fire together, so collectors with equal or
+        harmonic intervals end up in the same sample.
+
+        Args:
+            stop_event: Event that aborts the wait when set
+
+        Returns:
+            Tuple of (scheduled wall-clock timestamp, due collector names),
+            or None if stop_event was set
+        """
+        if not self._queue:
+            stop_event.wait()
+            return None
+
+        due = self._queue[0][0]
+        delay = due - self.clock()
+        if delay > 0 and stop_event.wait(delay):
+            return None
+        if stop_event.is_set():
+            return None
+
+        now = self.clock()
+        names = []
+        while self._queue and self._queue[0][0] <= due + _COALESCE_WINDOW:
+            _, _, name = heapq.heappop(self._queue)
+            task = self.tasks[name]
+            self._advance(task, now)
+            names.append(name)
+
+        return due + self._wall_offset, names
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cumulative schedule statistics
+
+        Returns:
+            Dictionary with total runs, late and missed ticks, and the
+            largest lateness of the most recent runs in ms
+        """
+        tasks = self.tasks.values()
+        return {
+            'runs': sum(t.runs for t in tasks),
+            'late_ticks': sum(t.late_ticks for t in tasks),
+            'missed_ticks': sum(t.missed_ticks for t in tasks),
+            'lateness_ms': round(max((t.last_lateness for t in tasks), default=0.0) * 1000, 1),
+        }
+
+    def _advance(self, task: ScheduledTask, now: float) -> None:
+        """
+        Record a run and schedule the task's next tick
+
+        Ticks whose due time has already passed completely are skipped
+        (counted as missed) rather than fired back to back.
+
+        Args:
+            task: Task that is firing
+            now: Current monotonic time
+        """
+        lateness = max(now - task.next_due, 0.0)
+        task.runs += 1
+        task.last_lateness = lateness
+
+        skipped = int(lateness // task.interval)
+        if skipped:
+            task.missed_ticks += skipped
+            logger.warning(f"Collector '{task.name}' missed {skipped} tick(s), "
+                           f"running {lateness:.2f}s behind schedule")
+        elif lateness > self.late_tolerance:
+            task.late_ticks += 1
+            logger.info(f"Collector '{task.name}' tick fired {lateness:.2f}s late")
+
+        task.next_due += (skipped + 1) * task.interval
+        self._push(task)
+
+    def _push(self, task: ScheduledTask) -> None:
+        # The sequence number keeps equal due times in insertion order
+        self._seq += 1
+        heapq.heappush(self._queue, (task.next_due, self._seq, task.name))
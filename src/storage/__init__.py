@@ -4,12 +4,90 @@ Storage backends module
 Adapters for Prometheus, InfluxDB, and other time-series databases.
 """
 
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Iterator, Tuple
 from abc import ABC, abstractmethod
+from src.sample import Sample, LabelSet, entity_label_sets
+
+# Label (tag) names for per-entity keys whose suffix is not a good name
+ENTITY_LABELS = {'cgroup_per_path': 'cgroup'}
+
+
+def entity_label(key: str) -> str:
+    """
+    Get the label name for the entities of a '*_per_*' key
+
+    Args:
+        key: Per-entity key such as 'disk_io_per_device'
+
+    Returns:
+        Label name such as 'device'
+    """
+    return ENTITY_LABELS.get(key) or key.rsplit('_per_', 1)[1]
+
+
+def iter_series(metrics: Dict[str, Any]) -> Iterator[Tuple[str, LabelSet, Any]]:
+    """
+    Iterate a sample's values as labelled series
+
+    Typed samples yield their labelled slots as one series per entity
+    (cpu_usage_per_core with core=0, core=1, ...). Lists under '*_per_*'
+    keys of plain dictionaries are labelled the same way, by index, with
+    the same interned label sets, so encoders can cache per label set.
+
+    Args:
+        metrics: Sample, or sample dictionary
+
+    Yields:
+        (metric name, label set, value); the label set is empty for plain
+        values and for per-entity dictionaries, which are yielded whole.
+        Timestamp and hostname are skipped
+    """
+    if isinstance(metrics, Sample):
+        for name, labels, value in metrics.series(names=True):
+            if labels or not isinstance(value, list):
+                yield name, labels, value
+            else:
+                yield from _entity_series(name, value)
+        return
+    for name, value in metrics.items():
+        if name in ('timestamp', 'hostname'):
+            continue
+        if not isinstance(value, list):
+            yield name, (), value
+        else:
+            yield from _entity_series(name, value)
+
+
+def _entity_series(name: str, values: List[Any]) -> Iterator[Tuple[str, LabelSet, Any]]:
+    """Series of a per-entity list, labelled by index; other lists whole"""
+    if '_per_' not in name:
+        yield name, (), values
+        return
+    for labels, value in zip(entity_label_sets(entity_label(name), len(values)), values):
+        yield name, labels, value
+
 
 class StorageBackend(ABC):
     """Abstract base class for storage backends"""
 
+    @classmethod
+    def from_config(cls, config: Dict[str, Any],
+                    storage_config: Optional[Dict[str, Any]] = None) -> 'StorageBackend':
+        """
+        Create a backend from its configuration section
+
+        Args:
+            config: The backend's section under 'storage' (constructor
+                keyword arguments by default)
+            storage_config: The whole 'storage' section, for backends
+                composed of other backends configured in their own
+                sections (ignored by default)
+
+        Returns:
+            Configured backend
+        """
+        return cls(**config)
+
     @abstractmethod
     def write_metrics(self, metrics: Dict[str, Any]) -> bool:
         """
@@ -37,3 +115,16 @@ class StorageBackend(ABC):
             List of metric data points
         """
         pass
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get backend statistics reported as agent metrics
+
+        Returns:
+            Dictionary of statistic name to value (empty by default)
+        """
+        return {}
+
+    def close(self) -> None:
+        """Flush pending data and release resources"""
+        pass
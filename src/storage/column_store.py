@@ -0,0 +1,206 @@
+"""
+Raw float64 column files with a memory-mapped, zero-copy read path
+
+FileStorage can mirror the numeric top-level metrics of each day into a
+directory of fixed-width column files (metrics-YYYY-MM-DD.cols/):
+
+    timestamp.f64         one float64 per sample
+    <metric>.f64          one float64 per sample, NaN where missing
+
+Columns are row-aligned, so row i of every file belongs to the same sample.
+On every flush the metric columns are appended first and the timestamp
+column last: the timestamp file's length is the commit point, and readers
+never look past it. A reader therefore stays consistent while the writer
+appends to today's directory, and bytes left behind by an interrupted
+flush are trimmed by the writer before its next append.
+
+Readers map the files read-only and return memoryview casts ('d') of the
+mappings, so analysis works on the page cache directly: nothing is copied
+or parsed, and concurrent readers share the same pages. Values are stored
+in host byte order; ints above 2**53 lose precision.
+"""
+
+import os
+import mmap
+import bisect
+import logging
+from array import array
+from pathlib import Path
+from typing import Dict, Any, Optional, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+SUFFIX = '.f64'
+TIMESTAMP_COLUMN = 'timestamp'
+_WIDTH = array('d').itemsize
+_NAN = float('nan')
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _column_file(directory: Path, name: str) -> Optional[Path]:
+    """Column file path for a metric, or None if the name is not file-safe"""
+    if not name or name.startswith('.') or '/' in name or '\0' in name:
+        return None
+    return directory / f'{name}{SUFFIX}'
+
+
+def append_columns(directory: Path, samples: List[Dict[str, Any]]) -> int:
+    """
+    Append the numeric metrics of samples to a day's column files
+
+    Args:
+        directory: Column directory for the day (created if missing)
+        samples: Samples to append; samples without a numeric timestamp
+            are skipped
+
+    Returns:
+        Number of rows appended
+    """
+    samples = [s for s in samples if _is_number(s.get(TIMESTAMP_COLUMN))]
+    if not samples:
+        return 0
+    directory.mkdir(parents=True, exist_ok=True)
+
+    timestamp_path = directory / f'{TIMESTAMP_COLUMN}{SUFFIX}'
+    try:
+        committed = os.path.getsize(timestamp_path) // _WIDTH
+    except FileNotFoundError:
+        committed = 0
+
+    names = {entry.name[:-len(SUFFIX)] for entry in os.scandir(directory)
+             if entry.name.endswith(SUFFIX)}
+    for sample in samples:
+        for name, value in sample.items():
+            if _is_number(value):
+                names.add(name)
+    names.discard(TIMESTAMP_COLUMN)
+
+    count = len(samples)
+    for name in names:
+        path = _column_file(directory, name)
+        if path is None:
+            continue
+        values = array('d', [_NAN] * count)
+        for row, sample in enumerate(samples):
+            value = sample.get(name)
+            if _is_number(value):
+                values[row] = value
+
+        with open(path, 'ab') as f:
+            size = f.tell()
+            expected = committed * _WIDTH
+            if size > expected:
+                # Leftover of an interrupted flush beyond the commit point
+                f.truncate(expected)
+            elif size < expected:
+                # New metric (or a short column): earlier rows are missing
+                whole = size - size % _WIDTH
+                f.truncate(whole)
+                f.write(array('d', [_NAN] * ((expected - whole) // _WIDTH)).tobytes())
+            f.write(values.tobytes())
+
+    # Commit: the rows become visible to readers once timestamps land
+    with open(timestamp_path, 'ab') as f:
+        if f.tell() != committed * _WIDTH:
+            f.truncate(committed * _WIDTH)
+        f.write(array('d', [float(s[TIMESTAMP_COLUMN]) for s in samples]).tobytes())
+    return count
+
+
+class DayColumns:
+    """Read-only, memory-mapped view of one day's column files"""
+
+    def __init__(self, directory: Path):
+        """
+        Map a day's timestamp column
+
+        Args:
+            directory: Column directory for the day
+        """
+        self.directory = Path(directory)
+        timestamps = self._map(TIMESTAMP_COLUMN)
+        # Rows committed when this reader opened; later appends are ignored
+        self.rows = len(timestamps) // _WIDTH
+        self.timestamps = timestamps[:self.rows * _WIDTH].cast('d')
+
+    def metrics(self) -> List[str]:
+        """
+        Get the metric names stored for the day
+
+        Returns:
+            Sorted metric names (excluding the timestamp column)
+        """
+        return sorted(entry.name[:-len(SUFFIX)] for entry in os.scandir(self.directory)
+                      if entry.name.endswith(SUFFIX)
+                      and entry.name != f'{TIMESTAMP_COLUMN}{SUFFIX}')
+
+    def column(self, name: str) -> Optional[memoryview]:
+        """
+        Get a metric's values as a zero-copy float64 view
+
+        Args:
+            name: Metric name
+
+        Returns:
+            View aligned with timestamps (possibly shorter if the column
+            was cut short), or None if the metric is not stored
+        """
+        path = _column_file(self.directory, name)
+        if path is None or not path.exists():
+            return None
+        view = self._map(name)
+        rows = min(self.rows, len(view) // _WIDTH)
+        return view[:rows * _WIDTH].cast('d')
+
+    def row_range(self, start_time: float, end_time: float) -> Tuple[int, int]:
+        """
+        Find the rows whose timestamps fall in a range
+
+        Args:
+            start_time: Range start (Unix epoch, inclusive)
+            end_time: Range end (Unix epoch, inclusive)
+
+        Returns:
+            Tuple of (first row, end row) for slicing
+        """
+        return (bisect.bisect_left(self.timestamps, start_time),
+                bisect.bisect_right(self.timestamps, end_time))
+
+    def _map(self, name: str) -> memoryview:
+        """Map a column file read-only; empty or missing files give an empty view"""
+        path = self.directory / f'{name}{SUFFIX}'
+        try:
+            with open(path, 'rb') as f:
+                # The mapping keeps its own reference to the file
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            return memoryview(b'')
+        return memoryview(mapped)
+
+
+def read_range(directory: Path, name: str, start_time: float,
+               end_time: float) -> Optional[Tuple[memoryview, memoryview]]:
+    """
+    Get zero-copy views of one metric over a time range within a day
+
+    Args:
+        directory: Column directory for the day
+        name: Metric name
+        start_time: Range start (Unix epoch, inclusive)
+        end_time: Range end (Unix epoch, inclusive)
+
+    Returns:
+        Tuple of (timestamps, values) views of equal length, or None if
+        the day has no such metric
+    """
+    day = DayColumns(directory)
+    values = day.column(name)
+    if values is None:
+        return None
+    first, end = day.row_range(start_time, end_time)
+    end = min(end, len(values))
+    first = min(first, end)
+    return day.timestamps[first:end], values[first:end]
@@ -0,0 +1,200 @@
+"""
+Seekable block-compressed JSON Lines files
+
+Closed daily JSONL files are rewritten as independent zlib blocks of whole
+lines, followed by an offset table, so a reader can jump to the block that
+holds a time range and decompress only from there, one block at a time:
+
+    magic 'MZB1' | block | block | ... | table | footer
+
+    block:  zlib stream of complete JSON lines (about block_size raw bytes)
+    table:  per block: f64 first timestamp, u64 offset, u32 compressed
+            length, u32 raw length
+    footer: u64 table offset | u32 block count | magic 'MZB1'
+
+The table takes the place of the .idx sidecar of a plain JSONL file. A
+file without a valid footer (e.g. cut short while being written) is
+rejected as a whole; compression writes a temporary file and renames it,
+so that only happens to files damaged afterwards.
+
+Compress a file by hand with:
+
+    python -m src.storage.compressed_file metrics-2024-01-01.jsonl metrics-2024-01-01.jsonz
+"""
+
+import os
+import zlib
+import json
+import bisect
+import struct
+import logging
+import argparse
+from typing import List, Tuple, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'MZB1'
+EXTENSION = 'jsonz'
+
+_BLOCK = struct.Struct('<dQII')
+_FOOTER = struct.Struct('<QI4s')
+
+
+class CompressedFileError(Exception):
+    """Raised when a compressed file is malformed"""
+
+
+def _first_timestamp(lines: List[bytes], default: float) -> float:
+    """Timestamp of the first line that has one"""
+    for line in lines:
+        try:
+            timestamp = json.loads(line).get('timestamp')
+        except (ValueError, AttributeError):
+            continue
+        if isinstance(timestamp, (int, float)) and not isinstance(timestamp, bool):
+            return float(timestamp)
+    return default
+
+
+def compress_file(src: str, dst: str, block_size: int = 256 * 1024, level: int = 6) -> Tuple[int, int]:
+    """
+    Compress a JSONL file into the block format
+
+    The output is written to a temporary file, fsynced and renamed into
+    place, so dst either does not exist or is complete.
+
+    Args:
+        src: JSONL file path
+        dst: Compressed file path
+        block_size: Raw bytes per block; smaller blocks seek more precisely,
+            larger ones compress better
+        level: zlib compression level
+
+    Returns:
+        Tuple of (raw bytes, compressed file bytes)
+    """
+    temp_path = dst + '.tmp'
+    table = []
+    raw_total = 0
+    previous_timestamp = float('-inf')
+    try:
+        with open(src, 'rb') as source, open(temp_path, 'wb') as out:
+            out.write(MAGIC)
+            lines: List[bytes] = []
+            pending = 0
+            for line in source:
+                if not line.endswith(b'\n'):
+                    line += b'\n'  # Torn last line of a crashed flush
+                lines.append(line)
+                pending += len(line)
+                if pending >= block_size:
+                    previous_timestamp = _write_block(out, lines, level, table, previous_timestamp)
+                    raw_total += pending
+                    lines, pending = [], 0
+            if lines:
+                _write_block(out, lines, level, table, previous_timestamp)
+                raw_total += pending
+
+            table_offset = out.tell()
+            out.write(b''.join(_BLOCK.pack(*entry) for entry in table))
+            out.write(_FOOTER.pack(table_offset, len(table), MAGIC))
+            out.flush()
+            os.fsync(out.fileno())
+            compressed_total = out.tell()
+        os.replace(temp_path, dst)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+    return raw_total, compressed_total
+
+
+def _write_block(out, lines: List[bytes], level: int, table: List[Tuple[float, int, int, int]],
+                 previous_timestamp: float) -> float:
+    """Compress one block of lines and record it in the table"""
+    raw = b''.join(lines)
+    data = zlib.compress(raw, level)
+    # A block without timestamps sorts with its predecessor
+    timestamp = _first_timestamp(lines, previous_timestamp)
+    table.append((timestamp, out.tell(), len(data), len(raw)))
+    out.write(data)
+    return timestamp
+
+
+class BlockReader:
+    """Streaming reader of a block-compressed file"""
+
+    def __init__(self, path: str):
+        """
+        Open a compressed file and load its block table
+
+        Args:
+            path: Compressed file path
+
+        Raises:
+            CompressedFileError: If the file has no valid footer or table
+        """
+        self.path = path
+        with open(path, 'rb') as f:
+            size = f.seek(0, os.SEEK_END)
+            if size < len(MAGIC) + _FOOTER.size:
+                raise CompressedFileError(f"{path}: too short")
+            f.seek(size - _FOOTER.size)
+            table_offset, count, magic = _FOOTER.unpack(f.read(_FOOTER.size))
+            if magic != MAGIC or table_offset + count * _BLOCK.size != size - _FOOTER.size:
+                raise CompressedFileError(f"{path}: bad footer")
+            f.seek(table_offset)
+            table = f.read(count * _BLOCK.size)
+        self.blocks: List[Tuple[float, int, int, int]] = list(_BLOCK.iter_unpack(table))
+        self._times = [block[0] for block in self.blocks]
+
+    @property
+    def raw_size(self) -> int:
+        """Total uncompressed bytes"""
+        return sum(block[3] for block in self.blocks)
+
+    def iter_lines(self, start_time: Optional[float] = None) -> Iterator[bytes]:
+        """
+        Stream the lines of the file, starting near a time
+
+        Only one block is decompressed in memory at a time.
+
+        Args:
+            start_time: Skip the blocks that end before this time (every
+                line from the block holding it on is yielded); None reads
+                from the start
+
+        Yields:
+            Lines including their newline
+        """
+        first = 0
+        if start_time is not None:
+            first = max(bisect.bisect_left(self._times, start_time) - 1, 0)
+        with open(self.path, 'rb') as f:
+            for _, offset, length, raw_length in self.blocks[first:]:
+                f.seek(offset)
+                try:
+                    raw = zlib.decompress(f.read(length))
+                except zlib.error as e:
+                    raise CompressedFileError(f"{self.path}: damaged block at {offset}: {e}")
+                if len(raw) != raw_length:
+                    raise CompressedFileError(f"{self.path}: short block at {offset}")
+                yield from raw.splitlines(keepends=True)
+
+
+def main() -> None:
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Compress a metrics JSONL file into seekable blocks")
+    parser.add_argument("src", help="JSONL file")
+    parser.add_argument("dst", help="Compressed output file")
+    parser.add_argument("--block-size", type=int, default=256 * 1024, help="Raw bytes per block")
+    args = parser.parse_args()
+
+    raw, compressed = compress_file(args.src, args.dst, args.block_size)
+    print(f"Compressed {raw} bytes to {compressed} ({raw / max(compressed, 1):.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,31 +2,135 @@
 Local file-based storage backend
 """
 
+import os
 import json
+import time
+import queue
+import bisect
+import struct
 import logging
+import threading
 from pathlib import Path
-from datetime import datetime
-from typing import Dict, Any, List
+from datetime import datetime, date, timedelta
+from typing import Dict, Any, List, Optional, Tuple, Iterator, Iterable, Set
 from src.storage import StorageBackend
+from src.storage.segment_format import encode_segment, decode_segment, SegmentError
+from src.storage import column_store
+from src.storage.spool import WriteAheadSpool
+from src.storage.rollup import RollupEngine, RollupTier, TIERS
+from src.storage.retention import RetentionManager, lower_io_priority
+from src.storage import compressed_file
+from src.sample import json_default
 
 logger = logging.getLogger(__name__)
 
+# Sidecar index entry: (timestamp, byte offset of the record or segment)
+INDEX_ENTRY = struct.Struct('<dQ')
+
+_decoder = json.JSONDecoder()
+_MISSING = object()
+
+# Tells the writer thread to flush and exit
+_STOP = object()
+
+# Seconds a query waits for the writer thread to flush queued samples
+QUERY_FLUSH_TIMEOUT = 5.0
+
 
 class FileStorage(StorageBackend):
-    """File-based storage using JSON Lines format"""
+    """File-based storage using JSON Lines or columnar segment files"""
 
-    def __init__(self, output_dir: str = 'data', buffer_size: int = 100):
+    # File extension per on-disk format
+    FORMATS = {'jsonl': 'jsonl', 'segment': 'seg'}
+
+    FSYNC_POLICIES = ('never', 'interval', 'batch')
+
+    def __init__(self, output_dir: str = 'data', buffer_size: int = 100, format: str = 'jsonl',
+                 index_interval: int = 100, column_files: bool = False,
+                 async_writer: bool = False, queue_size: int = 1000,
+                 fsync: str = 'never', fsync_interval_ms: int = 1000,
+                 spool_durability: str = 'off', spool_group_size: int = 16,
+                 spool_group_interval_ms: int = 5000, rollups: bool = False,
+                 retention_days: Optional[Dict[str, float]] = None,
+                 max_bytes: Optional[int] = None, merge_below_bytes: int = 1024 * 1024,
+                 compress_closed: bool = False, maintenance_interval_s: float = 3600):
         """
         Initialize file storage
 
         Args:
             output_dir: Directory to store metrics files
             buffer_size: Number of metrics to buffer before flushing to disk
+            format: 'jsonl' (one JSON object per line) or 'segment' (one
+                compact columnar segment per flush, see segment_format)
+            index_interval: JSONL records between sidecar index entries
+                (every flush also starts with an entry)
+            column_files: Also mirror numeric metrics into raw float64
+                column files for zero-copy reads (see read_columns)
+            async_writer: Hand samples to a writer thread through a
+                bounded queue instead of flushing on the caller's thread
+            queue_size: Samples the writer queue holds; when it is full
+                new samples are dropped (and counted) rather than
+                stalling collection
+            fsync: When data files are fsynced: 'never' (left to the OS),
+                'interval' (at most every fsync_interval_ms) or 'batch'
+                (after every flush)
+            fsync_interval_ms: Maximum time unsynced data is kept in the
+                page cache with the 'interval' policy
+            spool_durability: 'off', or the durability level of a
+                write-ahead spool ('os', 'group', 'sync') that holds
+                samples until they are flushed and is replayed on start
+            spool_group_size: Records per spool fsync with 'group'
+            spool_group_interval_ms: Maximum age of an unsynced spool
+                record with 'group'
+            rollups: Aggregate flushed samples into 1m and 1h rollup
+                tiers (see rollup), which query_metrics uses for
+                coarse steps
+            retention_days: Days to keep per tier ('raw', '1m', '1h');
+                older day files are deleted. Tiers left out are kept
+                until max_bytes needs their space
+            max_bytes: Size budget of output_dir; the oldest files are
+                evicted to stay under it (see retention)
+            merge_below_bytes: Closed rollup day files smaller than this
+                are merged into monthly files
+            compress_closed: Rewrite JSONL files of past days as seekable
+                block-compressed files (see compressed_file), which stay
+                queryable
+            maintenance_interval_s: Seconds between passes of the
+                maintenance thread, which compresses and applies retention
+                at idle I/O priority
         """
+        if format not in self.FORMATS:
+            raise ValueError(f"Unknown file storage format: {format}")
+        if fsync not in self.FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy: {fsync}")
+
         self.output_dir = Path(output_dir)
         self.buffer_size = buffer_size
+        self.format = format
+        self.index_interval = index_interval
+        self.column_files = column_files
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval_ms / 1000
+        self.compress_closed = compress_closed
         self.buffer: List[Dict[str, Any]] = []
 
+        # Writer statistics, reported by stats()
+        self.bytes_written = 0
+        self.flushes = 0
+        self.fsyncs = 0
+        self.dropped = 0
+        self.last_flush_latency = 0.0
+        self.compressed_files = 0
+        self.compressed_bytes_in = 0
+        self.compressed_bytes_out = 0
+
+        # Spool sequence number of the newest buffered sample
+        self._buffer_seq = 0
+
+        # Data files written since the last fsync ('interval' policy)
+        self._unsynced: Set[Path] = set()
+        self._last_fsync = time.monotonic()
+
         # Create output directory if it doesn't exist
         try:
             self.output_dir.mkdir(parents=True, exist_ok=True)
@@ -35,19 +139,74 @@ class FileStorage(StorageBackend):
             logger.error(f"Failed to create output directory {output_dir}: {e}")
             raise
 
+        self.rollup: Optional[RollupEngine] = None
+        if rollups:
+            self.rollup = RollupEngine(str(self.output_dir))
+
+        self.spool: Optional[WriteAheadSpool] = None
+        if spool_durability != 'off':
+            self.spool = WriteAheadSpool(str(self.output_dir / 'spool.wal'),
+                                         durability=spool_durability,
+                                         group_size=spool_group_size,
+                                         group_interval_ms=spool_group_interval_ms)
+            self._replay_spool()
+
+        self._queue: Optional['queue.Queue[Any]'] = None
+        self._writer: Optional[threading.Thread] = None
+        if async_writer:
+            self._queue = queue.Queue(maxsize=queue_size)
+            self._writer = threading.Thread(target=self._writer_loop, name="file-storage-writer",
+                                            daemon=True)
+            self._writer.start()
+
+        prefixes = {'raw': 'metrics-'}
+        prefixes.update((name, f'rollup-{name}-') for name, _ in TIERS)
+        self.retention = RetentionManager(str(self.output_dir), prefixes,
+                                          retention_days=retention_days, max_bytes=max_bytes,
+                                          merge_below_bytes=merge_below_bytes,
+                                          first_timestamp=self._first_timestamp)
+
+        self._maintenance_stop = threading.Event()
+        self._maintenance: Optional[threading.Thread] = None
+        if compress_closed or retention_days or max_bytes is not None:
+            self._maintenance = threading.Thread(target=self._maintenance_loop,
+                                                 args=(maintenance_interval_s,),
+                                                 name="file-storage-maintenance", daemon=True)
+            self._maintenance.start()
+
     def write_metrics(self, metrics: Dict[str, Any]) -> bool:
         """
         Write metrics to storage (buffered)
 
+        With the async writer this only enqueues the sample (and writes it
+        to the spool, if enabled) and never waits on an fsync, except for
+        a spool with 'sync' durability.
+
         Args:
             metrics: Dictionary of metrics to store
 
         Returns:
-            True if successful, False otherwise
+            True if successful, False otherwise (including a sample
+            dropped because the writer queue is full)
         """
+        seq = self._spool_append(metrics)
+
+        if self._queue is not None:
+            try:
+                self._queue.put_nowait((seq, metrics))
+                return True
+            except queue.Full:
+                self.dropped += 1
+                logger.warning(f"Storage writer queue full, dropped sample "
+                               f"({self.dropped} dropped so far)")
+                return False
+
         try:
             # Add to buffer
             self.buffer.append(metrics)
+            if seq:  # 0 when the spool append failed: keep the earlier samples' seq
+                self._buffer_seq = seq
+            self._spool_sync_due()
 
             # Flush if buffer is full
             if len(self.buffer) >= self.buffer_size:
@@ -66,41 +225,775 @@ class FileStorage(StorageBackend):
 
         # Get date for filename
         date_str = datetime.now().strftime('%Y-%m-%d')
-        filename = self.output_dir / f'metrics-{date_str}.jsonl'
+        filename = self.output_dir / f'metrics-{date_str}.{self.FORMATS[self.format]}'
 
         try:
+            started = time.monotonic()
             # Append to file (create if doesn't exist)
-            with open(filename, 'a', encoding='utf-8') as f:
-                for metric in self.buffer:
-                    json.dump(metric, f, default=str)
-                    f.write('\n')
+            with open(filename, 'ab') as f:
+                offset = f.tell()
+                was_empty = offset == 0
+                entries = self._write_records(f, offset)
+                f.flush()
+                self.bytes_written += f.tell() - offset
+                if self.fsync == 'batch':
+                    os.fsync(f.fileno())
+                    self.fsyncs += 1
+                elif self.fsync == 'interval':
+                    self._unsynced.add(filename)
+
+            if self.column_files:
+                self._write_columns(self.output_dir / f'metrics-{date_str}.cols')
+            if self.rollup is not None:
+                self._write_rollups()
 
             logger.debug(f"Flushed {len(self.buffer)} metrics to {filename}")
             self.buffer.clear()
+            self.flushes += 1
+            self._sync_due()
+            self._commit_spool(filename)
+            self.last_flush_latency = time.monotonic() - started
 
         except Exception as e:
             logger.error(f"Error flushing metrics to {filename}: {e}", exc_info=True)
             # Don't clear buffer on error - retry next time
+            return
+
+        self._append_index(filename, entries, was_empty)
+
+    def _spool_append(self, metrics: Dict[str, Any]) -> int:
+        """
+        Append a sample to the spool, if enabled
+
+        A failing spool does not stop samples from being stored.
+
+        Returns:
+            Spool sequence number, or 0 without a spool
+        """
+        if self.spool is None:
+            return 0
+        try:
+            return self.spool.append(metrics)
+        except (OSError, TypeError, ValueError) as e:
+            logger.error(f"Error appending to spool: {e}")
+            return 0
+
+    def _spool_sync_due(self) -> None:
+        """Fsync the spool's unsynced group if it is due"""
+        if self.spool is None:
+            return
+        try:
+            self.spool.sync_due()
+        except OSError as e:
+            logger.error(f"Error syncing spool: {e}")
+
+    def _replay_spool(self) -> None:
+        """Store the samples a previous run spooled but never flushed"""
+        replayed = self.spool.replay()
+        if not replayed:
+            return
+        logger.info(f"Replaying {len(replayed)} samples from spool {self.spool.path}")
+        self.buffer.extend(sample for _, sample in replayed)
+        self._buffer_seq = replayed[-1][0]
+        self._flush()
+
+    def _commit_spool(self, filename: Path) -> None:
+        """
+        Commit flushed samples to the spool so it can drop them
+
+        With an fsync-based spool level the data file is synced first,
+        so a sample is never durable in neither place.
+
+        Args:
+            filename: Data file the flush wrote to
+        """
+        if self.spool is None or not self._buffer_seq:
+            return
+        try:
+            if self.spool.durability != 'os' and self.fsync != 'batch':
+                fd = os.open(filename, os.O_RDONLY)
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+                self.fsyncs += 1
+                self._unsynced.discard(filename)
+            self.spool.commit(self._buffer_seq)
+        except OSError as e:
+            logger.error(f"Error committing spool: {e}")
+
+    def _sync_due(self, force: bool = False) -> None:
+        """
+        Fsync data files written since the last fsync, if the interval passed
+
+        Args:
+            force: Sync regardless of the interval
+        """
+        if not self._unsynced:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_fsync < self.fsync_interval:
+            return
+
+        for path in self._unsynced:
+            try:
+                fd = os.open(path, os.O_RDONLY)
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+                self.fsyncs += 1
+            except OSError as e:
+                logger.error(f"Error syncing {path}: {e}")
+        self._unsynced.clear()
+        self._last_fsync = now
+
+    def _writer_loop(self) -> None:
+        """Writer thread: batch queued samples into flushes"""
+        while True:
+            # Wake up to honour the fsync interval and the spool's group
+            # fsync even when idle
+            deadlines = []
+            if self._unsynced:
+                deadlines.append(self._last_fsync + self.fsync_interval)
+            spool_deadline = self.spool.sync_deadline() if self.spool is not None else None
+            if spool_deadline is not None:
+                deadlines.append(spool_deadline)
+            timeout = max(min(deadlines) - time.monotonic(), 0) if deadlines else None
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                self._sync_due()
+                self._spool_sync_due()
+                continue
+
+            # Drain whatever else is queued in one go
+            items = [item]
+            while True:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
 
-    def query_metrics(self, metric_name: str, start_time: int, end_time: int) -> List[Dict]:
+            for item in items:
+                if item is _STOP:
+                    self._flush()
+                    self._sync_due(force=True)
+                    return
+                if isinstance(item, threading.Event):
+                    # A query waits for everything queued before it
+                    self._flush()
+                    item.set()
+                    continue
+                seq, sample = item
+                if seq:
+                    self._buffer_seq = seq
+                self.buffer.append(sample)
+                if len(self.buffer) >= self.buffer_size:
+                    self._flush()
+            self._sync_due()
+            self._spool_sync_due()
+
+    def _maintenance_loop(self, interval: float) -> None:
+        """Maintenance thread: compress and apply retention until closed"""
+        lower_io_priority()
+        while not self._maintenance_stop.is_set():
+            self.maintain()
+            self._maintenance_stop.wait(interval)
+
+    def maintain(self) -> None:
+        """Compress closed day files (if enabled), then apply retention"""
+        if self.compress_closed:
+            self.compress_closed_files()
+        try:
+            self.retention.run()
+        except OSError as e:
+            logger.error(f"Error applying retention in {self.output_dir}: {e}")
+
+    def compress_closed_files(self) -> int:
+        """
+        Compress the JSONL files of past days
+
+        The writer only appends to today's file, so earlier files are
+        complete. The compressed file is renamed into place before the
+        JSONL file and its index are removed, and queries prefer it, so
+        readers never miss or double count a day.
+
+        Returns:
+            Number of files compressed
         """
-        Query metrics from storage (basic implementation for Phase 1)
+        today = date.today().isoformat()
+        count = 0
+        for path in sorted(self.output_dir.glob('metrics-*.jsonl')):
+            day = path.name[len('metrics-'):-len('.jsonl')]
+            if self._maintenance_stop.is_set():
+                break  # Closing
+            if day >= today:
+                continue
+            target = path.with_suffix(f'.{compressed_file.EXTENSION}')
+            try:
+                raw, compressed = compressed_file.compress_file(str(path), str(target))
+                path.unlink()
+                _index_path(path).unlink(missing_ok=True)
+            except OSError as e:
+                logger.error(f"Error compressing {path}: {e}")
+                continue
+            self.compressed_files += 1
+            self.compressed_bytes_in += raw
+            self.compressed_bytes_out += compressed
+            count += 1
+            logger.info(f"Compressed {path} ({raw} -> {compressed} bytes)")
+        return count
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get writer statistics
+
+        Returns:
+            Dictionary with queue depth, last flush latency in ms, bytes
+            written, flushes, fsyncs and dropped samples, plus rollup_*,
+            retention_* and spool_* statistics when those are enabled
+        """
+        stats = {
+            'queue_depth': self._queue.qsize() if self._queue is not None else 0,
+            'buffered': len(self.buffer),
+            'flush_latency_ms': round(self.last_flush_latency * 1000, 2),
+            'bytes_written': self.bytes_written,
+            'flushes': self.flushes,
+            'fsyncs': self.fsyncs,
+            'dropped': self.dropped,
+            'compressed_files': self.compressed_files,
+            'compressed_bytes_in': self.compressed_bytes_in,
+            'compressed_bytes_out': self.compressed_bytes_out,
+        }
+        if self.rollup is not None:
+            stats.update({f'rollup_{key}': value for key, value in self.rollup.stats().items()})
+        if self.retention.passes:
+            stats.update({f'retention_{key}': value for key, value in self.retention.stats().items()})
+        if self.spool is not None:
+            stats.update({f'spool_{key}': value for key, value in self.spool.stats().items()})
+        return stats
+
+    def close(self) -> None:
+        """Flush buffered samples, stop the writer and maintenance threads and close the spool"""
+        if self._maintenance is not None:
+            self._maintenance_stop.set()
+            self._maintenance.join()
+            self._maintenance = None
+        if self._writer is not None:
+            if self._writer.is_alive():
+                self._queue.put(_STOP)
+                self._writer.join()
+            self._writer = None
+        else:
+            self._flush()
+            self._sync_due(force=True)
+        if self.rollup is not None:
+            self.rollup.close()
+        if self.spool is not None:
+            self.spool.close()
+
+    def _write_records(self, f, offset: int) -> List[Tuple[float, int]]:
+        """
+        Write the buffer in the configured format
+
+        Args:
+            f: Data file opened for binary append
+            offset: Current size of the data file
+
+        Returns:
+            Sidecar index entries for the written records
+        """
+        entries: List[Tuple[float, int]] = []
+        if self.format == 'segment':
+            timestamp = _sample_time(self.buffer[0])
+            if timestamp is not None:
+                entries.append((timestamp, offset))
+            f.write(encode_segment(self.buffer))
+            return entries
+
+        lines = []
+        for i, metric in enumerate(self.buffer):
+            line = (json.dumps(metric, default=json_default) + '\n').encode('utf-8')
+            if i % self.index_interval == 0:
+                timestamp = _sample_time(metric)
+                if timestamp is not None:
+                    entries.append((timestamp, offset))
+            lines.append(line)
+            offset += len(line)
+        f.write(b''.join(lines))
+        return entries
+
+    def _write_columns(self, directory: Path) -> None:
+        """
+        Mirror the buffer into the day's column files
+
+        Failures are logged without failing the flush, since the primary
+        file already holds the samples.
+
+        Args:
+            directory: Column directory for the day
+        """
+        try:
+            column_store.append_columns(directory, self.buffer)
+        except OSError as e:
+            logger.error(f"Error writing column files in {directory}: {e}")
+
+    def _write_rollups(self) -> None:
+        """
+        Feed the buffer to the rollup tiers
+
+        Like the column files, rollups are derived data: failures are
+        logged without failing the flush.
+        """
+        try:
+            self.rollup.add_samples(self.buffer)
+        except (OSError, TypeError, ValueError) as e:
+            logger.error(f"Error updating rollups: {e}")
+
+    def _append_index(self, filename: Path, entries: List[Tuple[float, int]], was_empty: bool) -> None:
+        """
+        Append entries to a data file's sidecar index
+
+        An index must cover its file from the start, so entries are only
+        appended to an existing index or alongside a new data file; files
+        written without one are indexed on their first query.
+
+        Args:
+            filename: Data file path
+            entries: Index entries for the records just written
+            was_empty: Whether the data file was empty before the flush
+        """
+        index_path = _index_path(filename)
+        if not entries or not (was_empty or index_path.exists()):
+            return
+        try:
+            with open(index_path, 'wb' if was_empty else 'ab') as f:
+                f.write(b''.join(INDEX_ENTRY.pack(*entry) for entry in entries))
+        except OSError as e:
+            logger.warning(f"Failed to update index {index_path}: {e}")
+
+    def query_metrics(self, metric_name: str, start_time: int, end_time: int,
+                      step: Optional[float] = None) -> List[Dict]:
+        """
+        Query one metric over a time range
+
+        With rollups enabled and a step of at least a minute, the
+        coarsest rollup tier no wider than the step is read instead of
+        the raw files (see _query_rollup).
+
+        Only the day files that can hold the range are opened. Within a
+        file the sidecar index locates the first record of the range, and
+        JSONL records are not parsed whole: only the timestamp and the
+        requested field are decoded. Samples still in the write buffer are
+        included; with the async writer, the writer first flushes the
+        samples queued before the call (see _flush_writer), so the query
+        sees every sample written before it.
 
         Args:
             metric_name: Name of the metric to query
-            start_time: Start timestamp (Unix epoch)
-            end_time: End timestamp (Unix epoch)
+            start_time: Start timestamp (Unix epoch, inclusive)
+            end_time: End timestamp (Unix epoch, inclusive)
+            step: Resolution the caller needs, in seconds (None for raw)
 
         Returns:
-            List of metric data points
+            List of {'timestamp', 'value'} points in time order; samples
+            without the metric (or with a None value) are skipped
+        """
+        points: List[Dict[str, Any]] = []
+        if end_time < start_time:
+            return points
+
+        self._flush_writer()
+        tier = self._rollup_tier(step)
+        if tier is not None:
+            return self._query_rollup(tier, metric_name, start_time, end_time)
+
+        for path in self._day_files(start_time, end_time):
+            try:
+                if path.suffix == '.seg':
+                    points.extend(self._query_segments(path, metric_name, start_time, end_time))
+                elif path.suffix == f'.{compressed_file.EXTENSION}':
+                    points.extend(self._query_compressed(path, metric_name, start_time, end_time))
+                else:
+                    points.extend(self._query_jsonl(path, metric_name, start_time, end_time))
+            except (OSError, compressed_file.CompressedFileError) as e:
+                logger.error(f"Error querying {path}: {e}")
+
+        # Copy: the writer thread may be flushing the buffer
+        for metric in list(self.buffer):
+            timestamp = _sample_time(metric)
+            value = metric.get(metric_name)
+            if timestamp is not None and start_time <= timestamp <= end_time and value is not None:
+                points.append({'timestamp': timestamp, 'value': value})
+
+        points.sort(key=lambda point: point['timestamp'])
+        return points
+
+    def _flush_writer(self) -> None:
+        """
+        Have the writer thread flush the samples queued so far, and wait for it
+
+        Samples in the writer queue, or in a buffer the writer is between
+        writing and clearing, are not visible to a query. Waiting for the
+        writer to drain them makes the files plus the buffer a consistent
+        view of everything written before the query. If the writer does
+        not answer within QUERY_FLUSH_TIMEOUT, the query goes ahead with
+        what is on disk.
         """
-        # Basic implementation - not critical for Phase 1 MVP
-        logger.warning("query_metrics not fully implemented in Phase 1")
-        return []
+        if self._writer is None or not self._writer.is_alive():
+            return
+        flushed = threading.Event()
+        try:
+            self._queue.put(flushed, timeout=QUERY_FLUSH_TIMEOUT)
+        except queue.Full:
+            logger.warning("Storage writer queue full, querying without the queued samples")
+            return
+        if not flushed.wait(QUERY_FLUSH_TIMEOUT):
+            logger.warning("Storage writer did not flush in time, querying without the queued samples")
+
+    def _rollup_tier(self, step: Optional[float]) -> Optional[RollupTier]:
+        """Coarsest rollup tier whose bucket width fits in step, or None for raw"""
+        if self.rollup is None or step is None:
+            return None
+        chosen = None
+        for tier in self.rollup.tiers:
+            if tier.width <= step:
+                chosen = tier
+        return chosen
+
+    def _query_rollup(self, tier: RollupTier, metric_name: str, start_time: float,
+                      end_time: float) -> List[Dict[str, Any]]:
+        """
+        Query one metric from a rollup tier
+
+        Buckets are selected by start time, from the tier's day files
+        and the monthly files small day files are merged into. The still
+        open bucket is included, aggregated over the samples flushed so
+        far.
+
+        Returns:
+            List of {'timestamp', 'value', 'min', 'max', 'count', 'last'}
+            points in time order, where timestamp is the bucket start and
+            value its average
+        """
+        paths = []
+        for day in _days(start_time, end_time):
+            for path in (tier.month_path(day), tier.path_for(day)):
+                if path not in paths and path.exists():
+                    paths.append(path)
+
+        aggregates = []
+        for path in paths:
+            try:
+                aggregates.extend(self._query_jsonl(path, metric_name, start_time, end_time))
+            except OSError as e:
+                logger.error(f"Error querying {path}: {e}")
+
+        # Copy: the writer thread may be updating the bucket
+        bucket_start, bucket = tier.bucket_start, dict(tier.bucket)
+        if bucket_start is not None and start_time <= bucket_start <= end_time \
+                and metric_name in bucket:
+            aggregates.append({'timestamp': bucket_start, 'value': bucket[metric_name].to_dict()})
+
+        # Keyed by bucket: a day file being merged is briefly in two files
+        points = {}
+        for aggregate in aggregates:
+            value = aggregate['value']
+            if not isinstance(value, dict):
+                continue
+            points[aggregate['timestamp']] = {
+                'timestamp': aggregate['timestamp'], 'value': value['avg'],
+                'min': value['min'], 'max': value['max'],
+                'count': value['count'], 'last': value['last']}
+        return sorted(points.values(), key=lambda point: point['timestamp'])
+
+    def _day_files(self, start_time: float, end_time: float) -> Iterator[Path]:
+        """
+        Get the existing data files that can hold samples in a range
+
+        Args:
+            start_time: Range start (Unix epoch)
+            end_time: Range end (Unix epoch)
+
+        Yields:
+            Data file paths in date order; a day's compressed file
+            replaces its JSONL file
+        """
+        for day in _days(start_time, end_time):
+            compressed = self.output_dir / f'metrics-{day}.{compressed_file.EXTENSION}'
+            if compressed.exists():
+                yield compressed
+            for extension in self.FORMATS.values():
+                path = self.output_dir / f'metrics-{day}.{extension}'
+                if path.exists() and not (extension == 'jsonl' and compressed.exists()):
+                    yield path
+
+    def read_columns(self, metric_name: str, start_time: float,
+                     end_time: float) -> List[Tuple[memoryview, memoryview]]:
+        """
+        Read one metric over a time range as zero-copy float64 views
+
+        Requires column_files. The views are slices of read-only memory
+        maps of the column files: nothing is parsed or copied, concurrent
+        readers share the page cache, and samples appended after the call
+        are not visible through them. Missing values are NaN.
+
+        Args:
+            metric_name: Name of a numeric metric
+            start_time: Start timestamp (Unix epoch, inclusive)
+            end_time: End timestamp (Unix epoch, inclusive)
+
+        Returns:
+            List of (timestamps, values) view pairs, one per day file
+            holding data in the range, in date order
+        """
+        ranges = []
+        for day in _days(start_time, end_time):
+            directory = self.output_dir / f'metrics-{day}.cols'
+            if not directory.is_dir():
+                continue
+            views = column_store.read_range(directory, metric_name, start_time, end_time)
+            if views is not None and len(views[0]):
+                ranges.append(views)
+        return ranges
+
+    def _query_jsonl(self, path: Path, metric_name: str, start_time: float,
+                     end_time: float) -> List[Dict[str, Any]]:
+        offset = self._seek_offset(path, start_time)
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            return _scan_lines(f, metric_name, start_time, end_time)
+
+    def _query_compressed(self, path: Path, metric_name: str, start_time: float,
+                          end_time: float) -> List[Dict[str, Any]]:
+        reader = compressed_file.BlockReader(str(path))
+        return _scan_lines(reader.iter_lines(start_time), metric_name, start_time, end_time)
+
+    def _query_segments(self, path: Path, metric_name: str, start_time: float,
+                        end_time: float) -> List[Dict[str, Any]]:
+        points = []
+        offset = self._seek_offset(path, start_time)
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            data = f.read()
+
+        position = 0
+        while position < len(data):
+            try:
+                samples, position = decode_segment(data, position, ('timestamp', metric_name))
+            except SegmentError as e:
+                logger.warning(f"Stopping at damaged segment in {path}: {e}")
+                break
+            if samples and _sample_time(samples[0]) is not None and samples[0]['timestamp'] > end_time:
+                break
+            for sample in samples:
+                timestamp = _sample_time(sample)
+                value = sample.get(metric_name)
+                if timestamp is not None and start_time <= timestamp <= end_time and value is not None:
+                    points.append({'timestamp': timestamp, 'value': value})
+        return points
+
+    def _first_timestamp(self, path: Path) -> Optional[float]:
+        """
+        Get the first timestamp stored in a data or rollup file
+
+        Args:
+            path: File path
+
+        Returns:
+            Timestamp of the first record, or None if it has none
+        """
+        if path.suffix == f'.{compressed_file.EXTENSION}':
+            blocks = compressed_file.BlockReader(str(path)).blocks
+            return blocks[0][0] if blocks else None
+        entries = self._load_index(path)
+        return entries[0][0] if entries and entries[0][1] == 0 else None
+
+    def _seek_offset(self, path: Path, start_time: float) -> int:
+        """
+        Find where to start reading a data file for a range
+
+        Args:
+            path: Data file path
+            start_time: Range start (Unix epoch)
+
+        Returns:
+            Byte offset of the last indexed record before start_time
+        """
+        entries = self._load_index(path)
+        if not entries:
+            return 0
+        times = [entry[0] for entry in entries]
+        i = bisect.bisect_left(times, start_time) - 1
+        return entries[i][1] if i >= 0 else 0
+
+    def _load_index(self, path: Path) -> List[Tuple[float, int]]:
+        """
+        Load a data file's sidecar index, building it if missing
+
+        Args:
+            path: Data file path
+
+        Returns:
+            Index entries (timestamp, offset) in file order
+        """
+        index_path = _index_path(path)
+        try:
+            data = index_path.read_bytes()
+        except FileNotFoundError:
+            return self._rebuild_index(path)
+
+        # Ignore a torn trailing entry from an interrupted write
+        usable = len(data) - len(data) % INDEX_ENTRY.size
+        entries = list(INDEX_ENTRY.iter_unpack(data[:usable]))
+        if entries and entries[0][1] != 0:
+            return self._rebuild_index(path)
+        return entries
+
+    def _rebuild_index(self, path: Path) -> List[Tuple[float, int]]:
+        """
+        Scan a data file and write its sidecar index
+
+        Args:
+            path: Data file path
+
+        Returns:
+            Index entries (timestamp, offset) in file order
+        """
+        entries: List[Tuple[float, int]] = []
+        if path.suffix == '.seg':
+            data = path.read_bytes()
+            offset = 0
+            while offset < len(data):
+                try:
+                    samples, end = decode_segment(data, offset, ('timestamp',))
+                except SegmentError:
+                    break
+                if samples and _sample_time(samples[0]) is not None:
+                    entries.append((samples[0]['timestamp'], offset))
+                offset = end
+        else:
+            offset = 0
+            with open(path, 'rb') as f:
+                for i, raw in enumerate(f):
+                    if i % self.index_interval == 0:
+                        timestamp = _extract_field(raw.decode('utf-8', 'replace'), 'timestamp')
+                        if isinstance(timestamp, (int, float)):
+                            entries.append((float(timestamp), offset))
+                    offset += len(raw)
+
+        index_path = _index_path(path)
+        temp_path = index_path.with_name(index_path.name + '.tmp')
+        try:
+            temp_path.write_bytes(b''.join(INDEX_ENTRY.pack(*entry) for entry in entries))
+            temp_path.replace(index_path)
+            logger.info(f"Built index for {path} ({len(entries)} entries)")
+        except OSError as e:
+            logger.warning(f"Failed to write index {index_path}: {e}")
+        return entries
 
     def __del__(self):
         """Flush remaining metrics on deletion"""
         try:
-            self._flush()
+            self.close()
         except Exception:
             pass  # Avoid errors during cleanup
+
+
+def _days(start_time: float, end_time: float) -> Iterator[str]:
+    """
+    Get the file dates that can hold samples in a range
+
+    Files are named after the local date of the flush, which is never
+    earlier than the date of the samples in it; a flush shortly after
+    midnight holds the end of the previous day, so one extra day is
+    included.
+
+    Args:
+        start_time: Range start (Unix epoch)
+        end_time: Range end (Unix epoch)
+
+    Yields:
+        ISO dates in order
+    """
+    day = date.fromtimestamp(start_time)
+    last = date.fromtimestamp(end_time) + timedelta(days=1)
+    while day <= last:
+        yield day.isoformat()
+        day += timedelta(days=1)
+
+
+def _index_path(path: Path) -> Path:
+    """Sidecar index path for a data file"""
+    return path.with_name(path.name + '.idx')
+
+
+def _sample_time(sample: Dict[str, Any]) -> Optional[float]:
+    """Timestamp of a sample, or None if it has no numeric timestamp"""
+    timestamp = sample.get('timestamp')
+    return timestamp if isinstance(timestamp, (int, float)) else None
+
+
+def _scan_lines(lines: Iterable[bytes], metric_name: str, start_time: float,
+                end_time: float) -> List[Dict[str, Any]]:
+    """
+    Collect one metric from JSON lines in time order
+
+    Args:
+        lines: Raw JSON lines, starting at or before start_time
+        metric_name: Name of the metric
+        start_time: Range start (Unix epoch, inclusive)
+        end_time: Range end (Unix epoch, inclusive); reading stops at the
+            first record past it
+
+    Returns:
+        List of {'timestamp', 'value'} points
+    """
+    points = []
+    for raw in lines:
+        line = raw.decode('utf-8', 'replace')
+        timestamp = _extract_field(line, 'timestamp')
+        if not isinstance(timestamp, (int, float)):
+            continue
+        if timestamp > end_time:
+            break  # Records are appended in time order
+        if timestamp < start_time:
+            continue
+        value = _extract_field(line, metric_name)
+        if value is not _MISSING and value is not None:
+            points.append({'timestamp': timestamp, 'value': value})
+    return points
+
+
+def _extract_field(line: str, name: str) -> Any:
+    """
+    Decode one top-level field of a JSON line without parsing the rest
+
+    Falls back to a full parse when the key text is ambiguous: it occurs
+    more than once, or not at the top level of the object (e.g. only in a
+    per-device dictionary or inside a string).
+
+    Args:
+        line: One JSON object as written by json.dumps
+        name: Field name
+
+    Returns:
+        Field value, or _MISSING if the record lacks it
+    """
+    needle = f'"{name}": '
+    position = line.find(needle)
+    if position < 0:
+        return _MISSING
+    prefix = line[:position]
+    depth = (prefix.count('{') + prefix.count('[')) - (prefix.count('}') + prefix.count(']'))
+    if depth != 1 or line.find(needle, position + 1) >= 0 or line[position - 1] == '\\':
+        try:
+            return json.loads(line).get(name, _MISSING)
+        except ValueError:
+            return _MISSING
+    try:
+        value, _ = _decoder.raw_decode(line, position + len(needle))
+    except ValueError:
+        return _MISSING
+    return value
@@ -0,0 +1,561 @@
+"""
+InfluxDB v2 storage backend
+
+Samples are encoded into line protocol as they are written and shipped in
+gzip-compressed batches by a sender thread, over one persistent HTTP
+connection:
+
+    system,host=web-1 cpu_usage_percent=12.5,process_count=42.0 1700000000000000000
+    disk_io_per_device,host=web-1,device=sda disk_read_bytes=10.0 1700000000000000000
+
+Top-level numeric values are fields of one line in the main measurement;
+each '*_per_*' key becomes its own measurement with one line per entity,
+tagged like the Prometheus exporter labels it. Labelled series of typed
+samples (core=N) are read as series. The 'host=...' tag prefix is
+rendered once per hostname, and the tags of a series once per interned
+label set. Every number is written as a float field:
+InfluxDB fixes a field's type on first write and rejects the whole point
+on a conflict, and collectors do not keep a metric's Python type stable
+(a rate is int 0 before there is a delta, a float after).
+
+Failed sends are retried with exponential backoff. A batch that still
+fails, and every batch while the server stays unreachable, is spilled to
+a bounded directory of compressed batch files that is drained, oldest
+first, once sends succeed again. Memory stays bounded by the batch queue;
+disk by spool_max_bytes, beyond which the oldest spilled batches are
+dropped and counted.
+"""
+
+import os
+import csv
+import gzip
+import math
+import time
+import queue
+import logging
+import threading
+import http.client
+from pathlib import Path
+from datetime import datetime, timezone
+from urllib.parse import urlsplit, urlencode
+from typing import Dict, Any, List, Optional
+from src.storage import StorageBackend, entity_label, iter_series
+from src.sample import LabelSet
+
+logger = logging.getLogger(__name__)
+
+# Tells the sender thread to drain and exit
+_STOP = object()
+
+
+def _escape_key(value: str) -> str:
+    """Escape a measurement, tag key, tag value or field key"""
+    return value.replace('\\', '\\\\').replace(',', '\\,').replace('=', '\\=').replace(' ', '\\ ')
+
+
+def _field_value(value: Any) -> Optional[str]:
+    """Render a field value, or None for values that are not stored"""
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (int, float)):
+        value = float(value)
+        # Line protocol has no NaN or infinity
+        return repr(value) if math.isfinite(value) else None
+    return None
+
+
+def _fields(values: Dict[str, Any]) -> str:
+    fields = []
+    for key, value in values.items():
+        rendered = _field_value(value)
+        if rendered is not None:
+            fields.append(f'{_escape_key(key)}={rendered}')
+    return ','.join(fields)
+
+
+class SendError(Exception):
+    """Raised when a batch could not be delivered"""
+
+    def __init__(self, message: str, retryable: bool = True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class InfluxDBStorage(StorageBackend):
+    """Storage backend that writes line protocol batches to InfluxDB v2"""
+
+    def __init__(self, url: str = 'http://localhost:8086', token: str = '', org: str = '',
+                 bucket: str = 'system_metrics', measurement: str = 'system',
+                 batch_size: int = 500, flush_interval_s: float = 10.0, queue_batches: int = 16,
+                 timeout_s: float = 10.0, max_retries: int = 3, backoff_s: float = 1.0,
+                 max_backoff_s: float = 60.0, spool_dir: str = 'data/influxdb-spool',
+                 spool_max_bytes: int = 64 * 1024 * 1024):
+        """
+        Initialize backend and start its sender thread
+
+        Args:
+            url: InfluxDB base URL
+            token: API token
+            org: Organization
+            bucket: Bucket to write to
+            measurement: Measurement of the top-level values
+            batch_size: Samples per batch
+            flush_interval_s: Maximum age of a partial batch
+            queue_batches: Batches held in memory for the sender; more
+                are spilled to disk
+            timeout_s: HTTP timeout
+            max_retries: Retries of a failed send before it is spilled
+            backoff_s: First retry delay, doubled per failure
+            max_backoff_s: Retry delay cap, also used while offline
+            spool_dir: Directory of spilled batches
+            spool_max_bytes: Disk budget of the spill directory
+        """
+        parts = urlsplit(url)
+        self._scheme = parts.scheme or 'http'
+        self._netloc = parts.netloc
+        self._base_path = parts.path.rstrip('/')
+        self._headers = {
+            'Authorization': f'Token {token}',
+            'Content-Type': 'text/plain; charset=utf-8',
+            'Content-Encoding': 'gzip',
+        }
+        self._token = token
+        self.org = org
+        self.bucket = bucket
+        self._write_path = (f'{self._base_path}/api/v2/write?'
+                            + urlencode({'org': org, 'bucket': bucket, 'precision': 'ns'}))
+        self.measurement = _escape_key(measurement)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_s
+        self.timeout = timeout_s
+        self.max_retries = max_retries
+        self.backoff = backoff_s
+        self.max_backoff = max_backoff_s
+        self.spool_dir = Path(spool_dir)
+        self.spool_max_bytes = spool_max_bytes
+
+        self._prefixes: Dict[str, str] = {}
+        self._tags: Dict[LabelSet, str] = {}
+        self._lines: List[str] = []
+        self._samples = 0
+        self._batch_started = 0.0
+        self._connection: Optional[http.client.HTTPConnection] = None
+        self._offline_until = 0.0
+        self._failures = 0
+
+        # Statistics
+        self.sent_batches = 0
+        self.sent_samples = 0
+        self.send_failures = 0
+        self.retries = 0
+        self.spilled_batches = 0
+        self.spool_dropped = 0
+        self.rejected_batches = 0
+        self.last_send_latency = 0.0
+
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        # Spilled batch files, oldest first, and their sizes; guarded by
+        # _spool_lock since the writer spills and evicts while the sender
+        # drains
+        self._spool_lock = threading.Lock()
+        self._spool: Dict[Path, int] = {}
+        for path in self._spool_files():
+            try:
+                self._spool[path] = path.stat().st_size
+            except FileNotFoundError:
+                pass
+        self._spool_bytes = sum(self._spool.values())
+        self._spool_seq = max([self._spool_number(path) for path in self._spool] + [0])
+
+        self._queue: 'queue.Queue[Any]' = queue.Queue(maxsize=queue_batches)
+        self._sender = threading.Thread(target=self._sender_loop, name="influxdb-sender", daemon=True)
+        self._sender.start()
+        logger.info(f"InfluxDB storage writing to {url} bucket {bucket}")
+
+    def write_metrics(self, metrics: Dict[str, Any]) -> bool:
+        """
+        Encode a sample into the current batch
+
+        Never blocks on the network: full batches go to the sender thread,
+        or to the spill directory if its queue is full.
+
+        Args:
+            metrics: Dictionary of metrics to store
+
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            lines = self.encode(metrics)
+        except Exception as e:
+            logger.error(f"Error encoding metrics for InfluxDB: {e}", exc_info=True)
+            return False
+
+        now = time.monotonic()
+        if not self._lines:
+            self._batch_started = now
+        self._lines.extend(lines)
+        self._samples += 1
+        if self._samples >= self.batch_size or now - self._batch_started >= self.flush_interval:
+            self._submit()
+        return True
+
+    def encode(self, metrics: Dict[str, Any]) -> List[str]:
+        """
+        Encode a sample as line protocol
+
+        Args:
+            metrics: Sample dictionary
+
+        Returns:
+            Lines (without newlines); empty if nothing numeric
+        """
+        timestamp = metrics.get('timestamp')
+        suffix = f' {int(timestamp * 1e9)}' if isinstance(timestamp, (int, float)) else ''
+        prefix = self._tag_prefix(metrics.get('hostname'))
+
+        top: Dict[str, Any] = {}
+        entity_lines = []
+        for key, label_set, value in iter_series(metrics):
+            if label_set:
+                rendered = _field_value(value)
+                if rendered is not None:
+                    entity_lines.append(f'{_escape_key(key)}{prefix},{self._tag_text(label_set)} '
+                                        f'value={rendered}{suffix}')
+                continue
+            if '_per_' not in key:
+                top[key] = value
+                continue
+            if not isinstance(value, dict):
+                continue
+            measurement = _escape_key(key)
+            label = _escape_key(entity_label(key))
+            for entity, inner in value.items():
+                if not isinstance(inner, dict):
+                    continue
+                fields = _fields(inner)
+                if fields:
+                    entity_tag = _escape_key(str(entity)) or '_'
+                    entity_lines.append(f'{measurement}{prefix},{label}={entity_tag} {fields}{suffix}')
+
+        lines = []
+        fields = _fields(top)
+        if fields:
+            lines.append(f'{self.measurement}{prefix} {fields}{suffix}')
+        lines.extend(entity_lines)
+        return lines
+
+    def _tag_text(self, label_set: LabelSet) -> str:
+        """'core=0' tags of a label set, rendered once"""
+        tags = self._tags.get(label_set)
+        if tags is None:
+            tags = self._tags[label_set] = ','.join(
+                f'{_escape_key(name)}={_escape_key(value) or "_"}' for name, value in label_set)
+        return tags
+
+    def _tag_prefix(self, hostname: Any) -> str:
+        """',host=...' tag text for a hostname, rendered once"""
+        key = '' if hostname is None else str(hostname)
+        prefix = self._prefixes.get(key)
+        if prefix is None:
+            prefix = self._prefixes[key] = f',host={_escape_key(key)}' if key else ''
+        return prefix
+
+    def _submit(self) -> None:
+        """Hand the current batch to the sender, or spill it"""
+        if not self._lines:
+            return
+        batch = (self._samples, gzip.compress(('\n'.join(self._lines) + '\n').encode('utf-8')))
+        self._lines = []
+        self._samples = 0
+        try:
+            self._queue.put_nowait(batch)
+        except queue.Full:
+            self._spill(batch[1])
+
+    def _sender_loop(self) -> None:
+        """Sender thread: deliver queued batches, spill what fails, drain the spool"""
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                self._drain_queue_on_stop()
+                return
+            # An unexpected error must not end the thread: every later
+            # batch would only be spilled
+            try:
+                if item is not None:
+                    self._deliver(*item)
+                if time.monotonic() >= self._offline_until:
+                    self._drain_spool()
+            except Exception as e:
+                logger.error(f"Error in InfluxDB sender: {e}", exc_info=True)
+
+    def _drain_queue_on_stop(self) -> None:
+        """Try each remaining batch once, spilling failures"""
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                self._deliver(*item, retries=0)
+        if self._connection is not None:
+            self._connection.close()
+
+    def _deliver(self, samples: int, body: bytes, retries: Optional[int] = None) -> bool:
+        """
+        Send a batch with retries, spilling it if it cannot be sent
+
+        While the server is known to be down, batches are spilled without
+        trying.
+
+        Returns:
+            True if the batch was accepted
+        """
+        if time.monotonic() < self._offline_until:
+            self._spill(body)
+            return False
+        retries = self.max_retries if retries is None else retries
+        for attempt in range(retries + 1):
+            try:
+                self._send(body)
+                self.sent_batches += 1
+                self.sent_samples += samples
+                self._failures = 0
+                return True
+            except SendError as e:
+                self.send_failures += 1
+                if not e.retryable:
+                    self.rejected_batches += 1
+                    logger.error(f"InfluxDB rejected batch, dropping it: {e}")
+                    return False
+                if attempt < retries:
+                    self.retries += 1
+                    time.sleep(min(self.backoff * 2 ** attempt, self.max_backoff))
+                else:
+                    logger.warning(f"InfluxDB write failed, spilling batch: {e}")
+        self._failures += 1
+        self._offline_until = time.monotonic() + min(self.backoff * 2 ** self._failures, self.max_backoff)
+        self._spill(body)
+        return False
+
+    def _send(self, body: bytes) -> None:
+        """
+        POST a gzip body to the write endpoint
+
+        Raises:
+            SendError: On connection errors and non-2xx responses; 4xx
+                other than 429 are not retryable
+        """
+        started = time.monotonic()
+        try:
+            connection = self._get_connection()
+            connection.request('POST', self._write_path, body=body, headers=self._headers)
+            response = connection.getresponse()
+            detail = response.read()
+        except (OSError, http.client.HTTPException) as e:
+            self._reset_connection()
+            raise SendError(f"{type(e).__name__}: {e}")
+        self.last_send_latency = time.monotonic() - started
+
+        if response.status >= 300:
+            if response.getheader('Connection', '').lower() == 'close':
+                self._reset_connection()
+            message = f"HTTP {response.status}: {detail[:200].decode('utf-8', 'replace')}"
+            raise SendError(message, retryable=response.status == 429 or response.status >= 500)
+
+    def _get_connection(self) -> http.client.HTTPConnection:
+        """Get the persistent connection, opening it if needed"""
+        if self._connection is None:
+            cls = http.client.HTTPSConnection if self._scheme == 'https' else http.client.HTTPConnection
+            self._connection = cls(self._netloc, timeout=self.timeout)
+        return self._connection
+
+    def _reset_connection(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def _spool_files(self) -> List[Path]:
+        """Spilled batch files, oldest first"""
+        return sorted(self.spool_dir.glob('batch-*.lp.gz'))
+
+    @staticmethod
+    def _spool_number(path: Path) -> int:
+        try:
+            return int(path.name[len('batch-'):-len('.lp.gz')])
+        except ValueError:
+            return 0
+
+    def _spill(self, body: bytes) -> None:
+        """Write a batch to the spill directory, dropping the oldest over budget"""
+        # Called by the writer (queue full) and by the sender thread
+        with self._spool_lock:
+            self._spool_seq += 1
+            path = self.spool_dir / f'batch-{self._spool_seq:012d}.lp.gz'
+            try:
+                temp_path = path.with_name(path.name + '.tmp')
+                temp_path.write_bytes(body)
+                os.replace(temp_path, path)
+                self.spilled_batches += 1
+            except OSError as e:
+                self.spool_dropped += 1
+                logger.error(f"Error spilling InfluxDB batch to {path}: {e}")
+                return
+
+            self._spool[path] = len(body)
+            self._spool_bytes += len(body)
+            while self._spool_bytes > self.spool_max_bytes and self._spool:
+                oldest = next(iter(self._spool))
+                self._remove_spooled(oldest)
+                self.spool_dropped += 1
+                logger.warning(f"InfluxDB spool over {self.spool_max_bytes} bytes, dropped {oldest.name}")
+
+    def _remove_spooled(self, path: Path) -> None:
+        """Forget and delete a spilled batch; the caller holds _spool_lock"""
+        self._spool_bytes -= self._spool.pop(path)
+        path.unlink(missing_ok=True)
+
+    def _drain_spool(self) -> None:
+        """
+        Send spilled batches oldest first, stopping at the first failure
+
+        The network send happens outside _spool_lock, so the writer can
+        keep spilling; a batch evicted meanwhile is not deleted twice.
+        """
+        while self._queue.empty():  # Fresh batches first; resume on the next pass
+            with self._spool_lock:
+                if not self._spool:
+                    return
+                path = next(iter(self._spool))
+                try:
+                    body = path.read_bytes()
+                except OSError as e:
+                    logger.error(f"Error reading spilled InfluxDB batch {path}: {e}")
+                    self._remove_spooled(path)
+                    self.spool_dropped += 1
+                    continue
+            try:
+                self._send(body)
+            except SendError as e:
+                if e.retryable:
+                    self._failures += 1
+                    self._offline_until = time.monotonic() + min(self.backoff * 2 ** self._failures,
+                                                                 self.max_backoff)
+                    return
+                self.rejected_batches += 1
+                logger.error(f"InfluxDB rejected spilled batch {path.name}, dropping it: {e}")
+            else:
+                self.sent_batches += 1
+                self._failures = 0
+            with self._spool_lock:
+                if path in self._spool:
+                    self._remove_spooled(path)
+
+    def query_metrics(self, metric_name: str, start_time: int, end_time: int) -> List[Dict]:
+        """
+        Query a top-level metric through the Flux API
+
+        Args:
+            metric_name: Field name in the main measurement
+            start_time: Start timestamp (Unix epoch, inclusive)
+            end_time: End timestamp (Unix epoch, inclusive)
+
+        Returns:
+            List of {'timestamp', 'value'} points in time order
+        """
+        flux = (f'from(bucket: "{self.bucket}") '
+                f'|> range(start: {_rfc3339(start_time)}, stop: {_rfc3339(end_time + 1e-9)}) '
+                f'|> filter(fn: (r) => r._measurement == "{self.measurement}" '
+                f'and r._field == "{metric_name}")')
+        path = f'{self._base_path}/api/v2/query?' + urlencode({'org': self.org})
+        cls = http.client.HTTPSConnection if self._scheme == 'https' else http.client.HTTPConnection
+        connection = cls(self._netloc, timeout=self.timeout)
+        try:
+            connection.request('POST', path, body=flux.encode('utf-8'), headers={
+                'Authorization': f'Token {self._token}',
+                'Content-Type': 'application/vnd.flux',
+                'Accept': 'application/csv',
+            })
+            response = connection.getresponse()
+            text = response.read().decode('utf-8', 'replace')
+        except (OSError, http.client.HTTPException) as e:
+            logger.error(f"Error querying InfluxDB: {e}")
+            return []
+        finally:
+            connection.close()
+        if response.status != 200:
+            logger.error(f"InfluxDB query failed: HTTP {response.status}: {text[:200]}")
+            return []
+        return _parse_csv(text)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get sender statistics
+
+        Returns:
+            Dictionary with batches and samples sent, failures, retries,
+            spilled and dropped batches, spool size, queue depth and the
+            last send latency in ms
+        """
+        with self._spool_lock:
+            spool_files, spool_bytes = len(self._spool), self._spool_bytes
+        return {
+            'queue_depth': self._queue.qsize(),
+            'sent_batches': self.sent_batches,
+            'sent_samples': self.sent_samples,
+            'send_failures': self.send_failures,
+            'retries': self.retries,
+            'rejected_batches': self.rejected_batches,
+            'spilled_batches': self.spilled_batches,
+            'spool_dropped': self.spool_dropped,
+            'spool_files': spool_files,
+            'spool_bytes': spool_bytes,
+            'send_latency_ms': round(self.last_send_latency * 1000, 2),
+        }
+
+    def close(self) -> None:
+        """Submit the partial batch and stop the sender (unsent data is spilled)"""
+        if not self._sender.is_alive():
+            return
+        self._submit()
+        self._queue.put(_STOP)
+        self._sender.join()
+
+
+def _rfc3339(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+
+def _parse_time(text: str) -> float:
+    """Parse an RFC 3339 time as returned by InfluxDB (nanoseconds allowed)"""
+    text = text.rstrip('Z')
+    whole, _, fraction = text.partition('.')
+    seconds = datetime.strptime(whole, '%Y-%m-%dT%H:%M:%S').replace(tzinfo=timezone.utc).timestamp()
+    return seconds + (float(f'0.{fraction}') if fraction else 0.0)
+
+
+def _parse_csv(text: str) -> List[Dict[str, Any]]:
+    """Extract (_time, _value) points from an annotated CSV query result"""
+    points = []
+    header: Optional[List[str]] = None
+    for row in csv.reader(text.splitlines()):
+        if not row or row[0].startswith('#'):
+            header = None if not row else header
+            continue
+        if header is None:
+            header = row
+            continue
+        record = dict(zip(header, row))
+        try:
+            timestamp = _parse_time(record['_time'])
+            value = float(record['_value'])
+        except (KeyError, ValueError):
+            continue
+        points.append({'timestamp': timestamp, 'value': value})
+    points.sort(key=lambda point: point['timestamp'])
+    return points
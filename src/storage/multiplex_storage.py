@@ -0,0 +1,388 @@
+"""
+Fan-out storage backend
+
+Writes every sample to several storage backends, e.g. local files and a
+remote InfluxDB, without letting one backend slow down another or the
+collection loop. Each backend gets a lane: a bounded in-memory queue and a
+worker thread that calls the backend's write_metrics(). write_metrics()
+here only enqueues the sample on every lane.
+
+When a lane's queue is full its overflow policy decides what happens to a
+new sample:
+
+    drop_oldest  the oldest queued sample is dropped (the default)
+    block        the caller waits up to block_timeout_s for room, then the
+                 new sample is dropped
+    spill        the sample is appended to <spill_dir>/<name>.jsonl; once
+                 a lane spills, later samples follow them to disk until the
+                 worker has replayed the file, so the backend still sees
+                 samples in order. A spill file left behind at shutdown is
+                 replayed on the next start.
+
+Each lane reports its queue depth, lag (age of the oldest sample not yet
+written), drops, spills, failed writes and write latency, next to the
+backend's own statistics.
+"""
+
+import os
+import json
+import time
+import inspect
+import logging
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+from src.storage import StorageBackend
+from src.sample import json_default
+
+logger = logging.getLogger(__name__)
+
+OVERFLOW_POLICIES = ('drop_oldest', 'block', 'spill')
+
+
+class _Lane:
+    """Bounded queue and worker thread in front of one backend"""
+
+    def __init__(self, name: str, backend: StorageBackend, queue_size: int = 1000,
+                 overflow: str = 'drop_oldest', block_timeout_s: float = 1.0,
+                 spill_dir: str = 'data/multiplex-spill', spill_max_bytes: int = 64 * 1024 * 1024):
+        """
+        Initialize lane and start its worker
+
+        Args:
+            name: Lane name, used for the thread, spill file and statistics
+            backend: Backend the worker writes to
+            queue_size: Samples held in memory for the worker
+            overflow: 'drop_oldest', 'block' or 'spill'
+            block_timeout_s: Longest wait for room with 'block'
+            spill_dir: Directory of the spill file with 'spill'
+            spill_max_bytes: Spill file size beyond which new samples are
+                dropped
+        """
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy for {name}: {overflow} "
+                             f"(expected one of {', '.join(OVERFLOW_POLICIES)})")
+        self.name = name
+        self.backend = backend
+        self.queue_size = max(1, queue_size)
+        self.overflow = overflow
+        self.block_timeout_s = block_timeout_s
+        self.spill_max_bytes = spill_max_bytes
+
+        # (enqueue time, sample), oldest first
+        self._items: 'deque[Tuple[float, Dict[str, Any]]]' = deque()
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._inflight_since: Optional[float] = None
+
+        self._spill_path: Optional[Path] = None
+        self._spill_since: Optional[float] = None
+        self._spill_bytes = 0
+        if overflow == 'spill':
+            directory = Path(spill_dir)
+            directory.mkdir(parents=True, exist_ok=True)
+            self._spill_path = directory / f'{name}.jsonl'
+            # Left over from the last run: replayed before anything new
+            if self._spill_path.exists():
+                self._spill_since = time.monotonic()
+                self._spill_bytes = self._spill_path.stat().st_size
+
+        # Statistics
+        self.written = 0
+        self.failed = 0
+        self.dropped = 0
+        self.spilled = 0
+        self.last_write_latency = 0.0
+        self.total_write_time = 0.0
+
+        self._thread = threading.Thread(target=self._run, name=f"storage-lane-{name}", daemon=True)
+        self._thread.start()
+
+    @property
+    def _draining_path(self) -> Path:
+        return self._spill_path.with_name(self._spill_path.name + '.draining')
+
+    def offer(self, metrics: Dict[str, Any]) -> bool:
+        """
+        Queue a sample for the backend, applying the overflow policy
+
+        Returns:
+            False if the sample was dropped
+        """
+        with self._cond:
+            if self._stopping:
+                return False
+            if self._spill_since is not None or len(self._items) >= self.queue_size:
+                if self.overflow == 'spill':
+                    return self._spill(metrics)
+                if self.overflow == 'block':
+                    deadline = time.monotonic() + self.block_timeout_s
+                    while len(self._items) >= self.queue_size and not self._stopping:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self.dropped += 1
+                            return False
+                        self._cond.wait(remaining)
+                    if self._stopping:
+                        return False
+                else:
+                    self._items.popleft()
+                    self.dropped += 1
+            self._items.append((time.monotonic(), metrics))
+            self._cond.notify_all()
+            return True
+
+    def _spill(self, metrics: Dict[str, Any]) -> bool:
+        """Append a sample to the spill file (caller holds the lock)"""
+        try:
+            line = (json.dumps(metrics, default=json_default) + '\n').encode('utf-8')
+            if self._spill_bytes + len(line) > self.spill_max_bytes:
+                self.dropped += 1
+                return False
+            with open(self._spill_path, 'ab') as f:
+                f.write(line)
+        except (OSError, TypeError, ValueError) as e:
+            logger.error(f"Error spilling sample for {self.name}: {e}")
+            self.dropped += 1
+            return False
+        self._spill_bytes += len(line)
+        if self._spill_since is None:
+            self._spill_since = time.monotonic()
+        self.spilled += 1
+        self._cond.notify_all()
+        return True
+
+    def _run(self) -> None:
+        """Worker: write queued samples, then replay spilled ones, in order"""
+        if self._spill_path is not None and self._draining_path.exists():
+            self._replay(self._draining_path)
+
+        while True:
+            with self._cond:
+                while not self._items and self._spill_since is None and not self._stopping:
+                    self._cond.wait()
+                if self._items:
+                    self._inflight_since, metrics = self._items.popleft()
+                    self._cond.notify_all()
+                elif self._spill_since is not None and not self._stopping:
+                    # Everything queued is older than the spill file; take
+                    # the file over so new samples queue up behind it
+                    try:
+                        os.replace(self._spill_path, self._draining_path)
+                    except OSError as e:
+                        logger.error(f"Error replaying spilled samples for {self.name}: {e}")
+                    self._inflight_since, self._spill_since = self._spill_since, None
+                    self._spill_bytes = 0
+                    metrics = None
+                else:
+                    return
+
+            if metrics is None:
+                self._replay(self._draining_path)
+            else:
+                self._write(metrics)
+            self._inflight_since = None
+
+    def _replay(self, path: Path) -> None:
+        """Write the samples of a spill file and remove it"""
+        try:
+            with open(path, 'rb') as f:
+                for line in f:
+                    try:
+                        metrics = json.loads(line)
+                    except ValueError:
+                        continue  # Torn last line
+                    self._write(metrics)
+            path.unlink()
+        except OSError as e:
+            logger.error(f"Error replaying spilled samples for {self.name}: {e}")
+
+    def _write(self, metrics: Dict[str, Any]) -> None:
+        started = time.monotonic()
+        try:
+            ok = self.backend.write_metrics(metrics)
+        except Exception as e:
+            logger.error(f"Storage backend {self.name} failed to write: {e}", exc_info=True)
+            ok = False
+        self.last_write_latency = time.monotonic() - started
+        self.total_write_time += self.last_write_latency
+        if ok:
+            self.written += 1
+        else:
+            self.failed += 1
+
+    def lag(self) -> float:
+        """Seconds since the oldest sample not yet written was offered"""
+        oldest = [since for since in (self._inflight_since, self._spill_since) if since is not None]
+        items = self._items
+        if items:
+            try:
+                oldest.append(items[0][0])
+            except IndexError:
+                pass  # Emptied meanwhile
+        return time.monotonic() - min(oldest) if oldest else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        writes = self.written + self.failed
+        return {
+            'depth': len(self._items),
+            'lag_s': round(self.lag(), 3),
+            'written': self.written,
+            'failed': self.failed,
+            'dropped': self.dropped,
+            'spilled': self.spilled,
+            'spill_bytes': self._spill_bytes,
+            'write_latency_ms': round(self.last_write_latency * 1000, 2),
+            'write_latency_avg_ms': round(self.total_write_time / writes * 1000, 2) if writes else 0.0,
+        }
+
+    def close(self) -> None:
+        """Write what is queued, stop the worker and close the backend"""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        self._thread.join()
+        self.backend.close()
+
+
+class MultiplexStorage(StorageBackend):
+    """Storage backend that fans samples out to several backends"""
+
+    def __init__(self, lanes: List[Tuple[str, StorageBackend, Dict[str, Any]]]):
+        """
+        Initialize multiplexer and start one worker per backend
+
+        Args:
+            lanes: (name, backend, lane options) per backend, in query
+                order; options are queue_size, overflow, block_timeout_s,
+                spill_dir and spill_max_bytes
+        """
+        if not lanes:
+            raise ValueError("Multiplex storage needs at least one backend")
+        self.lanes: Dict[str, _Lane] = {}
+        for name, backend, options in lanes:
+            if name in self.lanes:
+                raise ValueError(f"Duplicate multiplexed backend: {name}")
+            self.lanes[name] = _Lane(name, backend, **options)
+        logger.info(f"Multiplexing storage to: {', '.join(self.lanes)}")
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any],
+                    storage_config: Optional[Dict[str, Any]] = None) -> 'MultiplexStorage':
+        """
+        Create the multiplexer and its backends from configuration
+
+        Args:
+            config: The 'multiplex' section; 'backends' lists the backends
+                by name, each with its lane options:
+
+                    backends:
+                      - name: file
+                        overflow: block
+                      - name: influxdb
+                        overflow: spill
+
+                A backend's own settings come from its entry's 'config', or
+                else from the storage section of the same name.
+            storage_config: The whole 'storage' configuration section
+
+        Returns:
+            Storage backend instance
+        """
+        from src import plugins
+
+        storage_config = storage_config or {}
+        lanes = []
+        try:
+            for entry in config.get('backends') or []:
+                options = {'name': entry} if isinstance(entry, str) else dict(entry)
+                name = options.pop('name')
+                if name == 'multiplex':
+                    raise ValueError("Multiplex storage cannot contain itself")
+                backend_config = options.pop('config', None)
+                if backend_config is None:
+                    backend_config = storage_config.get(name) or {}
+                backend_class = plugins.storage_backends.load(name)
+                backend = backend_class.from_config(backend_config, storage_config)
+                lanes.append((name, backend, options))
+            return cls(lanes)
+        except Exception:
+            for _, backend, _ in lanes:
+                backend.close()
+            raise
+
+    def write_metrics(self, metrics: Dict[str, Any]) -> bool:
+        """
+        Queue a sample for every backend
+
+        Args:
+            metrics: Dictionary of metrics to store
+
+        Returns:
+            True if every backend accepted the sample (queued or spilled)
+        """
+        accepted = True
+        for lane in self.lanes.values():
+            accepted = lane.offer(metrics) and accepted
+        return accepted
+
+    def query_metrics(self, metric_name: str, start_time: int, end_time: int,
+                      **kwargs) -> List[Dict]:
+        """
+        Query a metric from the first backend that has data for it
+
+        Backends are asked in configured order. Samples still queued for a
+        backend are not visible to its queries. Each backend only gets the
+        keyword options its query_metrics accepts.
+
+        Args:
+            metric_name: Name of the metric to query
+            start_time: Start timestamp (Unix epoch, inclusive)
+            end_time: End timestamp (Unix epoch, inclusive)
+            **kwargs: Passed on to the backends that take them (e.g. step
+                for FileStorage, host for SQLiteStorage)
+
+        Returns:
+            List of metric values with timestamps
+        """
+        for name, lane in self.lanes.items():
+            try:
+                query = lane.backend.query_metrics
+                results = query(metric_name, start_time, end_time, **_accepted_options(query, kwargs))
+            except Exception as e:
+                logger.error(f"Error querying storage backend {name}: {e}")
+                continue
+            if results:
+                return results
+        return []
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get per-backend statistics
+
+        Returns:
+            Dictionary with <name>_lane_* keys (queue depth, lag in
+            seconds, written, failed, dropped and spilled samples, write
+            latency in ms) and each backend's own stats as <name>_*
+        """
+        stats = {}
+        for name, lane in self.lanes.items():
+            stats.update({f'{name}_lane_{key}': value for key, value in lane.stats().items()})
+            stats.update({f'{name}_{key}': value for key, value in lane.backend.stats().items()})
+        return stats
+
+    def close(self) -> None:
+        """Write out every queue and close the backends"""
+        for lane in self.lanes.values():
+            lane.close()
+
+
+def _accepted_options(method: Any, options: Dict[str, Any]) -> Dict[str, Any]:
+    """The keyword options a method's signature accepts"""
+    if not options:
+        return options
+    parameters = inspect.signature(method).parameters
+    if any(parameter.kind is parameter.VAR_KEYWORD for parameter in parameters.values()):
+        return options
+    return {key: value for key, value in options.items() if key in parameters}
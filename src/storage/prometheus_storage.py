@@ -0,0 +1,283 @@
+"""
+Prometheus exporter storage backend
+
+Serves the latest sample on an HTTP /metrics endpoint in the Prometheus
+text exposition format. The exposition is rendered once per written
+sample (one per collection cycle) into a cached byte buffer, plus a gzip
+variant, and every scrape is answered from that cache: scrapes never touch
+collectors and cost the same however often, or by how many Prometheus
+replicas, they happen. The HTTP server runs on its own threads.
+
+Every numeric top-level value becomes a gauge labelled with the host.
+Per-entity values are exported with a label named after the key; labelled
+series of typed samples (core=N) are read as series, with their label
+text rendered once per interned label set:
+
+    cpu_usage_per_core: [1.5, 2.0]
+        -> cpu_usage_per_core{host="h",core="0"} 1.5
+    disk_io_per_device: {"sda": {"disk_read_bytes": 10}}
+        -> disk_read_bytes_per_device{host="h",device="sda"} 10
+    cgroup_per_path: {"/system.slice": {"memory_current": 1}}
+        -> memory_current_per_cgroup{host="h",cgroup="/system.slice"} 1
+
+Strings and other non-numeric values are skipped; booleans export as 0/1.
+"""
+
+import re
+import gzip
+import math
+import time
+import logging
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, Any, List, Optional, Tuple
+from src.storage import StorageBackend, entity_label, iter_series
+from src.sample import LabelSet
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+_INVALID_NAME = re.compile(r'[^a-zA-Z0-9_:]')
+
+
+def _metric_name(name: str) -> str:
+    """Sanitize a key into a Prometheus metric name"""
+    name = _INVALID_NAME.sub('_', name)
+    return '_' + name if name[:1].isdigit() else name
+
+
+def _escape(value: str) -> str:
+    """Escape a label value"""
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value: Any) -> Optional[str]:
+    """Render a sample value, or None if it is not numeric"""
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float):
+        if math.isnan(value):
+            return 'NaN'
+        if math.isinf(value):
+            return '+Inf' if value > 0 else '-Inf'
+        return repr(value)
+    return None
+
+
+class PrometheusStorage(StorageBackend):
+    """Storage backend that exposes the latest sample for Prometheus to scrape"""
+
+    def __init__(self, host: str = '0.0.0.0', port: int = 8000, path: str = '/metrics',
+                 namespace: str = ''):
+        """
+        Initialize exporter and start its HTTP server
+
+        Args:
+            host: Address to listen on
+            port: TCP port to listen on (0 picks a free port, see self.port)
+            path: URL path of the exposition
+            namespace: Prefix added to every metric name ('agent' gives
+                agent_cpu_usage_percent)
+        """
+        self.path = path
+        self.namespace = f'{_metric_name(namespace)}_' if namespace else ''
+        self._names: Dict[str, str] = {}
+        self._label_texts: Dict[LabelSet, str] = {}
+        self._latest: Dict[str, Any] = {}
+
+        # Rendered exposition and its gzip variant, replaced as one tuple
+        self._cache: Tuple[bytes, bytes] = (b'', gzip.compress(b''))
+
+        # Statistics
+        self.scrapes = 0
+        self.renders = 0
+        self.last_render_latency = 0.0
+
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, kwargs={'poll_interval': 0.1},
+                                        name="prometheus-exporter", daemon=True)
+        self._thread.start()
+        logger.info(f"Prometheus exporter listening on {host}:{self.port}{path}")
+
+    def write_metrics(self, metrics: Dict[str, Any]) -> bool:
+        """
+        Render a sample into the exposition cache
+
+        Args:
+            metrics: Dictionary of metrics to expose
+
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            started = time.monotonic()
+            body = self.render(metrics)
+            self._cache = (body, gzip.compress(body, compresslevel=6))
+            self._latest = metrics
+            self.renders += 1
+            self.last_render_latency = time.monotonic() - started
+            return True
+        except Exception as e:
+            logger.error(f"Error rendering Prometheus exposition: {e}", exc_info=True)
+            return False
+
+    def render(self, metrics: Dict[str, Any]) -> bytes:
+        """
+        Render a sample in the text exposition format
+
+        Args:
+            metrics: Sample dictionary
+
+        Returns:
+            UTF-8 exposition
+        """
+        hostname = metrics.get('hostname')
+        base = f'host="{_escape(str(hostname))}"' if hostname is not None else ''
+        labels = f'{{{base}}}' if base else ''
+        series_prefix = f'{base},' if base else ''
+        lines: List[str] = []
+        family = None
+
+        for key, label_set, value in iter_series(metrics):
+            if label_set:
+                rendered = _format_value(value)
+                if rendered is None:
+                    continue
+                name = self._name(key)
+                if name != family:
+                    family = name
+                    lines.append(f'# TYPE {name} gauge\n')
+                lines.append(f'{name}{{{series_prefix}{self._label_text(label_set)}}} {rendered}\n')
+                continue
+            family = None
+            if '_per_' in key and isinstance(value, dict):
+                self._render_per_entity(lines, key, value, base)
+                continue
+            rendered = _format_value(value)
+            if rendered is not None:
+                name = self._name(key)
+                lines.append(f'# TYPE {name} gauge\n{name}{labels} {rendered}\n')
+
+        return ''.join(lines).encode('utf-8')
+
+    def _label_text(self, label_set: LabelSet) -> str:
+        """'core="0"' text of a label set, memoized since label sets are interned"""
+        text = self._label_texts.get(label_set)
+        if text is None:
+            text = self._label_texts[label_set] = ','.join(
+                f'{_metric_name(name)}="{_escape(value)}"' for name, value in label_set)
+        return text
+
+    def _render_per_entity(self, lines: List[str], key: str, value: Dict[str, Any], base: str) -> None:
+        """Render a per-entity dictionary as labelled series"""
+        label = entity_label(key)
+        prefix = f'{base},{label}=' if base else f'{label}='
+
+        # Group entity values by inner metric, one family each
+        families: Dict[str, List[str]] = {}
+        for entity, inner in value.items():
+            if not isinstance(inner, dict):
+                continue
+            labels = f'{prefix}"{_escape(str(entity))}"'
+            for inner_key, inner_value in inner.items():
+                rendered = _format_value(inner_value)
+                if rendered is not None:
+                    families.setdefault(inner_key, []).append(f'{{{labels}}} {rendered}\n')
+        for inner_key, series in families.items():
+            name = self._name(f'{inner_key}_per_{label}')
+            lines.append(f'# TYPE {name} gauge\n')
+            lines.extend(name + line for line in series)
+
+    def _name(self, key: str) -> str:
+        """Metric name for a key, memoized since keys repeat every cycle"""
+        name = self._names.get(key)
+        if name is None:
+            name = self._names[key] = self.namespace + _metric_name(key)
+        return name
+
+    def query_metrics(self, metric_name: str, start_time: int, end_time: int) -> List[Dict]:
+        """
+        Query a metric
+
+        The exporter keeps only the latest sample; history lives in
+        Prometheus.
+
+        Args:
+            metric_name: Name of the metric to query
+            start_time: Start timestamp (Unix epoch, inclusive)
+            end_time: End timestamp (Unix epoch, inclusive)
+
+        Returns:
+            The latest point if it falls in the range, else an empty list
+        """
+        latest = self._latest
+        timestamp = latest.get('timestamp')
+        value = latest.get(metric_name)
+        if isinstance(timestamp, (int, float)) and start_time <= timestamp <= end_time and value is not None:
+            return [{'timestamp': timestamp, 'value': value}]
+        return []
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get exporter statistics
+
+        Returns:
+            Dictionary with scrapes served, renders, last render time in
+            ms and the cached exposition sizes
+        """
+        body, compressed = self._cache
+        return {
+            'scrapes': self.scrapes,
+            'renders': self.renders,
+            'render_latency_ms': round(self.last_render_latency * 1000, 2),
+            'exposition_bytes': len(body),
+            'exposition_gzip_bytes': len(compressed),
+        }
+
+    def close(self) -> None:
+        """Stop the HTTP server"""
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+        self._server = None
+
+    def _handler_class(self):
+        """Request handler bound to this exporter"""
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep-alive: scrapers reuse their connection, and headers and
+            # body go out without waiting on delayed ACKs
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                if self.path.split('?', 1)[0] != exporter.path:
+                    self.send_error(404)
+                    return
+                body, compressed = exporter._cache
+                exporter.scrapes += 1
+                use_gzip = 'gzip' in self.headers.get('Accept-Encoding', '')
+                payload = compressed if use_gzip else body
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                if use_gzip:
+                    self.send_header('Content-Encoding', 'gzip')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                if self.command != 'HEAD':
+                    self.wfile.write(payload)
+
+            do_HEAD = do_GET
+
+            def log_message(self, format, *args):
+                logger.debug(f"Prometheus exporter: {self.address_string()} {format % args}")
+
+        return Handler
@@ -0,0 +1,334 @@
+"""
+Age and size budgets for the storage directory
+
+FileStorage names every data file after a day (metrics-YYYY-MM-DD.jsonl,
+rollup-1h-YYYY-MM-DD.jsonl, ...) or, once merged, a month
+(rollup-1h-YYYY-MM.jsonl). RetentionManager works on those names, per
+tier, in one pass:
+
+1. Age: entries whose last day is older than the tier's retention are
+   removed, together with their sidecars (.idx, .cols/).
+2. Merge: closed day files of a rollup tier smaller than merge_below_bytes
+   are folded into the tier's monthly file, so a year of hourly rollups is
+   12 files rather than 365.
+3. Size: while the directory is over max_bytes, the entry whose last day
+   is oldest is evicted (raw data before rollups of the same day). A
+   merged month counts as its last day, so it outlives the raw day files
+   of that month. Today's files are never evicted.
+
+The pass is meant to run on a background thread; lower_io_priority() puts
+the calling thread in the idle I/O class so it yields the disk to the
+writer and to everything else on the host.
+"""
+
+import os
+import json
+import shutil
+import logging
+import threading
+from pathlib import Path
+from datetime import date, timedelta
+from typing import Dict, Any, Optional, List, Callable
+
+logger = logging.getLogger(__name__)
+
+
+def lower_io_priority() -> bool:
+    """
+    Move the calling thread to the idle I/O scheduling class
+
+    Linux applies I/O priorities per thread, so this leaves the writer and
+    collection threads alone.
+
+    Returns:
+        True if the priority was changed
+    """
+    try:
+        import psutil
+        psutil.Process(threading.get_native_id()).ionice(psutil.IOPRIO_CLASS_IDLE)
+        return True
+    except Exception as e:  # No psutil, not Linux, or not permitted
+        logger.debug(f"Could not lower I/O priority: {e}")
+    return False
+
+
+class _Entry:
+    """A dated file or directory of one tier"""
+
+    __slots__ = ('path', 'tier', 'rank', 'first', 'last', 'size', 'monthly')
+
+    def __init__(self, path: Path, tier: str, rank: int, first: date, last: date,
+                 size: int, monthly: bool):
+        self.path = path
+        self.tier = tier
+        self.rank = rank
+        self.first = first
+        self.last = last
+        self.size = size
+        self.monthly = monthly
+
+
+def _parse_period(text: str):
+    """
+    Parse the date part of a file name
+
+    Args:
+        text: File name with the tier prefix removed
+
+    Returns:
+        Tuple of (first day, last day, monthly) or None
+    """
+    try:
+        day = date.fromisoformat(text[:10])
+        return day, day, False
+    except ValueError:
+        pass
+    if len(text) < 8 or text[7] != '.':
+        return None
+    try:
+        first = date.fromisoformat(text[:7] + '-01')
+    except ValueError:
+        return None
+    following = (first.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return first, following - timedelta(days=1), True
+
+
+def _size(path: Path) -> int:
+    """Size of a file, or of the files in a directory"""
+    if path.is_dir():
+        return sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+    return path.stat().st_size
+
+
+def _remove(path: Path) -> None:
+    if path.is_dir() and not path.is_symlink():
+        shutil.rmtree(path)
+    else:
+        path.unlink()
+
+
+class RetentionManager:
+    """Applies age and size budgets to a storage directory"""
+
+    def __init__(self, directory: str, prefixes: Dict[str, str],
+                 retention_days: Optional[Dict[str, float]] = None,
+                 max_bytes: Optional[int] = None, merge_below_bytes: int = 1024 * 1024,
+                 first_timestamp: Optional[Callable[[Path], Optional[float]]] = None):
+        """
+        Initialize retention manager
+
+        Args:
+            directory: Storage directory
+            prefixes: Tier name to file name prefix, in eviction order for
+                entries of the same day ({'raw': 'metrics-', ...}); tiers
+                other than 'raw' are rollups and may be merged
+            retention_days: Days to keep per tier; tiers left out are kept
+                until the size budget needs their space
+            max_bytes: Size budget of the whole directory (None: no limit)
+            merge_below_bytes: Closed rollup day files smaller than this
+                are merged into monthly files (0 disables merging)
+            first_timestamp: Returns the first timestamp stored in a data
+                file, used to report the oldest retained sample
+        """
+        self.directory = Path(directory)
+        self.prefixes = prefixes
+        self.retention_days = dict(retention_days or {})
+        self.max_bytes = max_bytes
+        self.merge_below_bytes = merge_below_bytes
+        self.first_timestamp = first_timestamp
+
+        # Statistics
+        self.passes = 0
+        self.expired = 0
+        self.evicted = 0
+        self.merged = 0
+        self.disk_bytes = 0
+        self.disk_files = 0
+        self.oldest_timestamp: Optional[float] = None
+
+    def run(self, today: Optional[date] = None) -> None:
+        """
+        Apply retention, merging and the size budget once
+
+        Args:
+            today: Current local date (for tests)
+        """
+        today = today or date.today()
+
+        for entry in self._scan():
+            days = self.retention_days.get(entry.tier)
+            if days is not None and entry.last < today - timedelta(days=days):
+                if self._delete(entry):
+                    self.expired += 1
+
+        if self.merge_below_bytes > 0:
+            self._merge_small_files(today)
+
+        entries = self._scan()
+        self.disk_bytes, self.disk_files = self._usage()
+        if self.max_bytes is not None and self.disk_bytes > self.max_bytes:
+            entries.sort(key=lambda entry: (entry.last, entry.rank))
+            for entry in entries:
+                if self.disk_bytes <= self.max_bytes:
+                    break
+                if entry.last >= today:
+                    continue
+                if self._delete(entry):
+                    self.evicted += 1
+                    self.disk_bytes -= entry.size
+            self.disk_bytes, self.disk_files = self._usage()
+            if self.disk_bytes > self.max_bytes:
+                logger.warning(f"Storage directory {self.directory} uses {self.disk_bytes} bytes, "
+                               f"over its {self.max_bytes} byte budget, with only today's data left")
+
+        self.oldest_timestamp = self._oldest_timestamp(entries)
+        self.passes += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get retention statistics as of the last run
+
+        Returns:
+            Dictionary with the number of passes, bytes and files on
+            disk, the oldest retained timestamp, and expired, evicted and
+            merged file counts
+        """
+        return {
+            'passes': self.passes,
+            'disk_bytes': self.disk_bytes,
+            'disk_files': self.disk_files,
+            'oldest_timestamp': self.oldest_timestamp,
+            'expired_files': self.expired,
+            'evicted_files': self.evicted,
+            'merged_files': self.merged,
+        }
+
+    def _scan(self) -> List[_Entry]:
+        """List the dated entries of every tier"""
+        entries = []
+        for item in os.scandir(self.directory):
+            for rank, (tier, prefix) in enumerate(self.prefixes.items()):
+                if not item.name.startswith(prefix):
+                    continue
+                period = _parse_period(item.name[len(prefix):])
+                if period is None:
+                    break
+                path = Path(item.path)
+                try:
+                    size = _size(path)
+                except OSError:
+                    break  # Removed meanwhile
+                entries.append(_Entry(path, tier, rank, period[0], period[1], size, period[2]))
+                break
+        return entries
+
+    def _usage(self):
+        """Total bytes and files under the directory"""
+        total = files = 0
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                try:
+                    total += os.path.getsize(os.path.join(root, name))
+                    files += 1
+                except OSError:
+                    pass
+        return total, files
+
+    def _delete(self, entry: _Entry) -> bool:
+        try:
+            _remove(entry.path)
+            logger.info(f"Removed {entry.path} ({entry.tier} data up to {entry.last})")
+            return True
+        except FileNotFoundError:
+            return False
+        except OSError as e:
+            logger.error(f"Error removing {entry.path}: {e}")
+            return False
+
+    def _merge_small_files(self, today: date) -> None:
+        """Fold small closed rollup day files into monthly files"""
+        # The last bucket of a day is written just after midnight
+        closed_before = today - timedelta(days=1)
+        groups: Dict[Path, List[_Entry]] = {}
+        for entry in self._scan():
+            if (entry.tier == 'raw' or entry.monthly or entry.last >= closed_before
+                    or entry.path.suffix != '.jsonl' or entry.size >= self.merge_below_bytes):
+                continue
+            prefix = self.prefixes[entry.tier]
+            month = self.directory / f'{prefix}{entry.first.isoformat()[:7]}.jsonl'
+            groups.setdefault(month, []).append(entry)
+
+        for month, days in groups.items():
+            days.sort(key=lambda entry: entry.first)
+            try:
+                self._merge(month, [entry.path for entry in days])
+                self.merged += len(days)
+            except OSError as e:
+                logger.error(f"Error merging into {month}: {e}")
+
+    def _merge(self, month: Path, days: List[Path]) -> None:
+        """
+        Append day files to a monthly file and remove them
+
+        The monthly file is rewritten to a temporary file and renamed, so a
+        crash leaves either the old or the new version. Records not newer
+        than the monthly file's last record were merged before a crash
+        and are skipped.
+        """
+        existing = month.read_bytes() if month.exists() else b''
+        last = _last_timestamp(existing)
+        temp_path = month.with_name(month.name + '.tmp')
+        with open(temp_path, 'wb') as out:
+            out.write(existing)
+            for day in days:
+                with open(day, 'rb') as f:
+                    for line in f:
+                        timestamp = _line_timestamp(line)
+                        if timestamp is None or (last is not None and timestamp <= last):
+                            continue
+                        out.write(line if line.endswith(b'\n') else line + b'\n')
+                        last = timestamp
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(temp_path, month)
+
+        for path in [month] + days:
+            index = path.with_name(path.name + '.idx')
+            if index.exists():
+                index.unlink()
+        for day in days:
+            day.unlink()
+        logger.info(f"Merged {len(days)} files into {month}")
+
+    def _oldest_timestamp(self, entries: List[_Entry]) -> Optional[float]:
+        """First timestamp of the oldest remaining data file"""
+        if self.first_timestamp is None:
+            return None
+        for entry in sorted(entries, key=lambda entry: (entry.first, entry.rank)):
+            if entry.path.suffix == '.idx' or not entry.path.is_file():
+                continue
+            try:
+                timestamp = self.first_timestamp(entry.path)
+            except (OSError, ValueError) as e:
+                logger.debug(f"Could not read first timestamp of {entry.path}: {e}")
+                continue
+            if timestamp is not None:
+                return timestamp
+        return None
+
+
+def _line_timestamp(line: bytes) -> Optional[float]:
+    try:
+        timestamp = json.loads(line).get('timestamp')
+    except (ValueError, AttributeError):
+        return None
+    return timestamp if isinstance(timestamp, (int, float)) else None
+
+
+def _last_timestamp(data: bytes) -> Optional[float]:
+    """Timestamp of the last complete record in JSONL data"""
+    for line in reversed(data.splitlines()):
+        timestamp = _line_timestamp(line)
+        if timestamp is not None:
+            return timestamp
+    return None
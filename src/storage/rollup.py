@@ -0,0 +1,269 @@
+"""
+Multi-resolution rollups of stored metrics
+
+Raw samples are aggregated incrementally, as FileStorage flushes them, into
+fixed-width time buckets per tier (1m and 1h by default). Each closed
+bucket becomes one JSON line in a daily tier file:
+
+    rollup-1m-YYYY-MM-DD.jsonl
+    {"timestamp": <bucket start>, "<metric>": {"min": .., "max": .., "avg": ..,
+     "count": .., "last": ..}, ...}
+
+Tiers are chained: the 1m tier aggregates raw samples and the 1h tier
+merges closed 1m buckets, so no history is ever rescanned. The buckets
+still open are checkpointed to a state file after every batch (one small
+file write per flush) and resumed on the next start, so a killed agent
+loses no rollup data for the samples it flushed; the samples it had not
+flushed come back through FileStorage's spool replay.
+Only numeric top-level metrics are rolled up.
+"""
+
+import os
+import json
+import logging
+from pathlib import Path
+from datetime import date
+from typing import Dict, Any, Optional, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (name, bucket width in seconds), finest first
+TIERS = (('1m', 60), ('1h', 3600))
+
+STATE_FILE = 'rollup-state.json'
+
+
+class Aggregate:
+    """Running min/max/sum/count/last of one metric in one bucket"""
+
+    __slots__ = ('min', 'max', 'sum', 'count', 'last')
+
+    def __init__(self, value: float):
+        self.min = value
+        self.max = value
+        self.sum = value
+        self.count = 1
+        self.last = value
+
+    def merge(self, other: 'Aggregate') -> None:
+        if other.min < self.min:
+            self.min = other.min
+        if other.max > self.max:
+            self.max = other.max
+        self.sum += other.sum
+        self.count += other.count
+        self.last = other.last
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'min': self.min, 'max': self.max, 'avg': self.sum / self.count,
+                'count': self.count, 'last': self.last}
+
+    def to_state(self) -> List[float]:
+        return [self.min, self.max, self.sum, self.count, self.last]
+
+    @classmethod
+    def from_state(cls, state: List[float]) -> 'Aggregate':
+        aggregate = cls(state[0])
+        aggregate.min, aggregate.max, aggregate.sum, aggregate.count, aggregate.last = state
+        return aggregate
+
+
+class RollupTier:
+    """One resolution: the open bucket and the files closed buckets go to"""
+
+    def __init__(self, name: str, width: int, directory: Path):
+        """
+        Initialize tier
+
+        Args:
+            name: Tier name used in file names ('1m')
+            width: Bucket width in seconds
+            directory: Directory of the tier files
+        """
+        self.name = name
+        self.width = width
+        self.directory = directory
+        self.prefix = f'rollup-{name}-'
+        self.bucket_start: Optional[float] = None
+        self.bucket: Dict[str, Aggregate] = {}
+        self.late_samples = 0
+        self.buckets_written = 0
+
+    def path_for(self, day: str) -> Path:
+        """Tier file for an ISO date"""
+        return self.directory / f'{self.prefix}{day}.jsonl'
+
+    def month_path(self, day: str) -> Path:
+        """Tier file that day files of the month of an ISO date are merged into"""
+        return self.directory / f'{self.prefix}{day[:7]}.jsonl'
+
+    def add(self, timestamp: float, values: Dict[str, Aggregate]) -> Optional[Tuple[float, Dict[str, Aggregate]]]:
+        """
+        Add aggregates that start at timestamp to this tier
+
+        Args:
+            timestamp: Start time of what is being added
+            values: Metric name to aggregate (a raw sample is a count-1
+                aggregate per metric)
+
+        Returns:
+            The bucket that closed as a result, as (start, aggregates),
+            or None
+        """
+        start = timestamp - timestamp % self.width
+        closed = None
+        if self.bucket_start is None:
+            self.bucket_start = start
+        elif start > self.bucket_start:
+            closed = (self.bucket_start, self.bucket)
+            self.bucket_start = start
+            self.bucket = {}
+        elif start < self.bucket_start:
+            # Belongs to a bucket that was already written
+            self.late_samples += 1
+            return None
+
+        for name, aggregate in values.items():
+            current = self.bucket.get(name)
+            if current is None:
+                self.bucket[name] = Aggregate.from_state(aggregate.to_state())
+            else:
+                current.merge(aggregate)
+        return closed
+
+
+class RollupEngine:
+    """Incrementally maintains the rollup tiers of a storage directory"""
+
+    def __init__(self, directory: str, tiers: Tuple[Tuple[str, int], ...] = TIERS):
+        """
+        Initialize engine and resume buckets left open by the last run
+
+        Args:
+            directory: Storage directory holding the tier files
+            tiers: (name, width in seconds) pairs, finest first
+        """
+        self.directory = Path(directory)
+        self.tiers = [RollupTier(name, width, self.directory) for name, width in tiers]
+        # Whether the open buckets changed since the state was saved
+        self._dirty = False
+        self._load_state()
+
+    def tier(self, name: str) -> Optional[RollupTier]:
+        """Get a tier by name"""
+        for tier in self.tiers:
+            if tier.name == name:
+                return tier
+        return None
+
+    def add_samples(self, samples: List[Dict[str, Any]]) -> None:
+        """
+        Aggregate flushed samples and write the buckets they close
+
+        Args:
+            samples: Raw samples in time order
+        """
+        closed: Dict[str, List[Tuple[float, Dict[str, Aggregate]]]] = {}
+        for sample in samples:
+            timestamp = sample.get('timestamp')
+            if not _is_number(timestamp):
+                continue
+            values = {name: Aggregate(float(value)) for name, value in sample.items()
+                      if name != 'timestamp' and _is_number(value)}
+            self._cascade(0, timestamp, values, closed)
+            self._dirty = True
+        self._write(closed)
+        self.checkpoint()
+
+    def _cascade(self, level: int, timestamp: float, values: Dict[str, Aggregate],
+                 closed: Dict[str, List[Tuple[float, Dict[str, Aggregate]]]]) -> None:
+        """Add to a tier and feed each bucket it closes to the next tier"""
+        tier = self.tiers[level]
+        bucket = tier.add(timestamp, values)
+        if bucket is None:
+            return
+        closed.setdefault(tier.name, []).append(bucket)
+        if level + 1 < len(self.tiers):
+            self._cascade(level + 1, bucket[0], bucket[1], closed)
+
+    def _write(self, closed: Dict[str, List[Tuple[float, Dict[str, Aggregate]]]]) -> None:
+        """Append closed buckets to their tier files"""
+        for name, buckets in closed.items():
+            tier = self.tier(name)
+            lines: Dict[Path, List[str]] = {}
+            for start, aggregates in buckets:
+                record = {'timestamp': start}
+                record.update((metric, aggregate.to_dict())
+                              for metric, aggregate in aggregates.items())
+                path = tier.path_for(date.fromtimestamp(start).isoformat())
+                lines.setdefault(path, []).append(json.dumps(record) + '\n')
+            for path, chunk in lines.items():
+                try:
+                    with open(path, 'a', encoding='utf-8') as f:
+                        f.write(''.join(chunk))
+                    tier.buckets_written += len(chunk)
+                except OSError as e:
+                    logger.error(f"Error writing rollup file {path}: {e}")
+
+    def close(self) -> None:
+        """Save the open buckets so the next run can complete them"""
+        self.checkpoint()
+
+    def checkpoint(self) -> None:
+        """
+        Save the open buckets, if they changed, so the next run can complete them
+
+        Closed buckets are appended to the tier files first, so a bucket
+        is always in a tier file or in the state, or both after a kill in
+        between (queries key buckets by start, so a repeat is harmless).
+        """
+        if not self._dirty:
+            return
+        state = {tier.name: {'start': tier.bucket_start,
+                             'bucket': {name: aggregate.to_state()
+                                        for name, aggregate in tier.bucket.items()}}
+                 for tier in self.tiers if tier.bucket_start is not None}
+        path = self.directory / STATE_FILE
+        try:
+            temp_path = path.with_name(path.name + '.tmp')
+            temp_path.write_text(json.dumps(state), encoding='utf-8')
+            os.replace(temp_path, path)
+            self._dirty = False
+        except OSError as e:
+            logger.error(f"Error saving rollup state {path}: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get rollup statistics
+
+        Returns:
+            Buckets written and late samples per tier
+        """
+        stats: Dict[str, Any] = {}
+        for tier in self.tiers:
+            stats[f'{tier.name}_buckets'] = tier.buckets_written
+            stats[f'{tier.name}_late_samples'] = tier.late_samples
+        return stats
+
+    def _load_state(self) -> None:
+        path = self.directory / STATE_FILE
+        try:
+            state = json.loads(path.read_text(encoding='utf-8'))
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable rollup state {path}: {e}")
+            return
+
+        for tier in self.tiers:
+            saved = state.get(tier.name)
+            if not saved:
+                continue
+            tier.bucket_start = saved['start']
+            tier.bucket = {name: Aggregate.from_state(values)
+                           for name, values in saved['bucket'].items()}
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
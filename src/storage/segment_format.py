@@ -0,0 +1,577 @@
+"""
+Compact columnar segment format for stored metrics
+
+A segment holds one flush worth of samples, stored column by column:
+
+    magic 'MSEG' | u32 body length | body
+
+    body:   varint rows | varint columns | schema | column payloads
+    schema: per column: varint name length, name, u8 type, u8 flags,
+            varint payload length
+
+Column payloads start with a bitmap of the rows that have a value when
+some rows lack one (flag HAS_MISSING) and a bitmap of the rows where the
+key was present with value None (flag HAS_NONE), followed by the encoded
+values of the rows that have one:
+
+- TIMESTAMP: microseconds, delta-of-delta, zigzag varints
+- FLOAT: Gorilla XOR compression of the IEEE 754 bit patterns
+- INT: deltas as zigzag varints
+- STRING: dictionary of distinct values, then a varint index per row
+- JSON: as STRING, over the JSON text of lists, dicts and booleans
+
+The payload lengths in the schema let readers skip columns they do not
+need. A segment cut short by a crash is detected by its body length and
+ignored. Timestamps round to whole microseconds and a column mixing ints
+and floats is stored as FLOAT; everything else round-trips exactly.
+
+Convert existing files with:
+
+    python -m src.storage.segment_format to-segment metrics-2024-01-01.jsonl out.seg
+    python -m src.storage.segment_format to-jsonl out.seg metrics-2024-01-01.jsonl
+"""
+
+import json
+import struct
+import logging
+import argparse
+from typing import Dict, Any, Optional, List, Tuple, Iterator, Iterable, Set
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'MSEG'
+_HEADER = struct.Struct('<4sI')
+
+# Column types
+TIMESTAMP, FLOAT, INT, STRING, JSON = 1, 2, 3, 4, 5
+
+# Column flags
+HAS_MISSING = 0x01
+HAS_NONE = 0x02
+
+# Marks rows that lack a column
+_MISSING = object()
+
+_DOUBLE = struct.Struct('<d')
+_UINT64 = struct.Struct('<Q')
+
+
+class SegmentError(Exception):
+    """Raised when segment data is malformed"""
+
+
+# -- Variable-length integers -------------------------------------------------
+
+def _write_varint(out: bytearray, value: int) -> None:
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(buf, pos: int) -> Tuple[int, int]:
+    result = 0
+    shift = 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _zigzag(value: int) -> int:
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def _unzigzag(value: int) -> int:
+    return value >> 1 if not value & 1 else -((value + 1) >> 1)
+
+
+# -- Bit streams for Gorilla compression -------------------------------------
+
+class _BitWriter:
+    """Appends bit fields MSB first, flushing whole bytes as they fill"""
+
+    __slots__ = ('out', '_acc', '_bits')
+
+    def __init__(self):
+        self.out = bytearray()
+        self._acc = 0
+        self._bits = 0
+
+    def write(self, value: int, nbits: int) -> None:
+        self._acc = (self._acc << nbits) | value
+        self._bits += nbits
+        if self._bits >= 64:
+            extra = self._bits & 7
+            self.out += (self._acc >> extra).to_bytes(self._bits >> 3, 'big')
+            self._acc &= (1 << extra) - 1
+            self._bits = extra
+
+    def getvalue(self) -> bytes:
+        if self._bits:
+            pad = -self._bits & 7
+            self.out += (self._acc << pad).to_bytes((self._bits + pad) >> 3, 'big')
+            self._acc = 0
+            self._bits = 0
+        return bytes(self.out)
+
+
+class _BitReader:
+    """Reads bit fields written by _BitWriter"""
+
+    __slots__ = ('_data', '_pos', '_size')
+
+    def __init__(self, data: bytes):
+        self._data = data
+        self._pos = 0
+        self._size = len(data) * 8
+
+    def read(self, nbits: int) -> int:
+        start = self._pos
+        end = start + nbits
+        if end > self._size:
+            raise SegmentError("Float column ends early")
+        self._pos = end
+        # Only the bytes spanning the field are converted
+        last = (end + 7) >> 3
+        chunk = int.from_bytes(self._data[start >> 3:last], 'big')
+        return (chunk >> (last * 8 - end)) & ((1 << nbits) - 1)
+
+
+# -- Column codecs ------------------------------------------------------------
+
+def _encode_timestamps(values: List[float], out: bytearray) -> None:
+    previous = 0
+    previous_delta = 0
+    for value in values:
+        micros = round(value * 1_000_000)
+        delta = micros - previous
+        _write_varint(out, _zigzag(delta - previous_delta))
+        previous = micros
+        previous_delta = delta
+
+
+def _decode_timestamps(buf, pos: int, count: int) -> List[float]:
+    values = []
+    previous = 0
+    previous_delta = 0
+    for _ in range(count):
+        dod, pos = _read_varint(buf, pos)
+        previous_delta += _unzigzag(dod)
+        previous += previous_delta
+        values.append(previous / 1_000_000)
+    return values
+
+
+def _encode_floats(values: List[float], out: bytearray) -> None:
+    writer = _BitWriter()
+    previous = 0
+    leading = trailing = -1
+    for index, value in enumerate(values):
+        bits = _UINT64.unpack(_DOUBLE.pack(value))[0]
+        if index == 0:
+            writer.write(bits, 64)
+            previous = bits
+            continue
+
+        xor = bits ^ previous
+        previous = bits
+        if xor == 0:
+            writer.write(0, 1)
+            continue
+
+        new_leading = min(64 - xor.bit_length(), 31)
+        new_trailing = (xor & -xor).bit_length() - 1
+        if leading >= 0 and new_leading >= leading and new_trailing >= trailing:
+            # Meaningful bits fit in the previous window
+            writer.write(0b10, 2)
+            writer.write(xor >> trailing, 64 - leading - trailing)
+        else:
+            leading, trailing = new_leading, new_trailing
+            meaningful = 64 - leading - trailing
+            writer.write(0b11, 2)
+            writer.write(leading, 5)
+            writer.write(meaningful & 63, 6)  # 64 is stored as 0
+            writer.write(xor >> trailing, meaningful)
+    out += writer.getvalue()
+
+
+def _decode_floats(data: bytes, count: int) -> List[float]:
+    reader = _BitReader(data)
+    values = []
+    previous = 0
+    leading = trailing = 0
+    for index in range(count):
+        if index == 0:
+            previous = reader.read(64)
+        elif reader.read(1):
+            if reader.read(1):
+                leading = reader.read(5)
+                meaningful = reader.read(6) or 64
+                trailing = 64 - leading - meaningful
+            previous ^= reader.read(64 - leading - trailing) << trailing
+        values.append(_DOUBLE.unpack(_UINT64.pack(previous))[0])
+    return values
+
+
+def _encode_ints(values: List[int], out: bytearray) -> None:
+    previous = 0
+    for value in values:
+        _write_varint(out, _zigzag(value - previous))
+        previous = value
+
+
+def _decode_ints(buf, pos: int, count: int) -> List[int]:
+    values = []
+    previous = 0
+    for _ in range(count):
+        delta, pos = _read_varint(buf, pos)
+        previous += _unzigzag(delta)
+        values.append(previous)
+    return values
+
+
+def _encode_dictionary(values: List[str], out: bytearray) -> None:
+    entries: Dict[str, int] = {}
+    indexes = [entries.setdefault(value, len(entries)) for value in values]
+    _write_varint(out, len(entries))
+    for entry in entries:
+        encoded = entry.encode('utf-8')
+        _write_varint(out, len(encoded))
+        out += encoded
+    for index in indexes:
+        _write_varint(out, index)
+
+
+def _decode_dictionary(buf, pos: int, count: int) -> List[str]:
+    size, pos = _read_varint(buf, pos)
+    entries = []
+    for _ in range(size):
+        length, pos = _read_varint(buf, pos)
+        entries.append(bytes(buf[pos:pos + length]).decode('utf-8'))
+        pos += length
+    values = []
+    for _ in range(count):
+        index, pos = _read_varint(buf, pos)
+        values.append(entries[index])
+    return values
+
+
+def _column_type(name: str, values: List[Any], rows: int) -> int:
+    """Pick the narrowest column type that represents every value exactly"""
+    if not values:
+        return JSON
+    types = {type(value) for value in values}
+    if types <= {int, float}:
+        if name == 'timestamp' and len(values) == rows:
+            return TIMESTAMP
+        return INT if types == {int} else FLOAT
+    if types == {str}:
+        return STRING
+    return JSON
+
+
+def _bitmap(rows: Iterable[int], count: int) -> bytearray:
+    bitmap = bytearray((count + 7) >> 3)
+    for row in rows:
+        bitmap[row >> 3] |= 1 << (row & 7)
+    return bitmap
+
+
+def _bitmap_rows(bitmap, count: int) -> List[int]:
+    return [row for row in range(count) if bitmap[row >> 3] >> (row & 7) & 1]
+
+
+# -- Segments -----------------------------------------------------------------
+
+def encode_segment(samples: List[Dict[str, Any]]) -> bytes:
+    """
+    Encode samples into one segment
+
+    Args:
+        samples: Flat metric dictionaries, as written by the agent
+
+    Returns:
+        Encoded segment, ready to append to a segment file
+    """
+    rows = len(samples)
+    names: Dict[str, None] = {}
+    for sample in samples:
+        for name in sample:
+            names.setdefault(name)
+
+    schema = bytearray()
+    payloads = bytearray()
+    _write_varint(schema, rows)
+    _write_varint(schema, len(names))
+
+    for name in names:
+        present: List[int] = []
+        nones: List[int] = []
+        values: List[Any] = []
+        for row, sample in enumerate(samples):
+            value = sample.get(name, _MISSING)
+            if value is _MISSING:
+                continue
+            if value is None:
+                nones.append(row)
+                continue
+            present.append(row)
+            values.append(value)
+
+        column_type = _column_type(name, values, rows)
+        flags = 0
+        payload = bytearray()
+        if len(values) < rows:
+            flags |= HAS_MISSING
+            payload += _bitmap(present, rows)
+        if nones:
+            flags |= HAS_NONE
+            payload += _bitmap(nones, rows)
+
+        if column_type == TIMESTAMP:
+            _encode_timestamps(values, payload)
+        elif column_type == FLOAT:
+            _encode_floats([float(value) for value in values], payload)
+        elif column_type == INT:
+            _encode_ints(values, payload)
+        elif column_type == STRING:
+            _encode_dictionary(values, payload)
+        else:
+            _encode_dictionary([json.dumps(value, separators=(',', ':'), default=str)
+                                for value in values], payload)
+
+        encoded_name = name.encode('utf-8')
+        _write_varint(schema, len(encoded_name))
+        schema += encoded_name
+        schema.append(column_type)
+        schema.append(flags)
+        _write_varint(schema, len(payload))
+        payloads += payload
+
+    body = schema + payloads
+    return _HEADER.pack(MAGIC, len(body)) + bytes(body)
+
+
+def read_schema(buf, offset: int = 0) -> Tuple[int, List[Tuple[str, int, int, int, int]], int]:
+    """
+    Read a segment's schema without decoding any column
+
+    Args:
+        buf: Bytes-like object holding the segment
+        offset: Offset of the segment's magic
+
+    Returns:
+        Tuple of (row count, columns as (name, type, flags, payload
+        offset, payload length), offset of the next segment)
+
+    Raises:
+        SegmentError: If the data is not a complete segment
+    """
+    if len(buf) - offset < _HEADER.size:
+        raise SegmentError("Truncated segment header")
+    magic, length = _HEADER.unpack_from(buf, offset)
+    if magic != MAGIC:
+        raise SegmentError(f"Bad segment magic at offset {offset}")
+    start = offset + _HEADER.size
+    end = start + length
+    if end > len(buf):
+        raise SegmentError(f"Truncated segment at offset {offset}")
+
+    rows, pos = _read_varint(buf, start)
+    count, pos = _read_varint(buf, pos)
+    schema = []
+    for _ in range(count):
+        name_length, pos = _read_varint(buf, pos)
+        name = bytes(buf[pos:pos + name_length]).decode('utf-8')
+        pos += name_length
+        column_type, flags = buf[pos], buf[pos + 1]
+        payload_length, pos = _read_varint(buf, pos + 2)
+        schema.append([name, column_type, flags, 0, payload_length])
+
+    # Payloads follow the schema in column order
+    for column in schema:
+        column[3] = pos
+        pos += column[4]
+    if pos != end:
+        raise SegmentError(f"Segment at offset {offset} has inconsistent column lengths")
+    return rows, [tuple(column) for column in schema], end
+
+
+def decode_column(buf, rows: int, column: Tuple[str, int, int, int, int]) -> List[Any]:
+    """
+    Decode one column of a segment
+
+    Args:
+        buf: Bytes-like object holding the segment
+        rows: Row count of the segment
+        column: Column entry from read_schema()
+
+    Returns:
+        One value per row; _MISSING for rows without the key
+    """
+    _, column_type, flags, pos, length = column
+    end = pos + length
+    bitmap_size = (rows + 7) >> 3
+
+    present = list(range(rows))
+    nones: Set[int] = set()
+    if flags & HAS_MISSING:
+        present = _bitmap_rows(buf[pos:pos + bitmap_size], rows)
+        pos += bitmap_size
+    if flags & HAS_NONE:
+        nones = set(_bitmap_rows(buf[pos:pos + bitmap_size], rows))
+        present = [row for row in present if row not in nones]
+        pos += bitmap_size
+
+    count = len(present)
+    if column_type == TIMESTAMP:
+        values = _decode_timestamps(buf, pos, count)
+    elif column_type == FLOAT:
+        values = _decode_floats(bytes(buf[pos:end]), count)
+    elif column_type == INT:
+        values = _decode_ints(buf, pos, count)
+    elif column_type == STRING:
+        values = _decode_dictionary(buf, pos, count)
+    elif column_type == JSON:
+        values = [json.loads(text) for text in _decode_dictionary(buf, pos, count)]
+    else:
+        raise SegmentError(f"Unknown column type {column_type}")
+
+    result: List[Any] = [_MISSING] * rows
+    for row in nones:
+        result[row] = None
+    for row, value in zip(present, values):
+        result[row] = value
+    return result
+
+
+def decode_segment(buf, offset: int = 0,
+                   columns: Optional[Iterable[str]] = None) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Decode a segment back into samples
+
+    Args:
+        buf: Bytes-like object holding the segment
+        offset: Offset of the segment's magic
+        columns: Optional column names to decode; other columns are
+            skipped without being parsed
+
+    Returns:
+        Tuple of (samples, offset of the next segment)
+    """
+    rows, schema, end = read_schema(buf, offset)
+    wanted = set(columns) if columns is not None else None
+
+    samples: List[Dict[str, Any]] = [{} for _ in range(rows)]
+    for column in schema:
+        if wanted is not None and column[0] not in wanted:
+            continue
+        name = column[0]
+        for sample, value in zip(samples, decode_column(buf, rows, column)):
+            if value is not _MISSING:
+                sample[name] = value
+    return samples, end
+
+
+def iter_segment_file(path: str, columns: Optional[Iterable[str]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Iterate over the samples of a segment file
+
+    A truncated segment at the end of the file (an interrupted flush) is
+    skipped with a warning.
+
+    Args:
+        path: Segment file path
+        columns: Optional column names to decode
+
+    Yields:
+        Sample dictionaries
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    offset = 0
+    while offset < len(data):
+        try:
+            samples, offset = decode_segment(data, offset, columns)
+        except SegmentError as e:
+            logger.warning(f"Stopping at damaged segment in {path}: {e}")
+            return
+        yield from samples
+
+
+def _batches(samples: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    batch: List[Dict[str, Any]] = []
+    for sample in samples:
+        batch.append(sample)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def convert_to_segment(src: str, dst: str, segment_rows: int = 1000) -> int:
+    """
+    Convert a JSONL metrics file to a segment file
+
+    Args:
+        src: JSONL file path
+        dst: Segment file path (overwritten)
+        segment_rows: Samples per segment
+
+    Returns:
+        Number of samples converted
+    """
+    count = 0
+    with open(src, 'r', encoding='utf-8') as f_in, open(dst, 'wb') as f_out:
+        samples = (json.loads(line) for line in f_in if line.strip())
+        for batch in _batches(samples, segment_rows):
+            f_out.write(encode_segment(batch))
+            count += len(batch)
+    return count
+
+
+def convert_to_jsonl(src: str, dst: str) -> int:
+    """
+    Convert a segment file to a JSONL metrics file
+
+    Args:
+        src: Segment file path
+        dst: JSONL file path (overwritten)
+
+    Returns:
+        Number of samples converted
+    """
+    count = 0
+    with open(dst, 'w', encoding='utf-8') as f_out:
+        for sample in iter_segment_file(src):
+            json.dump(sample, f_out, default=str)
+            f_out.write('\n')
+            count += 1
+    return count
+
+
+def main() -> None:
+    """Command line converter between JSONL and segment files"""
+    parser = argparse.ArgumentParser(description="Convert metrics files between JSONL and segments")
+    parser.add_argument("direction", choices=["to-segment", "to-jsonl"])
+    parser.add_argument("src")
+    parser.add_argument("dst")
+    parser.add_argument("--segment-rows", type=int, default=1000,
+                        help="samples per segment when writing segments (default: 1000)")
+    args = parser.parse_args()
+
+    if args.direction == "to-segment":
+        count = convert_to_segment(args.src, args.dst, args.segment_rows)
+    else:
+        count = convert_to_jsonl(args.src, args.dst)
+    print(f"Converted {count} samples: {args.src} -> {args.dst}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+"""
+Append-only write-ahead spool for samples not yet in storage
+
+Every sample is appended to the spool before it is buffered, so a killed
+agent (SIGKILL, OOM) loses nothing that reached the spool: on the next
+start the records the storage never committed are replayed into it.
+
+Record framing, little-endian:
+
+    u32 payload length | u32 crc32(seq + payload) | u64 seq | payload (JSON)
+
+A torn or corrupt record ends the valid part of the spool. Committed
+progress is kept in a small side file holding the highest sequence number
+the storage has persisted; once every appended record is committed the
+spool is truncated to zero.
+
+Durability levels trade throughput for what a record survives:
+
+- 'os': write() only. Survives the process dying, not a kernel crash or
+  power loss.
+- 'group': fsync once per group_size records or group_interval_ms,
+  whichever comes first. A power loss loses at most the unsynced group.
+  append() only writes; the thread that flushes storage calls
+  sync_due(), so a caller appending from the collection loop never
+  waits on an fsync.
+- 'sync': fsync after every record, inside append().
+
+Replay is at-least-once: a crash between a storage flush and its commit
+replays those samples again.
+"""
+
+import os
+import json
+import time
+import zlib
+import struct
+import logging
+import threading
+from typing import Dict, Any, List, Tuple, Optional
+from src.sample import json_default
+
+logger = logging.getLogger(__name__)
+
+_RECORD = struct.Struct('<IIQ')
+_COMMIT = struct.Struct('<QI')
+_SEQ = struct.Struct('<Q')
+
+# Records larger than this are treated as corruption on replay
+MAX_RECORD_SIZE = 16 * 1024 * 1024
+
+
+def _encode_record(seq: int, sample: Dict[str, Any]) -> bytes:
+    """Frame one sample as a spool record"""
+    payload = json.dumps(sample, default=json_default).encode('utf-8')
+    crc = zlib.crc32(payload, zlib.crc32(_SEQ.pack(seq)))
+    return _RECORD.pack(len(payload), crc, seq) + payload
+
+
+class WriteAheadSpool:
+    """Crash-safe append-only spool with group fsync"""
+
+    DURABILITY_LEVELS = ('os', 'group', 'sync')
+
+    def __init__(self, path: str, durability: str = 'group', group_size: int = 16,
+                 group_interval_ms: int = 5000, max_bytes: int = 4 * 1024 * 1024):
+        """
+        Open (or create) a spool
+
+        Args:
+            path: Spool file path; the commit marker is stored next to it
+            durability: 'os', 'group' or 'sync' (see module docstring)
+            group_size: Records per fsync with 'group' durability
+            group_interval_ms: Maximum age of the oldest unsynced record
+                with 'group' durability, checked by sync_due()
+            max_bytes: Spool size above which committed records are
+                compacted away even though some are still pending
+        """
+        if durability not in self.DURABILITY_LEVELS:
+            raise ValueError(f"Unknown spool durability: {durability}")
+
+        self.path = path
+        self.commit_path = path + '.commit'
+        self.durability = durability
+        self.group_size = group_size
+        self.group_interval = group_interval_ms / 1000
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+        # Statistics
+        self.appends = 0
+        self.fsyncs = 0
+        self.bytes_appended = 0
+
+        self._committed = self._read_commit()
+        records, valid_end = self._scan()
+        self._pending = [(seq, sample) for seq, sample in records if seq > self._committed]
+        self._seq = max([self._committed] + [seq for seq, _ in records])
+
+        self._fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+        if os.fstat(self._fd).st_size != valid_end:
+            logger.warning(f"Discarding torn tail of spool {path} after byte {valid_end}")
+            os.ftruncate(self._fd, valid_end)
+        self._size = valid_end
+        self._unsynced = 0
+        self._first_unsynced = 0.0
+
+        if self._pending:
+            logger.info(f"Spool {path} holds {len(self._pending)} uncommitted samples to replay")
+
+    def replay(self) -> List[Tuple[int, Dict[str, Any]]]:
+        """
+        Get the records that storage never committed
+
+        Returns:
+            List of (seq, sample) in append order; commit the last seq
+            once they are persisted
+        """
+        pending, self._pending = self._pending, []
+        return pending
+
+    def append(self, sample: Dict[str, Any]) -> int:
+        """
+        Append a sample
+
+        Only 'sync' durability fsyncs here; 'group' leaves that to
+        sync_due().
+
+        Args:
+            sample: Sample dictionary
+
+        Returns:
+            Sequence number of the record
+        """
+        with self._lock:
+            self._seq += 1
+            seq = self._seq
+            record = _encode_record(seq, sample)
+            os.write(self._fd, record)
+            self._size += len(record)
+            self.appends += 1
+            self.bytes_appended += len(record)
+
+            if self.durability == 'sync':
+                self._fsync()
+            elif self.durability == 'group':
+                if not self._unsynced:
+                    self._first_unsynced = time.monotonic()
+                self._unsynced += 1
+        return seq
+
+    def sync_due(self) -> bool:
+        """
+        Fsync the unsynced group once it is full or old enough
+
+        Called by the thread that flushes storage. The fsync runs outside
+        the spool lock, so appends from other threads do not wait for it.
+
+        Returns:
+            True if the spool was synced
+        """
+        with self._lock:
+            if self.durability != 'group' or not self._unsynced or self._fd < 0:
+                return False
+            if (self._unsynced < self.group_size
+                    and time.monotonic() - self._first_unsynced < self.group_interval):
+                return False
+            fd = self._fd
+            self._unsynced = 0
+        os.fsync(fd)
+        with self._lock:
+            self.fsyncs += 1
+        return True
+
+    def sync_deadline(self) -> Optional[float]:
+        """
+        Get when the unsynced group is due for sync_due()
+
+        Returns:
+            Monotonic time, or None when nothing awaits a group fsync
+        """
+        if self.durability != 'group' or not self._unsynced:
+            return None
+        return self._first_unsynced + self.group_interval
+
+    def sync(self) -> None:
+        """Fsync any appended records that are not yet synced"""
+        with self._lock:
+            if self._unsynced:
+                self._fsync()
+
+    def commit(self, seq: int) -> None:
+        """
+        Mark all records up to seq as persisted by storage
+
+        Truncates the spool when nothing is pending, and compacts it when
+        it has grown past max_bytes.
+
+        Args:
+            seq: Highest sequence number now held by storage
+        """
+        with self._lock:
+            if seq <= self._committed:
+                return
+            self._committed = seq
+            self._write_commit(seq)
+
+            if seq >= self._seq:
+                os.ftruncate(self._fd, 0)
+                self._size = 0
+                self._unsynced = 0
+            elif self._size > self.max_bytes:
+                self._compact()
+
+    def pending(self) -> int:
+        """
+        Get the number of appended records not yet committed
+
+        Returns:
+            Uncommitted record count
+        """
+        return self._seq - self._committed
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get spool statistics
+
+        Returns:
+            Dictionary with appends, fsyncs, bytes appended, current size
+            and uncommitted records
+        """
+        return {
+            'appends': self.appends,
+            'fsyncs': self.fsyncs,
+            'bytes_appended': self.bytes_appended,
+            'size_bytes': self._size,
+            'pending': self.pending(),
+        }
+
+    def close(self) -> None:
+        """Sync and close the spool"""
+        with self._lock:
+            if self._fd < 0:
+                return
+            if self._unsynced:
+                self._fsync()
+            os.close(self._fd)
+            self._fd = -1
+
+    def _fsync(self) -> None:
+        os.fsync(self._fd)
+        self.fsyncs += 1
+        self._unsynced = 0
+
+    def _read_commit(self) -> int:
+        """Read the committed sequence number (0 if none or damaged)"""
+        try:
+            with open(self.commit_path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return 0
+        if len(data) != _COMMIT.size:
+            return 0
+        seq, crc = _COMMIT.unpack(data)
+        return seq if crc == zlib.crc32(data[:8]) else 0
+
+    def _write_commit(self, seq: int) -> None:
+        """Atomically replace the commit marker"""
+        seq_bytes = _SEQ.pack(seq)
+        temp_path = self.commit_path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(_COMMIT.pack(seq, zlib.crc32(seq_bytes)))
+        os.replace(temp_path, self.commit_path)
+
+    def _scan(self) -> Tuple[List[Tuple[int, Dict[str, Any]]], int]:
+        """
+        Read the valid records of a spool file
+
+        Returns:
+            Tuple of (records as (seq, sample), offset where valid data ends)
+        """
+        try:
+            with open(self.path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return [], 0
+
+        records = []
+        offset = 0
+        while offset + _RECORD.size <= len(data):
+            length, crc, seq = _RECORD.unpack_from(data, offset)
+            start = offset + _RECORD.size
+            end = start + length
+            if length > MAX_RECORD_SIZE or end > len(data):
+                break
+            payload = data[start:end]
+            if zlib.crc32(payload, zlib.crc32(_SEQ.pack(seq))) != crc:
+                break
+            try:
+                records.append((seq, json.loads(payload)))
+            except ValueError:
+                break
+            offset = end
+        return records, offset
+
+    def _compact(self) -> None:
+        """Rewrite the spool with only its uncommitted records"""
+        records, _ = self._scan()
+        temp_path = self.path + '.tmp'
+        size = 0
+        with open(temp_path, 'wb') as f:
+            for seq, sample in records:
+                if seq <= self._committed:
+                    continue
+                record = _encode_record(seq, sample)
+                f.write(record)
+                size += len(record)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+
+        os.close(self._fd)
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND)
+        self._size = size
+        self._unsynced = 0
+        logger.debug(f"Compacted spool {self.path} to {size} bytes")
@@ -0,0 +1,312 @@
+"""
+SQLite storage backend
+
+A queryable local store for single-box deployments. Samples are kept in a
+narrow layout, one row per value, with a dictionary table naming each
+series once:
+
+    series(id, metric, host, entity)        -- UNIQUE (metric, host, entity)
+    samples(series_id, ts, value)           -- PRIMARY KEY (series_id, ts),
+                                               WITHOUT ROWID
+
+samples is clustered on its primary key, so all rows of a series are
+stored together in time order and a query for a time range of a metric is
+a range scan per matching series that never touches another table page.
+Timestamps are integer milliseconds.
+
+Per-entity values get one series per entity, named like the Prometheus
+exporter names them: the core=1 series of cpu_usage_per_core is metric
+'cpu_usage_per_core', entity '1'; disk_io_per_device['sda']['disk_read_bytes']
+is metric 'disk_read_bytes_per_device', entity 'sda'. Strings are not
+stored.
+
+Rows are buffered and inserted batch_size samples at a time in one
+transaction, sorted by series so the B-tree is walked in order; the
+database runs in WAL mode with synchronous=NORMAL, so a batch costs one
+WAL append and readers never block the writer. Since each series has its
+own pages, a batch writes one page per series it touches: larger batches
+put more rows on each page write.
+"""
+
+import math
+import time
+import sqlite3
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+from src.storage import StorageBackend, entity_label, iter_series
+from src.sample import LabelSet
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS series (
+    id INTEGER PRIMARY KEY,
+    metric TEXT NOT NULL,
+    host TEXT NOT NULL,
+    entity TEXT NOT NULL DEFAULT '',
+    UNIQUE (metric, host, entity)
+);
+CREATE TABLE IF NOT EXISTS samples (
+    series_id INTEGER NOT NULL,
+    ts INTEGER NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (series_id, ts)
+) WITHOUT ROWID;
+"""
+
+# How often the retention DELETE runs, in seconds
+RETENTION_INTERVAL = 3600
+
+
+def _numeric(value: Any) -> Optional[float]:
+    """A storable value, or None"""
+    if isinstance(value, bool):
+        return float(value)
+    if isinstance(value, (int, float)) and math.isfinite(value):
+        return value
+    return None
+
+
+class SQLiteStorage(StorageBackend):
+    """Storage backend that keeps samples in a local SQLite database"""
+
+    def __init__(self, path: str = 'data/metrics.db', batch_size: int = 100,
+                 flush_interval_s: float = 10.0, retention_days: Optional[float] = None,
+                 cache_size_mb: int = 16):
+        """
+        Initialize backend and open (or create) the database
+
+        Args:
+            path: Database file
+            batch_size: Samples buffered before they are inserted in one
+                transaction
+            flush_interval_s: Maximum age of buffered samples
+            retention_days: Samples older than this are deleted (None
+                keeps everything)
+            cache_size_mb: SQLite page cache size
+        """
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self.retention_days = retention_days
+
+        # Queries may come from other threads (e.g. an API server)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(f'PRAGMA cache_size=-{cache_size_mb * 1024}')
+        self._conn.executescript(SCHEMA)
+
+        # (metric, host, entity) -> series id
+        self._series: Dict[Tuple[str, str, str], int] = {
+            (metric, host, entity): series_id for series_id, metric, host, entity
+            in self._conn.execute('SELECT id, metric, host, entity FROM series')}
+        # Interned label set -> entity column ('1' for core=1)
+        self._entities: Dict[LabelSet, str] = {}
+
+        self._rows: List[Tuple[int, int, float]] = []
+        self._buffered = 0
+        self._last_flush = time.monotonic()
+        self._last_retention: Optional[float] = None
+
+        # Statistics
+        self.rows_written = 0
+        self.batches = 0
+        self.deleted_rows = 0
+        self.last_flush_latency = 0.0
+
+        logger.info(f"SQLite storage initialized: {path}")
+
+    def write_metrics(self, metrics: Dict[str, Any]) -> bool:
+        """
+        Buffer a sample, inserting the buffer when it is full or old
+
+        Args:
+            metrics: Dictionary of metrics to store
+
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            with self._lock:
+                self._add_rows(metrics)
+                self._buffered += 1
+                if (self._buffered >= self.batch_size
+                        or time.monotonic() - self._last_flush >= self.flush_interval_s):
+                    self._flush()
+            return True
+        except Exception as e:
+            logger.error(f"Error writing metrics to SQLite: {e}", exc_info=True)
+            return False
+
+    def _add_rows(self, metrics: Dict[str, Any]) -> None:
+        """Turn a sample into (series id, ts, value) rows"""
+        timestamp = metrics.get('timestamp')
+        if not isinstance(timestamp, (int, float)):
+            timestamp = time.time()
+        ts = int(round(timestamp * 1000))
+        host = str(metrics.get('hostname') or '')
+        rows = self._rows
+
+        for key, label_set, value in iter_series(metrics):
+            if label_set:
+                number = _numeric(value)
+                if number is not None:
+                    entity = self._entities.get(label_set)
+                    if entity is None:
+                        entity = self._entities[label_set] = ','.join(
+                            label_value for _, label_value in label_set)
+                    rows.append((self._series_id(key, host, entity), ts, number))
+                continue
+            if '_per_' in key and isinstance(value, dict):
+                label = entity_label(key)
+                for entity, inner in value.items():
+                    if not isinstance(inner, dict):
+                        continue
+                    for inner_key, inner_value in inner.items():
+                        number = _numeric(inner_value)
+                        if number is not None:
+                            rows.append((self._series_id(f'{inner_key}_per_{label}', host, str(entity)),
+                                         ts, number))
+                continue
+            number = _numeric(value)
+            if number is not None:
+                rows.append((self._series_id(key, host, ''), ts, number))
+
+    def _series_id(self, metric: str, host: str, entity: str) -> int:
+        """Id of a series, created on first use"""
+        key = (metric, host, entity)
+        series_id = self._series.get(key)
+        if series_id is None:
+            self._conn.execute('INSERT OR IGNORE INTO series (metric, host, entity) VALUES (?, ?, ?)', key)
+            series_id = self._conn.execute(
+                'SELECT id FROM series WHERE metric = ? AND host = ? AND entity = ?', key).fetchone()[0]
+            self._series[key] = series_id
+        return series_id
+
+    def _flush(self) -> None:
+        """Insert buffered rows in one transaction (caller holds the lock)"""
+        self._last_flush = time.monotonic()
+        if self._rows:
+            started = time.perf_counter()
+            self._rows.sort()
+            self._conn.execute('BEGIN')
+            try:
+                self._conn.executemany('INSERT OR REPLACE INTO samples VALUES (?, ?, ?)', self._rows)
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+            self.rows_written += len(self._rows)
+            self.batches += 1
+            self.last_flush_latency = time.perf_counter() - started
+            self._rows = []
+        self._buffered = 0
+        self._apply_retention()
+
+    def _apply_retention(self) -> None:
+        """Delete expired samples, at most once per RETENTION_INTERVAL"""
+        if self.retention_days is None:
+            return
+        now = time.monotonic()
+        if self._last_retention is not None and now - self._last_retention < RETENTION_INTERVAL:
+            return
+        self._last_retention = now
+        cutoff = int((time.time() - self.retention_days * 86400) * 1000)
+        # Per series, so each DELETE is a range of the primary key
+        self._conn.execute('BEGIN')
+        deleted = 0
+        for series_id in self._series.values():
+            deleted += self._conn.execute('DELETE FROM samples WHERE series_id = ? AND ts < ?',
+                                          (series_id, cutoff)).rowcount
+        self._conn.execute('COMMIT')
+        self.deleted_rows += deleted
+        if deleted:
+            logger.info(f"Deleted {deleted} samples older than {self.retention_days} days")
+
+    def query_metrics(self, metric_name: str, start_time: int, end_time: int,
+                      host: Optional[str] = None) -> List[Dict]:
+        """
+        Query one metric over a time range
+
+        Buffered samples are inserted first, so they are included.
+
+        Args:
+            metric_name: Name of the metric (for per-entity values, the
+                series name such as 'disk_read_bytes_per_device')
+            start_time: Start timestamp (Unix epoch, inclusive)
+            end_time: End timestamp (Unix epoch, inclusive)
+            host: Only this host's samples (None for every host)
+
+        Returns:
+            List of {'timestamp', 'value', 'host'} points in time order;
+            per-entity points also carry their entity under the label
+            name (e.g. 'device': 'sda')
+        """
+        if end_time < start_time:
+            return []
+        start_ts = int(math.ceil(start_time * 1000))
+        end_ts = int(math.floor(end_time * 1000))
+        sql = ('SELECT series.host, series.entity, samples.ts, samples.value '
+               'FROM series JOIN samples ON samples.series_id = series.id '
+               'WHERE series.metric = ? AND samples.ts BETWEEN ? AND ?')
+        params: List[Any] = [metric_name, start_ts, end_ts]
+        if host is not None:
+            sql += ' AND series.host = ?'
+            params.append(host)
+
+        with self._lock:
+            try:
+                self._flush()
+            except Exception as e:
+                logger.error(f"Error writing metrics to SQLite: {e}", exc_info=True)
+            rows = self._conn.execute(sql + ' ORDER BY samples.ts', params).fetchall()
+
+        label = entity_label(metric_name) if '_per_' in metric_name else None
+        points = []
+        for row_host, entity, ts, value in rows:
+            point = {'timestamp': ts / 1000, 'value': value, 'host': row_host}
+            if entity:
+                point[label or 'entity'] = entity
+            points.append(point)
+        return points
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get storage statistics
+
+        Returns:
+            Dictionary with buffered samples, rows and batches written,
+            last batch latency in ms, series count, rows deleted by
+            retention and database file size
+        """
+        try:
+            db_bytes = sum(Path(self.path + suffix).stat().st_size
+                           for suffix in ('', '-wal') if Path(self.path + suffix).exists())
+        except OSError:
+            db_bytes = 0
+        return {
+            'buffered': self._buffered,
+            'rows_written': self.rows_written,
+            'batches': self.batches,
+            'flush_latency_ms': round(self.last_flush_latency * 1000, 2),
+            'series': len(self._series),
+            'deleted_rows': self.deleted_rows,
+            'db_bytes': db_bytes,
+        }
+
+    def close(self) -> None:
+        """Insert buffered samples and close the database"""
+        with self._lock:
+            if self._conn is None:
+                return
+            try:
+                self._flush()
+            except Exception as e:
+                logger.error(f"Error writing metrics to SQLite: {e}", exc_info=True)
+            self._conn.close()
+            self._conn = None
@@ -0,0 +1,131 @@
+"""
+Unit tests for BasicAlerting
+"""
+
+from src.alerting.basic_alerting import BasicAlerting
+from src.sample import Schema
+
+RULES = [
+    {'name': 'High CPU', 'metric': 'cpu_usage_percent', 'condition': '>', 'threshold': 90,
+     'severity': 'critical'},
+    {'name': 'High memory', 'metric': 'memory_percent', 'condition': '>=', 'threshold': 80},
+    {'name': 'Low disk', 'metric': 'disk_free_percent', 'condition': '<', 'threshold': 10,
+     'duration': 300},
+]
+
+
+def test_operators_and_rule_order():
+    """Test that conditions are evaluated and alerts are returned in rule order"""
+    alerting = BasicAlerting(RULES)
+    alerts = alerting.check_rules({'memory_percent': 85, 'cpu_usage_percent': 95,
+                                   'disk_free_percent': 50})
+    assert [alert['name'] for alert in alerts] == ['High CPU', 'High memory']
+    assert alerts[0]['severity'] == 'critical' and alerts[1]['severity'] == 'warning'
+    assert alerting.check_rules({'cpu_usage_percent': 90, 'memory_percent': 79}) == []
+    assert alerting.get_active_alerts() == []
+
+
+def test_duration_and_resolution(monkeypatch):
+    """Test that an alert fires only after its duration and resolves when the value recovers"""
+    now = [1000.0]
+    monkeypatch.setattr('src.alerting.basic_alerting.time.time', lambda: now[0])
+    alerting = BasicAlerting(RULES)
+
+    assert alerting.check_rules({'disk_free_percent': 5}) == []
+    assert alerting.get_active_alerts() == ['Low disk']
+    now[0] += 300
+    alerts = alerting.check_rules({'disk_free_percent': 5})
+    assert [alert['name'] for alert in alerts] == ['Low disk']
+    assert alerts[0]['duration'] == 300
+
+    alerting.check_rules({'disk_free_percent': 50})
+    assert alerting.get_active_alerts() == []
+
+
+def test_only_indexed_metrics_are_evaluated():
+    """Test that a sample only evaluates the rules of the metrics it carries"""
+    alerting = BasicAlerting(RULES)
+    alerting.check_rules({'cpu_usage_percent': 10, 'unrelated': 1, 'memory_percent': None})
+    stats = alerting.stats()
+    assert stats['evaluations'] == 1
+    assert stats['rules'] == 3 and stats['metrics'] == 3
+
+
+def test_invalid_rules_are_skipped():
+    """Test that rules with an unknown condition or no metric are skipped"""
+    alerting = BasicAlerting(RULES + [{'name': 'Bad', 'metric': 'x', 'condition': '=>'},
+                                      {'name': 'No metric', 'threshold': 1}])
+    assert alerting.stats()['rules'] == 3
+    assert alerting.check_rules({'x': 1}) == []
+
+
+def test_reload_keeps_unchanged_rules():
+    """Test that reload reuses unchanged rules with their state and drops changed ones"""
+    alerting = BasicAlerting(RULES)
+    alerting.check_rules({'memory_percent': 90, 'disk_free_percent': 5})
+    assert sorted(alerting.get_active_alerts()) == ['High memory', 'Low disk']
+    compiled = {rule.name: rule for rule in alerting.compiled}
+
+    changed = [dict(rule) for rule in RULES]
+    changed[2]['threshold'] = 20
+    alerting.reload(changed[1:])
+
+    assert alerting.get_active_alerts() == ['High memory']
+    assert alerting.compiled[0] is compiled['High memory']
+    assert alerting.compiled[1] is not compiled['Low disk']
+    stats = alerting.stats()
+    assert stats['rules'] == 2 and stats['rules_reused'] == 1 and stats['rules_compiled'] == 4
+    assert alerting.check_rules({'cpu_usage_percent': 99}) == []
+
+
+def test_windowed_rule_fires_on_noisy_metric(monkeypatch):
+    """Test that an average over a window fires where duration tracking keeps resetting"""
+    now = [0.0]
+    monkeypatch.setattr('src.alerting.basic_alerting.time.time', lambda: now[0])
+    rules = [{'name': 'High CPU (duration)', 'metric': 'cpu_usage_percent', 'condition': '>=',
+              'threshold': 80, 'duration': 300},
+             {'name': 'High CPU (avg)', 'metric': 'cpu_usage_percent', 'condition': '>=',
+              'threshold': 80, 'aggregate': 'avg', 'window': 300}]
+    alerting = BasicAlerting(rules)
+
+    fired = []
+    for tick in range(60):
+        now[0] = tick * 10.0
+        value = 95 if tick % 5 else 78  # Noisy 80-95% with a dip every 50s
+        fired.extend(alert['name'] for alert in alerting.check_rules({'cpu_usage_percent': value}))
+
+    assert 'High CPU (duration)' not in fired
+    assert 'High CPU (avg)' in fired
+    stats = alerting.stats()
+    assert stats['windowed_rules'] == 1 and stats['window_samples'] == 30
+    assert stats['window_bytes'] > 0
+
+
+def test_invalid_windowed_rules_are_skipped():
+    """Test that windowed rules with an unknown aggregate or no window are skipped"""
+    alerting = BasicAlerting([{'metric': 'x', 'aggregate': 'median', 'window': 60},
+                              {'metric': 'y', 'aggregate': 'avg'}])
+    assert alerting.stats()['rules'] == 0
+
+
+def test_typed_samples_read_by_slot():
+    """Test that typed samples alert exactly like the equivalent dictionary"""
+    schema = Schema(('cpu_usage_percent', 'memory_percent', 'load_average_1m'))
+    sample = schema.new_sample(1000.0, 'web-1')
+    sample.set('cpu_usage_percent', 95)
+    sample.set('memory_percent', 50)
+    sample.set('disk_free_percent', 5)  # Outside the schema: kept in extra
+    sample.extra['memory_percent'] = 90  # Overrides the slot; load_average_1m is never set
+    rules = RULES + [{'name': 'High load', 'metric': 'load_average_1m', 'threshold': 1}]
+
+    by_slot = BasicAlerting(rules)
+    by_name = BasicAlerting(rules)
+    assert ([alert['name'] for alert in by_slot.check_rules(sample)]
+            == [alert['name'] for alert in by_name.check_rules(sample.to_dict())]
+            == ['High CPU', 'High memory'])
+    assert sorted(by_slot.get_active_alerts()) == sorted(by_name.get_active_alerts())
+    assert by_slot.stats()['evaluations'] == by_name.stats()['evaluations'] == 3
+
+    # Plans are per schema and rebuilt on reload
+    by_slot.reload(rules[:1])
+    assert [alert['name'] for alert in by_slot.check_rules(sample)] == ['High CPU']
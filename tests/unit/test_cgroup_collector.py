@@ -0,0 +1,153 @@
+"""
+Unit tests for cgroup collector
+"""
+
+import shutil
+import pytest
+from src.collectors.cgroup_collector import CgroupCollector
+
+
+def write_cgroup(root, path, usage=0, throttled=0, periods=0, current=0, limit='max',
+                 rbytes=0, wbytes=0):
+    """Create a fake cgroup v2 directory"""
+    group = root / path if path else root
+    group.mkdir(parents=True, exist_ok=True)
+    (group / 'cpu.stat').write_text(
+        f"usage_usec {usage}\nuser_usec {usage // 2}\nsystem_usec {usage // 2}\n"
+        f"nr_periods {periods}\nnr_throttled {throttled}\nthrottled_usec {throttled * 1000}\n")
+    (group / 'memory.current').write_text(f"{current}\n")
+    (group / 'memory.max').write_text(f"{limit}\n")
+    (group / 'io.stat').write_text(
+        f"8:0 rbytes={rbytes} wbytes={wbytes} rios=1 wios=1 dbytes=0 dios=0\n"
+        f"8:16 rbytes={rbytes} wbytes=0 rios=0 wios=0 dbytes=0 dios=0\n")
+
+
+def set_descendants(root, count):
+    (root / 'cgroup.stat').write_text(f"nr_descendants {count}\nnr_dying_descendants 0\n")
+
+
+@pytest.fixture
+def cgroup_root(tmp_path):
+    (tmp_path / 'cgroup.controllers').write_text("cpu io memory\n")
+    write_cgroup(tmp_path, '')
+    write_cgroup(tmp_path, 'system.slice', current=1000)
+    write_cgroup(tmp_path, 'system.slice/app.service', current=512, limit=1024)
+    set_descendants(tmp_path, 2)
+    return tmp_path
+
+
+def age_samples(collector, seconds):
+    """Pretend the previous samples were taken earlier"""
+    for path, (taken, counters, identity) in collector._prev.items():
+        collector._prev[path] = (taken - seconds, counters, identity)
+
+
+def test_cgroup_collector_discovers_hierarchy(cgroup_root):
+    """Test that the collector reports every cgroup with memory values"""
+    collector = CgroupCollector(cgroup_root=str(cgroup_root))
+    metrics = collector.collect()
+
+    groups = metrics['cgroup_per_path']
+    assert metrics['cgroup_count'] == 3
+    assert set(groups) == {'/', '/system.slice', '/system.slice/app.service'}
+    assert groups['/system.slice/app.service']['memory_current'] == 512
+    assert groups['/system.slice/app.service']['memory_max'] == 1024
+    assert groups['/system.slice/app.service']['memory_usage_percent'] == 50.0
+    # "max" means no limit
+    assert groups['/system.slice']['memory_max'] is None
+    assert groups['/system.slice']['memory_usage_percent'] is None
+    # Rates need a previous sample
+    assert groups['/system.slice']['cpu_usage_percent'] is None
+
+
+def test_cgroup_collector_rates_from_deltas(cgroup_root):
+    """Test that CPU, throttling and IO rates come from counter deltas"""
+    collector = CgroupCollector(cgroup_root=str(cgroup_root))
+    collector.collect()
+    age_samples(collector, 2.0)
+
+    write_cgroup(cgroup_root, 'system.slice/app.service', usage=1_000_000, periods=100,
+                 throttled=25, current=512, limit=1024, rbytes=2048, wbytes=4096)
+    stats = collector.collect()['cgroup_per_path']['/system.slice/app.service']
+
+    # 1s of CPU over 2s is half a CPU
+    assert stats['cpu_usage_percent'] == pytest.approx(50.0, rel=0.01)
+    assert stats['cpu_user_percent'] == pytest.approx(25.0, rel=0.01)
+    assert stats['cpu_throttled_percent'] == 25.0
+    assert stats['cpu_throttled_time'] == pytest.approx(12.5, rel=0.01)
+    # rbytes summed over both devices
+    assert stats['io_read_bytes'] == pytest.approx(2048.0, rel=0.01)
+    assert stats['io_write_bytes'] == pytest.approx(2048.0, rel=0.01)
+
+
+def test_cgroup_collector_rescans_only_on_change(cgroup_root):
+    """Test that the directory index is rebuilt only when cgroups change"""
+    collector = CgroupCollector(cgroup_root=str(cgroup_root))
+    collector.collect()
+    collector.collect()
+    assert collector.rescans == 1
+
+    write_cgroup(cgroup_root, 'user.slice')
+    set_descendants(cgroup_root, 3)
+    metrics = collector.collect()
+    assert collector.rescans == 2
+    assert '/user.slice' in metrics['cgroup_per_path']
+
+
+def test_cgroup_collector_handles_removed_cgroup(cgroup_root):
+    """Test that a removed cgroup is dropped along with its baseline"""
+    collector = CgroupCollector(cgroup_root=str(cgroup_root))
+    collector.collect()
+
+    # Removed before the descendant count is noticed
+    shutil.rmtree(cgroup_root / 'system.slice' / 'app.service')
+    metrics = collector.collect()
+    assert '/system.slice/app.service' not in metrics['cgroup_per_path']
+    assert '/system.slice/app.service' not in collector._prev
+
+    set_descendants(cgroup_root, 1)
+    collector.collect()
+    assert '/system.slice/app.service' not in collector._index
+
+
+def test_cgroup_collector_respects_max_depth(cgroup_root):
+    """Test that cgroups deeper than max_depth are not reported"""
+    collector = CgroupCollector(cgroup_root=str(cgroup_root), max_depth=1)
+    metrics = collector.collect()
+    assert set(metrics['cgroup_per_path']) == {'/', '/system.slice'}
+
+
+def test_cgroup_collector_without_cgroup_v2(tmp_path):
+    """Test that the collector is disabled without a v2 hierarchy"""
+    collector = CgroupCollector(cgroup_root=str(tmp_path))
+    metrics = collector.collect()
+    assert collector.available is False
+    assert 'cgroup_per_path' not in metrics
+    assert 'timestamp' in metrics
+
+
+def test_cgroup_collector_restarted_unit(cgroup_root):
+    """Test that a cgroup recreated at the same path re-baselines instead of wrapping"""
+    app = 'system.slice/app.service'
+    write_cgroup(cgroup_root, app, usage=50_000_000, rbytes=10**9)
+    collector = CgroupCollector(cgroup_root=str(cgroup_root))
+    collector.collect()
+    age_samples(collector, 2.0)
+
+    # Counters go down in place
+    write_cgroup(cgroup_root, app, usage=1000, rbytes=4096)
+    stats = collector.collect()['cgroup_per_path']['/' + app]
+    assert stats['cpu_usage_percent'] is None and stats['io_read_bytes'] is None
+
+    age_samples(collector, 2.0)
+    write_cgroup(cgroup_root, app, usage=1_001_000, rbytes=4096)
+    stats = collector.collect()['cgroup_per_path']['/' + app]
+    assert stats['cpu_usage_percent'] == pytest.approx(50.0, rel=0.01)
+
+    # Recreated with a new cpu.stat whose counters already exceed the old ones
+    age_samples(collector, 2.0)
+    replacement = cgroup_root / 'cpu.stat.new'
+    replacement.write_text("usage_usec 90000000\n")
+    replacement.replace(cgroup_root / app / 'cpu.stat')
+    stats = collector.collect()['cgroup_per_path']['/' + app]
+    assert stats['cpu_usage_percent'] is None
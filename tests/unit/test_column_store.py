@@ -0,0 +1,88 @@
+"""
+Unit tests for raw column files and the memory-mapped reader
+"""
+
+import math
+import time
+from array import array
+from src.storage.column_store import append_columns, DayColumns, read_range
+from src.storage.file_storage import FileStorage
+
+
+def samples(start, count, **extra):
+    return [dict({'timestamp': start + i, 'hostname': 'h', 'cpu': float(i),
+                  'per_core': [1.0], 'flag': True}, **extra) for i in range(count)]
+
+
+def test_columns_round_trip(tmp_path):
+    """Test that numeric metrics come back as aligned float64 views"""
+    append_columns(tmp_path, samples(100.0, 5))
+    day = DayColumns(tmp_path)
+
+    assert day.rows == 5
+    assert list(day.timestamps) == [100.0, 101.0, 102.0, 103.0, 104.0]
+    assert list(day.column('cpu')) == [0.0, 1.0, 2.0, 3.0, 4.0]
+    # Only numeric top-level metrics are stored
+    assert day.metrics() == ['cpu']
+    assert day.column('hostname') is None
+
+
+def test_columns_pad_new_metrics(tmp_path):
+    """Test that a metric first seen mid-day is NaN for earlier rows"""
+    append_columns(tmp_path, samples(0.0, 3))
+    append_columns(tmp_path, samples(3.0, 2, memory=7))
+    day = DayColumns(tmp_path)
+
+    memory = day.column('memory')
+    assert len(memory) == 5
+    assert all(math.isnan(v) for v in memory[:3])
+    assert list(memory[3:]) == [7.0, 7.0]
+
+
+def test_reader_ignores_concurrent_appends(tmp_path):
+    """Test that an open reader keeps its committed view while the writer appends"""
+    append_columns(tmp_path, samples(0.0, 3))
+    day = DayColumns(tmp_path)
+    values = day.column('cpu')
+
+    append_columns(tmp_path, samples(3.0, 3))
+    assert day.rows == 3
+    assert list(values) == [0.0, 1.0, 2.0]
+    assert DayColumns(tmp_path).rows == 6
+
+
+def test_uncommitted_rows_are_invisible_and_trimmed(tmp_path):
+    """Test that column bytes past the timestamp commit point are ignored"""
+    append_columns(tmp_path, samples(0.0, 2))
+    # Interrupted flush: a value landed but its timestamp did not
+    with open(tmp_path / 'cpu.f64', 'ab') as f:
+        f.write(array('d', [99.0]).tobytes() + b'\x01\x02')
+
+    assert list(DayColumns(tmp_path).column('cpu')) == [0.0, 1.0]
+    append_columns(tmp_path, samples(2.0, 1))
+    assert list(DayColumns(tmp_path).column('cpu')) == [0.0, 1.0, 0.0]
+
+
+def test_read_range_is_zero_copy(tmp_path):
+    """Test that range reads return slices of the mapping"""
+    append_columns(tmp_path, samples(0.0, 10))
+    timestamps, values = read_range(tmp_path, 'cpu', 2.5, 6.0)
+
+    assert list(timestamps) == [3.0, 4.0, 5.0, 6.0]
+    assert list(values) == [3.0, 4.0, 5.0, 6.0]
+    assert isinstance(values, memoryview) and values.readonly
+    assert read_range(tmp_path, 'missing', 0, 10) is None
+
+
+def test_file_storage_read_columns(tmp_path):
+    """Test that FileStorage mirrors flushes into column files"""
+    storage = FileStorage(output_dir=str(tmp_path), buffer_size=4, column_files=True)
+    start = float(int(time.time()) - 100)
+    for sample in samples(start, 8):
+        storage.write_metrics(sample)
+
+    ranges = storage.read_columns('cpu', start + 2, start + 5)
+    assert len(ranges) == 1
+    assert list(ranges[0][1]) == [2.0, 3.0, 4.0, 5.0]
+    # The primary JSONL file is still written
+    assert len(list(tmp_path.glob('metrics-*.jsonl'))) == 1
@@ -0,0 +1,57 @@
+"""
+Unit tests for block-compressed JSONL files
+"""
+
+import json
+import pytest
+from src.storage.compressed_file import BlockReader, CompressedFileError, compress_file
+
+
+def write_jsonl(path, count):
+    with open(path, 'w') as f:
+        for i in range(count):
+            f.write(json.dumps({'timestamp': 1000.0 + i, 'value': i % 7}) + '\n')
+
+
+def test_compress_round_trip(tmp_path):
+    """Test that all lines come back in order across blocks"""
+    src, dst = tmp_path / 'm.jsonl', tmp_path / 'm.jsonz'
+    write_jsonl(src, 500)
+
+    raw, compressed = compress_file(str(src), str(dst), block_size=1024)
+    assert raw == src.stat().st_size
+    assert compressed == dst.stat().st_size < raw
+    reader = BlockReader(str(dst))
+    assert len(reader.blocks) > 5
+    assert reader.raw_size == raw
+    assert b''.join(reader.iter_lines()) == src.read_bytes()
+
+
+def test_iter_lines_seeks_to_block(tmp_path):
+    """Test that reading from a time skips the blocks before it"""
+    src, dst = tmp_path / 'm.jsonl', tmp_path / 'm.jsonz'
+    write_jsonl(src, 500)
+    compress_file(str(src), str(dst), block_size=1024)
+
+    lines = list(BlockReader(str(dst)).iter_lines(start_time=1400.0))
+    first = json.loads(lines[0])['timestamp']
+    assert 1400.0 - 40 < first <= 1400.0
+    assert json.loads(lines[-1])['timestamp'] == 1499.0
+
+
+def test_torn_last_line_is_terminated(tmp_path):
+    """Test that a file ending mid-line still yields newline-terminated lines"""
+    src, dst = tmp_path / 'm.jsonl', tmp_path / 'm.jsonz'
+    src.write_bytes(b'{"timestamp": 1.0}\n{"timesta')
+    compress_file(str(src), str(dst))
+    assert list(BlockReader(str(dst)).iter_lines()) == [b'{"timestamp": 1.0}\n', b'{"timesta\n']
+
+
+def test_truncated_file_is_rejected(tmp_path):
+    """Test that a file without its footer raises CompressedFileError"""
+    src, dst = tmp_path / 'm.jsonl', tmp_path / 'm.jsonz'
+    write_jsonl(src, 100)
+    compress_file(str(src), str(dst))
+    dst.write_bytes(dst.read_bytes()[:-3])
+    with pytest.raises(CompressedFileError):
+        BlockReader(str(dst))
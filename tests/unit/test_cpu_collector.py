@@ -135,3 +135,46 @@ def test_cpu_collector_handles_errors_gracefully():
         assert 'hostname' in metrics
     except Exception as e:
         pytest.fail(f"Collector should not raise exceptions, but got: {e}")
+
+
+def test_cpu_invalid_sampling_mode():
+    """Test that an unknown sampling mode is rejected"""
+    with pytest.raises(ValueError):
+        CPUCollector(collection_interval=10, sampling='bogus')
+
+
+def test_cpu_delta_collect_does_not_block():
+    """Test that delta sampling returns without the 1s blocking window"""
+    collector = CPUCollector(collection_interval=10, per_core=True, sampling='delta')
+
+    start = time.monotonic()
+    collector.collect()
+    collector.collect()
+    elapsed = time.monotonic() - start
+
+    assert elapsed < 0.5, f"Delta sampling took {elapsed:.2f}s"
+
+
+def test_cpu_delta_percentages_from_same_snapshots(monkeypatch):
+    """Test that overall, per-core and per-state numbers share one window"""
+    import psutil
+    from collections import namedtuple
+
+    scputimes = namedtuple('scputimes', ['user', 'system', 'idle', 'iowait'])
+    snapshots = iter([
+        [scputimes(10.0, 5.0, 80.0, 5.0), scputimes(20.0, 0.0, 80.0, 0.0)],
+        # core 0: 10 user + 10 idle, core 1: 20 system
+        [scputimes(20.0, 5.0, 90.0, 5.0), scputimes(20.0, 20.0, 80.0, 0.0)],
+    ])
+    monkeypatch.setattr(psutil, 'cpu_times', lambda percpu=False: next(snapshots))
+
+    collector = CPUCollector(collection_interval=10, per_core=True, sampling='delta',
+                             use_procfs=False)
+    metrics = collector.collect()
+
+    assert metrics['cpu_usage_per_core'] == [50.0, 100.0]
+    assert metrics['cpu_usage_percent'] == 75.0
+    assert metrics['cpu_user_time'] == 25.0
+    assert metrics['cpu_system_time'] == 50.0
+    assert metrics['cpu_idle_time'] == 25.0
+    assert metrics['cpu_iowait_time'] == 0.0
@@ -0,0 +1,98 @@
+"""
+Unit tests for Disk Usage collector
+"""
+
+import os
+import threading
+from src.collectors import disk_usage_collector
+from src.collectors.disk_usage_collector import DiskUsageCollector
+
+
+def write_mounts(path, *entries):
+    """Write a fake mount table"""
+    path.write_text("".join(f"{dev} {mnt} {fs} rw,relatime 0 0\n" for dev, mnt, fs in entries))
+
+
+def test_disk_usage_metrics_present():
+    """Test that all disk usage metrics are present on the real host"""
+    collector = DiskUsageCollector(collection_interval=60)
+    metrics = collector.collect()
+
+    for key in ['disk_total', 'disk_used', 'disk_free', 'disk_usage_percent',
+                'inode_total', 'inode_used', 'inode_free', 'inode_usage_percent',
+                'disk_usage_unresponsive_mounts', 'disk_usage_per_mount']:
+        assert key in metrics, f"Missing metric: {key}"
+    assert 0 <= metrics['disk_usage_percent'] <= 100
+
+
+def test_disk_usage_mount_table_parsed_once():
+    """Test that an unchanged mount table is not re-parsed"""
+    collector = DiskUsageCollector(collection_interval=60)
+    for _ in range(3):
+        collector.collect()
+
+    assert collector.mount_table_reads == 1
+
+
+def test_disk_usage_skips_pseudo_and_remote(tmp_path):
+    """Test the default pseudo/remote filesystem filters"""
+    mounts = tmp_path / 'mounts'
+    write_mounts(mounts,
+                 ('/dev/sda1', str(tmp_path), 'ext4'),
+                 ('tmpfs', '/dev/shm', 'tmpfs'),
+                 ('proc', '/proc', 'proc'),
+                 ('server:/export', '/mnt/nfs', 'nfs4'))
+    collector = DiskUsageCollector(collection_interval=60, mounts_path=str(mounts))
+    metrics = collector.collect()
+
+    assert list(metrics['disk_usage_per_mount']) == [str(tmp_path)]
+    entry = metrics['disk_usage_per_mount'][str(tmp_path)]
+    assert entry['fstype'] == 'ext4'
+    assert entry['inode_total'] >= entry['inode_used'] >= 0
+
+
+def test_disk_usage_mount_point_patterns_and_escapes(tmp_path):
+    """Test mount point patterns and octal-escaped mount table fields"""
+    spaced = tmp_path / 'my disk'
+    spaced.mkdir()
+    mounts = tmp_path / 'mounts'
+    write_mounts(mounts,
+                 ('/dev/sda1', str(spaced).replace(' ', '\\040'), 'ext4'),
+                 ('/dev/sdb1', '/', 'ext4'))
+    collector = DiskUsageCollector(collection_interval=60, mounts_path=str(mounts),
+                                   mount_points=[str(tmp_path) + '/*'])
+    metrics = collector.collect()
+
+    assert list(metrics['disk_usage_per_mount']) == [str(spaced)]
+
+
+def test_disk_usage_hung_mount_times_out(tmp_path, monkeypatch):
+    """Test that a hung statvfs is reported and does not block the cycle"""
+    mounts = tmp_path / 'mounts'
+    hung = str(tmp_path / 'hung')
+    write_mounts(mounts, ('/dev/sda1', str(tmp_path), 'ext4'), ('/dev/sdb1', hung, 'ext4'))
+
+    release = threading.Event()
+    calls = []
+    real_statvfs = os.statvfs
+
+    def fake_statvfs(path):
+        calls.append(path)
+        if path == hung:
+            release.wait(5)
+            raise OSError("stale handle")
+        return real_statvfs(path)
+
+    monkeypatch.setattr(disk_usage_collector.os, 'statvfs', fake_statvfs)
+    collector = DiskUsageCollector(collection_interval=60, mounts_path=str(mounts),
+                                   statvfs_timeout=0.2)
+
+    metrics = collector.collect()
+    assert metrics['disk_usage_unresponsive_mounts'] == [hung]
+    assert list(metrics['disk_usage_per_mount']) == [str(tmp_path)]
+
+    # Still hung: skipped without starting another statvfs call
+    metrics = collector.collect()
+    assert metrics['disk_usage_unresponsive_mounts'] == [hung]
+    assert calls.count(hung) == 1
+    release.set()
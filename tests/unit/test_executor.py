@@ -0,0 +1,97 @@
+"""
+Unit tests for the collector executor
+"""
+
+import time
+import threading
+import pytest
+from src.collectors import BaseCollector
+from src.executor import CollectorExecutor
+
+
+class FakeCollector(BaseCollector):
+    """Collector that sleeps, blocks or fails on demand"""
+
+    def __init__(self, value, delay=0.0, release=None, fail=False):
+        super().__init__(collection_interval=10)
+        self.value = value
+        self.delay = delay
+        self.release = release
+        self.fail = fail
+        self.calls = 0
+
+    def collect(self):
+        self.calls += 1
+        if self.release is not None:
+            self.release.wait(5)
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("boom")
+        return {'timestamp': time.time(), 'hostname': 'h', self.value: 1}
+
+
+def test_concurrent_runs_overlap():
+    """Test that collectors run in parallel rather than back to back"""
+    collectors = {f'c{i}': FakeCollector(f'm{i}', delay=0.2) for i in range(4)}
+    executor = CollectorExecutor(mode='concurrent', max_workers=4, deadline=2.0)
+
+    start = time.monotonic()
+    results = executor.run(collectors, list(collectors))
+    elapsed = time.monotonic() - start
+    executor.shutdown()
+
+    assert set(results) == set(collectors)
+    assert elapsed < 0.6, f"Collectors did not overlap ({elapsed:.2f}s)"
+
+
+def test_deadline_drops_hung_collector():
+    """Test that a hung collector misses the deadline and is skipped until done"""
+    release = threading.Event()
+    collectors = {'fast': FakeCollector('fast_metric'),
+                  'hung': FakeCollector('hung_metric', release=release)}
+    executor = CollectorExecutor(mode='concurrent', max_workers=2, deadline=0.2)
+
+    results = executor.run(collectors, ['fast', 'hung'])
+    assert set(results) == {'fast'}
+
+    # Still running: not queued a second time
+    results = executor.run(collectors, ['fast', 'hung'])
+    assert set(results) == {'fast'}
+    assert collectors['hung'].calls == 1
+
+    release.set()
+    for _ in range(50):
+        if 'hung' not in executor._in_flight:
+            break
+        time.sleep(0.02)
+
+    metrics = executor.collector_metrics()
+    assert metrics['agent_collector_hung_timeouts'] == 1
+    assert metrics['agent_collector_hung_skipped'] == 1
+    assert metrics['agent_collector_hung_stale'] == 1
+    assert metrics['agent_collector_fast_timeouts'] == 0
+    assert 'agent_collector_fast_duration_ms' in metrics
+
+    # Finished late result was dropped; the next tick runs it again
+    results = executor.run(collectors, ['hung'])
+    assert set(results) == {'hung'}
+    executor.shutdown()
+
+
+def test_failing_collector_is_isolated():
+    """Test that one collector raising does not lose the others"""
+    collectors = {'ok': FakeCollector('ok_metric'), 'bad': FakeCollector('x', fail=True)}
+
+    for mode in ('concurrent', 'sequential'):
+        executor = CollectorExecutor(mode=mode, max_workers=2, deadline=1.0)
+        results = executor.run(collectors, ['ok', 'bad'])
+        executor.shutdown()
+
+        assert set(results) == {'ok'}
+        assert executor.collector_metrics()['agent_collector_bad_errors'] == 1
+
+
+def test_invalid_mode_rejected():
+    """Test that an unknown execution mode is rejected"""
+    with pytest.raises(ValueError):
+        CollectorExecutor(mode='parallel')
@@ -0,0 +1,212 @@
+"""
+Unit tests for file storage
+"""
+
+import json
+import time
+import threading
+from datetime import datetime
+import pytest
+from src.storage.file_storage import FileStorage
+from src.storage.segment_format import iter_segment_file
+
+
+def test_file_storage_writes_jsonl(tmp_path):
+    """Test that flushed samples are appended as JSON lines"""
+    storage = FileStorage(output_dir=str(tmp_path), buffer_size=2)
+    storage.write_metrics({'timestamp': 1.0, 'cpu_usage_percent': 5.0})
+    storage.write_metrics({'timestamp': 2.0, 'cpu_usage_percent': 6.0})
+
+    files = list(tmp_path.glob('metrics-*.jsonl'))
+    assert len(files) == 1
+    lines = files[0].read_text().splitlines()
+    assert [json.loads(line)['timestamp'] for line in lines] == [1.0, 2.0]
+
+
+def test_file_storage_writes_segments(tmp_path):
+    """Test that the segment format appends one segment per flush"""
+    storage = FileStorage(output_dir=str(tmp_path), buffer_size=2, format='segment')
+    for i in range(5):
+        storage.write_metrics({'timestamp': float(i), 'hostname': 'h', 'value': i * 1.5})
+    storage._flush()
+
+    files = list(tmp_path.glob('metrics-*.seg'))
+    assert len(files) == 1
+    samples = list(iter_segment_file(str(files[0])))
+    assert [s['value'] for s in samples] == [0.0, 1.5, 3.0, 4.5, 6.0]
+
+
+def test_file_storage_rejects_unknown_format(tmp_path):
+    """Test that an unknown format is a configuration error"""
+    with pytest.raises(ValueError):
+        FileStorage(output_dir=str(tmp_path), format='parquet')
+
+
+def write_day(storage, start, count, step=10.0):
+    for i in range(count):
+        storage.write_metrics({
+            'timestamp': start + i * step,
+            'hostname': 'h',
+            'cpu_usage_percent': float(i),
+            'disk_io_per_device': {'sda': {'cpu_usage_percent': -1}},
+        })
+    storage._flush()
+
+
+@pytest.mark.parametrize('file_format', ['jsonl', 'segment'])
+def test_query_metrics_time_range(tmp_path, file_format):
+    """Test that a query returns only the requested range and metric"""
+    storage = FileStorage(output_dir=str(tmp_path), buffer_size=50, format=file_format,
+                          index_interval=10)
+    # Files are named after the flush date, so write recent samples
+    start = float(int(time.time()) - 10000)
+    write_day(storage, start, 500)
+
+    points = storage.query_metrics('cpu_usage_percent', start + 1000, start + 1990)
+    assert [p['value'] for p in points] == [float(i) for i in range(100, 200)]
+    assert points[0] == {'timestamp': start + 1000, 'value': 100.0}
+    assert storage.query_metrics('missing_metric', start, start + 5000) == []
+
+
+def test_query_metrics_uses_sidecar_index(tmp_path):
+    """Test that flushes maintain the index and queries seek with it"""
+    storage = FileStorage(output_dir=str(tmp_path), buffer_size=50, index_interval=10)
+    start = datetime(2024, 1, 1, 12).timestamp()
+    write_day(storage, start, 200)
+
+    data_file = next(tmp_path.glob('metrics-*.jsonl'))
+    entries = storage._load_index(data_file)
+    assert len(entries) == 20
+    assert entries[0] == (start, 0)
+    # Offsets point at the start of the indexed record
+    with open(data_file, 'rb') as f:
+        f.seek(entries[5][1])
+        assert json.loads(f.readline())['timestamp'] == start + 500
+    assert storage._seek_offset(data_file, start + 555) == entries[5][1]
+
+
+def test_query_metrics_rebuilds_missing_index(tmp_path):
+    """Test that files written without an index get one on first query"""
+    start = datetime(2024, 1, 2, 8).timestamp()
+    data_file = tmp_path / 'metrics-2024-01-02.jsonl'
+    data_file.write_text(''.join(
+        json.dumps({'timestamp': start + i, 'memory_used': i}) + '\n' for i in range(30)))
+
+    storage = FileStorage(output_dir=str(tmp_path), index_interval=10)
+    points = storage.query_metrics('memory_used', start + 25, start + 100)
+    assert [p['value'] for p in points] == [25, 26, 27, 28, 29]
+    assert (tmp_path / 'metrics-2024-01-02.jsonl.idx').exists()
+    assert len(storage._load_index(data_file)) == 3
+
+
+def test_query_metrics_selects_day_files(tmp_path):
+    """Test that files outside the range are not opened"""
+    storage = FileStorage(output_dir=str(tmp_path))
+    day_one = datetime(2024, 1, 1, 12).timestamp()
+    day_five = datetime(2024, 1, 5, 12).timestamp()
+    for day, ts in (('2024-01-01', day_one), ('2024-01-05', day_five)):
+        (tmp_path / f'metrics-{day}.jsonl').write_text(
+            json.dumps({'timestamp': ts, 'cpu_usage_percent': 1.0}) + '\n')
+
+    files = list(storage._day_files(day_five - 3600, day_five + 3600))
+    assert [f.name for f in files] == ['metrics-2024-01-05.jsonl']
+    assert len(storage.query_metrics('cpu_usage_percent', day_one, day_five)) == 2
+
+
+def test_query_metrics_includes_buffer(tmp_path):
+    """Test that unflushed samples are returned"""
+    storage = FileStorage(output_dir=str(tmp_path), buffer_size=100)
+    storage.write_metrics({'timestamp': 100.0, 'cpu_usage_percent': 3.0})
+    assert storage.query_metrics('cpu_usage_percent', 0, 200) == [
+        {'timestamp': 100.0, 'value': 3.0}]
+
+
+def read_jsonl(directory):
+    return [json.loads(line) for path in sorted(directory.glob('metrics-*.jsonl'))
+            for line in path.read_text().splitlines()]
+
+
+def test_async_writer_flushes_on_close(tmp_path):
+    """Test that queued samples reach disk through the writer thread"""
+    storage = FileStorage(output_dir=str(tmp_path), buffer_size=10, async_writer=True)
+    for i in range(25):
+        assert storage.write_metrics({'timestamp': float(i), 'value': i})
+    storage.close()
+
+    assert [s['value'] for s in read_jsonl(tmp_path)] == list(range(25))
+    stats = storage.stats()
+    assert stats['flushes'] == 3
+    assert stats['queue_depth'] == 0
+    assert stats['bytes_written'] == sum(p.stat().st_size for p in tmp_path.glob('*.jsonl'))
+
+
+def test_async_writer_queries_see_queued_samples(tmp_path):
+    """Test that a query sees samples still queued for the writer thread"""
+    storage = FileStorage(output_dir=str(tmp_path), buffer_size=1000, async_writer=True)
+    now = time.time()
+    for i in range(200):
+        storage.write_metrics({'timestamp': now + i, 'value': i})
+    points = storage.query_metrics('value', now, now + 1000)
+    assert [point['value'] for point in points] == list(range(200))
+    storage.close()
+
+
+def test_async_writer_drops_when_queue_full(tmp_path, monkeypatch):
+    """Test that a full queue drops samples instead of blocking the caller"""
+    storage = FileStorage(output_dir=str(tmp_path), buffer_size=1, async_writer=True,
+                          queue_size=2)
+    release = threading.Event()
+    original = storage._write_records
+    monkeypatch.setattr(storage, '_write_records',
+                        lambda f, offset: (release.wait(5), original(f, offset))[1])
+
+    results = [storage.write_metrics({'timestamp': float(i)}) for i in range(10)]
+    assert results.count(False) == storage.stats()['dropped'] > 0
+
+    release.set()
+    storage.close()
+    assert len(read_jsonl(tmp_path)) == results.count(True)
+
+
+@pytest.mark.parametrize('policy,expected', [('never', 0), ('batch', 3)])
+def test_fsync_policies(tmp_path, policy, expected):
+    """Test that fsync follows the configured policy"""
+    storage = FileStorage(output_dir=str(tmp_path), buffer_size=2, fsync=policy)
+    for i in range(6):
+        storage.write_metrics({'timestamp': float(i)})
+    assert storage.stats()['fsyncs'] == expected
+
+
+def test_fsync_interval_policy(tmp_path):
+    """Test that the interval policy syncs once the interval has passed"""
+    storage = FileStorage(output_dir=str(tmp_path), buffer_size=1, fsync='interval',
+                          fsync_interval_ms=60000)
+    storage.write_metrics({'timestamp': 1.0})
+    storage.write_metrics({'timestamp': 2.0})
+    assert storage.stats()['fsyncs'] == 0
+
+    storage._last_fsync -= 60
+    storage.write_metrics({'timestamp': 3.0})
+    assert storage.stats()['fsyncs'] == 1
+    with pytest.raises(ValueError):
+        FileStorage(output_dir=str(tmp_path), fsync='sometimes')
+
+
+def test_compress_closed_files_stay_queryable(tmp_path):
+    """Test that past days are compressed and queried transparently"""
+    storage = FileStorage(output_dir=str(tmp_path), buffer_size=10)
+    start = time.time() - 86400 * 2
+    write_day(storage, start, 30)
+    past = datetime.fromtimestamp(start).strftime('%Y-%m-%d')
+    past_file = tmp_path / f'metrics-{past}.jsonl'
+    next(tmp_path.glob('metrics-*.jsonl')).rename(past_file)
+    write_day(storage, time.time(), 5)
+    expected = storage.query_metrics('cpu_usage_percent', start, start + 1000)
+    assert len(expected) == 30
+
+    assert storage.compress_closed_files() == 1
+    assert not past_file.exists() and not (tmp_path / f'{past_file.name}.idx').exists()
+    assert (tmp_path / f'metrics-{past}.jsonz').exists()
+    assert len(list(tmp_path.glob('metrics-*.jsonl'))) == 1  # Today's file is left alone
+    assert storage.query_metrics('cpu_usage_percent', start, start + 1000) == expected
+    assert storage.stats()['compressed_files'] == 1
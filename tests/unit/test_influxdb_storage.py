@@ -0,0 +1,265 @@
+"""
+Unit tests for the InfluxDB backend, against a local HTTP stand-in
+"""
+
+import re
+import gzip
+import time
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import pytest
+from src import plugins
+from src.storage.influxdb_storage import InfluxDBStorage
+from src.sample import Schema
+
+
+class FakeInflux:
+    """Records write requests and answers with a settable status
+
+    Like InfluxDB, a field's type is fixed by its first write and a batch
+    with a point that conflicts with it is rejected with 400.
+    """
+
+    def __init__(self):
+        self.status = 204
+        self.writes = []
+        self.field_types = {}
+        self.clients = set()
+        self.query_response = ''
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers['Content-Length']))
+                if self.path.startswith('/api/v2/query'):
+                    payload = server.query_response.encode()
+                    self.send_response(200)
+                else:
+                    server.clients.add(self.client_address)
+                    text = gzip.decompress(body).decode()
+                    status = server.status
+                    if status == 204 and not server.check_types(text):
+                        status = 400
+                    if status == 204:
+                        server.writes.append((self.path, dict(self.headers), text))
+                    payload = b''
+                    self.send_response(status)
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f'http://127.0.0.1:{self.httpd.server_address[1]}'
+        threading.Thread(target=self.httpd.serve_forever, kwargs={'poll_interval': 0.05},
+                         daemon=True).start()
+
+    def check_types(self, text):
+        """Record field types; False if any field conflicts with a previous write"""
+        types = {}
+        for line in text.splitlines():
+            series, fields, _ = re.split(r'(?<!\\) ', line)
+            measurement = re.split(r'(?<!\\),', series)[0]
+            for field in re.split(r'(?<!\\),', fields):
+                key, value = re.split(r'(?<!\\)=', field)
+                kind = ('integer' if value.endswith('i') else
+                        'boolean' if value in ('true', 'false') else 'float')
+                known = self.field_types.get((measurement, key), types.get((measurement, key)))
+                if known is not None and known != kind:
+                    return False
+                types[(measurement, key)] = kind
+        self.field_types.update(types)
+        return True
+
+    def lines(self):
+        return [line for _, _, body in self.writes for line in body.splitlines()]
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def influx():
+    server = FakeInflux()
+    yield server
+    server.close()
+
+
+def make_storage(url, tmp_path, **kwargs):
+    options = dict(url=url, token='secret', org='o', bucket='b', batch_size=3,
+                   flush_interval_s=0.05, backoff_s=0.01, max_backoff_s=0.05,
+                   spool_dir=str(tmp_path / 'spool'))
+    options.update(kwargs)
+    return InfluxDBStorage(**options)
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_encode_line_protocol(tmp_path, influx):
+    """Test that samples encode as tagged line protocol"""
+    storage = make_storage(influx.url, tmp_path)
+    lines = storage.encode({
+        'timestamp': 1700000000.5, 'hostname': 'web 1', 'cpu_usage_percent': 12.5,
+        'process_count': 42, 'ok': True, 'label': 'x', 'nan': float('nan'),
+        'cpu_usage_per_core': [1.0, 2.0],
+        'disk_io_per_device': {'sda': {'disk_read_bytes': 10, 'model': 'x'}},
+    })
+    assert lines == [
+        r'system,host=web\ 1 cpu_usage_percent=12.5,process_count=42.0,ok=true 1700000000500000000',
+        r'cpu_usage_per_core,host=web\ 1,core=0 value=1.0 1700000000500000000',
+        r'cpu_usage_per_core,host=web\ 1,core=1 value=2.0 1700000000500000000',
+        r'disk_io_per_device,host=web\ 1,device=sda disk_read_bytes=10.0 1700000000500000000',
+    ]
+    storage.close()
+
+
+def test_encode_typed_sample_series(tmp_path, influx):
+    """Test that a typed sample's core=N series encode like the per-core list"""
+    storage = make_storage(influx.url, tmp_path)
+    schema = Schema(('cpu_usage_percent', 'cpu_usage_per_core'), labels={'cpu_usage_per_core': 'core'})
+    sample = schema.new_sample(1700000000.0, 'web-1')
+    sample.set('cpu_usage_percent', 12.5)
+    sample.set_series('cpu_usage_per_core', [1.0, 2.0])
+    assert storage.encode(sample) == storage.encode(sample.to_dict()) == [
+        'system,host=web-1 cpu_usage_percent=12.5 1700000000000000000',
+        'cpu_usage_per_core,host=web-1,core=0 value=1.0 1700000000000000000',
+        'cpu_usage_per_core,host=web-1,core=1 value=2.0 1700000000000000000',
+    ]
+    storage.close()
+
+
+def test_batches_over_one_connection(tmp_path, influx):
+    """Test that samples are sent in gzip batches on a persistent connection"""
+    storage = make_storage(influx.url, tmp_path, flush_interval_s=60)
+    for i in range(7):
+        storage.write_metrics({'timestamp': 1000.0 + i, 'hostname': 'h', 'value': i})
+    storage.close()
+
+    assert [body.count('\n') for _, _, body in influx.writes] == [3, 3, 1]
+    path, headers, _ = influx.writes[0]
+    assert path == '/api/v2/write?org=o&bucket=b&precision=ns'
+    assert headers['Authorization'] == 'Token secret'
+    assert headers['Content-Encoding'] == 'gzip'
+    assert len(influx.clients) == 1
+    assert storage.stats()['sent_samples'] == 7
+
+
+def test_spills_while_down_and_recovers(tmp_path, influx):
+    """Test that failed batches are spilled and drained once the server is back"""
+    influx.status = 503
+    storage = make_storage(influx.url, tmp_path, max_retries=1)
+    for i in range(9):
+        storage.write_metrics({'timestamp': 1000.0 + i, 'hostname': 'h', 'value': i})
+    assert wait_for(lambda: storage.stats()['spilled_batches'] == 3)
+    assert influx.writes == []
+
+    influx.status = 204
+    assert wait_for(lambda: storage.stats()['spool_files'] == 0)
+    values = sorted(int(float(line.split('value=')[1].split()[0])) for line in influx.lines())
+    assert values == list(range(9))
+    assert storage.stats()['retries'] >= 1
+    storage.close()
+
+
+def test_spool_is_bounded(tmp_path):
+    """Test that the spool drops the oldest batches beyond its budget"""
+    storage = make_storage('http://127.0.0.1:9', tmp_path, max_retries=0, spool_max_bytes=300)
+    for i in range(60):
+        storage.write_metrics({'timestamp': 1000.0 + i, 'hostname': 'h', 'value': i})
+    storage.close()
+
+    stats = storage.stats()
+    assert stats['spool_bytes'] <= 300
+    assert stats['spool_dropped'] > 0
+    assert stats['spilled_batches'] == 20
+
+
+def test_spool_eviction_while_draining(tmp_path, influx):
+    """Test that a spilled batch evicted while it is being sent does not stop the sender"""
+    storage = make_storage(influx.url, tmp_path)
+    first = gzip.compress(b'system,host=h value=1.0 1000000000000\n')
+    second = gzip.compress(b'system,host=h value=2.0 2000000000000\n')
+    storage._offline_until = time.monotonic() + 60
+    storage._spill(first)
+
+    send = storage._send
+
+    def send_while_writer_spills(body):
+        if body == first:
+            # The writer spills over budget while the oldest batch is in flight
+            storage.spool_max_bytes = len(second)
+            storage._spill(second)
+        send(body)
+
+    storage._send = send_while_writer_spills
+    storage._offline_until = 0.0
+    assert wait_for(lambda: len(influx.writes) == 2)
+    assert storage._sender.is_alive()
+    stats = storage.stats()
+    assert stats['spool_files'] == stats['spool_bytes'] == 0
+    assert stats['spool_dropped'] == 1
+    assert not list((tmp_path / 'spool').iterdir())
+
+    for i in range(3):
+        storage.write_metrics({'timestamp': 3000.0 + i, 'hostname': 'h', 'value': i})
+    assert wait_for(lambda: len(influx.writes) == 3)
+    storage.close()
+
+
+def test_rejected_batches_are_dropped(tmp_path, influx):
+    """Test that a 4xx answer drops the batch instead of retrying it"""
+    influx.status = 400
+    storage = make_storage(influx.url, tmp_path)
+    for i in range(3):
+        storage.write_metrics({'timestamp': 1000.0 + i, 'value': i})
+    storage.close()
+    stats = storage.stats()
+    assert stats['rejected_batches'] == 1
+    assert stats['retries'] == 0 and stats['spool_files'] == 0
+
+
+def test_field_types_stay_stable(tmp_path, influx):
+    """Test that int and float values of a field do not cause a type conflict"""
+    storage = make_storage(influx.url, tmp_path, batch_size=1)
+    storage.write_metrics({'timestamp': 1000.0, 'hostname': 'h', 'disk_read_bytes': 0,
+                           'cpu_usage_percent': 5.0})
+    storage.write_metrics({'timestamp': 1010.0, 'hostname': 'h', 'disk_read_bytes': 512.5,
+                           'cpu_usage_percent': 7})
+    storage.close()
+    stats = storage.stats()
+    assert stats['rejected_batches'] == 0
+    assert stats['sent_samples'] == 2
+    assert influx.field_types[('system', 'disk_read_bytes')] == 'float'
+
+
+def test_query_parses_flux_csv(tmp_path, influx):
+    """Test that query results are read from annotated CSV"""
+    influx.query_response = (
+        '#datatype,string,long,dateTime:RFC3339,double\r\n'
+        ',result,table,_time,_value\r\n'
+        ',_result,0,2023-11-14T22:13:30.5Z,2.5\r\n'
+        ',_result,0,2023-11-14T22:13:20Z,1.5\r\n\r\n')
+    storage = make_storage(influx.url, tmp_path)
+    assert storage.query_metrics('cpu', 1700000000, 1700000010) == [
+        {'timestamp': 1700000000.0, 'value': 1.5}, {'timestamp': 1700000010.5, 'value': 2.5}]
+    storage.close()
+
+
+def test_registered_as_storage_plugin(tmp_path, influx):
+    """Test that the backend builds from its config section"""
+    storage = plugins.storage_backends.load('influxdb').from_config(
+        {'url': influx.url, 'token': '', 'org': 'o', 'bucket': 'b', 'spool_dir': str(tmp_path)})
+    storage.close()
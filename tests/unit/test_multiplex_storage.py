@@ -0,0 +1,169 @@
+"""
+Unit tests for the fan-out storage backend
+"""
+
+import time
+import threading
+import pytest
+from src import plugins
+from src.storage import StorageBackend
+from src.storage.file_storage import FileStorage
+from src.storage.multiplex_storage import MultiplexStorage
+
+
+class RecordingStorage(StorageBackend):
+    """Backend that records samples, optionally held up by a gate"""
+
+    def __init__(self, gate=None):
+        self.gate = gate
+        self.samples = []
+        self.closed = False
+
+    def write_metrics(self, metrics):
+        if self.gate is not None:
+            self.gate.wait(5)
+        self.samples.append(metrics['timestamp'])
+        return True
+
+    def query_metrics(self, metric_name, start_time, end_time):
+        return [{'timestamp': t, 'value': 1} for t in self.samples if start_time <= t <= end_time]
+
+    def stats(self):
+        return {'samples': len(self.samples)}
+
+    def close(self):
+        self.closed = True
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.01)
+
+
+def test_fans_out_in_order():
+    """Test that every backend gets every sample in order"""
+    local, remote = RecordingStorage(), RecordingStorage()
+    storage = MultiplexStorage([('local', local, {}), ('remote', remote, {})])
+    for i in range(50):
+        assert storage.write_metrics({'timestamp': i})
+    storage.close()
+
+    assert local.samples == list(range(50))
+    assert remote.samples == list(range(50))
+    assert local.closed and remote.closed
+    stats = storage.stats()
+    assert stats['local_lane_written'] == 50 and stats['remote_samples'] == 50
+
+
+def test_slow_backend_drops_oldest_without_blocking_others():
+    """Test that a stuck backend drops its oldest samples and stalls nobody"""
+    gate = threading.Event()
+    local, remote = RecordingStorage(), RecordingStorage(gate)
+    storage = MultiplexStorage([('local', local, {}),
+                                ('remote', remote, {'queue_size': 3})])
+
+    storage.write_metrics({'timestamp': 0})
+    wait_for(lambda: storage.stats()['remote_lane_depth'] == 0)  # Held at the gate
+    started = time.monotonic()
+    for i in range(1, 10):
+        storage.write_metrics({'timestamp': i})
+    assert time.monotonic() - started < 1.0
+    wait_for(lambda: len(local.samples) == 10)
+
+    stats = storage.stats()
+    assert stats['remote_lane_depth'] == 3
+    assert stats['remote_lane_dropped'] == 6
+    assert stats['remote_lane_lag_s'] > 0
+    assert stats['local_lane_dropped'] == 0
+
+    gate.set()
+    storage.close()
+    assert remote.samples == [0, 7, 8, 9]
+
+
+def test_block_policy_waits_then_drops():
+    """Test that a full blocking lane waits for room up to its timeout"""
+    gate = threading.Event()
+    backend = RecordingStorage(gate)
+    storage = MultiplexStorage([('slow', backend, {'queue_size': 1, 'overflow': 'block',
+                                                   'block_timeout_s': 0.1})])
+    assert storage.write_metrics({'timestamp': 0})
+    wait_for(lambda: storage.stats()['slow_lane_depth'] == 0)
+    assert storage.write_metrics({'timestamp': 1})
+
+    started = time.monotonic()
+    assert not storage.write_metrics({'timestamp': 2})
+    assert time.monotonic() - started >= 0.1
+    assert storage.stats()['slow_lane_dropped'] == 1
+
+    gate.set()
+    storage.close()
+    assert backend.samples == [0, 1]
+
+
+def test_spill_keeps_order_and_survives_restart(tmp_path):
+    """Test that spilled samples are replayed in order, also after a restart"""
+    gate = threading.Event()
+    backend = RecordingStorage(gate)
+    options = {'queue_size': 2, 'overflow': 'spill', 'spill_dir': str(tmp_path)}
+    storage = MultiplexStorage([('remote', backend, options)])
+    assert storage.write_metrics({'timestamp': 0})
+    wait_for(lambda: storage.stats()['remote_lane_depth'] == 0)
+    for i in range(1, 10):
+        assert storage.write_metrics({'timestamp': i})
+    stats = storage.stats()
+    assert stats['remote_lane_spilled'] == 7
+    assert stats['remote_lane_spill_bytes'] > 0
+
+    gate.set()
+    wait_for(lambda: len(backend.samples) == 10)
+    assert backend.samples == list(range(10))
+    assert not (tmp_path / 'remote.jsonl').exists()
+    storage.close()
+
+    # A spill file left at shutdown is replayed before new samples
+    (tmp_path / 'remote.jsonl').write_text('{"timestamp": 10}\n{"timestamp": 11}\n')
+    backend = RecordingStorage()
+    storage = MultiplexStorage([('remote', backend, options)])
+    storage.write_metrics({'timestamp': 12})
+    wait_for(lambda: len(backend.samples) == 3)
+    storage.close()
+    assert backend.samples == [10, 11, 12]
+
+
+def test_query_uses_first_backend_with_data():
+    """Test that queries go to the backends in configured order"""
+    first, second = RecordingStorage(), RecordingStorage()
+    storage = MultiplexStorage([('first', first, {}), ('second', second, {})])
+    second.samples = [5]
+    assert storage.query_metrics('cpu', 0, 10) == [{'timestamp': 5, 'value': 1}]
+    first.samples = [6]
+    assert storage.query_metrics('cpu', 0, 10) == [{'timestamp': 6, 'value': 1}]
+    storage.close()
+
+
+def test_query_options_go_to_backends_that_take_them(tmp_path):
+    """Test that a backend is not passed query options it does not accept"""
+    recording = RecordingStorage()
+    storage = MultiplexStorage([('file', FileStorage(output_dir=str(tmp_path)), {}),
+                                ('recording', recording, {})])
+    recording.samples = [5]
+    assert storage.query_metrics('cpu', 0, 10, step=60) == [{'timestamp': 5, 'value': 1}]
+    storage.close()
+
+
+def test_from_config_builds_backends(tmp_path):
+    """Test that backends come from their own storage sections"""
+    sections = {'file': {'output_dir': str(tmp_path / 'data'), 'buffer_size': 1}}
+    config = {'backends': [{'name': 'file', 'overflow': 'block'}]}
+    storage = plugins.storage_backends.load('multiplex').from_config(config, sections)
+    now = time.time()
+    storage.write_metrics({'timestamp': now, 'cpu': 1.5})
+    storage.close()
+    assert storage.query_metrics('cpu', now - 1, now + 1) == [{'timestamp': now, 'value': 1.5}]
+
+    with pytest.raises(ValueError):
+        MultiplexStorage.from_config({'backends': [{'name': 'file', 'overflow': 'nope',
+                                                    'config': sections['file']}]})
@@ -0,0 +1,124 @@
+"""
+Unit tests for Network collector
+"""
+
+import pytest
+from src.collectors.network_collector import NetworkCollector
+from src.collectors.procfs import ProcfsReader
+
+NET_DEV_HEADER = (
+    "Inter-|   Receive                                                |  Transmit\n"
+    " face |bytes    packets errs drop fifo frame compressed multicast"
+    "|bytes    packets errs drop fifo colls carrier compressed\n"
+)
+
+
+def net_dev(**interfaces):
+    """Build /proc/net/dev with (rx_bytes, rx_packets, tx_bytes, tx_packets) per interface"""
+    lines = [NET_DEV_HEADER]
+    for name, (rx_bytes, rx_packets, tx_bytes, tx_packets) in interfaces.items():
+        lines.append(f"  {name}: {rx_bytes} {rx_packets} 1 2 0 0 0 0 "
+                     f"{tx_bytes} {tx_packets} 3 4 0 0 0 0\n")
+    return "".join(lines)
+
+
+@pytest.fixture
+def fake_host(tmp_path):
+    """Fake procfs and sysfs roots with lo and eth0 (1000 Mbps)"""
+    proc = tmp_path / 'proc'
+    (proc / 'net').mkdir(parents=True)
+    (proc / 'net' / 'dev').write_text(net_dev(lo=(0, 0, 0, 0), eth0=(0, 0, 0, 0)))
+    (proc / 'net' / 'sockstat').write_text(
+        "sockets: used 300\nTCP: inuse 120 orphan 0 tw 40 alloc 130 mem 5\nUDP: inuse 3 mem 1\n")
+    (proc / 'net' / 'sockstat6').write_text("TCP6: inuse 30\nUDP6: inuse 2\n")
+    eth0 = tmp_path / 'sys' / 'class' / 'net' / 'eth0'
+    eth0.mkdir(parents=True)
+    (eth0 / 'speed').write_text("1000\n")
+    return proc, tmp_path / 'sys'
+
+
+def make_collector(fake_host, **kwargs):
+    """Build a collector bound to the fake host"""
+    proc, sys_root = fake_host
+    collector = NetworkCollector(collection_interval=10, use_procfs=False,
+                                 sys_root=str(sys_root), **kwargs)
+    collector.procfs = ProcfsReader(str(proc), max_age=0)
+    collector._update(*collector._read_counters())
+    return collector
+
+
+def test_network_metrics_present():
+    """Test that all 10 network metrics are present on the real host"""
+    collector = NetworkCollector(collection_interval=10)
+    metrics = collector.collect()
+
+    for key in ['network_bytes_sent', 'network_bytes_recv', 'network_packets_sent',
+                'network_packets_recv', 'network_errors_in', 'network_errors_out',
+                'network_drops_in', 'network_drops_out', 'network_bandwidth_usage',
+                'network_connections', 'network_per_interface']:
+        assert key in metrics, f"Missing metric: {key}"
+
+
+def test_network_rates_and_bandwidth(fake_host):
+    """Test per-interface rates and bandwidth usage from cached link speed"""
+    proc, _ = fake_host
+    collector = make_collector(fake_host)
+    (proc / 'net' / 'dev').write_text(
+        net_dev(lo=(10**9, 10, 10**9, 10), eth0=(625_000_000, 1000, 125_000_000, 500)))
+    collector._prev_time -= 10
+
+    metrics = collector.collect()
+    eth0 = metrics['network_per_interface']['eth0']
+
+    assert list(metrics['network_per_interface']) == ['eth0']
+    assert eth0['network_bytes_recv'] == pytest.approx(62_500_000, rel=1e-3)
+    assert eth0['network_packets_sent'] == pytest.approx(50, rel=1e-3)
+    # 62.5 MB/s = 500 Mbit/s on a 1000 Mbit/s link
+    assert metrics['network_bandwidth_usage'] == pytest.approx(50.0, abs=0.1)
+
+
+def test_network_connections_from_sockstat(fake_host):
+    """Test that connections come from sockstat summaries"""
+    collector = make_collector(fake_host)
+    assert collector._count_connections() == 150
+
+
+def test_network_speeds_refresh_only_on_interface_change(fake_host):
+    """Test that link speeds are cached until the interface set changes"""
+    proc, sys_root = fake_host
+    collector = make_collector(fake_host)
+    assert collector._speeds == {'eth0': 1000}
+
+    (sys_root / 'class' / 'net' / 'eth0' / 'speed').write_text("10000\n")
+    collector._update(*collector._read_counters())
+    assert collector._speeds == {'eth0': 1000}
+
+    (proc / 'net' / 'dev').write_text(net_dev(eth0=(0, 0, 0, 0), eth1=(0, 0, 0, 0)))
+    collector._update(*collector._read_counters())
+    assert collector._speeds['eth0'] == 10000
+    assert 'eth1' in collector._speeds
+
+
+def test_network_interface_patterns(fake_host):
+    """Test that the interfaces filter accepts fnmatch patterns"""
+    collector = make_collector(fake_host, interfaces=['e*'], exclude_interfaces=[])
+    assert set(collector._prev) == {'eth0'}
+
+
+def test_network_counter_reset(fake_host):
+    """Test that a recreated interface re-baselines instead of reporting a wrap"""
+    proc, _ = fake_host
+    (proc / 'net' / 'dev').write_text(net_dev(eth0=(3_000_000_000, 10**6, 10**9, 10**6)))
+    collector = make_collector(fake_host)
+    (proc / 'net' / 'dev').write_text(net_dev(eth0=(5000, 10, 2000, 10)))
+    collector._prev_time -= 10
+
+    metrics = collector.collect()
+    assert metrics['network_per_interface'] == {}
+    # Floats even without rates, so storage sees one type per metric
+    assert metrics['network_bytes_recv'] == 0.0 and isinstance(metrics['network_bytes_recv'], float)
+
+    (proc / 'net' / 'dev').write_text(net_dev(eth0=(15000, 20, 2000, 10)))
+    collector._prev_time -= 10
+    metrics = collector.collect()
+    assert metrics['network_per_interface']['eth0']['network_bytes_recv'] == pytest.approx(1000, rel=1e-3)
@@ -0,0 +1,102 @@
+"""
+Unit tests for the plugin registry
+"""
+
+import sys
+import pytest
+from src import plugins
+from src.plugins import PluginRegistry, PluginError
+from src.collectors import BaseCollector
+from src.collectors.memory_collector import MemoryCollector
+from src.storage.file_storage import FileStorage
+from src.main import MetricsAgent
+
+
+class FakeEntryPoint:
+    def __init__(self, name, value):
+        self.name = name
+        self.value = value
+
+
+def test_registry_imports_lazily():
+    """Test that registering a plugin does not import its module"""
+    sys.modules.pop('src.collectors.cgroup_collector', None)
+    registry = PluginRegistry('collector', 'test.group',
+                              {'cgroup': 'src.collectors.cgroup_collector:CgroupCollector'})
+    assert 'src.collectors.cgroup_collector' not in sys.modules
+
+    cls = registry.load('cgroup')
+    assert cls.__name__ == 'CgroupCollector'
+    assert 'src.collectors.cgroup_collector' in sys.modules
+
+
+def test_registry_unknown_and_broken_plugins(monkeypatch):
+    """Test that unknown or unimportable plugins raise PluginError"""
+    monkeypatch.setattr(plugins, '_entry_points', lambda group: [])
+    registry = PluginRegistry('collector', 'test.group',
+                              {'broken': 'src.collectors.does_not_exist:Nothing'})
+    with pytest.raises(PluginError):
+        registry.load('missing')
+    with pytest.raises(PluginError):
+        registry.load('broken')
+    with pytest.raises(ValueError):
+        registry.register('bad', 'no_colon_here')
+
+
+def test_registry_discovers_entry_points(monkeypatch):
+    """Test that entry points are found but do not shadow built-ins"""
+    monkeypatch.setattr(plugins, '_entry_points', lambda group: [
+        FakeEntryPoint('mem2', 'src.collectors.memory_collector:MemoryCollector'),
+        FakeEntryPoint('cpu', 'somewhere.else:CPUCollector'),
+    ])
+    registry = PluginRegistry('collector', 'test.group',
+                              {'cpu': 'src.collectors.cpu_collector:CPUCollector'})
+
+    assert registry.names() == ['cpu', 'mem2']
+    assert registry.load('mem2') is MemoryCollector
+    assert registry.load('cpu').__module__ == 'src.collectors.cpu_collector'
+
+
+def test_builtin_collectors_build_from_config():
+    """Test that every built-in collector builds from a config section"""
+    agent_config = {'collection_interval': 7, 'use_procfs': False}
+    for name in plugins.BUILTIN_COLLECTORS:
+        cls = plugins.collectors.load(name)
+        collector = cls.from_config({'enabled': True}, agent_config)
+        assert isinstance(collector, BaseCollector)
+
+    collector = plugins.collectors.load('cpu').from_config({'interval': 3}, agent_config)
+    assert collector.collection_interval == 3
+    assert collector.procfs is None
+
+
+def test_storage_backend_from_config(tmp_path):
+    """Test that storage backends take their section as keyword arguments"""
+    cls = plugins.storage_backends.load('file')
+    storage = cls.from_config({'output_dir': str(tmp_path / 'out'), 'buffer_size': 5})
+    assert storage.buffer_size == 5
+    assert (tmp_path / 'out').is_dir()
+
+
+class SharedFileStorage(FileStorage):
+    """Third-party style backend that reuses the 'file' section"""
+
+    @classmethod
+    def from_config(cls, config, storage_config=None):
+        return cls(**dict((storage_config or {}).get('file') or {}, **config))
+
+
+def test_agent_passes_storage_section_to_any_backend(tmp_path, monkeypatch):
+    """Test that the agent builds every backend through the same from_config hook"""
+    monkeypatch.setattr(plugins, 'storage_backends', PluginRegistry(
+        'storage', 'test.group', {'shared': 'tests.unit.test_plugins:SharedFileStorage'}))
+    agent = object.__new__(MetricsAgent)
+    storage = agent._create_storage({
+        'backend': 'shared',
+        'shared': {'buffer_size': 5},
+        'file': {'output_dir': str(tmp_path / 'out'), 'buffer_size': 100},
+    })
+    assert isinstance(storage, SharedFileStorage)
+    assert storage.buffer_size == 5
+    assert (tmp_path / 'out').is_dir()
+    storage.close()
@@ -0,0 +1,118 @@
+"""
+Unit tests for Process collector
+"""
+
+import os
+import pytest
+from src.collectors.process_collector import ProcessCollector
+
+
+def write_proc(root, pid, name, utime, stime, rss_pages, starttime=1000, cmdline=None):
+    """Create a fake /proc/<pid> entry"""
+    pid_dir = root / str(pid)
+    pid_dir.mkdir(exist_ok=True)
+    fields = ['S', '1', '1', '1', '0', '-1', '0', '0', '0', '0', '0',
+              str(utime), str(stime), '0', '0', '20', '0', '1', '0',
+              str(starttime), '0', str(rss_pages)]
+    (pid_dir / 'stat').write_text(f"{pid} ({name}) {' '.join(fields)}\n")
+    (pid_dir / 'cmdline').write_bytes((cmdline or name).encode().replace(b' ', b'\0') + b'\0')
+
+
+@pytest.fixture
+def proc_root(tmp_path):
+    write_proc(tmp_path, 1, 'init', 0, 0, 100)
+    write_proc(tmp_path, 42, 'worker (x)', 0, 0, 5000, cmdline='worker --threads 8')
+    write_proc(tmp_path, 99, 'idle', 0, 0, 10)
+    return tmp_path
+
+
+def make_collector(proc_root, **kwargs):
+    collector = ProcessCollector(collection_interval=10, proc_root=str(proc_root), **kwargs)
+    collector.use_procfs = True
+    collector._clock_ticks = 100
+    return collector
+
+
+def age_samples(collector, seconds):
+    """Pretend the previous samples were taken earlier"""
+    for state in collector._states.values():
+        state.sampled_at -= seconds
+
+
+def test_process_metrics_present():
+    """Test that process metrics are present on the real host"""
+    metrics = ProcessCollector(collection_interval=10, top_k=3).collect()
+
+    for key in ['process_count', 'top_processes_cpu', 'top_processes_memory',
+                'process_scan_duration_ms', 'process_scan_cpu_ms', 'process_scan_coverage']:
+        assert key in metrics, f"Missing metric: {key}"
+    assert metrics['process_count'] > 0
+    assert len(metrics['top_processes_memory']) <= 3
+
+
+def test_top_k_by_cpu_and_memory(proc_root):
+    """Test ranking by CPU delta and by RSS"""
+    collector = make_collector(proc_root, top_k=2)
+    collector.collect()
+
+    write_proc(proc_root, 99, 'idle', 150, 50, 10)    # 200 ticks in 10s = 20%
+    write_proc(proc_root, 42, 'worker (x)', 50, 0, 5000, cmdline='worker --threads 8')
+    age_samples(collector, 10)
+    metrics = collector.collect()
+
+    top_cpu = metrics['top_processes_cpu']
+    assert [p['pid'] for p in top_cpu] == [99, 42]
+    assert top_cpu[0]['cpu_percent'] == pytest.approx(20.0, abs=0.5)
+
+    top_mem = metrics['top_processes_memory']
+    assert top_mem[0]['pid'] == 42
+    assert top_mem[0]['name'] == 'worker (x)'
+    assert top_mem[0]['cmdline'] == 'worker --threads 8'
+    assert top_mem[0]['memory_rss'] == 5000 * os.sysconf('SC_PAGE_SIZE')
+    assert metrics['process_count'] == 3
+
+
+def test_static_fields_cached_until_pid_reuse(proc_root):
+    """Test that cmdline is read once per process instance"""
+    collector = make_collector(proc_root, top_k=3)
+    collector.collect()
+    (proc_root / '42' / 'cmdline').write_bytes(b'changed\0')
+
+    metrics = collector.collect()
+    entry = next(p for p in metrics['top_processes_memory'] if p['pid'] == 42)
+    assert entry['cmdline'] == 'worker --threads 8'
+
+    # Same PID, new start time: a different process
+    write_proc(proc_root, 42, 'newproc', 0, 0, 5000, starttime=2000, cmdline='newproc')
+    metrics = collector.collect()
+    entry = next(p for p in metrics['top_processes_memory'] if p['pid'] == 42)
+    assert entry['name'] == 'newproc'
+    assert entry['cmdline'] == 'newproc'
+
+
+def test_exited_processes_are_forgotten(proc_root):
+    """Test that state for exited processes is dropped"""
+    collector = make_collector(proc_root)
+    collector.collect()
+
+    for entry in (proc_root / '99').iterdir():
+        entry.unlink()
+    (proc_root / '99').rmdir()
+    metrics = collector.collect()
+
+    assert 99 not in collector._states
+    assert metrics['process_count'] == 2
+
+
+def test_scan_budget_resumes_next_cycle(tmp_path):
+    """Test that an exhausted budget scans the rest on the next cycle"""
+    for pid in range(1, 201):
+        write_proc(tmp_path, pid, f'p{pid}', 0, 0, pid)
+    collector = make_collector(tmp_path, scan_budget=0)
+
+    metrics = collector.collect()
+    assert metrics['process_scan_coverage'] == pytest.approx(64 / 200)
+
+    for _ in range(3):
+        collector.collect()
+    assert len(collector._states) == 200
@@ -0,0 +1,152 @@
+"""
+Unit tests for the procfs reader engine
+"""
+
+import pytest
+from src.collectors.procfs import ProcfsReader, DISKSTAT_FIELDS, NETDEV_FIELDS
+from src.collectors.cpu_collector import CPUCollector
+from src.collectors.memory_collector import MemoryCollector
+
+
+STAT = """cpu  100 0 50 800 50 0 0 0 0 0
+cpu0 60 0 20 400 20 0 0 0 0 0
+cpu1 40 0 30 400 30 0 0 0 0 0
+intr 12345 0 0
+ctxt 999
+"""
+
+MEMINFO = """MemTotal:        8000000 kB
+MemFree:         2000000 kB
+MemAvailable:    5000000 kB
+Buffers:          100000 kB
+Cached:          2000000 kB
+SwapCached:            0 kB
+SReclaimable:     200000 kB
+SwapTotal:       1000000 kB
+SwapFree:         750000 kB
+"""
+
+DISKSTATS = """   8       0 sda 100 0 2000 50 200 0 4000 80 0 120 130 0 0 0 0
+   7       0 loop0 1 0 2 0 0 0 0 0 0 0 0 0 0 0 0
+"""
+
+NET_DEV = """Inter-|   Receive                                                |  Transmit
+ face |bytes    packets errs drop fifo frame compressed multicast|bytes    packets errs drop fifo colls carrier compressed
+    lo:    1000      10    0    0    0     0          0         0     1000      10    0    0    0     0       0          0
+  eth0:    5000      50    1    2    0     0          0         0     6000      60    3    4    0     0       0          0
+"""
+
+
+@pytest.fixture
+def proc_root(tmp_path):
+    """Fake procfs tree"""
+    (tmp_path / 'net').mkdir()
+    (tmp_path / 'stat').write_text(STAT)
+    (tmp_path / 'meminfo').write_text(MEMINFO)
+    (tmp_path / 'loadavg').write_text("0.50 0.25 0.10 1/100 4242\n")
+    (tmp_path / 'diskstats').write_text(DISKSTATS)
+    (tmp_path / 'net' / 'dev').write_text(NET_DEV)
+    return tmp_path
+
+
+def test_cpu_times_parsing(proc_root):
+    """Test that /proc/stat cpu lines are parsed"""
+    snap = ProcfsReader(str(proc_root)).snapshot()
+    fields, total, cores = snap.cpu_times()
+
+    assert fields[:4] == ('user', 'nice', 'system', 'idle')
+    assert total[0] == 100.0
+    assert len(cores) == 2
+    assert cores[1][2] == 30.0
+
+
+def test_meminfo_parsing_in_bytes(proc_root):
+    """Test that only the needed meminfo fields are parsed, in bytes"""
+    info = ProcfsReader(str(proc_root)).snapshot().meminfo()
+
+    assert info['MemTotal'] == 8000000 * 1024
+    assert info['SwapFree'] == 750000 * 1024
+    assert 'SwapCached' not in info
+
+
+def test_loadavg_parsing(proc_root):
+    """Test that /proc/loadavg is parsed"""
+    assert ProcfsReader(str(proc_root)).snapshot().loadavg() == (0.5, 0.25, 0.1)
+
+
+def test_diskstats_filter(proc_root):
+    """Test that diskstats filters devices before parsing"""
+    snap = ProcfsReader(str(proc_root)).snapshot()
+    stats = snap.diskstats(include=lambda name: not name.startswith('loop'))
+
+    assert list(stats) == ['sda']
+    assert len(stats['sda']) == len(DISKSTAT_FIELDS)
+    assert stats['sda'][DISKSTAT_FIELDS.index('sectors_written')] == 4000
+
+
+def test_net_dev_parsing(proc_root):
+    """Test that /proc/net/dev counters are parsed"""
+    stats = ProcfsReader(str(proc_root)).snapshot().net_dev()
+
+    assert set(stats) == {'lo', 'eth0'}
+    eth0 = dict(zip(NETDEV_FIELDS, stats['eth0']))
+    assert eth0['rx_bytes'] == 5000
+    assert eth0['tx_packets'] == 60
+    assert eth0['tx_drop'] == 4
+
+
+def test_snapshot_shared_within_max_age(proc_root):
+    """Test that a tick's snapshot is shared and files are read once"""
+    reader = ProcfsReader(str(proc_root), max_age=60)
+    first = reader.snapshot()
+    first.meminfo()
+
+    # Changes on disk are not visible within the same snapshot
+    (proc_root / 'meminfo').write_text(MEMINFO.replace('8000000', '9000000'))
+    assert reader.snapshot() is first
+    assert reader.snapshot().meminfo()['MemTotal'] == 8000000 * 1024
+
+
+def test_reader_reuses_descriptor_and_grows_buffer(proc_root):
+    """Test that files larger than the buffer are read completely"""
+    reader = ProcfsReader(str(proc_root), max_age=0, buffer_size=16)
+    data = reader.read('meminfo')
+    fd = reader._fds['meminfo']
+
+    assert data.decode() == MEMINFO
+    assert reader.read('meminfo') == data
+    assert reader._fds['meminfo'] == fd
+    reader.close()
+
+
+def test_memory_collector_procfs_path(proc_root):
+    """Test memory metrics computed from a fake meminfo"""
+    collector = MemoryCollector(collection_interval=10, use_procfs=False)
+    collector.procfs = ProcfsReader(str(proc_root))
+    metrics = collector.collect()
+
+    assert metrics['memory_total'] == 8000000 * 1024
+    assert metrics['memory_cached'] == 2200000 * 1024
+    assert metrics['memory_used'] == (8000000 - 2000000 - 2200000 - 100000) * 1024
+    assert metrics['memory_usage_percent'] == 37.5
+    assert metrics['swap_used'] == 250000 * 1024
+    assert metrics['swap_usage_percent'] == 25.0
+
+
+def test_cpu_collector_procfs_path(proc_root):
+    """Test CPU delta sampling driven by procfs snapshots"""
+    reader = ProcfsReader(str(proc_root), max_age=0)
+    collector = CPUCollector(collection_interval=10, per_core=True, use_procfs=False)
+    collector.procfs = reader
+    collector._prev_snapshot = collector._take_snapshot()
+
+    (proc_root / 'stat').write_text(
+        "cpu  200 0 50 900 50 0 0 0 0 0\n"
+        "cpu0 160 0 20 400 20 0 0 0 0 0\n"
+        "cpu1 40 0 30 500 30 0 0 0 0 0\n"
+    )
+    metrics = collector.collect()
+
+    assert metrics['cpu_usage_percent'] == 50.0
+    assert metrics['cpu_usage_per_core'] == [100.0, 0.0]
+    assert metrics['load_average_1m'] == 0.5
@@ -0,0 +1,106 @@
+"""
+Unit tests for the Prometheus exporter backend
+"""
+
+import gzip
+import urllib.error
+import urllib.request
+import pytest
+from src import plugins
+from src.storage.prometheus_storage import PrometheusStorage
+from src.sample import Schema
+
+
+@pytest.fixture
+def exporter():
+    storage = PrometheusStorage(host='127.0.0.1', port=0)
+    yield storage
+    storage.close()
+
+
+def scrape(exporter, path='/metrics', gzip_ok=False):
+    request = urllib.request.Request(f'http://127.0.0.1:{exporter.port}{path}')
+    if gzip_ok:
+        request.add_header('Accept-Encoding', 'gzip')
+    with urllib.request.urlopen(request, timeout=5) as response:
+        return response.headers, response.read()
+
+
+SAMPLE = {
+    'timestamp': 1000.0,
+    'hostname': 'web-1',
+    'cpu_usage_percent': 12.5,
+    'process_count': 42,
+    'disk_usage_unresponsive_mounts': [],
+    'cpu_usage_per_core': [1.5, 2.0],
+    'disk_io_per_device': {'sda': {'disk_read_bytes': 10, 'model': 'x'}},
+    'cgroup_per_path': {'/system.slice': {'memory_current': 1024, 'memory_max': None}},
+    'top_processes_cpu': [{'pid': 1, 'name': 'init'}],
+}
+
+
+def test_render_exposition(exporter):
+    """Test that values and per-entity labels render in the text format"""
+    text = exporter.render(SAMPLE).decode()
+    assert '# TYPE cpu_usage_percent gauge\ncpu_usage_percent{host="web-1"} 12.5\n' in text
+    assert 'process_count{host="web-1"} 42\n' in text
+    assert 'cpu_usage_per_core{host="web-1",core="1"} 2.0\n' in text
+    assert 'disk_read_bytes_per_device{host="web-1",device="sda"} 10\n' in text
+    assert 'memory_current_per_cgroup{host="web-1",cgroup="/system.slice"} 1024\n' in text
+    assert 'model' not in text and 'memory_max' not in text and 'top_processes' not in text
+
+
+def test_render_typed_sample_series(exporter):
+    """Test that a typed sample's core=N series render like the per-core list"""
+    schema = Schema(('cpu_usage_percent', 'cpu_usage_per_core'), labels={'cpu_usage_per_core': 'core'})
+    sample = schema.new_sample(1000.0, 'web-1')
+    sample.update(SAMPLE)
+    assert type(sample.data[1]) is not list
+    text = exporter.render(sample).decode()
+    assert text.count('# TYPE cpu_usage_per_core gauge') == 1
+    assert 'cpu_usage_per_core{host="web-1",core="1"} 2.0\n' in text
+    assert exporter.render(sample) == exporter.render(sample.to_dict())
+
+
+def test_scrape_serves_cached_exposition(exporter):
+    """Test that scrapes return the last rendered sample, plain or gzipped"""
+    assert exporter.write_metrics(SAMPLE)
+
+    headers, body = scrape(exporter)
+    assert headers['Content-Type'].startswith('text/plain; version=0.0.4')
+    assert body == exporter.render(SAMPLE)
+
+    headers, compressed = scrape(exporter, gzip_ok=True)
+    assert headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(compressed) == body
+
+    exporter.write_metrics(dict(SAMPLE, cpu_usage_percent=99.0))
+    assert b'cpu_usage_percent{host="web-1"} 99.0' in scrape(exporter)[1]
+    assert exporter.stats()['scrapes'] == 3
+    assert exporter.stats()['renders'] == 2
+
+
+def test_unknown_path_is_404(exporter):
+    """Test that only the metrics path is served"""
+    with pytest.raises(urllib.error.HTTPError) as error:
+        scrape(exporter, '/other')
+    assert error.value.code == 404
+
+
+def test_query_returns_latest_point(exporter):
+    """Test that queries see only the latest sample"""
+    exporter.write_metrics(SAMPLE)
+    assert exporter.query_metrics('cpu_usage_percent', 0, 2000) == [
+        {'timestamp': 1000.0, 'value': 12.5}]
+    assert exporter.query_metrics('cpu_usage_percent', 2000, 3000) == []
+
+
+def test_registered_as_storage_plugin():
+    """Test that the exporter builds from its config section"""
+    storage = plugins.storage_backends.load('prometheus').from_config(
+        {'host': '127.0.0.1', 'port': 0, 'namespace': 'agent'})
+    try:
+        storage.write_metrics({'hostname': 'h', 'load': 1})
+        assert b'agent_load{host="h"} 1' in scrape(storage)[1]
+    finally:
+        storage.close()
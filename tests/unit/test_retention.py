@@ -0,0 +1,133 @@
+"""
+Unit tests for the retention manager
+"""
+
+import json
+from datetime import date, datetime, time, timedelta
+from src.storage.retention import RetentionManager, lower_io_priority
+from src.storage.file_storage import FileStorage
+
+PREFIXES = {'raw': 'metrics-', '1m': 'rollup-1m-', '1h': 'rollup-1h-'}
+TODAY = date(2024, 6, 30)
+
+
+def day(offset):
+    return (TODAY - timedelta(days=offset)).isoformat()
+
+
+def write(path, size=10, timestamps=None):
+    if timestamps is not None:
+        path.write_text(''.join(json.dumps({'timestamp': t}) + '\n' for t in timestamps))
+    else:
+        path.write_bytes(b'x' * size)
+
+
+def test_age_retention_per_tier(tmp_path):
+    """Test that each tier's files expire after its own retention"""
+    for name in (f'metrics-{day(8)}.jsonl', f'metrics-{day(8)}.jsonl.idx', f'metrics-{day(3)}.jsonl',
+                 f'rollup-1m-{day(8)}.jsonl', 'metrics-notadate.jsonl'):
+        write(tmp_path / name)
+    (tmp_path / f'metrics-{day(8)}.cols').mkdir()
+    write(tmp_path / f'metrics-{day(8)}.cols' / 'timestamp.f64')
+    # A merged month is kept while any of its days is within retention
+    write(tmp_path / 'rollup-1h-2024-05.jsonl')
+    write(tmp_path / 'rollup-1h-2024-04.jsonl')
+
+    manager = RetentionManager(str(tmp_path), PREFIXES, retention_days={'raw': 7, '1h': 40},
+                               merge_below_bytes=0)
+    manager.run(TODAY)
+
+    assert {p.name for p in tmp_path.iterdir()} == {
+        'metrics-notadate.jsonl', f'metrics-{day(3)}.jsonl', f'rollup-1m-{day(8)}.jsonl',
+        'rollup-1h-2024-05.jsonl'}
+    assert manager.stats()['expired_files'] == 4
+
+
+def test_size_budget_evicts_oldest_first(tmp_path):
+    """Test that the oldest files go first, raw before rollups, never today's"""
+    write(tmp_path / f'metrics-{day(0)}.jsonl', 300)
+    write(tmp_path / f'metrics-{day(1)}.jsonl', 300)
+    write(tmp_path / f'rollup-1h-{day(2)}.jsonl', 100)
+    write(tmp_path / f'metrics-{day(2)}.jsonl', 300)
+
+    manager = RetentionManager(str(tmp_path), PREFIXES, max_bytes=700, merge_below_bytes=0)
+    manager.run(TODAY)
+    assert {p.name for p in tmp_path.iterdir()} == {
+        f'metrics-{day(0)}.jsonl', f'metrics-{day(1)}.jsonl', f'rollup-1h-{day(2)}.jsonl'}
+    assert manager.stats()['disk_bytes'] == 700
+
+    manager.max_bytes = 100
+    manager.run(TODAY)
+    assert {p.name for p in tmp_path.iterdir()} == {f'metrics-{day(0)}.jsonl'}
+    assert manager.stats()['evicted_files'] == 3
+
+
+def test_size_budget_keeps_merged_month_after_its_raw_days(tmp_path):
+    """Test that a merged monthly rollup is evicted after the raw days of its month"""
+    write(tmp_path / 'rollup-1h-2024-05.jsonl', 100)
+    write(tmp_path / 'metrics-2024-05-10.jsonl', 300)
+    write(tmp_path / 'metrics-2024-05-20.jsonl', 300)
+    write(tmp_path / f'metrics-{day(0)}.jsonl', 300)
+
+    manager = RetentionManager(str(tmp_path), PREFIXES, max_bytes=700, merge_below_bytes=0)
+    manager.run(TODAY)
+    assert {p.name for p in tmp_path.iterdir()} == {
+        'rollup-1h-2024-05.jsonl', 'metrics-2024-05-20.jsonl', f'metrics-{day(0)}.jsonl'}
+
+    manager.max_bytes = 400
+    manager.run(TODAY)
+    assert {p.name for p in tmp_path.iterdir()} == {
+        'rollup-1h-2024-05.jsonl', f'metrics-{day(0)}.jsonl'}
+
+
+def test_merges_small_rollup_files_into_months(tmp_path):
+    """Test that closed small rollup day files are merged and stay ordered"""
+    write(tmp_path / 'rollup-1h-2024-06-01.jsonl', timestamps=[1.0, 2.0])
+    write(tmp_path / 'rollup-1h-2024-06-02.jsonl', timestamps=[3.0])
+    write(tmp_path / 'rollup-1h-2024-05-31.jsonl', timestamps=[0.5])
+    write(tmp_path / f'rollup-1h-{day(1)}.jsonl', timestamps=[9.0])  # Not closed yet
+    write(tmp_path / f'metrics-{day(5)}.jsonl', timestamps=[4.0])  # Raw is never merged
+    # Left over from a merge interrupted before the day files were removed
+    write(tmp_path / 'rollup-1h-2024-06.jsonl', timestamps=[1.0, 2.0])
+
+    manager = RetentionManager(str(tmp_path), PREFIXES)
+    manager.run(TODAY)
+
+    june = [json.loads(line)['timestamp']
+            for line in (tmp_path / 'rollup-1h-2024-06.jsonl').read_text().splitlines()]
+    assert june == [1.0, 2.0, 3.0]
+    assert (tmp_path / 'rollup-1h-2024-05.jsonl').exists()
+    assert {p.name for p in tmp_path.iterdir()} == {
+        'rollup-1h-2024-05.jsonl', 'rollup-1h-2024-06.jsonl',
+        f'rollup-1h-{day(1)}.jsonl', f'metrics-{day(5)}.jsonl'}
+    assert manager.stats()['merged_files'] == 3
+
+
+def test_file_storage_maintenance(tmp_path):
+    """Test that FileStorage reports retention metrics and queries merged rollups"""
+    storage = FileStorage(output_dir=str(tmp_path), buffer_size=50, rollups=True,
+                          retention_days={'raw': 30})
+    yesterday = date.today() - timedelta(days=1)
+    start = datetime.combine(yesterday, time(6)).timestamp()
+    for i in range(3 * 360):
+        storage.write_metrics({'timestamp': start + i * 10, 'cpu': 1.0})
+    storage._flush()
+    before = storage.query_metrics('cpu', start, start + 4 * 3600, step=3600)
+    assert len(before) == 3
+
+    # Yesterday's hourly file is still open to writes, so merge it by hand
+    hourly = tmp_path / f'rollup-1h-{yesterday.isoformat()}.jsonl'
+    storage.retention._merge(tmp_path / f'rollup-1h-{yesterday.isoformat()[:7]}.jsonl', [hourly])
+    assert storage.query_metrics('cpu', start, start + 4 * 3600, step=3600) == before
+
+    storage.maintain()
+    stats = storage.stats()
+    assert stats['retention_passes'] >= 1
+    assert stats['retention_disk_bytes'] > 0 and stats['retention_disk_files'] > 0
+    assert stats['retention_oldest_timestamp'] == start
+    storage.close()
+
+
+def test_lower_io_priority_does_not_raise():
+    """Test that lowering I/O priority is best effort"""
+    assert lower_io_priority() in (True, False)
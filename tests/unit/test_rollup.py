@@ -0,0 +1,97 @@
+"""
+Unit tests for rollups
+"""
+
+import json
+import time
+from src.storage.rollup import RollupEngine
+from src.storage.file_storage import FileStorage
+
+
+def read_tier(tmp_path, name):
+    records = []
+    for path in sorted(tmp_path.glob(f'rollup-{name}-*.jsonl')):
+        records.extend(json.loads(line) for line in path.read_text().splitlines())
+    return records
+
+
+def test_rollup_aggregates_closed_buckets(tmp_path):
+    """Test that each closed 1m bucket is written with min/max/avg/count/last"""
+    engine = RollupEngine(str(tmp_path))
+    engine.add_samples([{'timestamp': 600.0 + i * 10, 'cpu': float(i), 'host': 'h', 'ok': True}
+                        for i in range(12)])
+
+    records = read_tier(tmp_path, '1m')
+    assert len(records) == 1  # The second minute is still open
+    assert records[0]['timestamp'] == 600.0
+    assert records[0]['cpu'] == {'min': 0.0, 'max': 5.0, 'avg': 2.5, 'count': 6, 'last': 5.0}
+    assert 'host' not in records[0] and 'ok' not in records[0]
+    assert engine.tier('1m').bucket['cpu'].count == 6
+
+
+def test_rollup_hour_tier_merges_minutes(tmp_path):
+    """Test that the 1h tier is built from closed 1m buckets"""
+    engine = RollupEngine(str(tmp_path))
+    # Two hours of 10s samples, flushed in small batches
+    samples = [{'timestamp': 3600.0 * 10 + i * 10, 'cpu': float(i % 60)} for i in range(721)]
+    for i in range(0, len(samples), 7):
+        engine.add_samples(samples[i:i + 7])
+
+    assert len(read_tier(tmp_path, '1m')) == 120
+    hours = read_tier(tmp_path, '1h')
+    assert len(hours) == 1
+    assert hours[0]['cpu']['count'] == 360
+    assert hours[0]['cpu']['min'] == 0.0 and hours[0]['cpu']['max'] == 59.0
+    assert hours[0]['cpu']['last'] == float(359 % 60)
+
+
+def test_rollup_resumes_open_buckets(tmp_path):
+    """Test that open buckets survive a restart and late samples are counted"""
+    engine = RollupEngine(str(tmp_path))
+    engine.add_samples([{'timestamp': 60.0, 'cpu': 1.0}, {'timestamp': 70.0, 'cpu': 3.0}])
+    engine.close()
+
+    engine = RollupEngine(str(tmp_path))
+    engine.add_samples([{'timestamp': 80.0, 'cpu': 5.0}, {'timestamp': 125.0, 'cpu': 0.0},
+                        {'timestamp': 65.0, 'cpu': 9.0}])
+
+    records = read_tier(tmp_path, '1m')
+    assert records == [{'timestamp': 60.0,
+                        'cpu': {'min': 1.0, 'max': 5.0, 'avg': 3.0, 'count': 3, 'last': 5.0}}]
+    assert engine.stats()['1m_late_samples'] == 1
+
+
+def test_rollup_open_buckets_survive_a_kill(tmp_path):
+    """Test that open buckets are checkpointed per batch, without close()"""
+    engine = RollupEngine(str(tmp_path))
+    engine.add_samples([{'timestamp': 3600.0 + i * 10, 'cpu': 1.0} for i in range(180)])
+    # Simulated kill: no close()
+
+    engine = RollupEngine(str(tmp_path))
+    engine.add_samples([{'timestamp': 3600.0 + i * 10, 'cpu': 1.0} for i in range(180, 367)])
+    hours = read_tier(tmp_path, '1h')
+    assert len(hours) == 1 and hours[0]['cpu']['count'] == 360
+
+
+def test_query_metrics_picks_coarsest_tier(tmp_path):
+    """Test that the step selects the raw, 1m or 1h data"""
+    storage = FileStorage(output_dir=str(tmp_path), buffer_size=100, rollups=True)
+    start = time.time() - 3 * 3600
+    start -= start % 3600
+    for i in range(3 * 360):
+        storage.write_metrics({'timestamp': start + i * 10, 'cpu': float(i % 6)})
+    storage._flush()
+    end = start + 3 * 3600
+
+    assert len(storage.query_metrics('cpu', start, end)) == 3 * 360
+    assert len(storage.query_metrics('cpu', start, end, step=30)) == 3 * 360
+
+    minutes = storage.query_metrics('cpu', start, end, step=300)
+    assert len(minutes) == 180  # Includes the open last minute
+    assert minutes[0] == {'timestamp': start, 'value': 2.5, 'min': 0.0, 'max': 5.0,
+                          'count': 6, 'last': 5.0}
+
+    hours = storage.query_metrics('cpu', start, end, step=86400)
+    assert [point['timestamp'] for point in hours] == [start, start + 3600, start + 7200]
+    assert hours[0]['count'] == 360 and hours[0]['value'] == 2.5
+    storage.close()
@@ -0,0 +1,97 @@
+"""
+Unit tests for typed samples
+"""
+
+import json
+import pytest
+from src.sample import Schema, Sample, metric_id, metric_name, label_set, json_default
+from src.collectors.cpu_collector import CPUCollector
+from src.collectors.memory_collector import MemoryCollector
+from src.executor import CollectorExecutor
+
+CPU = Schema(('cpu_usage_percent', 'cpu_usage_per_core'), labels={'cpu_usage_per_core': 'core'})
+MEMORY = Schema(('memory_used', 'memory_total'))
+
+
+def test_interning():
+    """Test that metric ids and label sets are interned"""
+    assert metric_id('cpu_usage_percent') == metric_id('cpu_usage_percent')
+    assert metric_name(metric_id('some_metric')) == 'some_metric'
+    assert CPU.ids == (metric_id('cpu_usage_percent'), metric_id('cpu_usage_per_core'))
+    assert label_set(('core', '1')) is label_set(('core', '1'))
+
+
+def test_sample_reads_like_a_dict():
+    """Test that a sample behaves as the flat dictionary it replaces"""
+    sample = CPU.new_sample(1000.0, 'web-1')
+    sample.set('cpu_usage_percent', 12.5)
+    sample.set('not_in_schema', None)
+
+    assert sample == {'timestamp': 1000.0, 'hostname': 'web-1',
+                      'cpu_usage_percent': 12.5, 'not_in_schema': None}
+    assert list(sample) == ['timestamp', 'hostname', 'cpu_usage_percent', 'not_in_schema']
+    assert 'cpu_usage_per_core' not in sample  # Never set
+    assert sample.get('cpu_usage_per_core', 'default') == 'default'
+    assert 'not_in_schema' in sample and sample['not_in_schema'] is None
+    with pytest.raises(KeyError):
+        sample['cpu_usage_per_core']
+    assert json.loads(json.dumps(sample, default=json_default)) == sample.to_dict()
+
+
+def test_merge_and_series():
+    """Test that merged samples share one combined schema and label per-entity slots"""
+    cpu = CPU.new_sample(1.0, 'h')
+    cpu.set('cpu_usage_percent', 50.0)
+    cpu.set_series('cpu_usage_per_core', [40.0, 60.0])
+    memory = MEMORY.new_sample(1.0, 'h')
+    memory.data[:] = [3, 8]
+
+    merged = Sample.merge(2.0, 'web-1', [cpu, memory], {'agent_errors': 0})
+    again = Sample.merge(3.0, 'web-1', [cpu, memory])
+    assert merged.schema is again.schema
+    assert merged.to_dict() == {'timestamp': 2.0, 'hostname': 'web-1', 'cpu_usage_percent': 50.0,
+                                'cpu_usage_per_core': [40.0, 60.0], 'memory_used': 3,
+                                'memory_total': 8, 'agent_errors': 0}
+
+    series = [(metric_name(mid), labels, value) for mid, labels, value in merged.series()]
+    assert series[:3] == [('cpu_usage_percent', (), 50.0),
+                          ('cpu_usage_per_core', (('core', '0'),), 40.0),
+                          ('cpu_usage_per_core', (('core', '1'),), 60.0)]
+    assert series[1][1] is label_set(('core', '0'))
+    assert series[-1] == ('agent_errors', (), 0)
+
+
+def test_collectors_fill_samples():
+    """Test that the CPU and memory collectors produce samples of their schema"""
+    for collector in (CPUCollector(collection_interval=10), MemoryCollector(collection_interval=10)):
+        collector.hostname = 'web-1'
+        sample = collector.collect_sample()
+        assert isinstance(sample, Sample)
+        assert sample.schema is collector.SCHEMA
+        assert sample['hostname'] == 'web-1'
+        assert set(collector.collect()) == set(sample)
+
+    sample = CPUCollector(collection_interval=10).collect_sample()
+    per_core = [(labels, value) for mid, labels, value in sample.series()
+                if mid == metric_id('cpu_usage_per_core')]
+    assert per_core
+    assert [labels for labels, _ in per_core] == [(('core', str(core)),)
+                                                 for core in range(len(per_core))]
+    assert [value for _, value in per_core] == sample['cpu_usage_per_core']
+
+    executor = CollectorExecutor(mode='sequential')
+    results = executor.run({'cpu': CPUCollector(collection_interval=10)}, ['cpu'])
+    assert isinstance(results['cpu'], Sample)
+    executor.shutdown()
+
+
+def test_per_core_busy_matches_percentages():
+    """Test that the per-core busy shortcut agrees with the full computation"""
+    collector = CPUCollector(collection_interval=10, sampling='blocking', use_procfs=False)
+    collector._fields = ('user', 'nice', 'system', 'idle', 'iowait', 'guest')
+    cases = [((10, 0, 5, 80, 5, 3), (20, 0, 5, 90, 5, 9)),
+             ((10, 0, 5, 80, 5, 0), (10, 0, 5, 80, 5, 0)),
+             ((10, 0, 5, 80, 5, 0), (9, 0, 5, 81, 5, 0))]
+    for prev, cur in cases:
+        full = collector._percentages(prev, cur)
+        assert collector._busy(prev, cur) == (full['busy'] if full is not None else 0.0)
@@ -0,0 +1,126 @@
+"""
+Unit tests for the collector scheduler
+"""
+
+import pytest
+from src.scheduler import CollectorScheduler
+
+
+class FakeClock:
+    """Controllable monotonic and wall clocks"""
+
+    def __init__(self, wall_start=1000.5):
+        self.now = 0.0
+        self.wall_start = wall_start
+
+    def monotonic(self):
+        return self.now
+
+    def wall(self):
+        return self.wall_start + self.now
+
+
+class FakeStopEvent:
+    """Stop event whose wait() advances the fake clock instead of sleeping"""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.stopped = False
+
+    def wait(self, timeout=None):
+        if timeout is not None:
+            self.clock.now += timeout
+        return self.stopped
+
+    def is_set(self):
+        return self.stopped
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def make_scheduler(clock, **kwargs):
+    return CollectorScheduler(clock=clock.monotonic, wall_clock=clock.wall, **kwargs)
+
+
+def test_ticks_align_to_wall_clock_boundaries(clock):
+    """Test that ticks land on multiples of each interval"""
+    scheduler = make_scheduler(clock)
+    scheduler.add('cpu', 10)
+    event = FakeStopEvent(clock)
+
+    timestamps = [scheduler.wait_due(event)[0] for _ in range(3)]
+
+    assert timestamps == pytest.approx([1010.0, 1020.0, 1030.0])
+
+
+def test_each_collector_fires_on_its_own_cadence(clock):
+    """Test that 10s and 60s collectors share ticks only on 60s boundaries"""
+    clock.wall_start = 1200.0  # multiple of 60
+    scheduler = make_scheduler(clock)
+    scheduler.add('cpu', 10)
+    scheduler.add('disk_usage', 60)
+    event = FakeStopEvent(clock)
+
+    ticks = [scheduler.wait_due(event) for _ in range(7)]
+    fired = [sorted(names) for _, names in ticks]
+
+    assert fired[0] == ['cpu', 'disk_usage']
+    assert fired[1:6] == [['cpu']] * 5
+    assert fired[6] == ['cpu', 'disk_usage']
+
+
+def test_collection_time_does_not_drift(clock):
+    """Test that time spent collecting does not shift later ticks"""
+    scheduler = make_scheduler(clock)
+    scheduler.add('cpu', 10)
+    event = FakeStopEvent(clock)
+
+    timestamps = []
+    for _ in range(5):
+        timestamp, _ = scheduler.wait_due(event)
+        timestamps.append(timestamp)
+        clock.now += 1.3  # slow collection
+
+    assert [b - a for a, b in zip(timestamps, timestamps[1:])] == pytest.approx([10.0] * 4)
+    assert scheduler.stats()['late_ticks'] == 0
+
+
+def test_missed_and_late_ticks_are_reported(clock):
+    """Test that overruns are counted instead of fired back to back"""
+    scheduler = make_scheduler(clock, late_tolerance=0.5)
+    scheduler.add('cpu', 10)
+    event = FakeStopEvent(clock)
+
+    scheduler.wait_due(event)            # t=1010
+    clock.now += 25                      # run overran 2 ticks
+    timestamp, _ = scheduler.wait_due(event)
+    stats = scheduler.stats()
+    assert timestamp == pytest.approx(1020.0)
+    assert stats['missed_ticks'] == 1
+    assert stats['lateness_ms'] == pytest.approx(15000.0)
+
+    timestamp, _ = scheduler.wait_due(event)
+    assert timestamp == pytest.approx(1040.0)
+
+    clock.now += 10.8                    # just past the next due time
+    scheduler.wait_due(event)
+    assert scheduler.stats()['late_ticks'] == 1
+
+
+def test_wait_returns_none_when_stopped(clock):
+    """Test that a stop request aborts the wait"""
+    scheduler = make_scheduler(clock)
+    scheduler.add('cpu', 10)
+    event = FakeStopEvent(clock)
+    event.stopped = True
+
+    assert scheduler.wait_due(event) is None
+
+
+def test_invalid_interval_rejected(clock):
+    """Test that non-positive intervals are rejected"""
+    with pytest.raises(ValueError):
+        make_scheduler(clock).add('cpu', 0)
@@ -0,0 +1,104 @@
+"""
+Unit tests for the columnar segment format
+"""
+
+import json
+import math
+import pytest
+from src.storage import segment_format
+from src.storage.segment_format import (encode_segment, decode_segment, read_schema,
+                                        iter_segment_file, convert_to_segment,
+                                        convert_to_jsonl, SegmentError)
+
+
+def make_samples(count=50):
+    samples = []
+    for i in range(count):
+        sample = {
+            'timestamp': 1700000000.0 + i * 10,
+            'hostname': 'web-01' if i % 2 else 'web-02',
+            'cpu_usage_percent': 12.5 + (i % 7) * 0.1,
+            'memory_total': 16 * 1024 ** 3,
+            'memory_used': 8 * 1024 ** 3 + i * 4096,
+            'cpu_usage_per_core': [1.0 * i, 2.5],
+            'disk_io_per_device': {'sda': {'read_bytes': i}},
+            'network_connections': None if i % 5 == 0 else i,
+            'enabled': bool(i % 3),
+        }
+        if i % 4 == 0:
+            del sample['memory_used']
+        samples.append(sample)
+    return samples
+
+
+def test_segment_round_trip():
+    """Test that samples decode to what was encoded, including None and missing keys"""
+    samples = make_samples()
+    data = encode_segment(samples)
+
+    decoded, end = decode_segment(data)
+    assert end == len(data)
+    assert decoded == samples
+
+
+def test_segment_column_types():
+    """Test that columns get the compact encodings"""
+    rows, schema, _ = read_schema(encode_segment(make_samples()))
+    types = {column[0]: column[1] for column in schema}
+    assert rows == 50
+    assert types['timestamp'] == segment_format.TIMESTAMP
+    assert types['hostname'] == segment_format.STRING
+    assert types['cpu_usage_percent'] == segment_format.FLOAT
+    assert types['memory_total'] == segment_format.INT
+    assert types['cpu_usage_per_core'] == segment_format.JSON
+
+
+def test_segment_float_edge_cases():
+    """Test that special and repeated floats survive XOR compression"""
+    values = [0.0, -0.0, 1e308, 5e-324, float('inf'), float('-inf'), 1.5, 1.5, 1.25, -7.75]
+    samples = [{'timestamp': 1.0 + i, 'value': v} for i, v in enumerate(values)]
+    samples.append({'timestamp': 100.0, 'value': float('nan')})
+
+    decoded, _ = decode_segment(encode_segment(samples))
+    assert [s['value'] for s in decoded[:-1]] == values
+    assert math.copysign(1.0, decoded[1]['value']) == -1.0
+    assert math.isnan(decoded[-1]['value'])
+
+
+def test_segment_is_smaller_than_jsonl():
+    """Test that the segment beats JSONL on repetitive samples"""
+    samples = make_samples(200)
+    jsonl = ''.join(json.dumps(s) + '\n' for s in samples).encode()
+    assert len(encode_segment(samples)) < len(jsonl) / 2
+
+
+def test_segment_column_selection():
+    """Test that selected columns decode alone"""
+    decoded, _ = decode_segment(encode_segment(make_samples(3)),
+                                columns=['timestamp', 'memory_used'])
+    assert decoded[0] == {'timestamp': 1700000000.0}
+    assert decoded[1] == {'timestamp': 1700000010.0, 'memory_used': 8 * 1024 ** 3 + 4096}
+
+
+def test_segment_file_skips_truncated_tail(tmp_path):
+    """Test that a segment cut short by a crash is ignored"""
+    path = tmp_path / 'metrics.seg'
+    first = encode_segment(make_samples(5))
+    second = encode_segment(make_samples(5))
+    path.write_bytes(first + second[:len(second) // 2])
+
+    assert len(list(iter_segment_file(str(path)))) == 5
+    with pytest.raises(SegmentError):
+        decode_segment(second[:10])
+
+
+def test_converter_round_trip(tmp_path):
+    """Test that JSONL -> segment -> JSONL preserves samples"""
+    samples = make_samples(30)
+    src = tmp_path / 'metrics.jsonl'
+    src.write_text(''.join(json.dumps(s) + '\n' for s in samples))
+
+    assert convert_to_segment(str(src), str(tmp_path / 'out.seg'), segment_rows=7) == 30
+    assert convert_to_jsonl(str(tmp_path / 'out.seg'), str(tmp_path / 'back.jsonl')) == 30
+    back = [json.loads(line) for line in (tmp_path / 'back.jsonl').read_text().splitlines()]
+    assert back == samples
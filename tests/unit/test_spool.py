@@ -0,0 +1,150 @@
+"""
+Unit tests for the write-ahead spool
+"""
+
+import os
+import threading
+import pytest
+from src.storage.spool import WriteAheadSpool
+from src.storage.file_storage import FileStorage
+
+
+def test_spool_replays_uncommitted_records(tmp_path):
+    """Test that records appended but never committed are replayed"""
+    path = str(tmp_path / 'spool.wal')
+    spool = WriteAheadSpool(path, durability='os')
+    for i in range(5):
+        spool.append({'timestamp': float(i)})
+    spool.commit(2)
+    # Simulated kill: no close()
+
+    reopened = WriteAheadSpool(path, durability='os')
+    replayed = reopened.replay()
+    assert [seq for seq, _ in replayed] == [3, 4, 5]
+    assert [s['timestamp'] for _, s in replayed] == [2.0, 3.0, 4.0]
+    # Sequence numbers continue after the replayed records
+    assert reopened.append({'timestamp': 5.0}) == 6
+
+
+def test_spool_truncates_when_fully_committed(tmp_path):
+    """Test that the spool file is emptied once everything is committed"""
+    path = str(tmp_path / 'spool.wal')
+    spool = WriteAheadSpool(path, durability='os')
+    seq = [spool.append({'value': i}) for i in range(3)][-1]
+    assert os.path.getsize(path) > 0
+
+    spool.commit(seq)
+    assert os.path.getsize(path) == 0
+    spool.close()
+    assert WriteAheadSpool(path).replay() == []
+
+
+def test_spool_discards_torn_tail(tmp_path):
+    """Test that a partially written record ends the spool"""
+    path = str(tmp_path / 'spool.wal')
+    spool = WriteAheadSpool(path, durability='os')
+    spool.append({'value': 1})
+    spool.append({'value': 2})
+    spool.close()
+    with open(path, 'r+b') as f:
+        f.truncate(os.path.getsize(path) - 3)
+
+    reopened = WriteAheadSpool(path, durability='os')
+    assert [s['value'] for _, s in reopened.replay()] == [1]
+    reopened.append({'value': 3})
+    reopened.close()
+    assert [s['value'] for _, s in WriteAheadSpool(path).replay()] == [1, 3]
+
+
+def test_spool_rejects_corrupt_record(tmp_path):
+    """Test that a checksum mismatch stops replay"""
+    path = str(tmp_path / 'spool.wal')
+    spool = WriteAheadSpool(path, durability='os')
+    spool.append({'value': 1})
+    spool.append({'value': 2})
+    spool.close()
+    data = bytearray(open(path, 'rb').read())
+    data[-2] ^= 0xFF
+    open(path, 'wb').write(bytes(data))
+
+    assert [s['value'] for _, s in WriteAheadSpool(path).replay()] == [1]
+
+
+@pytest.mark.parametrize('durability,expected', [('os', 0), ('group', 2), ('sync', 8)])
+def test_spool_fsync_per_durability(tmp_path, durability, expected):
+    """Test that group durability batches fsyncs across records"""
+    spool = WriteAheadSpool(str(tmp_path / 'spool.wal'), durability=durability,
+                            group_size=4, group_interval_ms=60000)
+    for i in range(8):
+        spool.append({'value': i})
+        spool.sync_due()
+    assert spool.stats()['fsyncs'] == expected
+
+
+def test_spool_group_fsync_off_the_caller_thread(tmp_path, monkeypatch):
+    """Test that with the async writer the group fsync runs on the writer thread"""
+    synced_on = []
+    real_fsync = os.fsync
+
+    def fsync(fd):
+        synced_on.append(threading.current_thread().name)
+        real_fsync(fd)
+
+    monkeypatch.setattr('src.storage.spool.os.fsync', fsync)
+    storage = FileStorage(output_dir=str(tmp_path), buffer_size=100, async_writer=True,
+                          spool_durability='group', spool_group_size=2)
+    for i in range(6):
+        storage.write_metrics({'timestamp': float(i), 'value': i})
+    storage.close()
+
+    assert synced_on
+    assert threading.current_thread().name not in synced_on
+
+
+def test_spool_compacts_when_large(tmp_path):
+    """Test that committed records are dropped once the spool outgrows max_bytes"""
+    path = str(tmp_path / 'spool.wal')
+    spool = WriteAheadSpool(path, durability='os', max_bytes=200)
+    for i in range(20):
+        spool.append({'value': i})
+    spool.commit(18)
+    assert spool.stats()['size_bytes'] == os.path.getsize(path) < 100
+    spool.close()
+    assert [s['value'] for _, s in WriteAheadSpool(path).replay()] == [18, 19]
+
+
+def test_file_storage_replays_spool_on_start(tmp_path):
+    """Test that samples lost with a killed agent are stored on the next start"""
+    storage = FileStorage(output_dir=str(tmp_path), buffer_size=100, spool_durability='group')
+    for i in range(5):
+        storage.write_metrics({'timestamp': float(i), 'value': i})
+    assert not list(tmp_path.glob('metrics-*.jsonl'))
+    # Simulated kill: the buffer never reaches disk
+    storage.buffer.clear()
+    storage.spool.close()
+
+    restarted = FileStorage(output_dir=str(tmp_path), buffer_size=100, spool_durability='group')
+    lines = next(tmp_path.glob('metrics-*.jsonl')).read_text().splitlines()
+    assert len(lines) == 5
+    assert restarted.spool.pending() == 0
+    assert os.path.getsize(tmp_path / 'spool.wal') == 0
+    restarted.close()
+
+
+@pytest.mark.parametrize('async_writer', [False, True])
+def test_failed_spool_append_keeps_commit(tmp_path, monkeypatch, async_writer):
+    """Test that one failed spool append does not leave the flushed samples uncommitted"""
+    storage = FileStorage(output_dir=str(tmp_path), buffer_size=100, spool_durability='os',
+                          async_writer=async_writer)
+    for i in range(3):
+        storage.write_metrics({'timestamp': float(i), 'value': i})
+
+    def full_disk(sample):
+        raise OSError('No space left on device')
+
+    monkeypatch.setattr(storage.spool, 'append', full_disk)
+    storage.write_metrics({'timestamp': 3.0, 'value': 3})
+    storage.close()
+
+    assert storage.spool.pending() == 0
+    assert WriteAheadSpool(str(tmp_path / 'spool.wal')).replay() == []
@@ -0,0 +1,105 @@
+"""
+Unit tests for the SQLite storage backend
+"""
+
+import sqlite3
+from src import plugins
+from src.storage.sqlite_storage import SQLiteStorage
+from src.sample import Schema
+
+SAMPLE = {
+    'timestamp': 1000.0,
+    'hostname': 'web-1',
+    'cpu_usage_percent': 12.5,
+    'process_count': 42,
+    'kernel': 'linux',
+    'cpu_usage_per_core': [1.5, 2.0],
+    'disk_io_per_device': {'sda': {'disk_read_bytes': 10, 'model': 'x'}},
+}
+
+
+def test_write_and_query(tmp_path):
+    """Test that values, per-entity values and hosts round-trip"""
+    storage = SQLiteStorage(path=str(tmp_path / 'metrics.db'), batch_size=10)
+    for i in range(5):
+        storage.write_metrics(dict(SAMPLE, timestamp=1000.0 + i * 10, cpu_usage_percent=float(i)))
+    storage.write_metrics(dict(SAMPLE, hostname='web-2', timestamp=1015.0))
+
+    points = storage.query_metrics('cpu_usage_percent', 1010, 1030)
+    assert [(p['timestamp'], p['value'], p['host']) for p in points] == [
+        (1010.0, 1.0, 'web-1'), (1015.0, 12.5, 'web-2'), (1020.0, 2.0, 'web-1'), (1030.0, 3.0, 'web-1')]
+    assert len(storage.query_metrics('cpu_usage_percent', 1010, 1030, host='web-2')) == 1
+
+    assert storage.query_metrics('cpu_usage_per_core', 1000, 1000, host='web-1') == [
+        {'timestamp': 1000.0, 'value': 1.5, 'host': 'web-1', 'core': '0'},
+        {'timestamp': 1000.0, 'value': 2.0, 'host': 'web-1', 'core': '1'}]
+    assert storage.query_metrics('disk_read_bytes_per_device', 1000, 1000, host='web-1') == [
+        {'timestamp': 1000.0, 'value': 10.0, 'host': 'web-1', 'device': 'sda'}]
+    assert storage.query_metrics('kernel', 0, 2000) == []
+    assert storage.query_metrics('model_per_device', 0, 2000) == []
+    storage.close()
+
+
+def test_typed_sample_series(tmp_path):
+    """Test that a typed sample's core=N series are stored like the per-core list"""
+    schema = Schema(('cpu_usage_percent', 'cpu_usage_per_core'), labels={'cpu_usage_per_core': 'core'})
+    sample = schema.new_sample(1000.0, 'web-1')
+    sample.update(SAMPLE)
+    storage = SQLiteStorage(path=str(tmp_path / 'metrics.db'), batch_size=10)
+    storage.write_metrics(sample)
+    storage.write_metrics(dict(SAMPLE, timestamp=1010.0))
+
+    points = storage.query_metrics('cpu_usage_per_core', 1000, 1010)
+    assert [(p['timestamp'], p['core'], p['value']) for p in points] == [
+        (1000.0, '0', 1.5), (1000.0, '1', 2.0), (1010.0, '0', 1.5), (1010.0, '1', 2.0)]
+    assert storage.stats()['series'] == 5
+    storage.close()
+
+
+def test_batches_inserts(tmp_path):
+    """Test that samples are inserted batch_size at a time"""
+    storage = SQLiteStorage(path=str(tmp_path / 'metrics.db'), batch_size=3)
+    for i in range(7):
+        storage.write_metrics({'timestamp': 1000.0 + i, 'hostname': 'h', 'cpu': 1.0, 'load': 2})
+    stats = storage.stats()
+    assert stats['batches'] == 2
+    assert stats['rows_written'] == 12
+    assert stats['buffered'] == 1
+    assert stats['series'] == 2
+    storage.close()
+
+    conn = sqlite3.connect(str(tmp_path / 'metrics.db'))
+    assert conn.execute('SELECT count(*) FROM samples').fetchone()[0] == 14
+    assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+
+
+def test_range_query_uses_primary_key(tmp_path):
+    """Test that a metric range query is an index range scan"""
+    storage = SQLiteStorage(path=str(tmp_path / 'metrics.db'))
+    storage.write_metrics(SAMPLE)
+    storage.close()
+
+    conn = sqlite3.connect(str(tmp_path / 'metrics.db'))
+    plan = ' '.join(row[-1] for row in conn.execute(
+        'EXPLAIN QUERY PLAN SELECT series.host, samples.ts, samples.value '
+        'FROM series JOIN samples ON samples.series_id = series.id '
+        'WHERE series.metric = ? AND samples.ts BETWEEN ? AND ?', ('cpu', 0, 1)))
+    assert 'SCAN samples' not in plan
+    assert 'PRIMARY KEY (series_id=? AND ts>? AND ts<?)' in plan
+
+
+def test_reopen_keeps_series_and_retention(tmp_path):
+    """Test that a reopened database reuses series ids and expires old rows"""
+    path = str(tmp_path / 'metrics.db')
+    storage = SQLiteStorage(path=path, batch_size=1)
+    storage.write_metrics({'timestamp': 1000.0, 'hostname': 'h', 'cpu': 1.0})
+    storage.close()
+
+    storage = plugins.storage_backends.load('sqlite').from_config(
+        {'path': path, 'batch_size': 1, 'retention_days': 1})
+    assert storage.stats()['series'] == 1
+    storage.write_metrics({'timestamp': 2e9, 'hostname': 'h', 'cpu': 2.0})
+    assert storage.stats()['deleted_rows'] == 1
+    assert storage.query_metrics('cpu', 0, 3e9) == [{'timestamp': 2e9, 'value': 2.0, 'host': 'h'}]
+    assert storage.stats()['series'] == 1
+    storage.close()
@@ -0,0 +1,94 @@
+"""
+Unit tests for sliding alert windows
+"""
+
+import math
+import random
+import pytest
+from src.alerting.windows import create_window, Window, QuantileWindow
+
+
+def naive(aggregate, values):
+    if aggregate == 'avg':
+        return sum(values) / len(values)
+    if aggregate == 'min':
+        return min(values)
+    if aggregate == 'max':
+        return max(values)
+    ordered = sorted(values)
+    return ordered[max(1, math.ceil(0.95 * len(ordered))) - 1]
+
+
+@pytest.mark.parametrize('aggregate', ['avg', 'min', 'max', 'p95'])
+def test_aggregates_match_recomputation(aggregate):
+    """Test that incremental aggregates match recomputing over the window"""
+    rng = random.Random(7)
+    window = create_window(aggregate, 60)
+    samples = []
+    for tick in range(500):
+        timestamp = tick * 5.0
+        value = rng.uniform(-50, 150)
+        samples.append((timestamp, value))
+        result = window.push(timestamp, value)
+        if timestamp < 60:
+            assert result is None  # Not a full window yet
+            continue
+        expected = naive(aggregate, [v for t, v in samples if t > timestamp - 60])
+        if aggregate == 'p95':
+            assert result == pytest.approx(expected, rel=0.01)
+        else:
+            assert result == pytest.approx(expected)
+        assert len(window.entries) == 12
+
+
+def test_rate():
+    """Test that rate is the change per second across the window"""
+    window = create_window('rate', 30)
+    for tick in range(10):
+        result = window.push(tick * 10.0, 100.0 + tick * 50)
+    assert result == pytest.approx(5.0)
+
+
+def test_memory_is_bounded():
+    """Test that max_samples caps the samples kept and memory is reported"""
+    window = create_window('max', 3600, max_samples=100)
+    for tick in range(1000):
+        window.push(float(tick), float(tick % 7))
+    assert len(window.entries) == 100
+    assert window.dropped == 900
+    assert window.value() == 6.0
+    assert 0 < window.memory_bytes() < 100 * 1024
+
+
+def test_invalid_windows():
+    """Test that unknown aggregates and bad windows are rejected"""
+    for aggregate, window_s in (('median', 60), ('p', 60), ('p0', 60), ('avg', 0)):
+        with pytest.raises(ValueError):
+            create_window(aggregate, window_s)
+    assert isinstance(create_window('p99.9', 60), QuantileWindow)
+    with pytest.raises(TypeError):
+        Window(60)
+
+
+def test_quantile_keys_stay_sorted():
+    """Test that the quantile window keeps exactly its occupied bucket keys in order"""
+    window = create_window('p95', 50)
+    rng = random.Random(7)
+    for tick in range(500):
+        window.push(float(tick), rng.choice((-1, 1)) * rng.lognormvariate(0, 3))
+        assert window.keys == sorted(window.buckets)
+
+
+@pytest.mark.parametrize('aggregate', ['avg', 'min', 'max', 'rate', 'p95'])
+def test_non_finite_values_are_skipped(aggregate):
+    """Test that NaN and infinite values neither poison nor break a window"""
+    window = create_window(aggregate, 30)
+    clean = create_window(aggregate, 30)
+    for tick in range(20):
+        if tick % 5 == 2:
+            for bad in (math.nan, math.inf, -math.inf):
+                window.push(tick * 10.0 + 1, bad)
+        result = window.push(tick * 10.0, float(tick))
+        assert result == clean.push(tick * 10.0, float(tick))
+    assert window.skipped == 12
+    assert len(window.entries) == len(clean.entries)